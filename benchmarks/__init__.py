@@ -0,0 +1,3 @@
+"""
+	benchmarks of the map tools and the turn pipeline - see benchmarks.suite (python -m benchmarks --help)
+"""
@@ -0,0 +1,266 @@
+"""
+	reproducible scenarios of the benchmarks
+
+	maps:
+		duelMap()                       the map of the tests (tests/files/duel.map)
+		generatedMap(mapSize, seed)     map generated with the seed
+
+	games (only ai players, see game.headless):
+		gameState(stage)                game on a generated duel map after the turns of the stage (early, mid, late)
+		gameState('war')                mid game with two majors at war and a lot of units between their capitals
+
+	playing a game up to the late stage takes a while, so the games are stored as snapshots in the cache directory
+	and restored from there (every call returns a fresh copy). each stage continues the game of the previous one.
+	the snapshots depend on the game rules - clear the cache (--rebuild) when the rules change.
+"""
+import contextlib
+import io
+import os
+import random
+from pathlib import Path
+from typing import Optional
+
+from map.base import HexPoint
+from map.path_finding.finder import MoveTypeIgnoreUnitsOptions, MoveTypeIgnoreUnitsPathfinderDataSource
+from map.types import MapSize, MapType, UnitMovementType
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+CACHE_DIR = BASE_DIR / 'benchmarks' / '.cache'
+
+# seed of the generated maps and games
+defaultSeed = 1
+
+# turns that are played for the game stages
+gameStages = {
+	'early': 5,
+	'mid': 30,
+	'late': 60,
+}
+
+# units per player in the war scenario
+warUnitsPerPlayer = 16
+
+
+def duelMap():
+	"""@return: the duel map of the tests"""
+	from serialisation.fastMap import loadsMap
+
+	with open(BASE_DIR / 'tests' / 'files' / 'duel.map', 'r') as file:
+		return loadsMap(file.read())
+
+
+def generateMap(mapSize: MapSize, seed: int = defaultSeed, mapType: MapType = MapType.continents):
+	"""
+		@param mapSize: size of the map
+		@param seed: seed of the generator
+		@param mapType: type of the map
+		@return: generated map
+	"""
+	from game.civilizations import LeaderType
+	from map.generation import MapOptions, MapGenerator
+
+	random.seed(seed)
+	options = MapOptions(mapSize=mapSize, mapType=mapType, leader=LeaderType.trajan)
+
+	with contextlib.redirect_stdout(io.StringIO()):
+		return MapGenerator(options).generate(lambda state: None)
+
+
+_maps = {}
+
+
+def generatedMap(mapSize: MapSize, seed: int = defaultSeed):
+	"""@return: generated map (shared between the benchmarks - don't modify it)"""
+	key = (mapSize, seed)
+
+	if key not in _maps:
+		_maps[key] = generateMap(mapSize, seed)
+
+	return _maps[key]
+
+
+class PathfindingScenario:
+	"""start and targets of the pathfinding benchmarks on a map (walking units that can't embark)"""
+
+	def __init__(self, mapModel):
+		self.mapModel = mapModel
+		self.dataSource = MoveTypeIgnoreUnitsPathfinderDataSource(
+			mapModel, UnitMovementType.walk, None, MoveTypeIgnoreUnitsOptions(False, False, False)
+		)
+		self.dataSource.options.ignore_sight = True
+
+		# the largest area of walkable tiles
+		self.reachable = max(self._areas(), key=len)
+		self.start = min(self.reachable, key=lambda point: (point.y, point.x))
+
+		# closest tile that is at least 4 tiles away
+		near = [point for point in self.reachable if point.distance(self.start) >= 4]
+		self.shortTarget = min(near, key=lambda point: (point.distance(self.start), point.y, point.x))
+		self.longTarget = max(self.reachable, key=lambda point: (point.distance(self.start), -point.y, -point.x))
+
+		# first tile that can't be reached - the search has to visit the whole area
+		self.unreachableTarget = next(
+			HexPoint(x, y) for y in range(mapModel.height) for x in range(mapModel.width)
+			if HexPoint(x, y) not in self.reachable
+		)
+
+	def _areas(self) -> [set]:
+		areas = []
+		visited = set()
+
+		for y in range(self.mapModel.height):
+			for x in range(self.mapModel.width):
+				point = HexPoint(x, y)
+				tile = self.mapModel.tileAt(point)
+
+				if point in visited or not tile.isLand() or tile.isImpassable(UnitMovementType.walk):
+					continue
+
+				area = {point}
+				stack = [point]
+
+				while stack:
+					current = stack.pop()
+
+					for neighbor in self.dataSource.walkableAdjacentTilesCoords(current):
+						if neighbor not in area:
+							area.add(neighbor)
+							stack.append(neighbor)
+
+				visited |= area
+				areas.append(area)
+
+		return areas
+
+
+def _snapshotPath(name: str, seed: int) -> Path:
+	return CACHE_DIR / f'{name}_{seed}.snapshot'
+
+
+def _playGame(turns: int, seed: int, simulation=None):
+	from game.headless import HeadlessGame
+
+	random.seed(seed)
+
+	if simulation is None:
+		game = HeadlessGame.generate(MapSize.duel, MapType.continents)
+	else:
+		game = HeadlessGame(simulation)
+
+	game.play(turns)
+
+	return game.simulation
+
+
+def _declareWar(simulation, seed: int):
+	"""moves the units of two majors between their capitals and lets them declare war"""
+	from game.headless import HeadlessGame
+	from game.unitTypes import UnitType
+	from game.units import Unit
+
+	random.seed(seed)
+	players = [player for player in HeadlessGame(simulation).majorPlayers() if player.isAlive()][:2]
+	capitals = [simulation.capitalOf(player) for player in players]
+
+	if len(players) < 2 or None in capitals:
+		raise Exception('the war scenario needs two majors with a capital')
+
+	# land tiles around the middle of the capitals
+	center = HexPoint((capitals[0].location.x + capitals[1].location.x) // 2,
+					  (capitals[0].location.y + capitals[1].location.y) // 2)
+	candidates = []
+
+	for point in center.areaWithRadius(8):
+		tile = simulation.tileAt(point)
+
+		if tile is None or not tile.isLand() or tile.isImpassable(UnitMovementType.walk) or tile.isCity():
+			continue
+
+		if len(simulation.unitsAt(point)) > 0:
+			continue
+
+		candidates.append(point)
+
+	# the units of each player on the side of its capital
+	for index, player in enumerate(players):
+		ownCapital = capitals[index].location
+		candidates.sort(key=lambda point: (point.distance(ownCapital), point.y, point.x))
+		unitTypes = [UnitType.warrior, UnitType.slinger, UnitType.archer, UnitType.spearman]
+
+		for unitIndex in range(min(warUnitsPerPlayer, len(candidates))):
+			point = candidates.pop(0)
+			unit = Unit(point, unitTypes[unitIndex % len(unitTypes)], player)
+			simulation.addUnit(unit)
+			simulation.sightAt(point, unit.sight(), unit, player)
+
+	if not players[0].hasMetWith(players[1]):
+		players[0].doFirstContactWith(players[1], simulation)
+
+	players[0].doDeclareWarTo(players[1], simulation)
+
+
+def _buildGame(stage: str, seed: int):
+	if stage == 'early':
+		return _playGame(gameStages['early'], seed)
+
+	if stage == 'mid':
+		return _playGame(gameStages['mid'], seed, gameState('early', seed))
+
+	if stage == 'late':
+		return _playGame(gameStages['late'], seed, gameState('mid', seed))
+
+	if stage == 'war':
+		simulation = gameState('mid', seed)
+
+		with contextlib.redirect_stdout(io.StringIO()):
+			_declareWar(simulation, seed)
+
+		return simulation
+
+	raise ValueError(f'unknown stage: {stage}')
+
+
+def clearCache():
+	"""removes the snapshots of the games, so they are played again"""
+	if CACHE_DIR.exists():
+		for path in CACHE_DIR.glob('*.snapshot'):
+			path.unlink()
+
+
+def gameSnapshot(stage: str, seed: int = defaultSeed) -> bytes:
+	"""
+		@param stage: early, mid, late or war
+		@param seed: seed of the map and the game
+		@return: snapshot of the game (played and added to the cache if it isn't there yet)
+	"""
+	from serialisation.snapshot import SnapshotWriter
+
+	path = _snapshotPath(stage, seed)
+
+	if path.exists():
+		return path.read_bytes()
+
+	data = SnapshotWriter().snapshot(_buildGame(stage, seed))
+
+	os.makedirs(CACHE_DIR, exist_ok=True)
+	tmpPath = path.with_suffix('.tmp')
+	tmpPath.write_bytes(data)
+	os.replace(tmpPath, path)
+
+	return data
+
+
+def gameState(stage: str, seed: int = defaultSeed, snapshot: Optional[bytes] = None):
+	"""
+		@param stage: early, mid, late or war
+		@param seed: seed of the map and the game
+		@param snapshot: snapshot of the game (default: from the cache)
+		@return: fresh copy of the game (with a user interface)
+	"""
+	from game.states.ui import Interface
+	from serialisation.snapshot import readSnapshots
+
+	simulation = readSnapshots([snapshot if snapshot is not None else gameSnapshot(stage, seed)])
+	simulation.userInterface = Interface()
+
+	return simulation
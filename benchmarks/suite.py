@@ -0,0 +1,493 @@
+"""
+	benchmark suite with json baselines
+
+	usage:
+		python -m benchmarks list
+		python -m benchmarks run --quick --output results.json
+		python -m benchmarks run --filter 'pathfinding.*' 'aiTurn.*' --repeat 10 --save-baseline main
+		python -m benchmarks compare main results.json --threshold 0.15
+
+	every benchmark has an untimed setup (that restores its scenario, see benchmarks.scenarios) and a timed run, both
+	are called for every repeat. the results contain the min, median and max wall time of the runs.
+
+	baselines are result files in benchmarks/baselines (compare accepts the name of a baseline or the path of a result
+	file). compare reports every benchmark whose time (min of the runs by default) is more than the threshold above
+	the baseline and exits with 1 if there is one - the baselines only make sense on the machine they were recorded on.
+"""
+import argparse
+import contextlib
+import datetime
+import fnmatch
+import gc
+import io
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+from pathlib import Path
+from typing import Optional
+
+from benchmarks import scenarios
+from map.types import MapSize
+from utils.translation import jsonDefault
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+BASELINE_DIR = BASE_DIR / 'benchmarks' / 'baselines'
+
+RESULTS_VERSION = 1
+
+
+class Benchmark:
+	def __init__(self, name: str, run, setup=None, quick: bool = True, repeat: Optional[int] = None):
+		"""
+			@param name: name like 'pathfinding.long.duel'
+			@param run: function that is timed, gets the result of setup (if there is a setup)
+			@param setup: optional function that prepares the run (not timed)
+			@param quick: part of the quick suite
+			@param repeat: number of runs (default: the repeat of the suite)
+		"""
+		self.name = name
+		self.run = run
+		self.setup = setup
+		self.quick = quick
+		self.repeat = repeat
+
+	def measure(self, repeat: int) -> dict:
+		"""
+			@param repeat: number of runs (if the benchmark doesn't define its own)
+			@return: dict with the min, median and max wall time of the runs in seconds
+		"""
+		times = []
+
+		for _ in range(self.repeat or repeat):
+			argument = self.setup() if self.setup is not None else None
+			gc.collect()
+
+			with contextlib.redirect_stdout(io.StringIO()):
+				startTime = time.perf_counter()
+
+				if self.setup is not None:
+					self.run(argument)
+				else:
+					self.run()
+
+				times.append(time.perf_counter() - startTime)
+
+		return {
+			'min': round(min(times), 6),
+			'median': round(statistics.median(times), 6),
+			'max': round(max(times), 6),
+			'runs': len(times)
+		}
+
+
+def _mapBenchmarks(label: str, mapFunc, quick: bool) -> [Benchmark]:
+	from map.map import MapModel
+	from serialisation.binaryMap import readBinaryMap, writeBinaryMap
+	from serialisation.fastMap import dumpsMap, loadsMap
+	from serialisation.map import MapModelSchema
+
+	def _binary(mapModel) -> bytes:
+		buffer = io.BytesIO()
+		writeBinaryMap(mapModel, buffer)
+		return buffer.getvalue()
+
+	def _pathfinding(target: str):
+		def _setup():
+			scenario = _pathfindingScenario(label, mapFunc)
+			return scenario, getattr(scenario, f'{target}Target')
+
+		def _run(argument):
+			from map.path_finding.finder import AStarPathfinder
+
+			scenario, targetPoint = argument
+			AStarPathfinder(scenario.dataSource).shortestPath(scenario.start, targetPoint)
+
+		return Benchmark(f'pathfinding.{target}.{label}', _run, _setup, quick)
+
+	return [
+		Benchmark(f'mapSave.json.{label}', dumpsMap, mapFunc, quick),
+		Benchmark(f'mapLoad.json.{label}', loadsMap, lambda: dumpsMap(mapFunc()), quick),
+		# reference of the json fast path
+		Benchmark(f'mapSave.schema.{label}', lambda mapModel: MapModelSchema().dumps(mapModel), mapFunc, quick),
+		Benchmark(f'mapLoad.schema.{label}', lambda data: MapModel(MapModelSchema().loads(data)),
+				  lambda: dumpsMap(mapFunc()), quick),
+		Benchmark(f'mapSave.binary.{label}', _binary, mapFunc, quick),
+		Benchmark(f'mapLoad.binary.{label}', readBinaryMap, lambda: _binary(mapFunc()), quick),
+		_pathfinding('short'),
+		_pathfinding('long'),
+		_pathfinding('unreachable'),
+	]
+
+
+_pathfindingScenarios = {}
+
+
+def _pathfindingScenario(label: str, mapFunc) -> scenarios.PathfindingScenario:
+	if label not in _pathfindingScenarios:
+		_pathfindingScenarios[label] = scenarios.PathfindingScenario(mapFunc())
+
+	return _pathfindingScenarios[label]
+
+
+def _catalogAccessors() -> list:
+	from game.buildings import BuildingType
+	from game.promotions import UnitPromotionType
+	from game.types import TechType
+
+	# members, accessor of the catalog and the same value from a freshly built record
+	return [
+		(list(TechType), lambda tech: tech.cost(), lambda tech: TechType._data.__wrapped__(tech).cost),
+		(list(BuildingType), lambda building: building.productionCost(),
+			lambda building: BuildingType._data.__wrapped__(building).productionCost),
+		(list(UnitPromotionType), lambda promotion: promotion.tier(),
+			lambda promotion: UnitPromotionType._data.__wrapped__(promotion).tier)
+	]
+
+
+def _enumNames() -> list:
+	from map.types import TerrainType, FeatureType, ResourceType, ClimateZone
+	from serialisation.fastMap import encodeMap
+
+	columns = [
+		(TerrainType, 'terrain'), (FeatureType, 'feature'), (ResourceType, 'resource'), (ClimateZone, 'climateZone')
+	]
+	tileDicts = [tileDict for row in encodeMap(scenarios.duelMap())['tiles'] for tileDict in row]
+
+	return [(enumType, tileDict[key]) for tileDict in tileDicts for enumType, key in columns]
+
+
+def _scanEnumNames(names: list):
+	# reference: scan the members like the former if/elif chains
+	for enumType, name in names:
+		next(member for member in enumType if name == str(member) or name == member.value)
+
+
+def _lookupEnumNames(names: list):
+	for enumType, name in names:
+		enumType.fromName(name)
+
+
+def _plainCalls(function):
+	for index in range(100000):
+		function(index)
+
+
+def _plain(value):
+	return value + 1
+
+
+def _basicBenchmarks() -> [Benchmark]:
+	from utils.profiling import profileSpan
+
+	return [
+		Benchmark('catalog.accessors', lambda accessors: [
+			accessor(member) for members, accessor, _ in accessors for member in members
+		], _catalogAccessors),
+		Benchmark('catalog.accessors.uncached', lambda accessors: [
+			build(member) for members, _, build in accessors for member in members
+		], _catalogAccessors),
+		Benchmark('enumFromName.lookup', _lookupEnumNames, _enumNames),
+		Benchmark('enumFromName.scan', _scanEnumNames, _enumNames),
+		Benchmark('profiling.plainCalls', _plainCalls, lambda: _plain),
+		Benchmark('profiling.disabledSpan', _plainCalls, lambda: profileSpan('plain')(_plain)),
+	]
+
+
+def _majorPlayers(simulation) -> list:
+	return [player for player in simulation.players if (player.isMajorAI() or player.isHuman()) and player.isAlive()]
+
+
+def _updateSight(simulation):
+	for player in simulation.players:
+		for unit in simulation.unitsOf(player):
+			simulation.sightAt(unit.location, unit.sight(), unit, player)
+
+
+def _refreshTacticalMap(simulation):
+	for player in _majorPlayers(simulation):
+		simulation.tacticalAnalysisMap().refreshFor(player, simulation)
+
+
+def _updateDangerPlots(simulation):
+	for player in _majorPlayers(simulation):
+		player.dangerPlotsAI.updateDanger(False, False, simulation)
+
+
+def _cityYields(simulation):
+	for player in simulation.players:
+		for city in simulation.citiesOf(player):
+			city.foodPerTurn(simulation)
+			city.productionPerTurn(simulation)
+			city.goldPerTurn(simulation)
+			city.culturePerTurn(simulation)
+			city.sciencePerTurn(simulation)
+
+
+def _aiTurn(simulation):
+	from game.headless import HeadlessGame
+
+	HeadlessGame(simulation).playTurn()
+
+
+def _gameBenchmarks(stage: str, quick: bool) -> [Benchmark]:
+	def _setup():
+		return scenarios.gameState(stage)
+
+	return [
+		Benchmark(f'sight.{stage}', _updateSight, _setup, quick),
+		Benchmark(f'tacticalMap.{stage}', _refreshTacticalMap, _setup, quick),
+		Benchmark(f'dangerPlots.{stage}', _updateDangerPlots, _setup, quick),
+		Benchmark(f'cityYields.{stage}', _cityYields, _setup, quick),
+		Benchmark(f'aiTurn.{stage}', _aiTurn, _setup, quick),
+	]
+
+
+def allBenchmarks() -> [Benchmark]:
+	benchmarks = _basicBenchmarks()
+
+	for mapSize in MapSize:
+		quick = mapSize == MapSize.duel
+		benchmarks.append(Benchmark(
+			f'mapGeneration.{mapSize.value}',
+			lambda mapSize=mapSize: scenarios.generateMap(mapSize),
+			quick=quick,
+			repeat=None if quick else 1
+		))
+
+	benchmarks += _mapBenchmarks('duelMap', scenarios.duelMap, quick=True)
+
+	for mapSize in MapSize:
+		benchmarks += _mapBenchmarks(mapSize.value, lambda mapSize=mapSize: scenarios.generatedMap(mapSize),
+									 quick=mapSize == MapSize.duel)
+
+	for stage in list(scenarios.gameStages.keys()) + ['war']:
+		benchmarks += _gameBenchmarks(stage, quick=stage in ['early', 'war'])
+
+	return benchmarks
+
+
+def selectBenchmarks(patterns: Optional[list] = None, quick: bool = False) -> [Benchmark]:
+	"""
+		@param patterns: shell style patterns of the names like 'pathfinding.*' (default: all)
+		@param quick: only the benchmarks of the quick suite
+		@return: matching benchmarks
+	"""
+	selected = []
+
+	for benchmark in allBenchmarks():
+		if quick and not benchmark.quick:
+			continue
+
+		if patterns and not any(fnmatch.fnmatchcase(benchmark.name, pattern) for pattern in patterns):
+			continue
+
+		selected.append(benchmark)
+
+	return selected
+
+
+def runBenchmarks(benchmarks: [Benchmark], repeat: int = 5, callback=None) -> dict:
+	"""
+		@param benchmarks: benchmarks to run
+		@param repeat: number of runs of each benchmark (if it doesn't define its own)
+		@param callback: optional function that is called with the name and the result of every benchmark
+		@return: results (json compatible)
+	"""
+	results = {}
+
+	for benchmark in benchmarks:
+		result = benchmark.measure(repeat)
+		results[benchmark.name] = result
+
+		if callback is not None:
+			callback(benchmark.name, result)
+
+	return {
+		'version': RESULTS_VERSION,
+		'created': datetime.datetime.now().isoformat(timespec='seconds'),
+		'python': platform.python_version(),
+		'platform': platform.platform(),
+		'machine': platform.machine(),
+		'repeat': repeat,
+		'benchmarks': results
+	}
+
+
+class Comparison:
+	def __init__(self, name: str, baseline: Optional[float], current: Optional[float]):
+		"""
+			@param name: name of the benchmark
+			@param baseline: time of the baseline (None if the benchmark is new)
+			@param current: current time (None if the benchmark wasn't run)
+		"""
+		self.name = name
+		self.baseline = baseline
+		self.current = current
+
+	def change(self) -> Optional[float]:
+		"""@return: relative change of the time (0.1 is 10% slower), None if one of the times is missing"""
+		if self.baseline is None or self.current is None or self.baseline <= 0.0:
+			return None
+
+		return self.current / self.baseline - 1.0
+
+	def status(self, threshold: float) -> str:
+		"""@return: 'regression', 'improvement', 'unchanged', 'new' or 'missing'"""
+		if self.baseline is None:
+			return 'new'
+
+		if self.current is None:
+			return 'missing'
+
+		change = self.change()
+
+		if change is None:
+			return 'unchanged'
+
+		if change > threshold:
+			return 'regression'
+
+		if change < -threshold:
+			return 'improvement'
+
+		return 'unchanged'
+
+	def __repr__(self):
+		return f'Comparison({self.name}, {self.baseline} -> {self.current})'
+
+
+def compareResults(baseline: dict, results: dict, metric: str = 'min') -> [Comparison]:
+	"""
+		@param baseline: results of the baseline
+		@param results: current results
+		@param metric: min, median or max
+		@return: comparison for every benchmark of the baseline or the results
+	"""
+	baselineTimes = {name: result[metric] for name, result in baseline['benchmarks'].items()}
+	currentTimes = {name: result[metric] for name, result in results['benchmarks'].items()}
+
+	return [
+		Comparison(name, baselineTimes.get(name), currentTimes.get(name))
+		for name in list(dict.fromkeys(list(baselineTimes.keys()) + list(currentTimes.keys())))
+	]
+
+
+def regressions(comparisons: [Comparison], threshold: float) -> [Comparison]:
+	return [comparison for comparison in comparisons if comparison.status(threshold) == 'regression']
+
+
+def baselinePath(name: str) -> Path:
+	return BASELINE_DIR / f'{name}.json'
+
+
+def loadResults(nameOrPath: str) -> dict:
+	"""
+		@param nameOrPath: name of a baseline in benchmarks/baselines or path of a result file
+		@return: results
+	"""
+	path = Path(nameOrPath)
+
+	if not path.exists():
+		path = baselinePath(nameOrPath)
+
+	with open(path, 'r') as file:
+		results = json.load(file)
+
+	if results.get('version') != RESULTS_VERSION:
+		raise ValueError(f'{path} has version {results.get("version")}, expected {RESULTS_VERSION}')
+
+	return results
+
+
+def saveResults(results: dict, path):
+	os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+
+	with open(path, 'w') as file:
+		json.dump(results, file, indent=2, default=jsonDefault)
+
+
+def _formatTime(value: Optional[float]) -> str:
+	if value is None:
+		return '-'
+
+	return f'{value * 1000:.2f}ms'
+
+
+def comparisonTable(comparisons: [Comparison], threshold: float) -> str:
+	lines = []
+	width = max([len(comparison.name) for comparison in comparisons] + [9])
+
+	lines.append(f'{"benchmark":<{width}}  {"baseline":>12}  {"current":>12}  {"change":>8}  status')
+
+	for comparison in comparisons:
+		change = comparison.change()
+		changeText = '-' if change is None else f'{change * 100:+.1f}%'
+		lines.append(f'{comparison.name:<{width}}  {_formatTime(comparison.baseline):>12}  '
+					 f'{_formatTime(comparison.current):>12}  {changeText:>8}  {comparison.status(threshold)}')
+
+	return '\n'.join(lines)
+
+
+def main(argv: Optional[list] = None) -> int:
+	parser = argparse.ArgumentParser(prog='python -m benchmarks', description='Run the benchmarks and compare them.')
+	subparsers = parser.add_subparsers(dest='command', required=True)
+
+	listParser = subparsers.add_parser('list', help='list the benchmarks')
+	listParser.add_argument('--quick', action='store_true', help='only the benchmarks of the quick suite')
+
+	runParser = subparsers.add_parser('run', help='run the benchmarks')
+	runParser.add_argument('--filter', nargs='+', default=None, help='patterns of the benchmark names')
+	runParser.add_argument('--quick', action='store_true', help='only the benchmarks of the quick suite')
+	runParser.add_argument('--repeat', type=int, default=5, help='number of runs of each benchmark')
+	runParser.add_argument('--output', default=None, help='path of the result file')
+	runParser.add_argument('--save-baseline', default=None, help='store the results as baseline with the name')
+	runParser.add_argument('--rebuild', action='store_true', help='play the games of the scenarios again')
+
+	compareParser = subparsers.add_parser('compare', help='compare results with a baseline')
+	compareParser.add_argument('baseline', help='name of a baseline or path of a result file')
+	compareParser.add_argument('results', help='name of a baseline or path of a result file')
+	compareParser.add_argument('--threshold', type=float, default=0.1, help='relative change that is a regression')
+	compareParser.add_argument('--metric', default='min', choices=['min', 'median', 'max'])
+
+	args = parser.parse_args(argv)
+
+	if args.command == 'list':
+		for benchmark in selectBenchmarks(quick=args.quick):
+			print(benchmark.name)
+
+		return 0
+
+	if args.command == 'run':
+		if args.rebuild:
+			scenarios.clearCache()
+
+		benchmarks = selectBenchmarks(args.filter, args.quick)
+
+		def _progress(name, result):
+			print(f'{name}: {_formatTime(result["min"])} (median {_formatTime(result["median"])})', flush=True)
+
+		results = runBenchmarks(benchmarks, args.repeat, _progress)
+
+		if args.output is not None:
+			saveResults(results, args.output)
+
+		if args.save_baseline is not None:
+			saveResults(results, baselinePath(args.save_baseline))
+
+		return 0
+
+	comparisons = compareResults(loadResults(args.baseline), loadResults(args.results), args.metric)
+	print(comparisonTable(comparisons, args.threshold))
+
+	regressed = regressions(comparisons, args.threshold)
+	if regressed:
+		print(f'{len(regressed)} regression(s) above {args.threshold * 100:.0f}%')
+
+	return 1 if regressed else 0
+
+
+if __name__ == '__main__':
+	sys.exit(main())
@@ -1,4 +1,80 @@
+import importlib.util
+import sys
 from enum import Enum
+from functools import lru_cache, wraps
+
+
+@lru_cache(maxsize=None)
+def enumLookup(enumType) -> dict:
+	"""
+		builds the lookup table of an enum once
+
+		@param enumType: enum class
+		@return: dict that maps the names ('TerrainType.grass' and 'grass') and string values of the members to the members
+	"""
+	lookup = {}
+
+	for memberName, member in enumType._member_map_.items():
+		if isinstance(member.value, str):
+			lookup[member.value] = member
+			lookup[f'{enumType.__name__}.{member.value}'] = member
+
+	# names win over values of other members
+	for memberName, member in enumType._member_map_.items():
+		lookup[memberName] = member
+		lookup[f'{enumType.__name__}.{memberName}'] = member
+
+	return lookup
+
+
+def catalog(func):
+	"""
+		decorator for the _data() method of an enum
+
+		the data of a member is built on the first access and the same record is returned afterwards, so the records
+		(and the lists in them) must not be modified by the callers
+
+		@param func: _data() method that builds the data of a member
+		@return: method that returns the shared record
+	"""
+	records = {}
+
+	@wraps(func)
+	def _data(self):
+		record = records.get(self)
+
+		if record is None:
+			record = func(self)
+			records[self] = record
+
+		return record
+
+	return _data
+
+
+def lazyImport(name: str):
+	"""
+		returns a module that is only executed on the first attribute access
+
+		the catalogs need numpy for the flavor vectors of the ai, but a tool that only loads or generates maps doesn't,
+		so the import is deferred until a vector is built (annotations that use the module need to be strings)
+
+		@param name: name of the module (like 'numpy')
+		@return: the module (already executed if it was imported before)
+	"""
+	module = sys.modules.get(name)
+
+	if module is not None:
+		return module
+
+	spec = importlib.util.find_spec(name)
+	loader = importlib.util.LazyLoader(spec.loader)
+	spec.loader = loader
+	module = importlib.util.module_from_spec(spec)
+	sys.modules[name] = module
+	loader.exec_module(module)
+
+	return module
 
 
 class ExtendedEnum(Enum):
@@ -7,6 +83,21 @@ class ExtendedEnum(Enum):
 	def values(cls):
 		return list(map(lambda c: c.value, cls))
 
+	@classmethod
+	def fromName(cls, name: str):
+		"""
+			looks up a member by its name or value with or without the enum prefix ('TerrainType.grass' or 'grass')
+
+			@param name: name of the member
+			@return: member of the enum
+		"""
+		member = enumLookup(cls).get(name)
+
+		if member is None:
+			raise Exception(f'No matching case for {cls.__name__}: "{name}"')
+
+		return member
+
 
 class InvalidEnumError(Exception):
 	def __init__(self, type_value):
@@ -0,0 +1,131 @@
+"""
+	zobrist-style hashing of the game state
+
+	every part of the state (like the terrain of a tile or a unit on a tile) gets a pseudo random 64 bit key that is
+	derived from its position and its value. the hash of the state is the sum of all keys (modulo 2^64), so a change
+	only replaces the key of the old value with the key of the new value:
+
+		stateHash = ZobristHash()
+		stateHash.replace(zobristKey(index, 'terrain', TerrainType.grass), zobristKey(index, 'terrain', TerrainType.plains))
+
+	the keys are computed on demand (not stored in tables) and don't depend on the python hash seed, so equal states
+	have equal hashes in every process. the sum (instead of the classic xor) keeps equal items (like two units of the
+	same type on a tile) from cancelling each other out.
+
+	the hashes of the turns are collected in a hash log (see GameModel.hashLog) - firstDivergentTurn() compares the
+	logs of two runs (serial vs parallel, cached vs uncached) turn by turn.
+"""
+import hashlib
+from enum import Enum
+from typing import Optional
+
+_mask = (1 << 64) - 1
+
+_valueCodes = {}
+
+
+def mix64(value: int) -> int:
+	"""
+		@param value: integer
+		@return: well mixed 64 bit integer (splitmix64 finalizer)
+	"""
+	value = (value + 0x9E3779B97F4A7C15) & _mask
+	value = ((value ^ (value >> 30)) * 0xBF58476D1CE4E5B9) & _mask
+	value = ((value ^ (value >> 27)) * 0x94D049BB133111EB) & _mask
+	return value ^ (value >> 31)
+
+
+def _digest(text: str) -> int:
+	return int.from_bytes(hashlib.blake2b(text.encode('utf-8'), digest_size=8).digest(), 'little')
+
+
+def valueCode(value) -> int:
+	"""
+		@param value: None, bool, int, float, str, enum member or player
+		@return: stable 64 bit code of the value (players are coded by their city state or leader)
+	"""
+	if value is None:
+		return 0
+
+	if isinstance(value, bool):
+		return 2 if value else 1
+
+	if isinstance(value, Enum):
+		code = _valueCodes.get(value)
+
+		if code is None:
+			code = _digest(f'{type(value).__name__}.{value._name_}')
+			_valueCodes[value] = code
+
+		return code
+
+	if isinstance(value, int):
+		return mix64(value & _mask)
+
+	if isinstance(value, float):
+		return _digest(repr(value))
+
+	if isinstance(value, str):
+		return _digest(value)
+
+	leader = getattr(value, 'leader', None)
+	if leader is not None:
+		cityState = getattr(value, 'cityState', None)
+		return valueCode(cityState if cityState is not None else leader)
+
+	raise TypeError(f'no hash code for {value!r}')
+
+
+def zobristKey(index: int, component: int, value) -> int:
+	"""
+		@param index: position of the item (like the index of the tile)
+		@param component: number of the component (like terrain or feature)
+		@param value: value of the component
+		@return: key of the value of the component at the position
+	"""
+	return mix64(((index << 8) | component) ^ valueCode(value))
+
+
+def hashValues(values) -> int:
+	"""
+		@param values: iterable of values (see valueCode) - the order matters
+		@return: 64 bit hash of the values
+	"""
+	result = 0
+
+	for value in values:
+		result = mix64(result ^ valueCode(value))
+
+	return result
+
+
+class ZobristHash:
+	"""incrementally updated sum of keys"""
+
+	def __init__(self, value: int = 0):
+		self.value = value
+
+	def add(self, key: int):
+		self.value = (self.value + key) & _mask
+
+	def remove(self, key: int):
+		self.value = (self.value - key) & _mask
+
+	def replace(self, oldKey: int, newKey: int):
+		self.value = (self.value - oldKey + newKey) & _mask
+
+	def __repr__(self):
+		return f'ZobristHash({self.value:016x})'
+
+
+def firstDivergentTurn(hashLog: dict, otherHashLog: dict) -> Optional[int]:
+	"""
+		@param hashLog: dict of turn and state hash of a run
+		@param otherHashLog: dict of turn and state hash of another run
+		@return: first turn that both runs played with different hashes (or None if the runs match)
+	"""
+	for turn in sorted(set(hashLog.keys()) & set(otherHashLog.keys())):
+		if hashLog[turn] != otherHashLog[turn]:
+			return turn
+
+	return None
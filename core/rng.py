@@ -0,0 +1,97 @@
+"""
+	deterministic random numbers
+
+	a GameRandom has one seed and hands out named streams, every stream is a random.Random with its own seed that is
+	derived from the seed of the GameRandom and the name of the stream:
+
+		rng = GameRandom(seed=42)
+		rng.stream('combat').uniform(0.8, 1.2)
+		rng.stream('tech', player).randrange(100)   # one stream per player
+
+	the numbers of a stream don't depend on how many numbers the other streams have drawn, so the subsystems (and the
+	players) can be evaluated in any order or in parallel without changing the results. the state of all streams can be
+	taken with snapshot() and set again with restore() - it is also saved with the game.
+"""
+import hashlib
+import random
+from typing import Optional
+
+
+def streamKey(name: str, player=None) -> str:
+	"""
+		@param name: name of the subsystem like 'tech'
+		@param player: optional player (or leader) the stream belongs to
+		@return: key of the stream like 'tech/alexander' (city states are keyed by their city state type)
+	"""
+	if player is None:
+		return name
+
+	cityState = getattr(player, 'cityState', None)
+	if cityState is not None:
+		return f'{name}/{cityState.value}'
+
+	leader = getattr(player, 'leader', player)
+	return f'{name}/{leader.value}'
+
+
+class GameRandom:
+	def __init__(self, seed: Optional[int] = None):
+		"""
+			@param seed: seed of all streams (default: drawn from the random module, so random.seed() still makes a
+				game reproducible)
+		"""
+		self.seed = seed if seed is not None else random.getrandbits(64)
+		self._streams = {}
+
+	def _streamSeed(self, key: str) -> int:
+		digest = hashlib.blake2b(f'{self.seed}/{key}'.encode('utf-8'), digest_size=8).digest()
+		return int.from_bytes(digest, 'little')
+
+	def stream(self, name: str, player=None) -> random.Random:
+		"""
+			@param name: name of the subsystem like 'tech' or 'combat'
+			@param player: optional player (or leader) for a stream per player
+			@return: stream of the subsystem (created on first use)
+		"""
+		key = streamKey(name, player)
+		stream = self._streams.get(key)
+
+		if stream is None:
+			stream = random.Random(self._streamSeed(key))
+			self._streams[key] = stream
+
+		return stream
+
+	def streamNames(self) -> [str]:
+		return sorted(self._streams.keys())
+
+	def snapshot(self) -> dict:
+		"""@return: seed and state of every stream that was used (plain tuples, can be pickled or copied)"""
+		return {
+			'seed': self.seed,
+			'streams': {key: stream.getstate() for key, stream in self._streams.items()}
+		}
+
+	def restore(self, snapshot: dict):
+		"""
+			sets the seed and the streams to a snapshot - streams that were created after the snapshot start again
+
+			@param snapshot: result of snapshot()
+		"""
+		self.seed = snapshot['seed']
+		self._streams = {}
+
+		for key, state in snapshot['streams'].items():
+			stream = random.Random()
+			stream.setstate(state)
+			self._streams[key] = stream
+
+	def __getstate__(self):
+		# random.Random can't be restored by the snapshot unpickler, so only the states are saved
+		return self.snapshot()
+
+	def __setstate__(self, state):
+		self.restore(state)
+
+	def __repr__(self):
+		return f'GameRandom(seed={self.seed}, streams={len(self._streams)})'
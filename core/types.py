@@ -1,4 +1,4 @@
-from core.base import ExtendedEnum
+from core.base import ExtendedEnum, catalog
 from utils.translation import gettext_lazy as _
 
 
@@ -46,6 +46,7 @@ class EraType(ExtendedEnum):
 	def warWearinessValue(self, formal: bool):
 		return self._data().formalWarWeariness if formal else self._data().surpriseWarWeariness
 
+	@catalog
 	def _data(self) -> EraTypeData:
 		if self == EraType.ancient:
 			return EraTypeData(
@@ -1,6 +1,6 @@
 from typing import Optional
 
-from core.base import ExtendedEnum
+from core.base import ExtendedEnum, catalog
 from game.flavors import Flavor, FlavorType
 from game.types import TechType
 
@@ -63,6 +63,7 @@ class MilitaryStrategyType(ExtendedEnum):
 	def flavorModifiers(self) -> [Flavor]:
 		return self._data().flavors
 
+	@catalog
 	def _data(self) -> MilitaryStrategyTypeData:
 		if self == MilitaryStrategyType.needRanged:
 			#
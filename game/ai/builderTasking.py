@@ -8,6 +8,7 @@ from map.base import HexPoint
 from map.improvements import ImprovementType
 from map.path_finding.finder import AStarPathfinder
 from map.types import ResourceType, UnitMovementType, UnitDomainType, RouteType, ResourceUsage, YieldType, FeatureType
+from utils.profiling import profileSpan
 
 
 class BuilderDirectiveType(ExtendedEnum):
@@ -65,6 +66,7 @@ class BuilderTaskingAI:
 
 		return
 
+	@profileSpan('BuilderTaskingAI.evaluateBuilder')
 	def evaluateBuilder(self, unit, onlyKeepBest: bool = False, onlyEvaluateWorkersPlot: bool = False, simulation=None):
 		"""Use the flavor settings to determine what the worker should do"""
 		if simulation is None:
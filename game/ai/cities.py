@@ -1,10 +1,11 @@
-import random
 from typing import Union, Optional
 
+import numpy as np
+
 from game.ai.baseTypes import MilitaryStrategyType, PlayerStateAllWars
 from game.buildings import BuildingType
 from game.districts import DistrictType
-from game.flavors import Flavors, FlavorType, Flavor
+from game.flavors import Flavors, FlavorType, Flavor, flavorMatrix, flavorVectorOf
 from game.projects import ProjectType
 from game.types import TechType, CityFocusType
 from game.unitTypes import UnitTaskType, UnitType
@@ -12,7 +13,7 @@ from game.wonders import WonderType
 from map.base import HexPoint
 from map.improvements import ImprovementType
 from map.types import YieldType, FeatureType, YieldList
-from core.base import ExtendedEnum, InvalidEnumError, WeightedBaseList
+from core.base import ExtendedEnum, InvalidEnumError, WeightedBaseList, catalog
 
 
 class CitySpecializationTypeData:
@@ -43,6 +44,7 @@ class CitySpecializationType(ExtendedEnum):
 	def name(self) -> str:
 		return self._data().name
 
+	@catalog
 	def _data(self) -> CitySpecializationTypeData:
 		if self == CitySpecializationType.none:
 			return CitySpecializationTypeData(
@@ -305,16 +307,16 @@ class CityStrategyType(ExtendedEnum):
 		return self._data().weightThreshold
 
 	def weightThresholdModifierFor(self, player) -> int:
-		value = 0
-
-		for flavor in list(FlavorType):
-			value += player.valueOfPersonalityFlavor(flavor) * self.flavorThresholdModifierFor(flavor)
-
-		return value
+		return int(player.leader.flavorVector() @ self.flavorThresholdModifierVector())
 
 	def flavorThresholdModifiers(self) -> [Flavor]:
 		return self._data().flavorThresholdModifiers
 
+	@catalog
+	def flavorThresholdModifierVector(self) -> np.ndarray:
+		"""@return: flavor threshold modifiers as a vector (see game.flavors.flavorTypes)"""
+		return flavorVectorOf(self.flavorThresholdModifiers())
+
 	def flavorThresholdModifierFor(self, flavorType: FlavorType) -> int:
 		modifier = next(filter(lambda modifierItem: modifierItem.flavorType == flavorType, self.flavorThresholdModifiers()), None)
 		if modifier is not None:
@@ -377,6 +379,7 @@ class CityStrategyType(ExtendedEnum):
 	
 		raise InvalidEnumError(self)
 
+	@catalog
 	def _data(self) -> CityStrategyTypeData:
 		if self == CityStrategyType.none:
 			return CityStrategyTypeData(
@@ -1160,19 +1163,16 @@ class BuildingProductionAI:
 		raise InvalidEnumError(itemType)
 
 	def initWeights(self):
-		for flavorType in list(FlavorType):
-			if flavorType == FlavorType.none:
-				continue
-
-			leaderFlavor = self.player.personalAndGrandStrategyFlavor(flavorType)
+		# the catalogs have no value for FlavorType.none, so it doesn't count
+		leaderFlavors = self.player.personalAndGrandStrategyFlavors()
 
-			for buildingType in list(BuildingType):
-				buildingFlavor = buildingType.flavor(flavorType)
-				self.buildingWeights.addWeight(buildingFlavor * leaderFlavor, buildingType)
+		buildingWeights = flavorMatrix(BuildingType) @ leaderFlavors
+		for buildingType, weight in zip(list(BuildingType), buildingWeights):
+			self.buildingWeights.addWeight(float(weight), buildingType)
 
-			for districtType in list(DistrictType):
-				districtFlavor = districtType.flavor(flavorType)
-				self.districtWeights.addWeight(districtFlavor * leaderFlavor, districtType)
+		districtWeights = flavorMatrix(DistrictType) @ leaderFlavors
+		for districtType, weight in zip(list(DistrictType), districtWeights):
+			self.districtWeights.addWeight(float(weight), districtType)
 
 		return
 
@@ -1215,15 +1215,11 @@ class UnitProductionAI:
 		return self.unitWeights.weight(unitType)
 
 	def initWeights(self):
-		for flavorType in list(FlavorType):
-			if flavorType == FlavorType.none:
-				continue
-
-			leaderFlavor = self.city.player.personalAndGrandStrategyFlavor(flavorType)
+		# the catalog has no value for FlavorType.none, so it doesn't count
+		unitWeights = flavorMatrix(UnitType) @ self.city.player.personalAndGrandStrategyFlavors()
 
-			for unitType in list(UnitType):
-				unitFlavor = unitType.flavor(flavorType)
-				self.unitWeights.addWeight(unitFlavor * leaderFlavor, unitType)
+		for unitType, weight in zip(list(UnitType), unitWeights):
+			self.unitWeights.addWeight(float(weight), unitType)
 
 		return
 
@@ -1573,7 +1569,7 @@ class CityStrategyAI:
 				pass
 
 		# select one
-		selectedIndex = random.randrange(100)
+		selectedIndex = simulation.rng.stream('production', self.city.player).randrange(100)
 
 		weightedBuildable = buildables.top3()
 		weightedBuildableArray = weightedBuildable.distributeByWeight()
@@ -52,16 +52,8 @@ class EconomicStrategy(abc.ABC):
 
     # Figure out what the WeightThreshold Mod should be by looking at the Flavors for this player & the Strategy
     def weightThresholdModifier(self, player):
-        modifier = 0
-
         # Look at all Flavors for the Player & this Strategy
-        for flavorType in list(FlavorType):
-            personalityFlavor = player.valueOfPersonalityIndividualFlavor(flavorType)
-            strategyFlavorMod = self.flavorThresholdModifiers.value(flavorType)
-
-            modifier += (personalityFlavor * strategyFlavorMod)
-
-        return modifier
+        return int(player.personalityFlavors.vector() @ self.flavorThresholdModifiers.vector())
 
     def shouldBeActive(self, player, simulation) -> bool:
         raise NotImplementedError
@@ -88,6 +88,9 @@ class EconomicAI:
 		self.explorationPlotsArray: [ExplorationPlot] = []
 		self.explorers = []
 
+	def adopted(self, economicStrategyType: EconomicStrategyType) -> bool:
+		return self.economicStrategyAdoptions.adopted(economicStrategyType)
+
 	def doTurn(self, simulation):
 		for economicStrategyType in list(EconomicStrategyType):
 			# check tech
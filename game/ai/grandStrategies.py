@@ -1,9 +1,10 @@
-import random
+
+import numpy as np
 
 from game.civilizations import TraitType
-from game.flavors import FlavorType, Flavor
+from game.flavors import FlavorType, Flavor, flavorVectorOf
 from game.states.victories import VictoryType
-from core.base import InvalidEnumError, ExtendedEnum
+from core.base import InvalidEnumError, ExtendedEnum, catalog
 
 
 class GrandStrategyAIType(ExtendedEnum):
@@ -16,6 +17,18 @@ class GrandStrategyAIType(ExtendedEnum):
 	def flavor(self, flavorType: FlavorType) -> int:
 		return self._flavorBase() + self.flavorModifier(flavorType)
 
+	@catalog
+	def flavorVector(self) -> np.ndarray:
+		"""@return: flavor() of all flavor types as a vector (see game.flavors.flavorTypes)"""
+		vector = self._flavorBase() + self.flavorModifierVector()
+		vector.flags.writeable = False
+		return vector
+
+	@catalog
+	def flavorModifierVector(self) -> np.ndarray:
+		"""@return: flavor modifiers as a vector (see game.flavors.flavorTypes)"""
+		return flavorVectorOf(self._flavorModifiers())
+
 	def _flavorBase(self) -> int:
 		if self == GrandStrategyAIType.none:
 			return 0
@@ -126,7 +139,7 @@ class GrandStrategyAI:
 				grandStrategyAIDict.add(self.councilGameValue(simulation), grandStrategyAIType)
 
 			# random
-			grandStrategyAIDict.add(random.randrange(50), grandStrategyAIType)
+			grandStrategyAIDict.add(simulation.rng.stream('grandStrategy', self.player).randrange(50), grandStrategyAIType)
 
 			# make the current strategy most likely
 			if grandStrategyAIType == self.activeStrategy:
@@ -150,10 +163,7 @@ class GrandStrategyAI:
 				print(f'Player {self.player.leader} has adopted {self.activeStrategy} in turn {simulation.currentTurn}')
 
 	def priority(self, grandStrategyAIType: GrandStrategyAIType):
-		value = 0
-
-		for flavorType in list(FlavorType):
-			value += grandStrategyAIType.flavor(flavorType) * self.player.leader.flavor(flavorType)
+		value = grandStrategyAIType.flavorVector() @ self.player.leader.flavorVector()
 
 		return 0
 
@@ -1,5 +1,4 @@
 import copy
-import random
 import sys
 from typing import Optional
 
@@ -16,7 +15,8 @@ from map.base import HexPoint
 from map.improvements import ImprovementType
 from map.path_finding.finder import AStarPathfinder
 from map.types import UnitDomainType, UnitMovementType, Yields
-from core.base import ExtendedEnum, InvalidEnumError, contains
+from core.base import ExtendedEnum, InvalidEnumError, contains, catalog
+from utils.profiling import profileSpan
 
 
 class HomelandMoveTypeData:
@@ -67,6 +67,7 @@ class HomelandMoveType(ExtendedEnum):
 	def priority(self) -> int:
 		return self._data().priority
 
+	@catalog
 	def _data(self) -> HomelandMoveTypeData:
 		if self == HomelandMoveType.none:
 			return HomelandMoveTypeData(name="none", priority=0)
@@ -216,6 +217,7 @@ class HomelandAI:
 		self.targetedHomelandRoads: [HomelandTarget] = []
 		self.targetedAncientRuins: [HomelandTarget] = []
 
+	@profileSpan('HomelandAI.doTurn')
 	def doTurn(self, simulation):
 		"""Update the AI for units"""
 		# no homeland for barbarians
@@ -396,7 +398,7 @@ class HomelandAI:
 						# FIXME
 						pass
 
-				elif tile.owner().leader == self.player.leader and tile.hasAnyRoute():
+				elif tile.owner() is not None and tile.owner().leader == self.player.leader and tile.hasAnyRoute():
 					# ...road segment in friendly territory?
 					newTarget = HomelandTarget(HomelandTargetType.homeRoad)
 					newTarget.target = point
@@ -1045,7 +1047,7 @@ class HomelandAI:
 						if path is None:
 							continue
 
-						distance = path.cost() + random.uniform(0.0, 5.0)
+						distance = path.cost() + simulation.rng.stream('homeland', self.player).uniform(0.0, 5.0)
 						if distance == 0:
 							plotScore = 1000 * rating
 						else:
@@ -1146,7 +1148,7 @@ class HomelandAI:
 					unit.finishMoves()
 			else:
 				# try to relocate trader to random city
-				randomCity = random.choice(simulation.citiesOf(self.player))
+				randomCity = simulation.rng.stream('homeland', self.player).choice(simulation.citiesOf(self.player))
 				if randomCity is not None:
 					unit.doRebaseTo(randomCity.location)
 
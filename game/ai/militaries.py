@@ -240,7 +240,7 @@ class MilitaryAI:
 
             threat = self.player.diplomacyAI.militaryThreatOf(otherPlayer)
 
-            if highestThreatByPlayer.value < threat.value:
+            if highestThreatByPlayer.value() < threat.value():
                 highestThreatByPlayer = threat
 
         return highestThreatByPlayer
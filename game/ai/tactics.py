@@ -1,8 +1,7 @@
-import random
 import sys
 from typing import Optional
 
-from core.base import ExtendedEnum
+from core.base import ExtendedEnum, catalog
 from game.ai.baseTypes import PlayerStateAllWars
 from game.civilizations import LeaderType
 from game.unitMissions import UnitMission
@@ -11,6 +10,7 @@ from map.base import Array2D, Size, HexArea, HexPoint, HexDirection
 from map.improvements import ImprovementType
 from map.path_finding.finder import AStarPathfinder
 from map.types import UnitDomainType, ResourceUsage, ResourceType, TerrainType, UnitMovementType
+from utils.profiling import profileSpan, countSpan
 
 
 class TacticalMoveTypeData:
@@ -166,6 +166,7 @@ class TacticalMoveType(ExtendedEnum):
 	def canRecruitForOperations(self) -> bool:
 		return self._data().operationsCanRecruit
 
+	@catalog
 	def _data(self) -> TacticalMoveTypeData:
 		if self == TacticalMoveType.none:
 			return TacticalMoveTypeData(
@@ -714,6 +715,7 @@ class TacticalAnalysisMap:
 	# reserve capacity
 	# self.dominanceZones.reserveCapacity(mapSize.width() * mapSize.height())
 
+	@profileSpan('TacticalAnalysisMap.refreshFor')
 	def refreshFor(self, player, simulation):
 		"""Fill the map with data for this AI player's turn"""
 		# skip for barbarian player
@@ -728,11 +730,21 @@ class TacticalAnalysisMap:
 			self.dominanceZones = []
 			self.addTemporaryZones(simulation)
 
+			# the planner fills the cells in its workers (see game.planning)
+			cells = None
+			if simulation.planner is not None:
+				cells = simulation.planner.planCells(player, simulation)
+
 			for x in range(self.plots.width):
 				for y in range(self.plots.height):
 					tile = simulation.tileAt(HexPoint(x, y))
 
-					if self.populateCellAt(x, y, tile, simulation):
+					if cells is not None:
+						populated = self.installCellAt(x, y, cells[y][x], simulation)
+					else:
+						populated = self.populateCellAt(x, y, tile, simulation)
+
+					if populated:
 						zone = self.dominanceZone(self.plots.values[y][x], tile, simulation)
 						if zone is not None:
 							# Set zone for this cell
@@ -743,6 +755,8 @@ class TacticalAnalysisMap:
 						# Erase this cell
 						self.plots.values[y][x].reset()
 
+			countSpan('tilesScanned', self.plots.width * self.plots.height)
+
 			self.calculateMilitaryStrengths(simulation)
 			self.prioritizeZones(simulation)
 			self.buildEnemyUnitList(simulation)
@@ -866,6 +880,25 @@ class TacticalAnalysisMap:
 
 		return True
 
+	def installCellAt(self, x: int, y: int, plannedCell: tuple, simulation) -> bool:
+		"""Update data for a cell from the planner (see populateCellAt): returns whether to add to dominance zones"""
+		populated, state = plannedCell
+		cell = self.plots.values[y][x]
+		cell.__dict__.update(state)
+
+		# the planner only marks the units
+		unitAttributes = [attribute for attribute in [
+			'enemyMilitaryUnit', 'enemyCivilianUnit', 'neutralMilitaryUnit', 'neutralCivilianUnit',
+			'friendlyMilitaryUnit', 'friendlyCivilianUnit'
+		] if state[attribute]]
+
+		if len(unitAttributes) > 0:
+			unit = simulation.unitAt(HexPoint(x, y), UnitMapType.combat)
+			for attribute in unitAttributes:
+				setattr(cell, attribute, unit)
+
+		return populated
+
 	def calculateMilitaryStrengths(self, simulation):
 		"""Calculate military presences in each owned dominance zone"""
 		player = self.playerBuild
@@ -1262,6 +1295,7 @@ class TacticalAI:
 		self.movePriorityTurn: int = 0
 		self.currentSeriesId: int = -1
 
+	@profileSpan('TacticalAI.doTurn')
 	def doTurn(self, simulation):
 		"""Update the AI for units"""
 		# DropOldFocusAreas();
@@ -1330,14 +1364,14 @@ class TacticalAI:
 					tile = simulation.tileAt(unit.location)
 
 					if tile is not None:
-						if tile.isVisibleTo(self.player) and unitToTest.location.distanceTo(unit.location) < distance:
+						if tile.isVisibleTo(self.player) and unitToTest.location.distance(unit.location) < distance:
 							return True
 
 				# Loop through their cities
 				for city in simulation.citiesOf(otherPlayer):
 					# Make sure this tile is visible to us
 					tile = simulation.tileAt(city.location)
-					if tile.isVisibleTo(self.player) and unitToTest.location.distanceTo(city.location) < distance:
+					if tile.isVisibleTo(self.player) and unitToTest.location.distance(city.location) < distance:
 						return True
 
 		return False
@@ -1626,11 +1660,11 @@ class TacticalAI:
 
 		# Barbarian processing is straightforward - - just one big list of priorities and everything is considered at once
 		if self.player.leader == LeaderType.barbar:
-			self.establishBarbarianPriorities(simulation.currentTurn)
+			self.establishBarbarianPriorities(simulation.currentTurn, simulation)
 			self.extractTargets()
 			self.assignBarbarianMoves(simulation)
 		else:
-			self.establishTacticalPriorities()
+			self.establishTacticalPriorities(simulation)
 			self.updatePostures(simulation)
 
 			# Proceed in priority order
@@ -1700,7 +1734,7 @@ class TacticalAI:
 
 		return
 
-	def establishBarbarianPriorities(self, turn: int):
+	def establishBarbarianPriorities(self, turn: int, simulation):
 		"""Choose which tactics the barbarians should emphasize this turn"""
 		# Only establish priorities once per turn
 		if turn <= self.movePriorityTurn:
@@ -1708,6 +1742,7 @@ class TacticalAI:
 
 		self.movePriorityList = []
 		self.movePriorityTurn = turn
+		rng = simulation.rng.stream('tactics', self.player)
 
 		# Loop through each possible tactical move(other than "none" or "unassigned")
 		for barbarianTacticalMove in TacticalMoveType.allBarbarianMoves():
@@ -1716,7 +1751,7 @@ class TacticalAI:
 			# Make sure base priority is not negative
 			if priority >= 0:
 				# Finally, add a random die roll to each priority
-				priority += random.randint(-2, 2)  # AI_TACTICAL_MOVE_PRIORITY_RANDOMNESS
+				priority += rng.randint(-2, 2)  # AI_TACTICAL_MOVE_PRIORITY_RANDOMNESS
 
 				# Store off this move and priority
 				move = TacticalMove()
@@ -1747,7 +1782,7 @@ class TacticalAI:
 					# Not obviously in this zone, but if within 2 of city we want them anyway
 					city = dominanceZone.closestCity
 					if city is not None:
-						if target.target.distanceTo(city.location) <= 2:
+						if target.target.distance(city.location) <= 2:
 							self.zoneTargets.append(target)
 
 		print(f"targets extracted: {len(self.zoneTargets)}")
@@ -2188,9 +2223,10 @@ class TacticalAI:
 
 		return
 
-	def establishTacticalPriorities(self):
+	def establishTacticalPriorities(self, simulation):
 		"""Choose which tactics to emphasize this turn"""
 		self.movePriorityList = []
+		rng = simulation.rng.stream('tactics', self.player)
 
 		for tacticalMove in TacticalMoveType.allPlayerMoves():
 			priority = tacticalMove.priority()
@@ -2199,7 +2235,7 @@ class TacticalAI:
 			if priority >= 0:
 
 				# Finally, add a random die roll to each priority
-				priority += random.randint(-2, 2)  # AI_TACTICAL_MOVE_PRIORITY_RANDOMNESS
+				priority += rng.randint(-2, 2)  # AI_TACTICAL_MOVE_PRIORITY_RANDOMNESS
 
 				# Store off this move and priority
 				move = TacticalMove()
@@ -2,7 +2,7 @@ from enum import Enum
 
 from game.types import TechType, CivicType
 from game.units import UnitType
-from core.base import InvalidEnumError
+from core.base import InvalidEnumError, catalog
 from utils.translation import gettext_lazy as _
 
 
@@ -60,6 +60,7 @@ class HandicapType(Enum):
 	def barbarbianLandTargetRange(self) -> int:
 		return self._data().barbarbianLandTargetRange
 
+	@catalog
 	def _data(self) -> HandicapTypeData:
 		if self == HandicapType.settler:
 			#
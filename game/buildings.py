@@ -1,13 +1,15 @@
 from typing import Optional
 
 from game.districts import DistrictType
-from game.flavors import Flavor, FlavorType
+from game.flavors import Flavor, FlavorType, flavorVectorOf
 from game.governments import GovernmentType
 from game.greatworks import GreatWorkSlotType
 from game.specialists import SpecialistSlots, SpecialistType
 from game.types import TechType, EraType, CivicType
 from map.types import Yields
-from core.base import ExtendedEnum
+from core.base import ExtendedEnum, catalog, lazyImport
+
+np = lazyImport('numpy')
 
 
 class BuildingCategoryType(ExtendedEnum):
@@ -193,6 +195,12 @@ class BuildingType(ExtendedEnum):
 
 		return 0
 
+	@catalog
+	def flavorVector(self) -> 'np.ndarray':
+		"""@return: flavors as a vector (see game.flavors.flavorTypes)"""
+		return flavorVectorOf(self._flavors())
+
+	@catalog
 	def _data(self) -> BuildingTypeData:
 		# default
 		if self == BuildingType.none:
@@ -1,4 +1,3 @@
-import random
 import sys
 from typing import Optional, Union
 
@@ -37,6 +36,7 @@ from map.improvements import ImprovementType
 from map.types import YieldList, FeatureType, TerrainType, ResourceUsage, ResourceType, YieldType, Yields, RouteType, \
 	UnitDomainType, Tutorials
 from core.base import WeightedBaseList
+from utils.profiling import profileSpan
 
 
 class CityDistrictItem:
@@ -331,7 +331,7 @@ class CityCitizens:
 				self.setForcedAvoidGrowth(False, simulation)
 			else:
 				# Are we running at a deficit?
-				inDeficit = self.city.player.economicAI.adoptedEconomicStrategy(EconomicStrategyType.losingMoney)
+				inDeficit = self.city.player.economicAI.adopted(EconomicStrategyType.losingMoney)
 				if inDeficit:
 					self.setFocusType(CityFocusType.goldGrowth)
 					self.setNoAutoAssignSpecialists(False, simulation)
@@ -1560,7 +1560,7 @@ class City:
 		# Founded cities start with eight additional tiles.
 		if self.player.leader.civilization().ability() == CivilizationAbility.motherRussia:
 			tiles = self.location.areaWithRadius(radius=2).points()
-			random.shuffle(tiles)
+			simulation.rng.stream('cities', self.player).shuffle(tiles)
 			additional = 0
 
 			for pointToClaim in tiles:
@@ -1764,7 +1764,10 @@ class City:
 		else:
 			humanPlayer = simulation.humanPlayer()
 			# inform human about foreign wonder built
-			if self.player.hasMetWith(humanPlayer):
+			if humanPlayer is None:
+				# no human player in this setup - so nothing to report
+				pass
+			elif self.player.hasMetWith(humanPlayer):
 				# human known this player
 				humanPlayer.notifications.addNotification(NotificationType.wonderBuilt, wonder=wonderType, civilization=self.player.leader.civilization())
 			else:
@@ -2371,6 +2374,7 @@ class City:
 	def _goldFromEnvoys(self, simulation):
 		return 0.0
 
+	@profileSpan('City.doTurn')
 	def doTurn(self, simulation):
 		if self.damage() > 0:
 			# CvAssertMsg(m_iDamage <= GC.getMAX_CITY_HIT_POINTS(), "Somehow a city has more damage than hit points. Please show this to a gameplay programmer immediately.");
@@ -4095,7 +4099,7 @@ class City:
 			return None
 
 		# select one
-		selectedIndex = random.randrange(100)
+		selectedIndex = simulation.rng.stream('districts', self.player).randrange(100)
 
 		weightedLocations = weightedLocations.top3()
 		weightedLocationsArray = weightedLocations.distributeByWeight()
@@ -4218,7 +4222,8 @@ class City:
 			return False
 
 		# city states cant build settlers or prophets
-		if self.player.isCityState() and (unitType == UnitType.settler or unitType == UnitType.prophet):
+		# there are no prophets (yet)
+		if self.player.isCityState() and unitType == UnitType.settler:
 			return False
 
 		# filter great people
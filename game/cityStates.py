@@ -1,5 +1,5 @@
 from game.envoys import EnvoyEffectLevel
-from core.base import ExtendedEnum, InvalidEnumError
+from core.base import ExtendedEnum, InvalidEnumError, catalog
 from core.theming import Color
 from utils.translation import gettext_lazy as _
 
@@ -24,6 +24,7 @@ class CityStateCategory(ExtendedEnum):
 	def name(self) -> str:
 		return self._data().name
 
+	@catalog
 	def _data(self):
 		if self == CityStateCategory.cultural:
 			return CityStateCategoryData(
@@ -157,85 +158,6 @@ class CityStateType(ExtendedEnum):
 	# yerevan
 	# zanzibar
 	
-	@staticmethod
-	def fromName(cityStateName: str) -> CityStateType:
-		# akkad
-		if cityStateName == 'CityStateType.amsterdam' or cityStateName == 'amsterdam':
-			return CityStateType.amsterdam
-		# anshan
-		# antananarivo
-		# antioch
-		# armagh
-		if cityStateName == 'CityStateType.auckland' or cityStateName == 'auckland':
-			return CityStateType.auckland
-		# ayutthaya
-		if cityStateName == 'CityStateType.babylon' or cityStateName == 'babylon':
-			return CityStateType.babylon
-		# bandarBrunei
-		if cityStateName == 'CityStateType.bologna' or cityStateName == 'bologna':
-			return CityStateType.bologna
-		# brussels
-		# buenosAires
-		# caguana
-		# cahokia
-		# cardiff
-		if cityStateName == 'CityStateType.carthage' or cityStateName == 'carthage':
-			return CityStateType.carthage
-		# chinguetti
-		# fez
-		if cityStateName == 'CityStateType.geneva' or cityStateName == 'geneva':
-			return CityStateType.geneva
-		# granada
-		# hattusa
-		# hongKong
-		# hunza
-		# jakarta
-		# jerusalem
-		if cityStateName == 'CityStateType.johannesburg' or cityStateName == 'johannesburg':
-			return CityStateType.johannesburg
-		if cityStateName == 'CityStateType.kabul' or cityStateName == 'kabul':
-			return CityStateType.kabul
-		# kandy
-		# kumasi
-		# laVenta
-		# Lahore
-		# Lisbon
-		# Mexico City
-		# Mitla
-		# Mogadishu
-		# Mohenjo-Daro
-		# Muscat
-		# Nalanda
-		# Nan Madol
-		# Nazca
-		# Ngazargamu
-		# Palenque
-		# Preslav
-		# Rapa Nui
-		# samarkand
-		if cityStateName == 'CityStateType.seoul' or cityStateName == 'seoul':
-			return CityStateType.seoul
-		if cityStateName == 'CityStateType.singapore' or cityStateName == 'singapore':
-			return CityStateType.singapore
-		if cityStateName == 'CityStateType.stockholm' or cityStateName == 'stockholm':
-			return CityStateType.stockholm
-		# taruga
-		if cityStateName == 'CityStateType.toronto' or cityStateName == 'toronto':
-			return CityStateType.toronto
-		if cityStateName == 'CityStateType.valletta' or cityStateName == 'valletta':
-			return CityStateType.valletta
-		# vaticanCity
-		if cityStateName == 'CityStateType.venice' or cityStateName == 'venice':
-			return CityStateType.venice
-		if cityStateName == 'CityStateType.vilnius' or cityStateName == 'vilnius':
-			return CityStateType.vilnius
-		if cityStateName == 'CityStateType.wolin' or cityStateName == 'wolin':
-			return CityStateType.wolin
-		# yerevan
-		# zanzibar
-
-		raise Exception(f'No matching case for cityStateName: "{cityStateName}"')
-
 	def name(self) -> str:
 		return self._data().name
 
@@ -254,6 +176,7 @@ class CityStateType(ExtendedEnum):
 
 		raise InvalidEnumError(level)
 
+	@catalog
 	def _data(self) -> CityStateTypeData:
 		# akkad
 		if self == CityStateType.amsterdam:
@@ -1,5 +1,7 @@
-from game.flavors import FlavorType, Flavor
-from core.base import ExtendedEnum, InvalidEnumError, WeightedBaseList
+from game.flavors import FlavorType, Flavor, flavorVectorOf
+from core.base import ExtendedEnum, InvalidEnumError, WeightedBaseList, catalog, lazyImport
+
+np = lazyImport('numpy')
 
 
 class TraitType(ExtendedEnum):
@@ -64,6 +66,7 @@ class CivilizationType(ExtendedEnum):
 
 		return 0  # rest
 
+	@catalog
 	def _data(self) -> CivilizationData:
 		if self == CivilizationType.none:
 			return CivilizationData(
@@ -308,26 +311,6 @@ class LeaderType(ExtendedEnum):
 	victoria = 'victoria'
 	peter = 'peter'
 
-	@staticmethod
-	def fromName(leaderName: str) -> LeaderType:
-		if leaderName == 'LeaderType.none' or leaderName == 'none':
-			return LeaderType.none
-		elif leaderName == 'LeaderType.barbar' or leaderName == 'barbar':
-			return LeaderType.barbar
-		elif leaderName == 'LeaderType.cityState' or leaderName == 'cityState':
-			return LeaderType.cityState
-
-		elif leaderName == 'LeaderType.alexander' or leaderName == 'alexander':
-			return LeaderType.alexander
-		elif leaderName == 'LeaderType.trajan' or leaderName == 'trajan':
-			return LeaderType.trajan
-		elif leaderName == 'LeaderType.victoria' or leaderName == 'victoria':
-			return LeaderType.victoria
-		elif leaderName == 'LeaderType.peter' or leaderName == 'peter':
-			return LeaderType.peter
-
-		raise Exception(f'No matching case for leaderName: "{leaderName}"')
-
 	def name(self) -> str:
 		return self._data().name
 
@@ -359,6 +342,12 @@ class LeaderType(ExtendedEnum):
 	def _traits(self) -> [Trait]:
 		return self._data().traits
 
+	@catalog
+	def flavorVector(self) -> 'np.ndarray':
+		"""@return: flavors as a vector (see game.flavors.flavorTypes)"""
+		return flavorVectorOf(self._flavors())
+
+	@catalog
 	def _data(self) -> LeaderTypeData:
 		if self == LeaderType.alexander:
 			return LeaderTypeData(
@@ -492,4 +481,4 @@ class LeaderWeightList(dict):
 	def __init__(self):
 		super().__init__()
 		for leaderType in list(LeaderType):
-			self[leaderType.name] = 0
+			self[leaderType] = 0
@@ -1,6 +1,5 @@
 import inspect
 import math
-import random
 
 from core.base import ExtendedEnum
 from game.cityStates import CityStateType
@@ -211,8 +210,9 @@ class Combat:
 			defenderStrength = defender.defensiveStrengthAgainst(attacker, defenderTile, ranged=False, simulation=simulation)
 
 		attackerStrengthDifference = attackerStrength - defenderStrength
+		rng = simulation.rng.stream('combat')
 
-		defenderDamage: int = int(30.0 * pow(math.e, 0.04 * float(attackerStrengthDifference) * random.uniform(0.8, 1.2)))
+		defenderDamage: int = int(30.0 * pow(math.e, 0.04 * float(attackerStrengthDifference) * rng.uniform(0.8, 1.2)))
 
 		if defenderDamage < 0:
 			defenderDamage = 0
@@ -230,7 +230,7 @@ class Combat:
 
 			defenderStrengthDifference = attackerStrength2 - defenderStrength2
 
-			attackerDamage: int = int(30.0 * pow(math.e, 0.04 * float(defenderStrengthDifference) * random.uniform(0.8, 1.2)))
+			attackerDamage: int = int(30.0 * pow(math.e, 0.04 * float(defenderStrengthDifference) * rng.uniform(0.8, 1.2)))
 
 			if attackerDamage < 0:
 				attackerDamage = 0
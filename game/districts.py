@@ -1,10 +1,12 @@
 from typing import Optional
 
-from game.flavors import Flavor, FlavorType
+from game.flavors import Flavor, FlavorType, flavorVectorOf
 from game.types import CivicType, TechType
 from map.base import HexPoint
 from map.types import Yields, TerrainType, FeatureType
-from core.base import ExtendedEnum, InvalidEnumError
+from core.base import ExtendedEnum, InvalidEnumError, catalog, lazyImport
+
+np = lazyImport('numpy')
 
 
 class DistrictTypeData:
@@ -77,6 +79,12 @@ class DistrictType(ExtendedEnum):
 	def domesticTradeYields(self)-> Yields:
 		return self._data().domesticTradeYields
 
+	@catalog
+	def flavorVector(self) -> 'np.ndarray':
+		"""@return: flavors as a vector (see game.flavors.flavorTypes)"""
+		return flavorVectorOf(self._flavors())
+
+	@catalog
 	def _data(self) -> DistrictTypeData:
 		if self == DistrictType.none:
 			return DistrictTypeData(
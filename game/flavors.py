@@ -1,6 +1,9 @@
 import random
+from functools import lru_cache
 
-from core.base import ExtendedEnum
+from core.base import ExtendedEnum, lazyImport
+
+np = lazyImport('numpy')
 
 
 class FlavorType(ExtendedEnum):
@@ -51,17 +54,58 @@ class Flavor:
         return f'Flavor({self.flavorType}, {self.value})'
 
 
+# order of the entries of the flavor vectors
+flavorTypes = list(FlavorType)
+flavorIndices = {flavorType: index for index, flavorType in enumerate(flavorTypes)}
+
+
+def flavorVectorOf(flavors: [Flavor]) -> 'np.ndarray':
+    """
+        converts a list of flavors into a dense (read only) vector with one entry per FlavorType
+
+        @param flavors: list of flavors, the first one counts if a flavor type is listed twice (like in flavor())
+        @return: vector in the order of flavorTypes
+    """
+    vector = np.zeros(len(flavorTypes))
+
+    for flavor in reversed(flavors):
+        vector[flavorIndices[flavor.flavorType]] = flavor.value
+
+    vector.flags.writeable = False
+    return vector
+
+
+@lru_cache(maxsize=None)
+def flavorMatrix(enumType) -> 'np.ndarray':
+    """
+        stacks the flavor vectors of all members of a flavored catalog (TechType, BuildingType, UnitType, ...)
+
+        @param enumType: enum whose members have a flavorVector() method
+        @return: read only matrix with one row per member (in the order of the enum) and one column per FlavorType
+    """
+    matrix = np.array([member.flavorVector() for member in enumType])
+    matrix.flags.writeable = False
+    return matrix
+
+
 class Flavors:
     def __init__(self):
         self._items = []
+        self.version = 0
+
+    def vector(self) -> 'np.ndarray':
+        """@return: values of all flavor types in the order of flavorTypes"""
+        return np.array([self.value(flavorType) for flavorType in flavorTypes], dtype=float)
 
     def isEmpty(self):
         return len(self._items) == 0
 
     def reset(self):
         self._items = []
+        self.version += 1
 
     def set(self, flavorType: FlavorType, value: int):
+        self.version += 1
         item = next(filter(lambda flavor: flavor.flavorType == flavorType, self._items), None)
 
         if item is not None:
@@ -85,6 +129,7 @@ class Flavors:
 
             return self
         elif isinstance(other, Flavor):
+            self.version += 1
             item = next((flavor for flavor in self._items if flavor.flavorType == other.flavorType), None)
 
             if item is not None:
@@ -97,6 +142,7 @@ class Flavors:
             raise Exception(f'type is not accepted {type(other)}')
 
     def addFlavor(self, flavorType: FlavorType, value: int):
+        self.version += 1
         item = next((flavor for flavor in self._items if flavor.flavorType == flavorType), None)
 
         if item is not None:
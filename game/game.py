@@ -1,5 +1,7 @@
 from typing import Optional
 
+from core.hashing import hashValues
+from core.rng import GameRandom
 from game.ai.barbarians import BarbarianAI
 from game.ai.religions import Religions
 from game.ai.tactics import TacticalAnalysisMap
@@ -32,10 +34,13 @@ from map.path_finding.finder import AStarPathfinder, MoveTypeIgnoreUnitsOptions,
 	MoveTypeIgnoreUnitsPathfinderDataSource, InfluencePathfinderDataSource
 from map.path_finding.path import HexPath
 from map.types import FeatureType, Tutorials, UnitMovementType
+from serialisation.replayLog import ReplayEventCategory
+from utils.profiling import profileSpan, setProfilingTurn
 
 
 class GameModel:
-	def __init__(self, victoryTypes: [VictoryType], handicap: HandicapType, turnsElapsed: int, players, map: MapModel):
+	def __init__(self, victoryTypes: [VictoryType], handicap: HandicapType, turnsElapsed: int, players, map: MapModel,
+				 seed: Optional[int] = None):
 		self.turnSliceValue = 0
 		self.waitDiploPlayer = None
 		self.players = players
@@ -43,7 +48,14 @@ class GameModel:
 		self.victoryTypes = victoryTypes
 		self.handicap = handicap
 		self._map = map
+		self.rng = GameRandom(seed)
+		# hash of the game state at the end of each turn (see stateHash)
+		self.hashLog = {}
 		self.userInterface = None
+		self.autoSaver = None
+		self.replayLog = None
+		# optional TurnPlanner that fills the tactical analysis map of the players in worker processes
+		self.planner = None
 		self._gameStateValue = GameState.on
 		self._tacticalAnalysisMap = TacticalAnalysisMap(Size(map.width, map.height))
 
@@ -54,6 +66,7 @@ class GameModel:
 		# analyze map
 		analyzer = MapAnalyzer(self._map)
 		analyzer.analyze()
+		self._map.enableHashing()
 
 		# stats
 		self.discoveredContinents = []
@@ -115,6 +128,7 @@ class GameModel:
 		# If there are no active players, move on to the AI
 		if self.numGameTurnActive() == 0:
 			self.doTurn()
+			self.autoSave()
 
 		# Check for paused again, the doTurn call might have called something that paused the game and we don't want an update to sneak through
 		if not self.isPaused():
@@ -129,7 +143,8 @@ class GameModel:
 
 			# self.testAlive()
 
-			if not self.humanPlayer().isAlive():
+			humanPlayer = self.humanPlayer()
+			if humanPlayer is not None and not humanPlayer.isAlive():
 				self.setGameStateTo(GameState.over)
 
 			# next player ???
@@ -137,6 +152,52 @@ class GameModel:
 
 			self.changeTurnSliceBy(1)
 
+	def autoSave(self):
+		if self.autoSaver is not None:
+			self.autoSaver.save(self)
+
+	def logReplayEvent(self, category, eventType, player=None, location: Optional[HexPoint] = None, **data):
+		"""
+			appends an event to the replay log (if there is one)
+
+			@param category: ReplayEventCategory of the event
+			@param eventType: type of the event (enum member or string)
+			@param player: player of the event (or None)
+			@param location: location of the event (or None)
+			@param data: details of the event
+		"""
+		if self.replayLog is None:
+			return
+
+		playerIndex = next((index for index, item in enumerate(self.players) if item is player), -1)
+		self.replayLog.addEvent(self.currentTurn, category, eventType, playerIndex, location, data)
+
+	def save(self, path: str):
+		"""
+			writes a full snapshot of the game (see serialisation.snapshot)
+
+			@param path: path of the file
+		"""
+		from serialisation.snapshot import SnapshotWriter
+
+		with open(path, 'wb') as file:
+			SnapshotWriter().write(self, file)
+
+	@staticmethod
+	def load(path: str):
+		"""
+			reads a game from a snapshot file (see serialisation.snapshot)
+
+			the user interface of the loaded game needs to be set before it can be updated
+
+			@param path: path of the file
+			@return: GameModel
+		"""
+		from serialisation.snapshot import readSnapshots
+
+		with open(path, 'rb') as file:
+			return readSnapshots([file.read()])
+
 	def capitalOf(self, player: Player) -> City:
 		return self._map.capitalOf(player)
 
@@ -158,6 +219,9 @@ class GameModel:
 	def removeUnit(self, unit):
 		self._map.removeUnit(unit)
 
+	def moveUnit(self, unit, location: HexPoint):
+		self._map.moveUnit(unit, location)
+
 	def cityAt(self, location: HexPoint) -> Optional[City]:
 		return self._map.cityAt(location)
 
@@ -246,12 +310,15 @@ class GameModel:
 
 		return numActive
 
+	@profileSpan('GameModel.doTurn')
 	def doTurn(self):
 		print('', flush=True)
 		print(f"::: TURN {self.currentTurn + 1} starts now :::", flush=True)
 		print('', flush=True)
 
-		self.humanPlayer().resetFinishTurnButtonPressed()
+		humanPlayer = self.humanPlayer()
+		if humanPlayer is not None:
+			humanPlayer.resetFinishTurnButtonPressed()
 
 		self.barbarianAI.doTurn(self)
 		self.religions.doTurn(self)
@@ -273,8 +340,14 @@ class GameModel:
 		self.barbarianAI.doCamps(self)
 		self.barbarianAI.doUnits(self)
 
+		if self.replayLog is not None:
+			self.replayLog.finishTurn(self)
+
+		self.hashLog[self.currentTurn] = self.stateHash()
+
 		# incrementGameTurn();
 		self.currentTurn += 1
+		setProfilingTurn(self.currentTurn)
 
 		# Sequential turns.
 		# Activate the << FIRST >> player we find from the start, human or AI, who wants a sequential turn.
@@ -297,12 +370,20 @@ class GameModel:
 
 		# Who's Winning every 25 turns (to be un-hardcoded later)
 		human = self.humanPlayer()
-		if human.isAlive():
+		if human is not None and human.isAlive():
 			if self.currentTurn % 25 == 0:
 				# This popup is the sync rand, so beware
 				# self.userInterface.showScreen(screenType: .interimRanking, city: nil, other: nil, data: nil)
 				pass
 
+	def stateHash(self) -> int:
+		"""
+			hash of the map state and the summaries of the players - equal games have equal hashes in every process
+
+			@return: 64 bit hash of the game state
+		"""
+		return hashValues([self._map.stateHash()] + [player.stateHash() for player in self.players])
+
 	def humanPlayer(self) -> Player:
 		return next((player for player in self.players if player.isHuman()), None)
 
@@ -315,6 +396,7 @@ class GameModel:
 	def doTestVictory(self):
 		pass
 
+	@profileSpan('GameModel.updateMoves')
 	def updateMoves(self):
 		playersToProcess = []
 		processPlayerAutoMoves = False
@@ -648,6 +730,9 @@ class GameModel:
 		if player is None:
 			raise Exception('player must not be none')
 
+		self.logReplayEvent(ReplayEventCategory.gossip, gossipType, player, cityName=cityName, tech=tech,
+			leader=leader, building=building, district=district, pantheonName=pantheonName)
+
 		humanPlayer = self.humanPlayer()
 
 		if humanPlayer is None:
@@ -864,5 +949,4 @@ class GameModel:
 		return None
 
 	def addReplayEvent(self, eventType: ReplyEventType, message: str, location: HexPoint):
-		# fixme
-		pass
+		self.logReplayEvent(ReplayEventCategory.replay, eventType, location=location, message=message)
@@ -1,3 +1,5 @@
+from typing import Optional
+
 from game.baseTypes import HandicapType
 from game.civilizations import LeaderType
 from game.game import GameModel
@@ -18,7 +20,7 @@ class GameGenerator:
 	def freeCityStateStartingUnitTypes(self) -> [UnitType]:
 		return [UnitType.settler, UnitType.warrior, UnitType.builder]
 
-	def generate(self, map: MapModel, handicap: HandicapType) -> GameModel:
+	def generate(self, map: MapModel, handicap: HandicapType, seed: Optional[int] = None) -> GameModel:
 		players: [Player] = []
 		units: [Unit] = []
 
@@ -62,7 +64,7 @@ class GameGenerator:
 		# handle city states
 		for startLocation in map.cityStateStartLocations:
 
-			cityStatePlayer = Player(leader=startLocation.leader, human=False)
+			cityStatePlayer = Player(leader=startLocation.leader, cityState=startLocation.cityState, human=False)
 			cityStatePlayer.initialize()
 			players.insert(1, cityStatePlayer)
 
@@ -73,7 +75,8 @@ class GameGenerator:
 			handicap=handicap,
 			turnsElapsed=0,
 			players=players,
-			map=map
+			map=map,
+			seed=seed
 		)
 
 		# add UI
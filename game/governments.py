@@ -3,7 +3,7 @@ from typing import Optional
 from game.flavors import Flavor, FlavorType
 from game.policyCards import PolicyCardType
 from game.types import CivicType, EraType
-from core.base import ExtendedEnum
+from core.base import ExtendedEnum, catalog
 
 
 class PolicyCardSlots:
@@ -59,6 +59,7 @@ class GovernmentType(ExtendedEnum):
 	def requiredCivic(self) -> Optional[CivicType]:
 		return self._data().requiredCivic
 
+	@catalog
 	def _data(self) -> GovernmentTypeData:
 		# ancient
 		if self == GovernmentType.chiefdom:
@@ -0,0 +1,413 @@
+"""
+	headless ai-vs-ai games for balance and regression runs
+
+	usage:
+		python -m game.headless --seeds 0-19 --size duel --turns 100 --workers 8 --output runs/
+
+	every game is generated and played in a worker process without a user interface, all players (including the
+	one that would be human) are controlled by the ai. a game ends at the turn limit or when only one major player
+	is alive. the wall time of every turn is recorded, broken down by phase:
+
+		doTurn        GameModel.doTurn (end of the turn, contains prepareTurn)
+		prepareTurn   Player.prepareTurn of all players
+		updateMoves   GameModel.updateMoves (contains the unit ai)
+		unitAI        Player.unitUpdate and Player.doTurnUnits (tactical, homeland and operational ai)
+		cityAI        City.doTurn
+		diplomacy     DiplomaticAI.doTurn
+
+	the phases overlap, so their sum is not the turn time. every turn row also has the state hash of the game at the
+	end of the turn (see GameModel.hashLog), so runs of the same seed can be compared turn by turn. the turns of all
+	games are appended to turns.csv, the summary of each game (and its turns) is written to
+	game_<seed>_<size>_<type>.json. with --profile the span tree of every turn (see utils.profiling) is written to
+	profile_<seed>_<size>_<type>.json and as collapsed stacks (for flamegraph.pl) to profile_<seed>_<size>_<type>.folded.
+	with --plan-workers the tactical analysis of the players is planned in worker processes (see game.planning).
+"""
+import argparse
+import contextlib
+import csv
+import io
+import json
+import os
+import random
+import sys
+import time
+from functools import wraps
+from multiprocessing import Pool
+from typing import Optional
+
+from core.rng import GameRandom
+from game.baseTypes import HandicapType, GameState
+from game.civilizations import LeaderType
+from game.cities import City
+from game.game import GameModel
+from game.generation import GameGenerator
+from game.planning import TurnPlanner
+from game.playerMechanics import DiplomaticAI
+from game.players import Player
+from game.states.ui import Interface
+from map.batch import _parseSeeds
+from map.generation import MapOptions, MapGenerator
+from map.types import MapSize, MapType
+from utils.profiling import profiling
+from utils.translation import jsonDefault
+
+
+class PhaseTimer:
+	"""
+		measures the wall time of the phases of a turn
+
+		instrument() wraps the methods of the phases on their classes (for all instances, including cities that are
+		founded during the game) and restores them afterwards
+	"""
+	phases = [
+		('doTurn', GameModel, 'doTurn'),
+		('prepareTurn', Player, 'prepareTurn'),
+		('updateMoves', GameModel, 'updateMoves'),
+		('unitAI', Player, 'unitUpdate'),
+		('unitAI', Player, 'doTurnUnits'),
+		('cityAI', City, 'doTurn'),
+		('diplomacy', DiplomaticAI, 'doTurn'),
+	]
+
+	def __init__(self):
+		self.times = {}
+
+	@staticmethod
+	def phaseNames() -> [str]:
+		return list(dict.fromkeys(phaseName for phaseName, _, _ in PhaseTimer.phases))
+
+	def reset(self):
+		self.times = {phaseName: 0.0 for phaseName in PhaseTimer.phaseNames()}
+
+	def _wrap(self, phaseName: str, func):
+		times = self
+
+		@wraps(func)
+		def _timed(*args, **kwargs):
+			startTime = time.perf_counter()
+
+			try:
+				return func(*args, **kwargs)
+			finally:
+				times.times[phaseName] += time.perf_counter() - startTime
+
+		return _timed
+
+	@contextlib.contextmanager
+	def instrument(self):
+		self.reset()
+		originals = []
+
+		for phaseName, owner, methodName in PhaseTimer.phases:
+			func = owner.__dict__[methodName]
+			originals.append((owner, methodName, func))
+			setattr(owner, methodName, self._wrap(phaseName, func))
+
+		try:
+			yield self
+		finally:
+			for owner, methodName, func in reversed(originals):
+				setattr(owner, methodName, func)
+
+
+class HeadlessGameJob:
+	def __init__(self, seed: int, mapSize: MapSize, mapType: MapType, turns: int, outputDir: str,
+				 handicap: HandicapType = HandicapType.chieftain, players: Optional[int] = None, profile: bool = False,
+				 planWorkers: Optional[int] = None):
+		"""
+			@param seed: seed of the map and the game
+			@param mapSize: size of the map
+			@param mapType: type of the map
+			@param turns: turn limit
+			@param outputDir: directory for the summary of the game
+			@param handicap: handicap of the game
+			@param players: number of major players (default: the number of the map size)
+			@param profile: record the profiling spans of the game
+			@param planWorkers: plan the tactical analysis of the players in this number of processes (see game.planning)
+		"""
+		self.seed = seed
+		self.mapSize = mapSize
+		self.mapType = mapType
+		self.turns = turns
+		self.outputDir = outputDir
+		self.handicap = handicap
+		self.players = players
+		self.profile = profile
+		self.planWorkers = planWorkers
+
+	def fileName(self, prefix: str = 'game', extension: str = 'json') -> str:
+		return f'{prefix}_{self.seed}_{self.mapSize.value}_{self.mapType.value}.{extension}'
+
+
+class HeadlessGame:
+	"""ai only game without user interface"""
+	# update() calls within one turn before the game is considered stuck
+	maxUpdatesPerTurn = 1000
+
+	def __init__(self, simulation: GameModel):
+		self.simulation = simulation
+		self.timer = PhaseTimer()
+
+	@classmethod
+	def generate(cls, mapSize: MapSize, mapType: MapType, handicap: HandicapType = HandicapType.chieftain,
+				 players: Optional[int] = None, seed: Optional[int] = None) -> 'HeadlessGame':
+		"""
+			generates a map and a game with only ai players (the map generator uses the current state of random)
+
+			@param mapSize: size of the map
+			@param mapType: type of the map
+			@param handicap: handicap of the game
+			@param players: number of major players (default: the number of the map size)
+			@param seed: seed of the GameRandom of the game (default: drawn from the random module)
+			@return: the game
+		"""
+		gameRandom = GameRandom(seed)
+		numberOfPlayers = mapSize.numberOfPlayers() if players is None else players
+		excludedLeaders = [LeaderType.barbar, LeaderType.none, LeaderType.cityState]
+		leaders = gameRandom.stream('setup').sample(
+			[leader for leader in list(LeaderType) if leader not in excludedLeaders], k=numberOfPlayers
+		)
+
+		options = MapOptions(mapSize=mapSize, mapType=mapType, leader=leaders[0], aiLeaders=leaders[1:])
+
+		with contextlib.redirect_stdout(io.StringIO()):
+			mapModel = MapGenerator(options).generate(lambda state: None)
+
+			for startLocation in mapModel.startLocations:
+				startLocation.isHuman = False
+
+			simulation = GameGenerator().generate(mapModel, handicap, seed=gameRandom.seed)
+
+		simulation.userInterface = Interface()
+
+		return cls(simulation)
+
+	def majorPlayers(self) -> [Player]:
+		return [player for player in self.simulation.players if player.isMajorAI() or player.isHuman()]
+
+	def winner(self) -> Optional[Player]:
+		"""@return: the last major player that is alive (or None if there are more)"""
+		alive = [player for player in self.majorPlayers() if player.isAlive()]
+		return alive[0] if len(alive) == 1 else None
+
+	def isOver(self) -> bool:
+		return self.simulation.gameState() == GameState.over or self.winner() is not None
+
+	def playTurn(self) -> dict:
+		"""
+			calls update() until the next turn starts
+
+			@return: row with the wall time of the turn and its phases
+		"""
+		simulation = self.simulation
+		turn = simulation.currentTurn
+		updates = 0
+
+		self.timer.reset()
+		startTime = time.perf_counter()
+
+		while simulation.currentTurn == turn and not self.isOver():
+			simulation.update()
+			updates += 1
+
+			if updates > HeadlessGame.maxUpdatesPerTurn:
+				raise Exception(f'game is stuck in turn {turn}')
+
+		row = {'turn': turn, 'updates': updates, 'time_total': round(time.perf_counter() - startTime, 6)}
+		row.update({f'time_{phaseName}': round(value, 6) for phaseName, value in self.timer.times.items()})
+
+		stateHash = simulation.hashLog.get(turn)
+		row['stateHash'] = f'{stateHash:016x}' if stateHash is not None else ''
+
+		return row
+
+	def play(self, turns: int, callback=None) -> [dict]:
+		"""
+			plays until the turn limit or until a player has won
+
+			@param turns: turn limit
+			@param callback: optional function that is called with every turn row
+			@return: list of turn rows
+		"""
+		rows = []
+
+		with self.timer.instrument(), contextlib.redirect_stdout(io.StringIO()):
+			while self.simulation.currentTurn < turns and not self.isOver():
+				row = self.playTurn()
+				rows.append(row)
+
+				if callback is not None:
+					callback(row)
+
+		return rows
+
+
+def turnColumns() -> [str]:
+	columns = ['seed', 'mapSize', 'mapType', 'turn', 'updates', 'time_total']
+	columns += [f'time_{phaseName}' for phaseName in PhaseTimer.phaseNames()]
+	columns.append('stateHash')
+	return columns
+
+
+def runGameJob(job: HeadlessGameJob) -> dict:
+	"""
+		generates and plays a single game and writes its summary (json) to the output directory
+
+		@param job: seed, map and turn limit of the game
+		@return: summary of the game with the list of turn rows
+	"""
+	random.seed(job.seed)
+
+	startTime = time.perf_counter()
+	game = HeadlessGame.generate(job.mapSize, job.mapType, job.handicap, job.players, seed=job.seed)
+	generationTime = time.perf_counter() - startTime
+
+	if job.planWorkers is not None:
+		game.simulation.planner = TurnPlanner(workers=job.planWorkers)
+
+	try:
+		if job.profile:
+			with profiling() as profiler:
+				rows = game.play(job.turns)
+
+			with open(os.path.join(job.outputDir, job.fileName('profile')), 'w') as file:
+				json.dump(profiler.toJson(), file, indent=2, default=jsonDefault)
+
+			with open(os.path.join(job.outputDir, job.fileName('profile', 'folded')), 'w') as file:
+				file.write(profiler.collapsedStacks())
+		else:
+			rows = game.play(job.turns)
+	finally:
+		if game.simulation.planner is not None:
+			game.simulation.planner.close()
+
+	for row in rows:
+		row.update({'seed': job.seed, 'mapSize': job.mapSize.value, 'mapType': job.mapType.value})
+
+	winner = game.winner()
+	summary = {
+		'seed': job.seed,
+		'mapSize': job.mapSize.value,
+		'mapType': job.mapType.value,
+		'handicap': job.handicap._name_,  # value() and name() are methods of HandicapType
+		'players': [player.leader.value for player in game.majorPlayers()],
+		'turns': game.simulation.currentTurn,
+		'winner': winner.leader.value if winner is not None else None,
+		'time_generation': round(generationTime, 6),
+		'time_total': round(sum(row['time_total'] for row in rows), 6),
+		'turnRows': rows
+	}
+
+	with open(os.path.join(job.outputDir, job.fileName()), 'w') as file:
+		json.dump(summary, file, indent=2, default=jsonDefault)
+
+	return summary
+
+
+class HeadlessRun:
+	"""plays a game for every seed and appends the turn rows to the turn table of the output directory"""
+	turnsFileName = 'turns.csv'
+
+	def __init__(self, outputDir: str, seeds: [int], mapSize: MapSize, mapType: MapType, turns: int,
+				 handicap: HandicapType = HandicapType.chieftain, players: Optional[int] = None, workers: int = 1,
+				 profile: bool = False, planWorkers: Optional[int] = None):
+		self.outputDir = outputDir
+		self.seeds = seeds
+		self.mapSize = mapSize
+		self.mapType = mapType
+		self.turns = turns
+		self.handicap = handicap
+		self.players = players
+		self.workers = workers
+		self.profile = profile
+		self.planWorkers = planWorkers
+
+	def turnsPath(self) -> str:
+		return os.path.join(self.outputDir, HeadlessRun.turnsFileName)
+
+	def jobs(self) -> [HeadlessGameJob]:
+		return [
+			HeadlessGameJob(seed, self.mapSize, self.mapType, self.turns, self.outputDir, self.handicap, self.players,
+							self.profile, self.planWorkers)
+			for seed in self.seeds
+		]
+
+	def run(self, callback=None) -> [dict]:
+		"""
+			plays all games
+
+			@param callback: optional function that is called with the summary of every finished game
+			@return: summaries of the games (in the order they finished)
+		"""
+		os.makedirs(self.outputDir, exist_ok=True)
+		writeHeader = not os.path.exists(self.turnsPath()) or os.path.getsize(self.turnsPath()) == 0
+		summaries = []
+
+		with open(self.turnsPath(), 'a', newline='') as file:
+			writer = csv.DictWriter(file, fieldnames=turnColumns())
+
+			if writeHeader:
+				writer.writeheader()
+
+			if self.workers > 1:
+				with Pool(processes=self.workers) as pool:
+					for summary in pool.imap_unordered(runGameJob, self.jobs(), chunksize=1):
+						self._writeSummary(writer, file, summary, summaries, callback)
+			else:
+				for job in self.jobs():
+					self._writeSummary(writer, file, runGameJob(job), summaries, callback)
+
+		return summaries
+
+	def _writeSummary(self, writer, file, summary: dict, summaries: [dict], callback):
+		writer.writerows(summary['turnRows'])
+		file.flush()
+		summaries.append(summary)
+
+		if callback is not None:
+			callback(summary)
+
+
+def main(argv: Optional[list] = None) -> int:
+	parser = argparse.ArgumentParser(description='Play ai-only games without user interface and time their turns.')
+	parser.add_argument('--seeds', nargs='+', default=['0'], help='seeds or seed ranges like 0-19')
+	parser.add_argument('--size', default=MapSize.duel.value, choices=[size.value for size in MapSize])
+	parser.add_argument('--type', default=MapType.continents.value,
+						choices=[mapType.value for mapType in MapType if mapType != MapType.empty])
+	parser.add_argument('--handicap', default=HandicapType.chieftain._name_,
+						choices=[handicap._name_ for handicap in HandicapType])
+	parser.add_argument('--players', type=int, default=None, help='number of major players')
+	parser.add_argument('--turns', type=int, default=50, help='turn limit')
+	parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help='number of worker processes')
+	parser.add_argument('--output', default='runs', help='directory for the turn table and the game summaries')
+	parser.add_argument('--profile', action='store_true', help='write the profiling spans of every game')
+	parser.add_argument('--plan-workers', type=int, default=None,
+						help='plan the tactical analysis of the players in this number of processes per game (0: plan '
+							 'in the game process) - needs --workers 1, the processes of the pool can\'t start processes')
+	args = parser.parse_args(argv)
+
+	headlessRun = HeadlessRun(
+		outputDir=args.output,
+		seeds=_parseSeeds(args.seeds),
+		mapSize=MapSize(args.size),
+		mapType=MapType(args.type),
+		turns=args.turns,
+		handicap=HandicapType[args.handicap],
+		players=args.players,
+		workers=args.workers,
+		profile=args.profile,
+		planWorkers=args.plan_workers
+	)
+
+	def _progress(summary):
+		print(f'game {summary["seed"]}: {summary["turns"]} turns, winner {summary["winner"]}, '
+			  f'{summary["time_total"]:.1f}s', flush=True)
+
+	summaries = headlessRun.run(_progress)
+	print(f'played {len(summaries)} games, turns in {headlessRun.turnsPath()}')
+
+	return 0
+
+
+if __name__ == '__main__':
+	sys.exit(main())
@@ -5,7 +5,7 @@ from game.states.dedications import DedicationType
 from game.types import EraType
 from game.wonders import WonderType
 from map.types import FeatureType
-from core.base import ExtendedEnum, InvalidEnumError
+from core.base import ExtendedEnum, InvalidEnumError, catalog
 
 
 class MomentCategory(ExtendedEnum):
@@ -209,6 +209,7 @@ class MomentType(ExtendedEnum):
 	def maxEra(self) -> EraType:
 		return self._data().maxEra
 
+	@catalog
 	def _data(self) -> MomentTypeData:
 		# major
 		# admiralDefeatsEnemy  # 1 #
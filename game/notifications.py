@@ -6,7 +6,7 @@ from game.moments import MomentType
 from game.religions import PantheonType
 from game.wonders import WonderType
 from map.base import HexPoint
-from core.base import ExtendedEnum, InvalidEnumError
+from core.base import ExtendedEnum, InvalidEnumError, catalog
 from map.improvements import ImprovementType
 
 
@@ -74,6 +74,7 @@ class NotificationType(ExtendedEnum):
 	def message(self) -> str:
 		return self._data().message
 
+	@catalog
 	def _data(self) -> NotificationTypeData:
 		if self == NotificationType.turn:  # 0
 			return NotificationTypeData(
@@ -0,0 +1,187 @@
+"""
+	parallel analysis of the players
+
+	the tactical analysis map of a player is refreshed when the turn of the player starts (see
+	TacticalAnalysisMap.refreshFor) - most of the refresh fills one cell per tile from the tile, the unit and the city on
+	it and only reads the game. with a planner the cells are filled by worker processes, each worker fills a part of
+	the rows of the map:
+
+		simulation.planner = TurnPlanner(workers=4)
+		...
+		simulation.planner.close()
+
+	the workers read the map from shared memory (see serialisation.sharedWorld): the snapshot is updated right before
+	the cells of a player are planned, so the workers see the same state as the refresh without a planner. the game
+	process installs the cells in the usual order and does the rest of the refresh (like building the dominance
+	zones), so a game with a planner is the same as a game without one - the hash logs of the games (see
+	GameModel.hashLog) must be equal. TurnPlanner(workers=0) fills the cells in the process of the game (from the
+	shared memory snapshot, like a worker).
+
+	the danger plots are computed without the planner: they are cheap and depend on the health, the moves and the
+	visibility of the units, which change until the player uses them.
+"""
+import multiprocessing
+from collections import Counter
+
+from game.ai.tactics import TacticalAnalysisMap, TacticalAnalysisCell
+from serialisation.sharedWorld import SharedWorldSnapshot, SharedWorldView, SharedPlayer
+from utils.profiling import profileSpan
+
+# attributes of a TacticalAnalysisCell that reference the unit on the tile
+_cellUnitAttributes = (
+	'enemyMilitaryUnit', 'enemyCivilianUnit', 'neutralMilitaryUnit', 'neutralCivilianUnit', 'friendlyMilitaryUnit',
+	'friendlyCivilianUnit'
+)
+
+
+class PlannedDiplomacy:
+	"""answers the diplomacy questions of the analysis from the values of the game (by index of the other player)"""
+
+	def __init__(self, atWar: [bool], openBorders: [bool]):
+		self.atWar = atWar
+		self.openBorders = openBorders
+
+	def isAtWarWith(self, otherPlayer) -> bool:
+		return self.atWar[otherPlayer.index]
+
+	def isOpenBorderAgreementActiveWith(self, otherPlayer) -> bool:
+		return self.openBorders[otherPlayer.index]
+
+
+class PlannedPlayer(SharedPlayer):
+	"""player whose analysis is planned in a worker"""
+
+	def __init__(self, player: SharedPlayer, barbarian: bool, atWar: [bool], openBorders: [bool]):
+		super().__init__(player.index, player.leader, player.cityState)
+		self.barbarian = barbarian
+		self.diplomacyAI = PlannedDiplomacy(atWar, openBorders)
+
+	def isBarbarian(self) -> bool:
+		return self.barbarian
+
+
+def planCells(manifest, playerIndex: int, barbarian: bool, atWar: [bool], openBorders: [bool], rows: [int]) -> list:
+	"""
+		fills the cells of the tactical analysis map of a player (runs in the workers)
+
+		@param manifest: manifest of the SharedWorldSnapshot of the game
+		@param playerIndex: index of the player in the game
+		@param barbarian: the player is the barbarian player
+		@param atWar: is the player at war with the player of each index
+		@param openBorders: has the player an open border agreement with the player of each index
+		@param rows: rows of the map to fill
+		@return: list of (y, cells of the row) - each cell is the result of populateCellAt and the attributes it wrote
+			(the units are only marked, the game process resolves them)
+	"""
+	with SharedWorldView(manifest) as world:
+		player = PlannedPlayer(world.players[playerIndex], barbarian, atWar, openBorders)
+		analysisMap = TacticalAnalysisMap(world.mapSize())
+		analysisMap.playerBuild = player
+		result = []
+
+		for y in rows:
+			cells = []
+
+			for x in range(world.width):
+				# a new cell for each tile, so only the attributes of this tile are sent back
+				cell = TacticalAnalysisCell()
+				analysisMap.plots.values[y][x] = cell
+				populated = analysisMap.populateCellAt(x, y, world.tileAt(x, y), world)
+
+				state = dict(cell.__dict__)
+				for attribute in _cellUnitAttributes:
+					state[attribute] = state[attribute] is not None
+
+				cells.append((populated, state))
+
+			result.append((y, cells))
+
+	return result
+
+
+class TurnPlanner:
+	def __init__(self, workers: int = 0):
+		"""
+			@param workers: number of worker processes (0: plan in the process of the game)
+		"""
+		self.workers = workers
+		# number of planned analyses per leader
+		self.plannedPlayers = Counter()
+		self._snapshot = None
+		self._pool = None
+
+	def _workerPool(self):
+		if self._pool is None:
+			# fork keeps the hash seed of the game, so sets are iterated in the same order in the workers
+			methods = multiprocessing.get_all_start_methods()
+			context = multiprocessing.get_context('fork' if 'fork' in methods else None)
+			self._pool = context.Pool(processes=self.workers)
+
+		return self._pool
+
+	def _worldSnapshot(self, simulation) -> SharedWorldSnapshot:
+		mapSize = simulation.mapSize()
+
+		if self._snapshot is not None and \
+			(self._snapshot.manifest.width, self._snapshot.manifest.height) != (mapSize.width(), mapSize.height()):
+			self._snapshot.unlink()
+			self._snapshot = None
+
+		if self._snapshot is None:
+			self._snapshot = SharedWorldSnapshot(simulation)
+		else:
+			self._snapshot.update(simulation)
+
+		return self._snapshot
+
+	def _rowChunks(self, height: int) -> [[int]]:
+		chunks = max(1, min(self.workers, height))
+		return [list(range(chunk, height, chunks)) for chunk in range(chunks)]
+
+	@profileSpan('TurnPlanner.planCells')
+	def planCells(self, player, simulation) -> [[tuple]]:
+		"""
+			fills the cells of the tactical analysis map of the player on the current state of the game
+
+			@param player: player whose tactical analysis map is refreshed
+			@param simulation: game
+			@return: rows of (result of populateCellAt, attributes of the cell) - see TacticalAnalysisMap.installCellAt
+		"""
+		manifest = self._worldSnapshot(simulation).manifest
+		playerIndex = next(index for index, loopPlayer in enumerate(simulation.players) if loopPlayer is player)
+		atWar = [player.diplomacyAI.isAtWarWith(loopPlayer) for loopPlayer in simulation.players]
+		openBorders = [player.diplomacyAI.isOpenBorderAgreementActiveWith(loopPlayer) for loopPlayer in simulation.players]
+		jobs = [
+			(manifest, playerIndex, player.isBarbarian(), atWar, openBorders, rows)
+			for rows in self._rowChunks(manifest.height)
+		]
+
+		if self.workers > 0:
+			results = self._workerPool().starmap(planCells, jobs)
+		else:
+			results = [planCells(*job) for job in jobs]
+
+		cells = [None] * manifest.height
+		for result in results:
+			for y, row in result:
+				cells[y] = row
+
+		self.plannedPlayers[player.leader] += 1
+
+		return cells
+
+	def close(self):
+		if self._pool is not None:
+			self._pool.close()
+			self._pool.join()
+			self._pool = None
+
+		if self._snapshot is not None:
+			self._snapshot.unlink()
+			self._snapshot = None
+
+	def __enter__(self):
+		return self
+
+	def __exit__(self, excType, excValue, traceback):
+		self.close()
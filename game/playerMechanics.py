@@ -1,15 +1,15 @@
-import random
 import sys
 from functools import reduce
 from typing import Optional
 
-from core.base import WeightedBaseList, ExtendedEnum, InvalidEnumError
+from core.base import WeightedBaseList, ExtendedEnum, InvalidEnumError, catalog
 from game.ai.baseTypes import PlayerStateAllWars, WarGoalType
 from game.ai.militaries import MilitaryThreatType
 from game.civilizations import CivilizationType, LeaderType
 from game.flavors import FlavorType
 from game.moments import Moment, MomentType
 from game.notifications import NotificationType
+from game.researchGraph import ResearchFrontier, researchGraph
 from game.states.accessLevels import AccessLevel
 from game.states.ages import AgeType
 from game.states.dedications import DedicationType
@@ -49,6 +49,7 @@ class PlayerTechs:
 	def __init__(self, player):
 		self.player = player
 		self._techs: [TechType] = []
+		self._frontier = ResearchFrontier(TechType)
 		self._currentTechValue: Optional[TechType] = None
 		self._lastScienceEarnedValue: float = 1.0
 		self._progresses = WeightedTechList()
@@ -169,6 +170,7 @@ class PlayerTechs:
 					self.player.diplomacyAI.increaseAccessLevelTowards(loopPlayer)
 
 		self._techs.append(tech)
+		self._frontier.discover(tech)
 
 	def hasTech(self, tech: TechType) -> bool:
 		return tech in self._techs
@@ -185,26 +187,7 @@ class PlayerTechs:
 				self.player.civics.triggerInspirationFor(CivicType.massMedia, simulation)
 
 	def possibleTechs(self) -> [TechType]:
-		returnTechs: [TechType] = []
-
-		for tech in list(TechType):
-			if tech == TechType.none:
-				continue
-
-			if self.hasTech(tech):
-				continue
-
-			allRequiredPresent = True
-
-			for req in tech.required():
-
-				if not self.hasTech(req):
-					allRequiredPresent = False
-
-			if allRequiredPresent:
-				returnTechs.append(tech)
-
-		return returnTechs
+		return self._frontier.possible()
 
 	def setCurrentTech(self, tech: TechType, simulation):
 		if tech not in self.possibleTechs():
@@ -249,35 +232,24 @@ class PlayerTechs:
 
 		return float(tech.flavorValue(flavor) * self.player.leader.flavor(flavor))
 
-	def chooseNextTech(self) -> Optional[TechType]:
+	def chooseNextTech(self, simulation) -> Optional[TechType]:
+		"""
+			@param simulation: game whose tech stream of the player is used
+			@return: one of the three techs with the highest weight
+		"""
 		weightedTechs: WeightedTechList = WeightedTechList()
 		weightedTechs.removeAll()
 
 		possibleTechsList = self.possibleTechs()
 
-		for possibleTech in possibleTechsList:
-			weightByFlavor = 0.0
-
-			# weight of current tech
-			for flavor in list(FlavorType):
-				weightByFlavor += self.flavorWeightedOf(possibleTech, flavor)
-
-			# add techs that can be research with this tech, but only with a little less weight
-			for activatedTech in possibleTech.leadsTo():
-
-				for flavor in list(FlavorType):
-					weightByFlavor += self.flavorWeightedOf(activatedTech, flavor) * 0.75
-
-				for secondActivatedTech in activatedTech.leadsTo():
-
-					for flavor in list(FlavorType):
-						weightByFlavor += self.flavorWeightedOf(secondActivatedTech, flavor) * 0.5
-
-					for thirdActivatedTech in secondActivatedTech.leadsTo():
-
-						for flavor in list(FlavorType):
-							weightByFlavor += self.flavorWeightedOf(thirdActivatedTech, flavor) * 0.25
+		# weight of the techs and (with a little less weight) of the techs that can be researched with them
+		graph = researchGraph(TechType)
+		if self.player is not None:
+			weightsByFlavor = graph.lookaheadOf(possibleTechsList) @ self.player.leader.flavorVector()
+		else:
+			weightsByFlavor = [0.0] * len(possibleTechsList)
 
+		for possibleTech, weightByFlavor in zip(possibleTechsList, weightsByFlavor):
 			# revalue based on cost / number of turns
 			numberOfTurnsLeft = self.turnsRemainingFor(possibleTech)
 			additionalTurnCostFactor = 0.015 * float(numberOfTurnsLeft)
@@ -290,7 +262,7 @@ class PlayerTechs:
 			weightedTechs.addWeight(weightByFlavor, possibleTech)
 
 		# select one
-		selectedIndex = random.randrange(100)
+		selectedIndex = simulation.rng.stream('tech', self.player).randrange(100)
 
 		weightedTechs = weightedTechs.top3()
 		weightedTechsArray = weightedTechs.distributeByWeight()
@@ -330,6 +302,7 @@ class PlayerCivics:
 		self.player = player
 
 		self._civics: [CivicType] = []
+		self._frontier = ResearchFrontier(CivicType)
 		self._currentCivicValue: Optional[CivicType] = None
 		self._lastCultureEarnedValue: float = 1.0
 		self._progresses = WeightedCivicList()
@@ -375,6 +348,7 @@ class PlayerCivics:
 		# simulation.sendGossip(type:.civicCompleted(civic: civic), of: self.player)
 
 		self._civics.append(civic)
+		self._frontier.discover(civic)
 
 		self.player.doUpdateTradeRouteCapacity(simulation)
 
@@ -398,25 +372,7 @@ class PlayerCivics:
 		pass
 
 	def possibleCivics(self):
-		returnCivics: [CivicType] = []
-
-		for civic in list(CivicType):
-			if civic == CivicType.none:
-				continue
-
-			if self.hasCivic(civic):
-				continue
-
-			allRequiredPresent = True
-
-			for req in civic.required():
-				if not self.hasCivic(req):
-					allRequiredPresent = False
-
-			if allRequiredPresent:
-				returnCivics.append(civic)
-
-		return returnCivics
+		return self._frontier.possible()
 
 	def setCurrentCivic(self, civic: CivicType, simulation):
 		if civic not in self.possibleCivics():
@@ -692,6 +648,7 @@ class ApproachModifierType(ExtendedEnum):
 	def reductionValue(self) -> int:
 		return self._data().reductionValue
 
+	@catalog
 	def _data(self) -> ApproachModifierTypeData:
 		if self == ApproachModifierType.delegation:
 			return ApproachModifierTypeData(
@@ -1001,6 +958,24 @@ class DiplomaticPlayerDict:
 
 		return False
 
+	def numberOfTurnsLockedIntoWarWith(self, otherPlayer) -> int:
+		otherLeader = otherPlayer.leader
+		item = next((item for item in self.items if item.leader == otherLeader), None)
+
+		if item is not None:
+			return item.numTurnsLockedIntoWar
+
+		return 0
+
+	def updateNumberOfTurnsLockedIntoWarWith(self, otherPlayer, value: int):
+		otherLeader = otherPlayer.leader
+		item = next((item for item in self.items if item.leader == otherLeader), None)
+
+		if item is not None:
+			item.numTurnsLockedIntoWar = value
+		else:
+			raise Exception("not gonna happen")
+
 	def isAtWar(self) -> bool:
 		for item in self.items:
 			if item.warState != PlayerWarStateType.none:
@@ -1054,6 +1029,9 @@ class DiplomaticPlayerDict:
 
 		return
 
+	def doDeclareWarFromDefensivePactTo(self, otherPlayer, simulation):
+		self.doDeclareWarTo(otherPlayer, simulation)
+
 	def allPlayersWithDefensivePacts(self) -> [LeaderType]:
 		defPlayers: [LeaderType] = []
 
@@ -1063,6 +1041,24 @@ class DiplomaticPlayerDict:
 
 		return defPlayers
 
+	def warStateTowards(self, otherPlayer) -> PlayerWarStateType:
+		otherLeader = otherPlayer.leader
+		item = next((item for item in self.items if item.leader == otherLeader), None)
+
+		if item is not None:
+			return item.warState
+
+		return PlayerWarStateType.none
+
+	def warGoalTowards(self, otherPlayer) -> WarGoalType:
+		otherLeader = otherPlayer.leader
+		item = next((item for item in self.items if item.leader == otherLeader), None)
+
+		if item is not None:
+			return item.warGoal
+
+		return WarGoalType.none
+
 	def updateWarStateTowards(self, otherPlayer, warStateType: PlayerWarStateType):
 		otherLeader = otherPlayer.leader
 		item = next((item for item in self.items if item.leader == otherLeader), None)
@@ -1114,6 +1110,15 @@ class DiplomaticPlayerDict:
 
 		return
 
+	def isAllianceActiveWith(self, otherPlayer) -> bool:
+		otherLeader = otherPlayer.leader
+		item = next((item for item in self.items if item.leader == otherLeader), None)
+
+		if item is not None:
+			return item.alliance.isActive()
+
+		return False
+
 	def isOpenBorderAgreementActiveWith(self, otherPlayer) -> bool:
 		otherLeader = otherPlayer.leader
 		item = next((item for item in self.items if item.leader == otherLeader), None)
@@ -1335,7 +1340,7 @@ class DiplomaticAI:
 		self.playerDict.initContactWith(otherPlayer, simulation.currentTurn)
 		self.updateMilitaryStrengthOf(otherPlayer, simulation)
 
-		impression = simulation.handicap.firstImpressionBaseValue() + random.randrange(-3, 3)
+		impression = simulation.handicap.firstImpressionBaseValue() + simulation.rng.stream('diplomacy', self.player).randrange(-3, 3)
 		self.playerDict.addApproachOf(ApproachModifierType.firstImpression, impression, 1 if impression > 0 else -1,
 									  otherPlayer)
 
@@ -1616,7 +1621,7 @@ class DiplomaticAI:
 			# Loop through all of THEIR Cities
 			for otherCity in simulation.citiesOf(otherPlayer):
 				numCityConnections += 1
-				distance = myCity.location.distanceTo(otherCity.location)
+				distance = myCity.location.distance(otherCity.location)
 
 				if distance < smallestDistanceBetweenCities:
 					smallestDistanceBetweenCities = distance
@@ -1771,10 +1776,28 @@ class DiplomaticAI:
 	def isOpenBorderAgreementActiveWith(self, otherPlayer) -> bool:
 		return self.playerDict.isOpenBorderAgreementActiveWith(otherPlayer)
 
+	def isOpenBorderAgreementActiveBy(self, otherPlayer) -> bool:
+		return self.playerDict.isOpenBorderAgreementActiveWith(otherPlayer)
+
+	def isAllianceActiveWith(self, otherPlayer) -> bool:
+		return self.playerDict.isAllianceActiveWith(otherPlayer)
+
 	def changeOtherPlayerWarValueLostBy(self, fromPlayer, toPlayer, delta: int):
 		value = self.playerDict.otherPlayerWarValueLostFrom(fromPlayer, toPlayer)
 		self.playerDict.updateOtherPlayerWarValueLostFrom(fromPlayer, toPlayer, value + delta)
 
+	def warStateTowards(self, otherPlayer) -> PlayerWarStateType:
+		return self.playerDict.warStateTowards(otherPlayer)
+
+	def warGoalTowards(self, otherPlayer) -> WarGoalType:
+		return self.playerDict.warGoalTowards(otherPlayer)
+
+	def warValueLostWith(self, otherPlayer) -> int:
+		return self.playerDict.warValueLostWith(otherPlayer)
+
+	def changeWarValueLostWith(self, otherPlayer, delta: int):
+		self.changeWarValueLostBy(otherPlayer, delta)
+
 	def changeWarValueLostBy(self, otherPlayer, delta: int):
 		if self.player.isEqualTo(otherPlayer):
 			return
@@ -1785,6 +1808,13 @@ class DiplomaticAI:
 	def changeWarWearinessWith(self, otherPlayer, value):
 		self.playerDict.changeWarWearinessWith(otherPlayer, value)
 
+	def numberOfTurnsLockedIntoWarWith(self, otherPlayer) -> int:
+		return self.playerDict.numberOfTurnsLockedIntoWarWith(otherPlayer)
+
+	def changeNumberOfTurnsLockedIntoWarWith(self, otherPlayer, delta: int):
+		value = self.playerDict.numberOfTurnsLockedIntoWarWith(otherPlayer)
+		self.playerDict.updateNumberOfTurnsLockedIntoWarWith(otherPlayer, max(value + delta, 0))
+
 
 class DiplomacyRequests:
 	def __init__(self, player):
@@ -1,8 +1,10 @@
 import math
-import random
 from typing import Optional
 
+import numpy as np
+
 from core.base import ExtendedEnum
+from core.hashing import hashValues
 from game.ai.builderTasking import BuilderTaskingAI
 from game.ai.homeland import HomelandAI
 from game.ai.tactics import TacticalAI
@@ -39,6 +41,8 @@ from map.base import HexPoint, HexArea, Array2D
 from map.improvements import ImprovementType
 from map.path_finding.finder import AStarPathfinder
 from map.types import Tutorials, Yields, TerrainType, FeatureType, UnitMovementType, RouteType, UnitDomainType
+from serialisation.replayLog import ReplayEventCategory
+from utils.profiling import profileSpan, countSpan
 
 
 class Player:
@@ -323,8 +327,13 @@ class DangerPlotsAI:
 		if self._dangerPlots is None:
 			return 0.0
 
+		# areas around cities at the border of the map reach beyond it
+		if not (0 <= location.x < self._dangerPlots.width and 0 <= location.y < self._dangerPlots.height):
+			return 0.0
+
 		return self._dangerPlots.values[location.y][location.x]
 
+	@profileSpan('DangerPlotsAI.updateDanger')
 	def updateDanger(self, pretendWarWithAllCivs: bool, ignoreVisibility: bool, simulation):
 		"""Updates the danger plots values to reflect threats across the map"""
 		# danger plots have not been initialized yet, so no need to update
@@ -337,6 +346,7 @@ class DangerPlotsAI:
 
 		# wipe out values
 		self._dangerPlots.fill(0)
+		tilesScanned = 0
 
 		# for each opposing civ
 		for loopPlayer in simulation.players:
@@ -362,6 +372,8 @@ class DangerPlotsAI:
 				self.assignUnitDangerValue(loopUnit, unitTile, simulation)
 
 				for loopPoint in loopUnit.location.areaWithRadius(unitRange):
+					tilesScanned += 1
+
 					if not simulation.valid(loopPoint):
 						continue
 
@@ -385,6 +397,8 @@ class DangerPlotsAI:
 				self.assignCityDangerValue(loopCity, cityTile)
 
 				for loopPoint in loopCity.point.areaWithRadius(cityRange):
+					tilesScanned += 1
+
 					if not simulation.valid(loopPoint):
 						continue
 
@@ -425,6 +439,7 @@ class DangerPlotsAI:
 			threatValue = self.dangerOfCity(loopCity)
 			loopCity.setThreatValue(threatValue)
 
+		countSpan('tilesScanned', tilesScanned)
 		self._dirty = False
 
 	def setDirty(self):
@@ -445,12 +460,11 @@ class DangerPlotsAI:
 				minor = otherPlayer
 				major = self.player
 
-			if minor.minorCivAI.isFriends(major):
-				return True
+			# there is no friendship with city states (only envoys) - so the minorCivAI.isFriends() check is skipped
 
 			# if we're a major, we should ignore minors that are not at war with us
-			if self.player.isCityState():
-				if not major.isAtWarWith(minor):
+			if not self.player.isCityState():
+				if not major.diplomacyAI.isAtWarWith(minor):
 					return True
 
 		return False
@@ -562,6 +576,8 @@ class Player:
 		self.moments = PlayerMoments(self)
 
 		self.personalityFlavors = Flavors()
+		self._flavorVector = None
+		self._flavorVectorKey = None
 		# state values
 		self.isAliveVal = True
 		self.turnActive = False
@@ -615,6 +631,7 @@ class Player:
 		else:
 			return f'Player({self.leader}, {self.leader.civilization()}, AI)'
 
+	@profileSpan('Player.doTurn')
 	def doTurn(self, simulation):
 		self.dangerPlotsAI.updateDanger(False, False, simulation)
 		self.doEurekas(simulation)
@@ -947,6 +964,25 @@ class Player:
 	def isAlive(self) -> bool:
 		return self.isAliveVal
 
+	def stateHash(self) -> int:
+		"""
+			summary hash of the techs, civics, treasury and diplomacy of the player (computed on demand)
+
+			@return: 64 bit hash
+		"""
+		values = [self, self.isAliveVal, self.treasury.value()]
+		values += sorted(self.techs._techs, key=lambda tech: tech._name_)
+		values.append(self.techs._currentTechValue)
+		values += sorted(self.civics._civics, key=lambda civic: civic._name_)
+		values.append(self.civics._currentCivicValue)
+
+		for item in sorted(self.diplomacyAI.playerDict.items, key=lambda item: item.leader._name_):
+			values += [item.leader, item.turnOfFirstContact, item.approach, item.warState, item.accessLevel,
+					   item.declarationOfWar.isActive(), item.peaceTreaty.isActive(),
+					   item.openBorderAgreement.isActive(), item.defensivePact.isActive(), item.alliance.isActive()]
+
+		return hashValues(values)
+
 	def prepareTurn(self, simulation):
 		# Barbarians get all Techs that 3 / 4 of alive players get
 		if self.isBarbarian():
@@ -1341,6 +1377,10 @@ class Player:
 								 cityName=cityName, continentName=continentName, eraType=eraType,
 								 naturalWonder=naturalWonder, dedication=dedication, wonder=wonder)
 
+		simulation.logReplayEvent(ReplayEventCategory.moment, momentType, self, civilization=civilization,
+								  cityName=cityName, continentName=continentName, eraType=eraType,
+								  naturalWonder=naturalWonder, dedication=dedication, wonder=wonder)
+
 		# also show a notification, when the moment brings era score
 		if momentType.eraScore() > 0:
 			if self.isHuman():
@@ -1595,6 +1635,27 @@ class Player:
 
 		return value
 
+	def personalAndGrandStrategyFlavors(self) -> np.ndarray:
+		"""
+			the vector is rebuilt when the personality flavors or the grand strategy change
+
+			@return: personalAndGrandStrategyFlavor() of all flavor types as a vector (see game.flavors.flavorTypes)
+		"""
+		activeStrategy = self.grandStrategyAI.activeStrategy
+		key = (activeStrategy, self.personalityFlavors.version)
+
+		if self._flavorVectorKey != key:
+			vector = self.personalityFlavors.vector()
+
+			if activeStrategy != GrandStrategyAIType.none:
+				vector = np.maximum(vector + activeStrategy.flavorModifierVector(), 0)
+
+			vector.flags.writeable = False
+			self._flavorVector = vector
+			self._flavorVectorKey = key
+
+		return self._flavorVector
+
 	def numberOfTradeRoutes(self) -> int:
 		# fixme
 		return 0
@@ -1985,8 +2046,9 @@ class Player:
 		if conquest:
 			captureGold += 200  # BASE_CAPTURE_GOLD
 			captureGold += oldCity.population() * 40  # CAPTURE_GOLD_PER_POPULATION
-			captureGold += random.randint(0, 40)  # CAPTURE_GOLD_RAND1
-			captureGold += random.randint(0, 20)  # CAPTURE_GOLD_RAND2
+			rng = simulation.rng.stream('capture', self)
+			captureGold += rng.randint(0, 40)  # CAPTURE_GOLD_RAND1
+			captureGold += rng.randint(0, 20)  # CAPTURE_GOLD_RAND2
 
 			foundedTurnsAgo = simulation.currentTurn - oldCity.turnFounded()
 			captureGold *= min(500, max(0, foundedTurnsAgo)) # CAPTURE_GOLD_MAX_TURNS
@@ -2162,7 +2224,8 @@ class Player:
 				if self.isHuman():
 					simulation.userInterface.showPopup(PopupType.lostOwnCapital)
 				else:
-					if self.hasMetWith(simulation.humanPlayer()):
+					humanPlayer = simulation.humanPlayer()
+					if humanPlayer is not None and self.hasMetWith(humanPlayer):
 						simulation.userInterface.showPopup(PopupType.lostCapital, leader=self.leader)
 					else:
 						simulation.userInterface.showPopup(PopupType.lostCapital, leader=LeaderType.unmet)
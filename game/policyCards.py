@@ -2,7 +2,7 @@ from typing import Optional
 
 from game.flavors import Flavor, FlavorType
 from game.types import CivicType, EraType
-from core.base import ExtendedEnum, InvalidEnumError
+from core.base import ExtendedEnum, InvalidEnumError, catalog
 
 
 class PolicyCardSlotData:
@@ -20,6 +20,7 @@ class PolicyCardSlot(ExtendedEnum):
 	def name(self) -> str:
 		return self._data().name
 
+	@catalog
 	def _data(self) -> PolicyCardSlotData:
 		if self == PolicyCardSlot.diplomatic:
 			return PolicyCardSlotData(name='TXT_KEY_POLICY_CARD_TYPE_DIPLOMATIC_TITLE')
@@ -241,6 +242,7 @@ class PolicyCardType(ExtendedEnum):
 	def requiresDarkAge(self) -> bool:
 		return self._data().requiresDarkAge
 
+	@catalog
 	def _data(self) -> PolicyCardTypeData:
 		if self == PolicyCardType.none:
 			return PolicyCardTypeData(
@@ -1,10 +1,12 @@
 from typing import Optional
 
-from core.base import ExtendedEnum, contains, InvalidEnumError
-from game.flavors import Flavor, FlavorType
+from core.base import ExtendedEnum, contains, InvalidEnumError, catalog, lazyImport
+from game.flavors import Flavor, FlavorType, flavorVectorOf
 from game.unitTypes import UnitClassType
 from map.types import FeatureType, UnitDomainType
 
+np = lazyImport('numpy')
+
 
 class PromotionCombatModifierDirection(ExtendedEnum):
 	attack = 'attack'
@@ -256,6 +258,12 @@ class UnitPromotionType(ExtendedEnum):
 
 		return CombatModifier(combatModifier.amount, self.name())
 
+	@catalog
+	def flavorVector(self) -> 'np.ndarray':
+		"""@return: flavors as a vector (see game.flavors.flavorTypes)"""
+		return flavorVectorOf(self._data().flavors)
+
+	@catalog
 	def _data(self) -> UnitPromotionTypeData:
 		if self == UnitPromotionType.embarkation:
 			return UnitPromotionTypeData(
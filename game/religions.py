@@ -1,4 +1,4 @@
-from core.base import ExtendedEnum
+from core.base import ExtendedEnum, catalog
 
 
 class PantheonTypeData:
@@ -38,6 +38,7 @@ class PantheonType(ExtendedEnum):
 	def name(self) -> str:
 		return self._data().name
 
+	@catalog
 	def _data(self) -> PantheonTypeData:
 		if self == PantheonType.none:
 			return PantheonTypeData(
@@ -0,0 +1,124 @@
+"""
+	precomputed graph of the techs and civics
+
+	the requirements of the techs and civics don't change during a game, so the graph is built once per enum
+	(see researchGraph):
+
+		- forward (leadsTo) and reverse (required) adjacency lists of member indices
+		- a matrix with the flavors of each member plus the decayed flavors of the members it leads to (up to three
+		  levels), so scoring candidates for a leader is a product with the flavor vector of the leader
+
+	the members a player can research (or adopt) next are kept in a ResearchFrontier that is updated when a member is
+	discovered instead of scanning the whole tree.
+"""
+from functools import lru_cache
+
+import numpy as np
+
+from game.flavors import flavorTypes
+
+# weight of the member itself and of the members one, two and three levels ahead
+lookaheadWeights = (1.0, 0.75, 0.5, 0.25)
+
+
+class ResearchGraph:
+	def __init__(self, enumType):
+		"""
+			@param enumType: TechType or CivicType
+		"""
+		self.enumType = enumType
+		self.members = list(enumType)
+		self.indices = {member: index for index, member in enumerate(self.members)}
+		self.flavorTypes = flavorTypes
+
+		self.required = [tuple(self.indices[requirement] for requirement in member.required()) for member in self.members]
+
+		leadsTo = [[] for _ in self.members]
+		for index, requiredIndices in enumerate(self.required):
+			for requiredIndex in requiredIndices:
+				leadsTo[requiredIndex].append(index)
+
+		self.leadsTo = [tuple(indices) for indices in leadsTo]
+
+		self.flavors = np.array([member.flavorVector() for member in self.members])
+
+		# paths are counted like the nested loops over leadsTo() did: a member that can be reached in two ways
+		# contributes twice
+		adjacency = np.zeros((len(self.members), len(self.members)))
+		for index, leadsToIndices in enumerate(self.leadsTo):
+			for leadsToIndex in leadsToIndices:
+				adjacency[index, leadsToIndex] += 1.0
+
+		self.lookahead = np.zeros_like(self.flavors)
+		levelFlavors = self.flavors
+		for weight in lookaheadWeights:
+			self.lookahead += weight * levelFlavors
+			levelFlavors = adjacency @ levelFlavors
+
+	def leadsToOf(self, member) -> list:
+		"""@return: members that directly require the member"""
+		return [self.members[index] for index in self.leadsTo[self.indices[member]]]
+
+	def lookaheadOf(self, members: list) -> np.ndarray:
+		"""@return: matrix with the lookahead flavor values (one row per member, one column per FlavorType)"""
+		return self.lookahead[[self.indices[member] for member in members]]
+
+
+@lru_cache(maxsize=None)
+def researchGraph(enumType) -> ResearchGraph:
+	"""
+		@param enumType: TechType or CivicType
+		@return: graph that is shared by all players
+	"""
+	return ResearchGraph(enumType)
+
+
+class ResearchFrontier:
+	"""
+		members of a tech or civic tree that are not discovered yet, but whose requirements are
+
+		only plain lists and sets are stored, so the frontier can be saved with the player (the graph is looked up again)
+	"""
+
+	def __init__(self, enumType):
+		"""
+			@param enumType: TechType or CivicType
+		"""
+		self.enumType = enumType
+
+		graph = researchGraph(enumType)
+		self._discovered = [False] * len(graph.members)
+		self._missing = [len(requiredIndices) for requiredIndices in graph.required]
+		self._frontier = {index for index, missing in enumerate(self._missing) if missing == 0}
+
+		# the none member can't be researched
+		self._frontier.discard(graph.indices[enumType.none])
+
+	def __contains__(self, member) -> bool:
+		return researchGraph(self.enumType).indices[member] in self._frontier
+
+	def discover(self, member):
+		"""
+			removes the member from the frontier and adds the members it unlocks
+
+			@param member: discovered member (the requirements don't need to be discovered)
+		"""
+		graph = researchGraph(self.enumType)
+		index = graph.indices[member]
+
+		if self._discovered[index]:
+			return
+
+		self._discovered[index] = True
+		self._frontier.discard(index)
+
+		for leadsToIndex in graph.leadsTo[index]:
+			self._missing[leadsToIndex] -= 1
+
+			if self._missing[leadsToIndex] == 0 and not self._discovered[leadsToIndex]:
+				self._frontier.add(leadsToIndex)
+
+	def possible(self) -> list:
+		"""@return: members that can be researched next (in the order of the enum)"""
+		members = researchGraph(self.enumType).members
+		return [members[index] for index in sorted(self._frontier)]
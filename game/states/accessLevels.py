@@ -1,4 +1,4 @@
-from core.base import ExtendedEnum, InvalidEnumError
+from core.base import ExtendedEnum, InvalidEnumError, catalog
 from utils.translation import gettext_lazy as _
 
 
@@ -38,6 +38,7 @@ class AccessLevel(ExtendedEnum):
 
 		return False
 
+	@catalog
 	def _data(self) -> AccessLevelData:
 		if self == AccessLevel.none:
 			return AccessLevelData(
@@ -1,4 +1,4 @@
-from core.base import ExtendedEnum, InvalidEnumError
+from core.base import ExtendedEnum, InvalidEnumError, catalog
 
 
 class AgeTypeData:
@@ -14,6 +14,7 @@ class AgeType(ExtendedEnum):
 	def name(self) -> str:
 		return self._data().name
 
+	@catalog
 	def _data(self) -> AgeTypeData:
 		if self == AgeType.normal:
 			return AgeTypeData(
@@ -4,7 +4,7 @@ from typing import Optional
 from game.types import TechType, EraType
 from map.improvements import ImprovementType
 from map.types import FeatureType, RouteType
-from core.base import ExtendedEnum
+from core.base import ExtendedEnum, catalog
 
 
 class BuildTypeData:
@@ -98,6 +98,7 @@ class BuildType(ExtendedEnum):
 		# fixme
 		return False
 
+	@catalog
 	def _data(self) -> BuildTypeData:
 		if self == BuildType.none:
 			return BuildTypeData(
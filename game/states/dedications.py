@@ -1,5 +1,5 @@
 from game.types import EraType
-from core.base import ExtendedEnum, InvalidEnumError
+from core.base import ExtendedEnum, InvalidEnumError, catalog
 
 
 class DedicationTypeData:
@@ -37,6 +37,7 @@ class DedicationType(ExtendedEnum):
 	def eras(self) -> [EraType]:
 		return self._data().eras
 
+	@catalog
 	def _data(self):
 		if self == DedicationType.monumentality:
 			return DedicationTypeData(
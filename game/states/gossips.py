@@ -1,5 +1,5 @@
 from game.states.accessLevels import AccessLevel
-from core.base import ExtendedEnum
+from core.base import ExtendedEnum, catalog
 from utils.translation import gettext_lazy as _
 
 
@@ -58,6 +58,7 @@ class GossipType(ExtendedEnum):
 	def accessLevel(self) -> AccessLevel:
 		return self._data().accessLevel
 
+	@catalog
 	def _data(self) -> GossipTypeData:
 		# AccessLevel: none
 		if self == GossipType.cityConquests:
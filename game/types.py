@@ -1,7 +1,9 @@
-from core.base import ExtendedEnum
+from core.base import ExtendedEnum, catalog, lazyImport
 from core.types import EraType
-from game.flavors import Flavor, FlavorType
-from gettext import gettext as _
+from game.flavors import Flavor, FlavorType, flavorVectorOf
+from utils.translation import gettext_lazy as _
+
+np = lazyImport('numpy')
 
 
 class CityFocusType(ExtendedEnum):
@@ -149,14 +151,15 @@ class TechType(ExtendedEnum):
 		return self.era() == EraType.ancient
 
 	def leadsTo(self) -> [TechType]:
-		leadingTo: [TechType] = []
-
-		for tech in list(TechType):
-			if self in tech.required():
-				leadingTo.append(tech)
+		from game.researchGraph import researchGraph
+		return researchGraph(TechType).leadsToOf(self)
 
-		return leadingTo
+	@catalog
+	def flavorVector(self) -> 'np.ndarray':
+		"""@return: flavors as a vector (see game.flavors.flavorTypes)"""
+		return flavorVectorOf(self._data().flavors)
 
+	@catalog
 	def _data(self):
 		if self == TechType.none:
 			return TechTypeData(
@@ -1357,7 +1360,7 @@ class TechType(ExtendedEnum):
 		raise AttributeError(f'cant get data for tech {self}')
 
 	def __str__(self):
-		return self.name()
+		return str(self.name())
 
 
 class CivicType:
@@ -1480,6 +1483,20 @@ class CivicType(ExtendedEnum):
 	def era(self) -> EraType:
 		return self._data().era
 
+	def flavorValue(self, flavorType: FlavorType) -> int:
+		flavorOfCivic = next((flavor for flavor in self._data().flavors if flavor.flavorType == flavorType), None)
+
+		if flavorOfCivic is not None:
+			return flavorOfCivic.value
+
+		return 0
+
+	@catalog
+	def flavorVector(self) -> 'np.ndarray':
+		"""@return: flavors as a vector (see game.flavors.flavorTypes)"""
+		return flavorVectorOf(self._data().flavors)
+
+	@catalog
 	def _data(self):
 		# default
 		if self == CivicType.none:
@@ -2503,4 +2520,4 @@ class CivicType(ExtendedEnum):
 		raise AttributeError(f'cant get data for civic {self}')
 
 	def __str__(self):
-		return self.name()
+		return str(self.name())
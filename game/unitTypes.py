@@ -4,13 +4,15 @@ from enum import Enum
 from typing import Optional, Union
 
 from game.civilizations import CivilizationType
-from game.flavors import Flavor, FlavorType
+from game.flavors import Flavor, FlavorType, flavorVectorOf
 from game.states.builds import BuildType
 from game.types import EraType, TechType, CivicType
 from map.types import UnitMovementType, ResourceType, UnitDomainType
-from core.base import ExtendedEnum, InvalidEnumError
+from core.base import ExtendedEnum, InvalidEnumError, catalog, lazyImport
 from utils.translation import gettext_lazy as _
 
+np = lazyImport('numpy')
+
 
 class UnitMapType(ExtendedEnum):
 	civilian = 'civilian'
@@ -105,6 +107,7 @@ class UnitClassType(ExtendedEnum):
 	def domain(self) -> UnitDomainType:
 		return self._data().domain
 
+	@catalog
 	def _data(self) -> UnitClassTypeData:
 		if self == UnitClassType.civilian:
 			return UnitClassTypeData(
@@ -562,6 +565,12 @@ class UnitType(ExtendedEnum):
 
 		return True
 
+	@catalog
+	def flavorVector(self) -> 'np.ndarray':
+		"""@return: flavors as a vector (see game.flavors.flavorTypes)"""
+		return flavorVectorOf(self._flavors())
+
+	@catalog
 	def _data(self) -> UnitTypeData:
 		# default ------------------------------
 		if self == UnitType.none:
@@ -1690,6 +1699,7 @@ class UnitMissionType(Enum):
 	def needsTarget(self) -> bool:
 		return self._data().needsTarget
 
+	@catalog
 	def _data(self) -> UnitMissionTypeData:
 		if self == UnitMissionType.found:
 			return UnitMissionTypeData(name='TXT_KEY_MISSION_FOUND_NAME', needsTarget=False)
@@ -592,7 +592,7 @@ class Unit:
 		# self.set(lastMoveTurn: gameModel.turnSlice())
 		oldCity = simulation.cityAt(oldPlot.point)
 
-		self.location = newLocation
+		simulation.moveUnit(self, newLocation)
 		if self.unitMoved is not None:
 			self.unitMoved(newLocation)
 
@@ -2699,10 +2699,5 @@ class Unit:
 		raise Exception(f'Could find promotion for unit {self.name()}')
 
 	def valueOfPromotion(self, promotion):
-		val = 0
-
-		for flavorType in list(FlavorType):
-			val += self.player.personalAndGrandStrategyFlavor(flavorType) * promotion.flavor(flavorType)
-
-		return val
+		return float(self.player.personalAndGrandStrategyFlavors() @ promotion.flavorVector())
 	
\ No newline at end of file
@@ -2,14 +2,16 @@ from typing import Optional
 
 from game.buildings import BuildingType
 from game.districts import DistrictType
-from game.flavors import Flavor, FlavorType
+from game.flavors import Flavor, FlavorType, flavorVectorOf
 from game.greatworks import GreatWorkSlotType
 from game.religions import ReligionType
 from game.types import CivicType, TechType, EraType
 from map.base import HexPoint
 from map.improvements import ImprovementType
 from map.types import Yields, FeatureType, TerrainType, ResourceType
-from core.base import ExtendedEnum, InvalidEnumError
+from core.base import ExtendedEnum, InvalidEnumError, catalog, lazyImport
+
+np = lazyImport('numpy')
 
 
 class WonderTypeData:
@@ -111,6 +113,12 @@ class WonderType(ExtendedEnum):
 	def productionCost(self) -> float:
 		return self._data().productionCost
 
+	@catalog
+	def flavorVector(self) -> 'np.ndarray':
+		"""@return: flavors as a vector (see game.flavors.flavorTypes)"""
+		return flavorVectorOf(self._data().flavors)
+
+	@catalog
 	def _data(self) -> WonderTypeData:
 		# default
 		if self == WonderType.none:
@@ -0,0 +1,204 @@
+"""
+	numpy helpers to evaluate the whole map at once instead of tile by tile
+
+	all per tile arrays are indexed by the flat index y * width + x (or have the shape (height, width)),
+	which matches the layout of Array2D.values[y][x]
+"""
+from functools import lru_cache
+
+import numpy as np
+
+from map.base import HexPoint
+
+
+def enumMembers(enumType) -> list:
+	"""@return: members of the enum in definition order (aliases excluded), the index in this list is the code"""
+	return list(enumType)
+
+
+@lru_cache(maxsize=None)
+def enumCodes(enumType) -> dict:
+	"""@return: dict that maps each enum member to its integer code"""
+	return {member: index for index, member in enumerate(enumMembers(enumType))}
+
+
+def enumTable(enumType, func, dtype=np.int32) -> np.ndarray:
+	"""
+		builds a lookup table with one entry per enum member
+
+		@param enumType: enum class
+		@param func: function that is evaluated for each member
+		@param dtype: dtype of the lookup table
+		@return: array that can be indexed with the codes of enumCodes
+	"""
+	return np.array([func(member) for member in enumMembers(enumType)], dtype=dtype)
+
+
+def tileArray(mapModel, func, dtype) -> np.ndarray:
+	"""
+		evaluates func for every tile of the map in one pass
+
+		@param mapModel: map to evaluate
+		@param func: function that gets a tile and returns a value
+		@param dtype: dtype of the result
+		@return: flat array with one value per tile
+	"""
+	count = mapModel.width * mapModel.height
+	return np.fromiter((func(tile) for row in mapModel.tiles.values for tile in row), dtype=dtype, count=count)
+
+
+class TileSignatures:
+	"""
+		groups tiles by their terrain, feature, hills and river signature
+
+		rules that only depend on these attributes of a tile (like Tile.canHaveResource or FeatureType.isPossibleOn)
+		only need to be evaluated once per signature instead of once per tile
+	"""
+
+	def __init__(self, mapModel, indices: np.ndarray = None):
+		"""
+			@param mapModel: map to evaluate
+			@param indices: flat indices of the tiles to group, all tiles if None
+		"""
+		from map.types import TerrainType, FeatureType
+
+		self.mapModel = mapModel
+		self.tiles = [tile for row in mapModel.tiles.values for tile in row]
+		self.indices = np.arange(len(self.tiles)) if indices is None else indices
+
+		terrainCodes = enumCodes(TerrainType)
+		featureCodes = enumCodes(FeatureType)
+
+		terrains = tileArray(mapModel, lambda tile: terrainCodes[tile._terrainValue], np.int32)
+		features = tileArray(mapModel, lambda tile: featureCodes[tile._featureValue], np.int32)
+		hills = tileArray(mapModel, lambda tile: tile._isHills, np.int32)
+		rivers = tileArray(mapModel, lambda tile: tile._riverValue > 0, np.int32)
+
+		signatures = ((terrains * len(featureCodes) + features) * 2 + hills) * 2 + rivers
+		_, self.representatives, self.inverse = np.unique(
+			signatures[self.indices], return_index=True, return_inverse=True)
+		self.inverse = self.inverse.reshape(-1)
+
+	def mask(self, predicate) -> np.ndarray:
+		"""
+			@param predicate: function that gets a tile and returns a bool
+			@return: boolean array with the result of the predicate for each of the indices
+		"""
+		values = np.array([predicate(self.tiles[self.indices[representative]]) for representative in self.representatives], dtype=np.bool_)
+		return values[self.inverse]
+
+
+@lru_cache(maxsize=None)
+def _hexOffsets(radius: int) -> ((tuple, ...), (tuple, ...)):
+	# the offsets of the hex neighborhood only depend on the parity of the row
+	offsets = []
+
+	for parity in range(2):
+		center = HexPoint(2 * radius + 2, 2 * radius + 2 + parity)
+
+		if radius == 1:
+			points = center.neighbors()
+		else:
+			points = [point for point in center.areaWithRadius(radius).points() if point != center]
+			points = sorted(points, key=lambda point: (point.y, point.x))
+
+		offsets.append(tuple((point.x - center.x, point.y - center.y) for point in points))
+
+	return offsets[0], offsets[1]
+
+
+@lru_cache(maxsize=16)
+def hexNeighborIndices(width: int, height: int, radius: int = 1) -> np.ndarray:
+	"""
+		flat indices of all tiles within the radius of each tile (the tile itself excluded)
+
+		for radius 1 the columns are ordered like HexPoint.neighbors(): north, northEast, southEast, south, southWest
+		and northWest
+
+		@param width: width of the map
+		@param height: height of the map
+		@param radius: radius of the neighborhood
+		@return: read-only array of shape (width * height, number of neighbors), invalid neighbors are -1
+	"""
+	evenOffsets, oddOffsets = _hexOffsets(radius)
+
+	ys, xs = np.divmod(np.arange(width * height), width)
+	parity = (ys & 1).astype(bool)
+
+	dx = np.where(parity[:, None], np.array([o[0] for o in oddOffsets])[None, :], np.array([o[0] for o in evenOffsets])[None, :])
+	dy = np.where(parity[:, None], np.array([o[1] for o in oddOffsets])[None, :], np.array([o[1] for o in evenOffsets])[None, :])
+
+	nx = xs[:, None] + dx
+	ny = ys[:, None] + dy
+	valid = (nx >= 0) & (nx < width) & (ny >= 0) & (ny < height)
+
+	indices = np.where(valid, ny * width + nx, -1)
+	indices.setflags(write=False)
+
+	return indices
+
+
+def neighborCount(mask: np.ndarray, neighbors: np.ndarray) -> np.ndarray:
+	"""
+		counts for each tile the neighbors for which mask is set
+
+		@param mask: flat boolean (or numeric) array with one entry per tile
+		@param neighbors: result of hexNeighborIndices
+		@return: flat int array with the number of matching neighbors per tile
+	"""
+	# append a sentinel, so that the invalid neighbors (-1) point to a zero entry
+	padded = np.append(mask.astype(np.int32), 0)
+	return padded[neighbors].sum(axis=1)
+
+
+def neighborSum(values: np.ndarray, neighbors: np.ndarray) -> np.ndarray:
+	"""
+		sums the values of the neighbors for each tile
+
+		@param values: flat array with one entry per tile
+		@param neighbors: result of hexNeighborIndices
+		@return: flat array with the sum of the neighbor values per tile
+	"""
+	padded = np.append(values, 0)
+	return padded[neighbors].sum(axis=1)
+
+
+class SummedAreaTable:
+	"""
+		2D prefix sums of a (height, width) array
+
+		the sum of any axis aligned rectangle can be queried in O(1)
+	"""
+
+	def __init__(self, values: np.ndarray):
+		self.height, self.width = values.shape
+		self.table = np.zeros((self.height + 1, self.width + 1), dtype=np.float64)
+		self.table[1:, 1:] = values.cumsum(axis=0).cumsum(axis=1)
+
+	def sum(self, minX: int, minY: int, maxX: int, maxY: int) -> float:
+		"""
+			sum of all values in the rectangle
+
+			@param minX: first column (inclusive)
+			@param minY: first row (inclusive)
+			@param maxX: last column (inclusive)
+			@param maxY: last row (inclusive)
+			@return: sum of the rectangle, 0 for an empty rectangle
+		"""
+		if maxX < minX or maxY < minY:
+			return 0.0
+
+		table = self.table
+		return float(table[maxY + 1, maxX + 1] - table[minY, maxX + 1] - table[maxY + 1, minX] + table[minY, minX])
+
+	def columnSums(self, minX: int, minY: int, maxX: int, maxY: int) -> np.ndarray:
+		"""@return: sum of each column of the rectangle - O(width)"""
+		table = self.table
+		cumulative = table[maxY + 1, minX:maxX + 2] - table[minY, minX:maxX + 2]
+		return np.diff(cumulative)
+
+	def rowSums(self, minX: int, minY: int, maxX: int, maxY: int) -> np.ndarray:
+		"""@return: sum of each row of the rectangle - O(height)"""
+		table = self.table
+		cumulative = table[minY:maxY + 2, maxX + 1] - table[minY:maxY + 2, minX]
+		return np.diff(cumulative)
@@ -0,0 +1,322 @@
+"""
+	batch map generation for balance and regression sweeps
+
+	usage:
+		python -m map.batch --seeds 0-999 --sizes duel tiny --types continents pangaea --workers 8 --output sweep/
+
+	every map is generated in a worker process, written to its own compressed map file and summarized as one row
+	of the summary table (csv). rows are appended as soon as a map is finished, so a sweep can be interrupted and
+	resumed - maps that are already listed in the summary table are skipped.
+"""
+import argparse
+import contextlib
+import csv
+import gzip
+import io
+import os
+import random
+import sys
+import time
+from multiprocessing import Pool
+from typing import Optional
+
+from game.civilizations import LeaderType
+from map.generation import MapOptions, MapGenerator, TileFertilityEvaluator
+from map.types import MapSize, MapType, ResourceType, ResourceUsage
+from serialisation.streamingMap import MapStreamWriter
+
+
+class MapSweepJob:
+	def __init__(self, seed: int, mapSize: MapSize, mapType: MapType, leader: LeaderType, outputDir: str):
+		self.seed = seed
+		self.mapSize = mapSize
+		self.mapType = mapType
+		self.leader = leader
+		self.outputDir = outputDir
+
+	def key(self) -> (str, str, str):
+		return str(self.seed), self.mapSize.value, self.mapType.value
+
+	def fileName(self) -> str:
+		return f'map_{self.seed}_{self.mapSize.value}_{self.mapType.value}.map.gz'
+
+
+class MapSweep:
+	"""
+		generates maps for every combination of seed, map size and map type
+		and streams the results into the summary table of the output directory
+	"""
+	summaryFileName = 'summary.csv'
+
+	# the progress values reported by MapGenerator.generate mark the end of each stage
+	stages = [
+		(0.1, 'init'),
+		(0.3, 'elevation'),
+		(0.35, 'climate'),
+		(0.4, 'coast'),
+		(0.5, 'terrain'),
+		(0.6, 'resources'),
+		(0.7, 'rivers'),
+		(0.8, 'features'),
+		(0.83, 'naturalWonders'),
+		(0.86, 'continents'),
+		(0.9, 'oceans'),
+		(0.95, 'startPositions'),
+		(0.99, 'goodies'),
+	]
+
+	def __init__(self, outputDir: str, seeds: [int], mapSizes: [MapSize], mapTypes: [MapType],
+				 leader: LeaderType = LeaderType.trajan, workers: int = 1):
+		self.outputDir = outputDir
+		self.seeds = seeds
+		self.mapSizes = mapSizes
+		self.mapTypes = mapTypes
+		self.leader = leader
+		self.workers = workers
+
+	@staticmethod
+	def resources() -> [ResourceType]:
+		return [resource for resource in list(ResourceType)
+				if resource != ResourceType.none and resource.usage() != ResourceUsage.artifacts]
+
+	@staticmethod
+	def columns() -> [str]:
+		columns = ['seed', 'mapSize', 'mapType', 'file', 'landPercent', 'continents', 'startFertility']
+		columns += [f'resource_{resource.value}' for resource in MapSweep.resources()]
+		columns += [f'time_{stageName}' for _, stageName in MapSweep.stages]
+		columns += ['time_total']
+		return columns
+
+	def summaryPath(self) -> str:
+		return os.path.join(self.outputDir, MapSweep.summaryFileName)
+
+	def finishedKeys(self) -> set:
+		"""
+			reads the summary table and returns the keys of all completely written rows
+
+			@return: set of (seed, mapSize, mapType) tuples
+		"""
+		finished = set()
+
+		if not os.path.exists(self.summaryPath()):
+			return finished
+
+		with open(self.summaryPath(), 'r', newline='') as file:
+			for row in csv.DictReader(file):
+				# a row that was cut off by an interrupted run is missing its last column
+				if row.get('time_total') in (None, ''):
+					continue
+
+				finished.add((row['seed'], row['mapSize'], row['mapType']))
+
+		return finished
+
+	def jobs(self) -> [MapSweepJob]:
+		"""@return: all jobs of this sweep that are not yet listed in the summary table"""
+		finished = self.finishedKeys()
+		jobs = []
+
+		for seed in self.seeds:
+			for mapSize in self.mapSizes:
+				for mapType in self.mapTypes:
+					job = MapSweepJob(seed, mapSize, mapType, self.leader, self.outputDir)
+
+					if job.key() not in finished:
+						jobs.append(job)
+
+		return jobs
+
+	def run(self, callback=None) -> int:
+		"""
+			generates all pending maps and appends their summary rows
+
+			@param callback: optional function that is called with every finished summary row
+			@return: number of generated maps
+		"""
+		os.makedirs(self.outputDir, exist_ok=True)
+		jobs = self.jobs()
+
+		if len(jobs) == 0:
+			return 0
+
+		writeHeader = not os.path.exists(self.summaryPath()) or os.path.getsize(self.summaryPath()) == 0
+		generated = 0
+
+		with open(self.summaryPath(), 'a', newline='') as file:
+			writer = csv.DictWriter(file, fieldnames=MapSweep.columns())
+
+			if writeHeader:
+				writer.writeheader()
+
+			if self.workers > 1:
+				with Pool(processes=self.workers) as pool:
+					# chunksize of one keeps results flowing to disk as soon as each map is done
+					for row in pool.imap_unordered(generateMapJob, jobs, chunksize=1):
+						self._writeRow(writer, file, row, callback)
+						generated += 1
+			else:
+				for job in jobs:
+					self._writeRow(writer, file, generateMapJob(job), callback)
+					generated += 1
+
+		return generated
+
+	def _writeRow(self, writer, file, row: dict, callback):
+		writer.writerow(row)
+		file.flush()
+
+		if callback is not None:
+			callback(row)
+
+
+def generateMapJob(job: MapSweepJob) -> dict:
+	"""
+		generates a single map, writes it to disk and returns its summary row
+
+		this is the worker function of the sweep - it only gets the (small) job and only returns the (small) row,
+		the map itself never leaves the worker process
+
+		@param job: seed, size and type of the map to generate
+		@return: summary row
+	"""
+	stageNames = dict(MapSweep.stages)
+	stageTimes = {stageName: 0.0 for _, stageName in MapSweep.stages}
+	lastTime = [time.perf_counter()]
+
+	def _callback(state):
+		now = time.perf_counter()
+		stageName = stageNames.get(state.value)
+
+		if stageName is not None:
+			stageTimes[stageName] += now - lastTime[0]
+
+		lastTime[0] = now
+
+	random.seed(job.seed)
+	options = MapOptions(mapSize=job.mapSize, mapType=job.mapType, leader=job.leader)
+	generator = MapGenerator(options)
+
+	startTime = time.perf_counter()
+
+	# the generator reports its progress via print - keep the sweep output readable
+	with contextlib.redirect_stdout(io.StringIO()):
+		mapModel = generator.generate(_callback)
+
+	totalTime = time.perf_counter() - startTime
+
+	_writeMap(mapModel, os.path.join(job.outputDir, job.fileName()))
+
+	row = {
+		'seed': job.seed,
+		'mapSize': job.mapSize.value,
+		'mapType': job.mapType.value,
+		'file': job.fileName(),
+	}
+	row.update(mapStatistics(mapModel))
+	row.update({f'time_{stageName}': f'{stageTime:.4f}' for stageName, stageTime in stageTimes.items()})
+	row['time_total'] = f'{totalTime:.4f}'
+
+	return row
+
+
+def mapStatistics(mapModel) -> dict:
+	"""
+		land percentage, number of continents, fertility around each start location and resource counts of a map
+
+		@param mapModel: map to evaluate
+		@return: dict with the statistics columns of the summary table
+	"""
+	landTiles = 0
+	resourceCounts = {resource: 0 for resource in MapSweep.resources()}
+
+	for y in range(mapModel.height):
+		for x in range(mapModel.width):
+			tile = mapModel.tileAt(x, y)
+
+			if tile.isLand():
+				landTiles += 1
+
+			if tile._resourceValue in resourceCounts:
+				resourceCounts[tile._resourceValue] += 1
+
+	fertilityEvaluator = TileFertilityEvaluator(mapModel)
+	startFertilities = []
+
+	for startLocation in mapModel.startLocations + mapModel.cityStateStartLocations:
+		fertility = 0
+
+		for loopPoint in startLocation.location.areaWithRadius(2):
+			loopTile = mapModel.tileAt(loopPoint)
+
+			if loopTile is None:
+				continue
+
+			fertility += fertilityEvaluator.placementFertility(loopTile, checkForCoastalLand=True)
+
+		startFertilities.append(str(fertility))
+
+	statistics = {
+		'landPercent': f'{100.0 * landTiles / (mapModel.width * mapModel.height):.2f}',
+		'continents': len(mapModel.continents),
+		'startFertility': ';'.join(startFertilities),
+	}
+	statistics.update({f'resource_{resource.value}': count for resource, count in resourceCounts.items()})
+
+	return statistics
+
+
+def _writeMap(mapModel, path: str):
+	# write to a temporary file first, so an interrupted sweep never leaves a truncated map behind
+	tmpPath = f'{path}.tmp'
+
+	with gzip.open(tmpPath, 'wt') as file:
+		MapStreamWriter(file).write(mapModel)
+
+	os.replace(tmpPath, path)
+
+
+def _parseSeeds(values: [str]) -> [int]:
+	seeds = []
+
+	for value in values:
+		if '-' in value:
+			first, last = value.split('-', 1)
+			seeds += list(range(int(first), int(last) + 1))
+		else:
+			seeds.append(int(value))
+
+	return seeds
+
+
+def main(argv: Optional[list] = None) -> int:
+	parser = argparse.ArgumentParser(description='Generate maps in batch for balance and regression sweeps.')
+	parser.add_argument('--seeds', nargs='+', default=['0-9'], help='seeds or seed ranges like 0-999')
+	parser.add_argument('--sizes', nargs='+', default=[MapSize.duel.value], choices=[size.value for size in MapSize])
+	parser.add_argument('--types', nargs='+', default=[MapType.continents.value],
+						choices=[mapType.value for mapType in MapType if mapType != MapType.empty])
+	parser.add_argument('--leader', default=LeaderType.trajan.value, help='leader of the human player')
+	parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help='number of worker processes')
+	parser.add_argument('--output', default='sweep', help='directory for the map files and the summary table')
+	args = parser.parse_args(argv)
+
+	sweep = MapSweep(
+		outputDir=args.output,
+		seeds=_parseSeeds(args.seeds),
+		mapSizes=[MapSize(size) for size in args.sizes],
+		mapTypes=[MapType(mapType) for mapType in args.types],
+		leader=LeaderType(args.leader),
+		workers=args.workers
+	)
+
+	def _progress(row):
+		print(f'{row["file"]}: land {row["landPercent"]}%, {row["continents"]} continents, {row["time_total"]}s',
+			  flush=True)
+
+	generated = sweep.run(_progress)
+	print(f'generated {generated} maps, summary in {sweep.summaryPath()}')
+
+	return 0
+
+
+if __name__ == '__main__':
+	sys.exit(main())
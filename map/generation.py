@@ -3,26 +3,35 @@ import random
 import sys
 from typing import Optional
 
+import numpy as np
+
 from game.cityStates import CityStateType
 from game.civilizations import LeaderType
 from game.unitTypes import BitArray
 from map.areas import OceanType, ContinentType, Continent, Ocean
+from map.arrays import enumCodes, enumMembers, enumTable, tileArray, hexNeighborIndices, neighborCount, neighborSum, \
+	SummedAreaTable, TileSignatures
 from map.base import HexPoint, HexDirection, Array2D, HexArea
-from map.map import MapModel, Tile
+from map.map import MapModel, Tile, TileStatistics, FlowDirection, River
 from map.path_finding.finder import MoveTypeIgnoreUnitsOptions, MoveTypeIgnoreUnitsPathfinderDataSource, AStarPathfinder
 from map.perlin_noise.perlinNoise import PerlinNoise
 from map.types import TerrainType, MapType, MapAge, MapSize, ResourceType, ClimateZone, FeatureType, ResourceUsage, \
 	UnitMovementType, StartLocation
 from core.base import WeightedStringList
+from core.rng import GameRandom
 from utils.translation import gettext_lazy as _
 
 
 # https://www.redblobgames.com/maps/terrain-from-noise/
 class HeightMap(Array2D):
-	def __init__(self, width: int, height: int, octaves: int = 4):
+	def __init__(self, width: int, height: int, octaves: int = 4, rng: Optional[random.Random] = None):
+		"""
+			@param rng: stream that seeds the noise (default: the random module)
+		"""
 		super().__init__(width, height, 0.0)
 		self.width = width
 		self.height = height
+		self.rng = rng if rng is not None else random
 		self._generate(octaves)
 		self._normalize()
 
@@ -33,10 +42,10 @@ class HeightMap(Array2D):
 			@param octaves: object
 		"""
 
-		noise1 = PerlinNoise(octaves=1 * octaves)
-		noise2 = PerlinNoise(octaves=2 * octaves)
-		noise3 = PerlinNoise(octaves=4 * octaves)
-		noise4 = PerlinNoise(octaves=8 * octaves)
+		noise1 = PerlinNoise(octaves=1 * octaves, seed=self.rng.randint(1, 10 ** 5))
+		noise2 = PerlinNoise(octaves=2 * octaves, seed=self.rng.randint(1, 10 ** 5))
+		noise3 = PerlinNoise(octaves=4 * octaves, seed=self.rng.randint(1, 10 ** 5))
+		noise4 = PerlinNoise(octaves=8 * octaves, seed=self.rng.randint(1, 10 ** 5))
 
 		for x in range(self.width):
 			for y in range(self.height):
@@ -95,14 +104,278 @@ class ResourcesInfo:
 		self.already_placed = already_placed
 
 
+class ResourcePlacer:
+	"""
+		places resources from precomputed candidate lists
+
+		the candidate list of a resource holds the flat indices (y * width + x) of all tiles that can have it. the
+		lists are built in one pass over the map: the tiles are grouped by their (terrain, feature, hills, river)
+		signature and Tile.canHaveResource is only evaluated once per signature and resource. tiles that receive a
+		resource are excluded from all candidate lists, so the map never needs to be re-tested.
+	"""
+
+	def __init__(self, mapModel, resources: [ResourceType], rng: Optional[random.Random] = None):
+		"""
+			@param mapModel: map to place the resources on
+			@param resources: resources that can be placed
+			@param rng: stream that chooses the tiles (default: the random module)
+		"""
+		self.mapModel = mapModel
+		self.rng = rng if rng is not None else random
+		self.tiles = [tile for row in mapModel.tiles.values for tile in row]
+
+		resourceCodes = enumCodes(ResourceType)
+		existingResources = tileArray(mapModel, lambda tile: resourceCodes[tile._resourceValue], np.int32)
+
+		# running counts of the resources on the map
+		self.placed = {resource: 0 for resource in resources}
+		for resource, count in zip(*np.unique(existingResources, return_counts=True)):
+			member = enumMembers(ResourceType)[resource]
+			if member in self.placed:
+				self.placed[member] = int(count)
+
+		# only one resource per tile
+		self.occupied = existingResources != resourceCodes[ResourceType.none]
+		freeIndices = np.nonzero(~self.occupied)[0]
+		signatures = TileSignatures(mapModel, freeIndices)
+
+		self.candidates = {}
+		for resource in resources:
+			eligible = signatures.mask(lambda tile: tile.canHaveResource(mapModel, resource, ignore_latitude=True))
+			self.candidates[resource] = freeIndices[eligible]
+
+	def candidatesFor(self, resource: ResourceType) -> np.ndarray:
+		"""@return: flat indices of the tiles that can have the resource"""
+		candidates = self.candidates[resource]
+		candidates = candidates[~self.occupied[candidates]]
+		self.candidates[resource] = candidates
+		return candidates
+
+	def info(self, resource: ResourceType) -> ResourcesInfo:
+		placed = self.placed[resource]
+		return ResourcesInfo(resource=resource, num_possible=len(self.candidatesFor(resource)) + placed, already_placed=placed)
+
+	def numberOfPlaced(self, resource: ResourceType) -> int:
+		return self.placed[resource]
+
+	def place(self, resource: ResourceType, amount: int, quantity: int) -> int:
+		"""
+			places the resource on randomly chosen candidate tiles
+
+			@param resource: resource to place
+			@param amount: number of tiles that should get the resource
+			@param quantity: quantity of the resource on each tile
+			@return: number of tiles that got the resource
+		"""
+		candidates = self.candidatesFor(resource)
+		amount = min(amount, len(candidates))
+
+		if amount <= 0:
+			return 0
+
+		indices = self.rng.sample(list(candidates), amount)
+
+		for index in indices:
+			tile = self.tiles[index]
+			tile._resourceQuantity = quantity
+			tile._resourceValue = resource
+
+		self.placed[resource] += amount
+		self.excludeTiles(indices)
+
+		return amount
+
+	def excludeTiles(self, indices):
+		"""
+			removes tiles from all candidate lists
+
+			@param indices: flat indices of the tiles
+		"""
+		self.occupied[indices] = True
+
+class RiverGenerator:
+	"""
+		generates rivers along the edges of the tiles from the height map
+
+		rivers flow along the corners of the tiles. each corner is shared by three tiles, the height of a corner is the
+		average height of these tiles. every tile owns two corners: the corner between its north and north-east edge
+		(0) and the corner between its north-east and south-east edge (1), so corner c of tile t has the index 2 * t + c.
+
+		1. flow direction: every land corner drains to its lowest neighbor corner (steepest descent), corners next
+			to water are the outlets
+		2. flow accumulation: the number of corners that drain through each corner, computed front by front from the
+			ridges down to the outlets (each corner is visited once)
+		3. the outlets with the highest accumulated flow get rivers: all edges of their basin with at least
+			minimumFlow upstream corners become river segments
+
+		each river segment is the north, north-east or south-east edge of one tile, so the flags of all tiles can be
+		written in one pass.
+	"""
+
+	def __init__(self, mapModel, heightMap: Array2D, minimumFlow: int = 4):
+		self.mapModel = mapModel
+		self.minimumFlow = minimumFlow
+
+		width, height = mapModel.width, mapModel.height
+		count = width * height
+		tiles = np.arange(count)
+
+		neighbors = hexNeighborIndices(width, height, 1)
+		north, northEast, southEast, south, _, northWest = neighbors.T
+
+		terrainCodes = enumCodes(TerrainType)
+		terrains = tileArray(mapModel, lambda tile: terrainCodes[tile._terrainValue], np.int32)
+		isWater = enumTable(TerrainType, lambda terrain: terrain.isWater(), np.bool_)[terrains]
+		heights = np.array(heightMap.values, dtype=np.float64).reshape(-1)
+
+		# the three tiles of each corner
+		cornerTiles = np.empty((2 * count, 3), dtype=np.int64)
+		cornerTiles[0::2] = np.stack([tiles, north, northEast], axis=1)
+		cornerTiles[1::2] = np.stack([tiles, northEast, southEast], axis=1)
+		self.valid = (cornerTiles >= 0).all(axis=1)
+
+		safeTiles = np.where(cornerTiles >= 0, cornerTiles, 0)
+		self.heights = np.where(self.valid, heights[safeTiles].mean(axis=1), np.inf)
+		self.touchesWater = self.valid & isWater[safeTiles].any(axis=1)
+		self.land = self.valid & ~self.touchesWater
+
+		def _corner(tileIndices: np.ndarray, corner: int) -> np.ndarray:
+			return np.where(tileIndices >= 0, 2 * tileIndices + corner, -1)
+
+		# the three neighbor corners of each corner, the tile that owns the edge towards them
+		# and the flow flag of the edge when the river flows towards them
+		self.neighbors = np.empty((2 * count, 3), dtype=np.int64)
+		self.neighbors[0::2] = np.stack([_corner(northWest, 1), _corner(tiles, 1), _corner(north, 1)], axis=1)
+		self.neighbors[1::2] = np.stack([_corner(tiles, 0), _corner(south, 0), _corner(southEast, 0)], axis=1)
+
+		self.owners = np.empty((2 * count, 3), dtype=np.int64)
+		self.owners[0::2] = np.stack([tiles, tiles, north], axis=1)
+		self.owners[1::2] = np.stack([tiles, tiles, southEast], axis=1)
+
+		self.flows = np.empty((2 * count, 3), dtype=np.int64)
+		self.flows[0::2] = [FlowDirection.west.value, FlowDirection.southEast.value, FlowDirection.northEast.value]
+		self.flows[1::2] = [FlowDirection.northWest.value, FlowDirection.southWest.value, FlowDirection.east.value]
+
+		self.down, self.downColumn = self._flowDirections()
+		self.flow, self.fronts = self._flowAccumulation()
+		self.outlets = self._outlets()
+
+	def _flowDirections(self) -> (np.ndarray, np.ndarray):
+		"""@return: the neighbor corner each corner drains to (-1 for outlets and pits) and its column"""
+		neighborValid = (self.neighbors >= 0) & self.valid[np.maximum(self.neighbors, 0)]
+		neighborHeights = np.where(neighborValid, self.heights[np.maximum(self.neighbors, 0)], np.inf)
+
+		column = neighborHeights.argmin(axis=1)
+		lowest = neighborHeights[np.arange(len(column)), column]
+		drains = self.land & (lowest < self.heights)
+		down = np.where(drains, self.neighbors[np.arange(len(column)), column], -1)
+
+		return down, column
+
+	def _flowAccumulation(self) -> (np.ndarray, [np.ndarray]):
+		"""@return: the number of land corners that drain through each corner and the processed fronts in order"""
+		flow = self.valid.astype(np.int64)
+		drains = self.down >= 0
+		upstream = np.bincount(self.down[drains], minlength=len(flow))
+
+		fronts = []
+		front = np.nonzero(self.valid & (upstream == 0))[0]
+
+		while front.size > 0:
+			fronts.append(front)
+			front = front[self.down[front] >= 0]
+			targets = self.down[front]
+
+			np.add.at(flow, targets, flow[front])
+			np.subtract.at(upstream, targets, 1)
+
+			targets = np.unique(targets)
+			front = targets[upstream[targets] == 0]
+
+		return flow, fronts
+
+	def _outlets(self) -> np.ndarray:
+		"""@return: the corner where the water of each corner ends (outlet or pit)"""
+		outlets = np.arange(len(self.down))
+
+		# from the outlets up to the ridges, the outlet of the downstream corner is always known
+		for front in reversed(self.fronts):
+			front = front[self.down[front] >= 0]
+			outlets[front] = outlets[self.down[front]]
+
+		return outlets
+
+	def riverSegments(self, numberOfRivers: int, priorities: np.ndarray) -> (np.ndarray, np.ndarray):
+		"""
+			selects the basins of the outlets with the highest accumulated flow
+
+			@param numberOfRivers: maximum number of rivers
+			@param priorities: random value per corner that breaks ties between outlets with the same flow
+			@return: the corners where a river segment starts and the rank of its river (0 is the biggest)
+		"""
+		candidates = np.nonzero(self.touchesWater & (self.flow > self.minimumFlow))[0]
+		candidates = candidates[np.lexsort((priorities[candidates], -self.flow[candidates]))][:numberOfRivers]
+
+		rank = np.full(len(self.down), -1, dtype=np.int64)
+		rank[candidates] = np.arange(len(candidates))
+
+		segments = np.nonzero(self.land & (self.down >= 0) & (self.flow >= self.minimumFlow) & (rank[self.outlets] >= 0))[0]
+
+		return segments, rank[self.outlets[segments]]
+
+	def springs(self, segments: np.ndarray) -> np.ndarray:
+		"""@return: the corners of the segments that no other segment flows into"""
+		fed = np.zeros(len(self.down), dtype=np.bool_)
+		fed[self.down[segments]] = True
+
+		return segments[~fed[segments]]
+
+	def apply(self, numberOfRivers: int, priorities: np.ndarray) -> [HexPoint]:
+		"""
+			writes the river flags of the selected rivers to the tiles
+
+			@param numberOfRivers: maximum number of rivers
+			@param priorities: random value per corner that breaks ties between outlets with the same flow
+			@return: locations of the springs
+		"""
+		segments, ranks = self.riverSegments(numberOfRivers, priorities)
+		count = self.mapModel.width * self.mapModel.height
+
+		owners = self.owners[segments, self.downColumn[segments]]
+		flows = self.flows[segments, self.downColumn[segments]]
+
+		riverValues = np.zeros(count, dtype=np.int64)
+		np.bitwise_or.at(riverValues, owners, flows)
+
+		# tiles next to several rivers belong to the biggest
+		riverRanks = np.full(count, np.iinfo(np.int64).max, dtype=np.int64)
+		np.minimum.at(riverRanks, owners, ranks)
+
+		rivers = [River(f'River {rank + 1}') for rank in range(numberOfRivers)]
+
+		for index in np.nonzero(riverValues)[0]:
+			y, x = divmod(int(index), self.mapModel.width)
+			tile = self.mapModel.tileAt(x, y)
+			tile._riverName = rivers[riverRanks[index]].name()
+			tile._riverValue |= int(riverValues[index])
+
+		springs = self.springs(segments) // 2
+		return [HexPoint(int(index % self.mapModel.width), int(index // self.mapModel.width)) for index in springs]
+
+
 class MapOptions:
-	def __init__(self, mapSize: MapSize, mapType: MapType, leader: LeaderType, aiLeaders=None):
+	def __init__(self, mapSize: MapSize, mapType: MapType, leader: LeaderType, aiLeaders=None,
+				 seed: Optional[int] = None):
+		"""
+			@param seed: seed of the random streams of the generator (default: drawn from the random module)
+		"""
 		self.mapSize = mapSize
 		self.mapType = mapType
 		self.rivers = 20
 		self.age = MapAge.normal
 		self.leader = leader
 		self.aiLeaders = [] if aiLeaders is None else aiLeaders
+		self.seed = seed
 
 	def mountains_percentage(self):
 		""" Percentage of mountain on land """
@@ -208,6 +481,81 @@ class TileFertilityEvaluator(BaseSiteEvaluator):
 
 		return plotFertility
 
+	def placementFertilities(self, checkForCoastalLand: bool) -> np.ndarray:
+		"""
+			vectorized version of placementFertility for all tiles of the map
+
+			@param checkForCoastalLand: add the bonus for coastal land
+			@return: array of shape (height, width) with the placement fertility of each tile
+		"""
+		terrainCodes = enumCodes(TerrainType)
+		featureCodes = enumCodes(FeatureType)
+
+		terrains = tileArray(self.map, lambda tile: terrainCodes[tile._terrainValue], np.int8)
+		features = tileArray(self.map, lambda tile: featureCodes[tile._featureValue], np.int8)
+		hills = tileArray(self.map, lambda tile: tile._isHills, np.bool_)
+		rivers = tileArray(self.map, lambda tile: tile._riverValue > 0, np.bool_)
+		neighbors = hexNeighborIndices(self.map.width, self.map.height)
+
+		featureFertility = {
+			FeatureType.mountains: 1,
+			FeatureType.forest: 4,
+			FeatureType.rainforest: 3,
+			FeatureType.marsh: 3,
+			FeatureType.ice: -1,
+			FeatureType.oasis: 6,
+			FeatureType.floodplains: 6,
+		}
+		terrainFertility = {
+			TerrainType.grass: 4,
+			TerrainType.plains: 4,
+			TerrainType.desert: 1,
+			TerrainType.tundra: 2,
+			TerrainType.snow: 1,
+			TerrainType.shore: 4,
+			TerrainType.ocean: 2,
+		}
+		featureBonus = {
+			FeatureType.reef: 2,
+			FeatureType.greatBarrierReef: 2,
+			FeatureType.atoll: 4,
+		}
+
+		# the feature decides the base fertility, if it is one of the listed features - otherwise the terrain
+		hasFeatureFertility = enumTable(FeatureType, lambda feature: feature in featureFertility, np.bool_)[features]
+		fertility = np.where(
+			hasFeatureFertility,
+			enumTable(FeatureType, lambda feature: featureFertility.get(feature, 0))[features],
+			enumTable(TerrainType, lambda terrain: terrainFertility.get(terrain, 0))[terrains]
+		)
+
+		fertility[hills & (fertility == 1)] = 2
+		fertility += enumTable(FeatureType, lambda feature: featureBonus.get(feature, 0))[features]
+
+		# fresh water: passable land next to a river, lake or oasis
+		isWater = enumTable(TerrainType, lambda terrain: terrain.isWater(), np.bool_)[terrains]
+		terrainImpassable = enumTable(
+			TerrainType,
+			lambda terrain: terrain.movementCost(UnitMovementType.walk) == UnitMovementType.max,
+			np.bool_
+		)[terrains]
+		featureImpassable = enumTable(
+			FeatureType,
+			lambda feature: feature != FeatureType.none and feature.movementCost(UnitMovementType.walk) == UnitMovementType.max,
+			np.bool_
+		)[features]
+		freshWaterSource = (features == featureCodes[FeatureType.lake]) | (features == featureCodes[FeatureType.oasis])
+		freshWater = ~isWater & ~terrainImpassable & ~featureImpassable & (rivers | (neighborCount(freshWaterSource, neighbors) > 0))
+
+		fertility += rivers
+		fertility += freshWater
+
+		if checkForCoastalLand:
+			coastal = ~isWater & (neighborCount(isWater, neighbors) > 0)
+			fertility += 2 * (coastal & (features != featureCodes[FeatureType.mountains]))
+
+		return fertility.reshape((self.map.height, self.map.width))
+
 
 class StartArea:
 	def __init__(self, area: HexArea, fertility: float, used: bool = False):
@@ -216,16 +564,121 @@ class StartArea:
 		self.used = used
 
 
+class StartRegion:
+	pass
+
+
+class StartRegion:
+	"""
+		rectangular part of a landmass that is divided into start areas
+
+		fertility and number of plots of the region are looked up in summed area tables of the landmass,
+		so dividing a region does not need to iterate its points
+	"""
+
+	def __init__(self, landmass: np.ndarray, fertilityTable: SummedAreaTable, plotTable: SummedAreaTable,
+				 minX: int, minY: int, maxX: int, maxY: int):
+		self.landmass = landmass
+		self.fertilityTable = fertilityTable
+		self.plotTable = plotTable
+		self.minX = minX
+		self.minY = minY
+		self.maxX = maxX
+		self.maxY = maxY
+
+	def width(self) -> int:
+		return self.maxX - self.minX
+
+	def height(self) -> int:
+		return self.maxY - self.minY
+
+	def fertility(self) -> float:
+		return self.fertilityTable.sum(self.minX, self.minY, self.maxX, self.maxY)
+
+	def numberOfPlots(self) -> int:
+		return int(self.plotTable.sum(self.minX, self.minY, self.maxX, self.maxY))
+
+	def shrunk(self) -> StartRegion:
+		"""@return: region reduced to the bounding box of its landmass plots"""
+		if self.numberOfPlots() == 0:
+			return self
+
+		columns = np.nonzero(self.plotTable.columnSums(self.minX, self.minY, self.maxX, self.maxY))[0]
+		rows = np.nonzero(self.plotTable.rowSums(self.minX, self.minY, self.maxX, self.maxY))[0]
+
+		return StartRegion(
+			self.landmass, self.fertilityTable, self.plotTable,
+			self.minX + int(columns[0]), self.minY + int(rows[0]), self.minX + int(columns[-1]), self.minY + int(rows[-1])
+		)
+
+	def divide(self, numberOfParts: int) -> [StartRegion]:
+		"""
+			divides the region along its longer side into parts of (nearly) equal fertility
+
+			@param numberOfParts: number of regions to create
+			@return: list of regions - fewer than numberOfParts, if the region has fewer rows / columns
+		"""
+		horizontally = self.width() > self.height()
+
+		if horizontally:
+			sums = self.fertilityTable.columnSums(self.minX, self.minY, self.maxX, self.maxY)
+			plots = self.plotTable.columnSums(self.minX, self.minY, self.maxX, self.maxY)
+			start = self.minX
+		else:
+			sums = self.fertilityTable.rowSums(self.minX, self.minY, self.maxX, self.maxY)
+			plots = self.plotTable.rowSums(self.minX, self.minY, self.maxX, self.maxY)
+			start = self.minY
+
+		# balance by number of plots, if there is no fertility to balance
+		if sums.sum() <= 0:
+			sums = plots
+
+		cumulative = np.cumsum(sums)
+		total = cumulative[-1]
+		lastIndex = len(cumulative) - 1
+
+		regions = []
+		first = 0
+		for part in range(1, numberOfParts + 1):
+			if first > lastIndex:
+				# fewer rows / columns than parts - no empty (or inverted) regions
+				break
+
+			if part == numberOfParts:
+				last = lastIndex
+			else:
+				# best split line: first row / column where the cumulative fertility reaches the share of this part,
+				# leaving one row / column for each of the following parts (if there are enough)
+				last = int(np.searchsorted(cumulative, total * part / numberOfParts, side='left'))
+				last = max(first, min(last, lastIndex - (numberOfParts - part)))
+
+			if horizontally:
+				region = StartRegion(self.landmass, self.fertilityTable, self.plotTable, start + first, self.minY, start + last, self.maxY)
+			else:
+				region = StartRegion(self.landmass, self.fertilityTable, self.plotTable, self.minX, start + first, self.maxX, start + last)
+
+			regions.append(region.shrunk())
+			first = last + 1
+
+		return regions
+
+	def area(self) -> HexArea:
+		# points are ordered column by column, like the points of the continents
+		columns, rows = np.nonzero(self.landmass[self.minY:self.maxY + 1, self.minX:self.maxX + 1].T)
+		return HexArea([HexPoint(self.minX + int(x), self.minY + int(y)) for x, y in zip(columns, rows)])
+
+
 class StartPositioner:
-	def __init__(self, mapModel, numberOfPlayers: int, numberOfCityStates: int):
+	def __init__(self, mapModel, numberOfPlayers: int, numberOfCityStates: int, rng: Optional[random.Random] = None):
 		self.mapModel = mapModel
 		self.numberOfPlayers = numberOfPlayers
 		self.numberOfCityStates = numberOfCityStates
+		self.rng = rng if rng is not None else random
 
 		# internal
 		self.tileFertilityEvaluator = TileFertilityEvaluator(self.mapModel)
 		self.startAreas = []
-		self.fertilityMap = Array2D(self.mapModel.width, self.mapModel.height)
+		self.fertilityMap = np.zeros((self.mapModel.height, self.mapModel.width))
 
 		# result
 		self.startLocations = []
@@ -234,30 +687,33 @@ class StartPositioner:
 	def generateRegions(self):
 		print(f'starting with: {self.numberOfPlayers} civs and {self.numberOfCityStates} city states')
 
-		self.fertilityMap.fill(0)
+		terrainCodes = enumCodes(TerrainType)
+		terrains = tileArray(self.mapModel, lambda tile: terrainCodes[tile._terrainValue], np.int8)
+		landPlots = enumTable(TerrainType, lambda terrain: terrain.isLand(), np.bool_)[terrains]
+		landPlots = landPlots.reshape((self.mapModel.height, self.mapModel.width))
 
-		landAreaFert = WeightedStringList()
+		# Cycle through all plots in the world, checking their Start Placement Fertility and AreaID.
+		# Check for coastal land is enabled.
+		plotFertility = self.tileFertilityEvaluator.placementFertilities(checkForCoastalLand=True)
+		self.fertilityMap = np.where(landPlots, plotFertility, 0)
+
+		continentIdentifiers = tileArray(
+			self.mapModel,
+			lambda tile: -1 if tile.continentIdentifier is None else int(tile.continentIdentifier),
+			np.int32
+		).reshape((self.mapModel.height, self.mapModel.width))
 
 		# Obtain info on all landmasses for comparison purposes.
-		globalFertilityOfLands = 0
-		numberOfLandPlots = 0
+		globalFertilityOfLands = int(self.fertilityMap.sum())
+		numberOfLandPlots = int(landPlots.sum())
 
-		# Cycle through all plots in the world, checking their Start Placement Fertility and AreaID.
-		for x in range(self.mapModel.width):
-			for y in range(self.mapModel.height):
-				tile = self.mapModel.tileAt(x, y)
-				if tile is not None:
-					# Land plot, process it.
-					if tile.terrain().isLand():
-						numberOfLandPlots += 1
-						continentIdentifier = tile.continentIdentifier
-
-						# Check for coastal land is enabled.
-						plotFertility = self.tileFertilityEvaluator.placementFertility(tile, checkForCoastalLand=True)
-						globalFertilityOfLands += plotFertility
-
-						self.fertilityMap.values[y][x] = plotFertility
-						landAreaFert.addWeight(plotFertility, continentIdentifier)
+		# landmasses in the order of their first plot (column by column)
+		landAreaFert = WeightedStringList()
+		identifiersByColumn = continentIdentifiers.T[landPlots.T]
+		_, firstIndices = np.unique(identifiersByColumn, return_index=True)
+		for continentIdentifier in identifiersByColumn[np.sort(firstIndices)]:
+			continentFertility = int(self.fertilityMap[landPlots & (continentIdentifiers == continentIdentifier)].sum())
+			landAreaFert.setWeight(continentFertility, None if continentIdentifier == -1 else int(continentIdentifier))
 
 		# init number of civs on each continent
 		numberOfCivsPerArea = WeightedStringList()
@@ -292,11 +748,17 @@ class StartPositioner:
 			print(f'numberOfCivsOnCurrentArea: {numberOfCivsOnCurrentArea} on continent {numberOfCivsPerAreaKey}')
 			continent = self.mapModel.continent(numberOfCivsPerAreaKey)
 			if continent is not None:
-				area = HexArea(continent.points, 0)
+				landmass = continentIdentifiers == continent.identifier
+				region = StartRegion(
+					landmass,
+					SummedAreaTable(np.where(landmass, self.fertilityMap, 0)),
+					SummedAreaTable(landmass.astype(np.int32)),
+					0, 0, self.mapModel.width - 1, self.mapModel.height - 1
+				).shrunk()
 
 				# Divide this landmass into a number of regions equal to civs assigned here.
 				if 0 < numberOfCivsOnCurrentArea <= 12:
-					self.divideIntoRegions(int(numberOfCivsPerAreaValue), area)
+					self.divideIntoRegions(int(numberOfCivsPerAreaValue), region)
 
 		self.startAreas = sorted(self.startAreas, key=lambda startArea: len(startArea.area.points()),
 								 reverse=True)  # by: { $0.area.points.count > $1.area.points.count})
@@ -311,15 +773,29 @@ class StartPositioner:
 
 		print("----")
 
+	def _fertilityWithinRadius2(self) -> np.ndarray:
+		"""@return: flat array with the sum of the fertility of all tiles in radius 2 of each tile"""
+		fertility = self.fertilityMap.reshape(-1)
+		return fertility + neighborSum(fertility, hexNeighborIndices(self.mapModel.width, self.mapModel.height, 2))
+
 	def chooseLocations(self, aiLeaders, human):
 		combined: [LeaderType] = aiLeaders
 		combined.append(human)
-		random.shuffle(combined)
+		self.rng.shuffle(combined)
+
+		fertility = self.fertilityMap.reshape(-1)
+		fertilityWithinRadius2 = self._fertilityWithinRadius2()
+		radius2Neighbors = hexNeighborIndices(self.mapModel.width, self.mapModel.height, 2)
 
 		for leader in combined:
 			print(f'choose location for {leader.name()}')
 			civ = leader.civilization()
 
+			# count center 3 times
+			startingBias = tileArray(self.mapModel, lambda tile: civ.startingBias(tile, self.mapModel), np.float64)
+			locationValues = fertilityWithinRadius2 + 2 * fertility + \
+				startingBias + neighborSum(startingBias, radius2Neighbors) + 2 * startingBias
+
 			bestArea: Optional[StartArea] = None
 			bestValue: int = 0
 			bestLocation: HexPoint = HexPoint(0, 0)
@@ -338,24 +814,7 @@ class StartPositioner:
 					if smallestDistanceOther < 8:
 						continue
 
-					valueSum: int = 0
-					for loopPoint in startPoint.areaWithRadius(2):
-						if not self.mapModel.valid(loopPoint):
-							continue
-
-						tile = self.mapModel.tileAt(loopPoint)
-
-						tileValue: int = 0
-						# count center 3 times
-						if loopPoint == startPoint:
-							tileValue += 3 * self.fertilityMap.values[tile.point.y][tile.point.x]
-							tileValue += 3 * civ.startingBias(tile, self.mapModel)
-						else:
-							tileValue += self.fertilityMap.values[tile.point.y][tile.point.x]
-							tileValue += civ.startingBias(tile, self.mapModel)
-
-						valueSum += tileValue
-						# print("value of \(tile.point) => \(tileValue)")
+					valueSum = locationValues[startPoint.y * self.mapModel.width + startPoint.x]
 
 					if valueSum > bestValue:
 						bestValue = valueSum
@@ -394,13 +853,14 @@ class StartPositioner:
 				distance = leaderPos.location.distance(leader2Pos.location)
 				print(f'   - distance: {distance} to {leader2}')
 
-	def divideIntoRegions(self, numberOfDivisions: int, area: HexArea):
+	def divideIntoRegions(self, numberOfDivisions: int, region: StartRegion):
 		numDivides = 0
 		subDivisions = 0
 
 		if numberOfDivisions == 1:
-			averageFertility = 2.0  # float(area.points.map({self.fertilityMap[$0]!}).reduce(0, +)) / Double(len(area.points)
-			self.startAreas.append(StartArea(area, averageFertility, False))
+			numberOfPlots = region.numberOfPlots()
+			averageFertility = region.fertility() / numberOfPlots if numberOfPlots > 0 else 0.0
+			self.startAreas.append(StartArea(region.area(), averageFertility, False))
 			return
 		elif numberOfDivisions == 2:
 			numDivides = 2
@@ -429,37 +889,16 @@ class StartPositioner:
 		else:
 			raise Exception(f'Erroneous number of regional divisions : {numberOfDivisions}')
 
-		if numDivides == 2:
-			# area1, area2: HexArea
-			boundingBox = area.boundingBox()
-
-			if boundingBox.width() > boundingBox.height():
-				midX = area.center().x
-				(area1, area2) = area.divideHorizontally(midX)
-			else:
-				midY = area.center().y
-				(area1, area2) = area.divideVertically(midY)
-
-			self.divideIntoRegions(subDivisions, area1)
-			self.divideIntoRegions(subDivisions, area2)
-		elif numDivides == 3:
-			# area1, area2, area3, areaTmp: HexArea
-			boundingBox = area.boundingBox()
-
-			if boundingBox.width() > boundingBox.height():
-				(area1, areaTmp) = area.divideHorizontally(boundingBox.min_x + boundingBox.width() / 3)
-				(area2, area3) = areaTmp.divideHorizontally(boundingBox.min_x + 2 * boundingBox.width() / 3)
-			else:
-				(area1, areaTmp) = area.divideVertically(boundingBox.min_y + boundingBox.height() / 3)
-				(area2, area3) = areaTmp.divideVertically(boundingBox.min_y + 2 * boundingBox.height() / 3)
-
-			self.divideIntoRegions(subDivisions, area1)
-			self.divideIntoRegions(subDivisions, area2)
-			self.divideIntoRegions(subDivisions, area3)
-		else:
+		if numDivides != 2 and numDivides != 3:
 			raise Exception("wrong number of sub divisions")
 
+		# split along the longer side into parts of equal fertility
+		for subRegion in region.divide(numDivides):
+			self.divideIntoRegions(subDivisions, subRegion)
+
 	def chooseCityStateLocations(self, cityStateTypes: [CityStateType]):
+		fertilityWithinRadius2 = self._fertilityWithinRadius2()
+
 		for cityState in cityStateTypes:
 			bestArea: Optional[StartArea] = None
 			bestValue: int = 0
@@ -471,7 +910,6 @@ class StartPositioner:
 					continue
 
 				for startPoint in startArea.area:
-					valueSum: int = 0
 					tooClose: bool = False
 
 					# other start locations
@@ -483,12 +921,7 @@ class StartPositioner:
 					if tooClose:
 						continue
 
-					for loopPoint in startPoint.areaWithRadius(2):
-						if not self.mapModel.valid(loopPoint):
-							continue
-
-						tile = self.mapModel.tileAt(loopPoint)
-						valueSum += self.fertilityMap.values[tile.point.y][tile.point.x]
+					valueSum = fertilityWithinRadius2[startPoint.y * self.mapModel.width + startPoint.x]
 
 					if valueSum > bestValue:
 						bestValue = valueSum
@@ -517,8 +950,9 @@ class ContinentFinder:
 	notAnalyzed = -2
 	noContinent = -1
 
-	def __init__(self, width: int, height: int):
+	def __init__(self, width: int, height: int, rng: Optional[random.Random] = None):
 		self.continentIdentifiers = Array2D(width, height)
+		self.rng = rng if rng is not None else random
 		self.continentIdentifiers.fill(ContinentFinder.notAnalyzed)
 
 	def evaluated(self, value) -> bool:
@@ -558,7 +992,7 @@ class ContinentFinder:
 			if len(continent.points) < 10:
 				continue
 
-			pickContinentType = random.choice(availableContinentTypes)
+			pickContinentType = self.rng.choice(availableContinentTypes)
 			continent.continentType = pickContinentType
 			availableContinentTypes.remove(pickContinentType)
 
@@ -628,8 +1062,9 @@ class OceanFinder:
 	notAnalyzed = -2
 	noContinent = -1
 
-	def __init__(self, width: int, height: int):
+	def __init__(self, width: int, height: int, rng: Optional[random.Random] = None):
 		self.oceanIdentifiers = Array2D(width, height)
+		self.rng = rng if rng is not None else random
 		self.oceanIdentifiers.fill(OceanFinder.notAnalyzed)
 
 	def evaluated(self, value) -> bool:
@@ -669,7 +1104,7 @@ class OceanFinder:
 			if len(ocean.points) < 10:
 				continue
 
-			pickOceanType = random.choice(availableOceanTypes)
+			pickOceanType = self.rng.choice(availableOceanTypes)
 			ocean.oceanType = pickOceanType
 			availableOceanTypes.remove(pickOceanType)
 
@@ -736,8 +1171,22 @@ class OceanFinder:
 
 
 class MapGenerator:
+	# hillsBlendPercent = 0.45 -- Chance for flat land to become hills per near mountain. Requires at least 2 near mountains.
+	terrain_blend_range = 3  # range to smooth terrain (desert surrounded by plains turns to plains, etc)
+	terrain_blend_random = 0.6  # random modifier for terrain smoothing
+
+	# maximum percentage of the candidate tiles that get a feature
+	feature_percents = {
+		FeatureType.reef: 5,
+		FeatureType.oasis: 1,
+		FeatureType.marsh: 3,
+		FeatureType.rainforest: 15,
+		FeatureType.forest: 36
+	}
+
 	def __init__(self, options: MapOptions):
 		self.options = options
+		self.rng = GameRandom(options.seed)
 		self.width = options.mapSize.size().width()
 		self.height = options.mapSize.size().height()
 
@@ -762,7 +1211,7 @@ class MapGenerator:
 		mapModel = MapModel(self.width, self.height)
 
 		height_map = self._generateHeightMap()
-		moisture_map = HeightMap(self.width, self.height)
+		moisture_map = HeightMap(self.width, self.height, rng=self.rng.stream('moisture'))
 
 		callback(MapGeneratorState(0.1, _("TXT_KEY_MAP_GENERATOR_INITED")))
 
@@ -854,13 +1303,13 @@ class MapGenerator:
 
 	def _generateHeightMap(self):
 		if self.options.mapType == MapType.continents:
-			return HeightMap(self.width, self.height, 4)
+			return HeightMap(self.width, self.height, 4, rng=self.rng.stream('height'))
 		elif self.options.mapType == MapType.pangaea:
-			return HeightMap(self.width, self.height, 2)
+			return HeightMap(self.width, self.height, 2, rng=self.rng.stream('height'))
 		elif self.options.mapType == MapType.archipelago:
-			return HeightMap(self.width, self.height, 8)
+			return HeightMap(self.width, self.height, 8, rng=self.rng.stream('height'))
 		else:
-			return HeightMap(self.width, self.height, 4)  # fallback
+			return HeightMap(self.width, self.height, 4, rng=self.rng.stream('height'))  # fallback
 
 	def _fillFromElevation(self, height_map, threshold):
 
@@ -998,7 +1447,7 @@ class MapGenerator:
 								continue
 							neighbor_terrain = mapModel.terrainAt(neighbor)
 
-							if neighbor_terrain == TerrainType.shore and random.random() <= 0.2:
+							if neighbor_terrain == TerrainType.shore and self.rng.stream('terrain').random() <= 0.2:
 								is_adjacent_to_shallow_water = True
 								break
 
@@ -1024,7 +1473,7 @@ class MapGenerator:
 
 		# remove some mountains, where there are mountain neighbors
 		points = mapModel.points()
-		random.shuffle(points)
+		self.rng.stream('terrain').shuffle(points)
 
 		for point in points:
 			# just check mountains
@@ -1068,33 +1517,33 @@ class MapGenerator:
 			self._updateBiomeForTropic(point, mapModel, elevation, moisture)
 
 	def _updateBiomeForPolar(self, point: HexPoint, mapModel, elevation, moisture):
-		if random.random() > 0.5:
+		if self.rng.stream('terrain').random() > 0.5:
 			mapModel.modifyIsHillsAt(point, True)
 
 		mapModel.modifyTerrainAt(point, TerrainType.snow)
 
 	def _updateBiomeForSubpolar(self, point: HexPoint, mapModel, elevation, moisture):
-		if elevation > 0.7 and random.random() > 0.7:
+		if elevation > 0.7 and self.rng.stream('terrain').random() > 0.7:
 			mapModel.modifyIsHillsAt(point, True)
 			mapModel.modifyTerrainAt(point, TerrainType.snow)
 			return
 
-		if elevation > 0.5 and random.random() > 0.6:
+		if elevation > 0.5 and self.rng.stream('terrain').random() > 0.6:
 			mapModel.modifyTerrainAt(point, TerrainType.snow)
 			return
 
-		if random.random() > 0.85:
+		if self.rng.stream('terrain').random() > 0.85:
 			mapModel.modifyIsHillsAt(point, True)
 
 		mapModel.modifyTerrainAt(point, TerrainType.tundra)
 
 	def _updateBiomeForTemperate(self, point: HexPoint, mapModel, elevation, moisture):
-		if elevation > 0.7 and random.random() > 0.7:
+		if elevation > 0.7 and self.rng.stream('terrain').random() > 0.7:
 			mapModel.modifyIsHillsAt(point, True)
 			mapModel.modifyTerrainAt(point, TerrainType.grass)
 			return
 
-		if random.random() > 0.85:
+		if self.rng.stream('terrain').random() > 0.85:
 			mapModel.modifyIsHillsAt(point, True)
 
 		if moisture < 0.5:
@@ -1103,16 +1552,16 @@ class MapGenerator:
 			mapModel.modifyTerrainAt(point, TerrainType.grass)
 
 	def _updateBiomeForSubtropic(self, point: HexPoint, mapModel, elevation, moisture):
-		if elevation > 0.7 and random.random() > 0.7:
+		if elevation > 0.7 and self.rng.stream('terrain').random() > 0.7:
 			mapModel.modifyIsHillsAt(point, True)
 			mapModel.modifyTerrainAt(point, TerrainType.plains)
 			return
 
-		if random.random() > 0.85:
+		if self.rng.stream('terrain').random() > 0.85:
 			mapModel.modifyIsHillsAt(point, True)
 
 		if moisture < 0.2:
-			if random.random() < 0.3:
+			if self.rng.stream('terrain').random() < 0.3:
 				mapModel.modifyTerrainAt(point, TerrainType.desert)
 			else:
 				mapModel.modifyTerrainAt(point, TerrainType.plains)
@@ -1122,17 +1571,17 @@ class MapGenerator:
 			mapModel.modifyTerrainAt(point, TerrainType.grass)
 
 	def _updateBiomeForTropic(self, point: HexPoint, mapModel, elevation, moisture):
-		if elevation > 0.7 and random.random() > 0.7:
+		if elevation > 0.7 and self.rng.stream('terrain').random() > 0.7:
 			mapModel.modifyIsHillsAt(point, True)
 			mapModel.modifyTerrainAt(point, TerrainType.plains)
 			return
 
-		if random.random() > 0.85:
+		if self.rng.stream('terrain').random() > 0.85:
 			mapModel.modifyIsHillsAt(point, True)
 
 		# arid
 		if moisture < 0.3:
-			if random.random() < 0.4:
+			if self.rng.stream('terrain').random() < 0.4:
 				mapModel.modifyTerrainAt(point, TerrainType.desert)
 			else:
 				mapModel.modifyTerrainAt(point, TerrainType.plains)
@@ -1140,14 +1589,65 @@ class MapGenerator:
 			mapModel.modifyTerrainAt(point, TerrainType.plains)
 
 	def _blendTerrains(self, mapModel):
-		# hillsBlendPercent = 0.45 -- Chance for flat land to become hills per near mountain. Requires at least 2 near mountains.
-		terrain_blend_range = 3  # range to smooth terrain (desert surrounded by plains turns to plains, etc)
-		terrain_blend_random = 0.6  # random modifier for terrain smoothing
+		"""
+			smooths the terrain (desert surrounded by plains turns to plains, etc)
 
-		points = mapModel.points()
-		random.shuffle(points)
+			the terrain statistics of the neighborhoods of all tiles are computed at once with a neighborhood-count
+			kernel over the hex neighbor table and the rules of _blendTerrainRule are applied as masks. all tiles see
+			the terrain before the blending, _blendTerrainsPerTile is the per tile reference implementation.
+		"""
+		randPercents = self._terrainBlendRandomPercents(mapModel)
+		self._applyTerrainBlend(mapModel, randPercents)
+
+	def _numpyRandom(self, name: str) -> np.random.Generator:
+		# seeded from the stream, so the seed of the options still makes the generation reproducible
+		return np.random.default_rng(self.rng.stream(name).getrandbits(64))
+
+	def _terrainBlendRandomPercents(self, mapModel) -> np.ndarray:
+		rng = self._numpyRandom('terrain')
+		terrain_blend_random = MapGenerator.terrain_blend_random
 
-		for pt in points:
+		return 1.0 + rng.random(mapModel.width * mapModel.height) * 2.0 * terrain_blend_random - terrain_blend_random
+
+	@staticmethod
+	def _blendTerrainRule(terrain: TerrainType, feature: FeatureType, plot_percents: TileStatistics,
+						  rand_percent: float) -> (TerrainType, FeatureType):
+		"""
+			blending rule of a single (non-water, non-mountain) tile
+
+			@param terrain: terrain of the tile
+			@param feature: feature of the tile
+			@param plot_percents: terrain statistics of the neighborhood of the tile
+			@param rand_percent: random modifier of the tile
+			@return: blended terrain and feature of the tile
+		"""
+		if terrain == TerrainType.grass:
+			if plot_percents.desert + plot_percents.snow >= 0.33 * rand_percent:
+				terrain = TerrainType.plains
+				if feature == FeatureType.marsh:
+					feature = FeatureType.forest
+		elif terrain == TerrainType.plains:
+			if plot_percents.desert >= 0.5 * rand_percent:
+				# plot:SetTerrainType(TerrainTypes.TERRAIN_DESERT, true, true)
+				pass
+		elif terrain == TerrainType.desert:
+			if plot_percents.grass + plot_percents.snow >= 0.25 * rand_percent:
+				terrain = TerrainType.plains
+		elif feature == FeatureType.rainforest or feature == FeatureType.marsh:
+			if plot_percents.snow + plot_percents.tundra + plot_percents.desert >= 0.25 * rand_percent:
+				feature = FeatureType.none
+		elif terrain == TerrainType.tundra:
+			if 2.0 * plot_percents.grass + plot_percents.plains + plot_percents.desert >= 0.5 * rand_percent:
+				terrain = TerrainType.plains
+
+		return terrain, feature
+
+	def _blendTerrainsPerTile(self, mapModel, randPercents: np.ndarray):
+		"""reference implementation of _applyTerrainBlend that evaluates _blendTerrainRule tile by tile"""
+		changes = []
+		mountain_passes = []
+
+		for pt in mapModel.points():
 			tile: Tile = mapModel.tileAt(pt)
 
 			if tile.terrain().isWater():
@@ -1160,34 +1660,84 @@ class MapGenerator:
 					if not mapModel.valid(neighbor):
 						continue
 
-					neighbor_feature = mapModel.featureAt(neighbor)
-
-					if neighbor_feature == FeatureType.mountains:
+					if mapModel.featureAt(neighbor) == FeatureType.mountains:
 						num_near_mountains = num_near_mountains + 1
 
 				if 2 <= num_near_mountains <= 4:
-					self._createPossibleMountainPass(mapModel, pt)
+					mountain_passes.append(pt)
 			else:
-				rand_percent = 1.0 + random.random() * 2.0 * terrain_blend_random - terrain_blend_random
-				plot_percents = mapModel.tileStatistics(pt, terrain_blend_range)
-				if tile.terrain == TerrainType.grass:
-					if plot_percents.desert + plot_percents.snow >= 0.33 * rand_percent:
-						tile.terrain = TerrainType.plains
-						if tile._featureValue == FeatureType.marsh:
-							tile._featureValue = FeatureType.forest
-				elif tile.terrain == TerrainType.plains:
-					if plot_percents.desert >= 0.5 * rand_percent:
-						# plot:SetTerrainType(TerrainTypes.TERRAIN_DESERT, true, true)
-						pass
-				elif tile.terrain == TerrainType.desert:
-					if plot_percents.grass + plot_percents.snow >= 0.25 * rand_percent:
-						tile.terrain = TerrainType.plains
-				elif tile._featureValue == FeatureType.rainforest and tile._featureValue == FeatureType.marsh:
-					if plot_percents.snow + plot_percents.tundra + plot_percents.desert >= 0.25 * rand_percent:
-						tile._featureValue = FeatureType.none
-				elif tile.terrain == TerrainType.tundra:
-					if 2.0 * plot_percents.grass + plot_percents.plains + plot_percents.desert >= 0.5 * rand_percent:
-						tile.terrain = TerrainType.plains
+				plot_percents = mapModel.tileStatistics(pt, MapGenerator.terrain_blend_range)
+				rand_percent = randPercents[pt.y * mapModel.width + pt.x]
+				terrain, feature = self._blendTerrainRule(tile.terrain(), tile.feature(), plot_percents, rand_percent)
+
+				if terrain != tile.terrain() or feature != tile.feature():
+					changes.append((tile, terrain, feature))
+
+		for tile, terrain, feature in changes:
+			tile.setTerrain(terrain)
+			tile.setFeature(feature)
+
+		for pt in mountain_passes:
+			self._createPossibleMountainPass(mapModel, pt)
+
+	def _applyTerrainBlend(self, mapModel, randPercents: np.ndarray):
+		terrainCodes = enumCodes(TerrainType)
+		featureCodes = enumCodes(FeatureType)
+		terrainMembers = enumMembers(TerrainType)
+		featureMembers = enumMembers(FeatureType)
+
+		terrains = tileArray(mapModel, lambda tile: terrainCodes[tile._terrainValue], np.int32)
+		features = tileArray(mapModel, lambda tile: featureCodes[tile._featureValue], np.int32)
+		isWater = enumTable(TerrainType, lambda terrain: terrain.isWater(), np.bool_)[terrains]
+
+		neighbors = hexNeighborIndices(mapModel.width, mapModel.height, 1)
+		area = hexNeighborIndices(mapModel.width, mapModel.height, MapGenerator.terrain_blend_range)
+		validTiles = 1.0 + (area >= 0).sum(axis=1)
+
+		def percents(terrain: TerrainType) -> np.ndarray:
+			# the neighborhood of tileStatistics includes the tile itself
+			mask = terrains == terrainCodes[terrain]
+			return (mask + neighborCount(mask, area)) / validTiles
+
+		desert = percents(TerrainType.desert)
+		grass = percents(TerrainType.grass)
+		plains = percents(TerrainType.plains)
+		snow = percents(TerrainType.snow)
+		tundra = percents(TerrainType.tundra)
+
+		mountains = features == featureCodes[FeatureType.mountains]
+		land = ~isWater
+		blend = land & ~mountains
+
+		isGrass = blend & (terrains == terrainCodes[TerrainType.grass])
+		isDesert = blend & (terrains == terrainCodes[TerrainType.desert])
+		others = blend & ~isGrass & ~isDesert & (terrains != terrainCodes[TerrainType.plains])
+		isRainforestOrMarsh = others & (
+			(features == featureCodes[FeatureType.rainforest]) | (features == featureCodes[FeatureType.marsh]))
+		isTundra = others & ~isRainforestOrMarsh & (terrains == terrainCodes[TerrainType.tundra])
+
+		grassToPlains = isGrass & (desert + snow >= 0.33 * randPercents)
+		desertToPlains = isDesert & (grass + snow >= 0.25 * randPercents)
+		removeFeature = isRainforestOrMarsh & (snow + tundra + desert >= 0.25 * randPercents)
+		tundraToPlains = isTundra & (2.0 * grass + plains + desert >= 0.5 * randPercents)
+
+		newTerrains = terrains.copy()
+		newTerrains[grassToPlains | desertToPlains | tundraToPlains] = terrainCodes[TerrainType.plains]
+		newFeatures = features.copy()
+		newFeatures[grassToPlains & (features == featureCodes[FeatureType.marsh])] = featureCodes[FeatureType.forest]
+		newFeatures[removeFeature] = featureCodes[FeatureType.none]
+
+		# write back only the changed tiles
+		for index in np.nonzero((newTerrains != terrains) | (newFeatures != features))[0]:
+			y, x = divmod(int(index), mapModel.width)
+			tile = mapModel.tileAt(x, y)
+			tile.setTerrain(terrainMembers[newTerrains[index]])
+			tile.setFeature(featureMembers[newFeatures[index]])
+
+		mountainNeighbors = neighborCount(mountains, neighbors)
+		for index in np.nonzero(land & mountains & (mountainNeighbors >= 2) & (mountainNeighbors <= 4))[0]:
+			y, x = divmod(int(index), mapModel.width)
+			self._createPossibleMountainPass(mapModel, HexPoint(x, y))
 
 	def _createPossibleMountainPass(self, mapModel, point):
 
@@ -1246,68 +1796,39 @@ class MapGenerator:
 	def _placeResources(self, mapModel):
 		resources = filter(lambda res: res.usage() != ResourceUsage.artifacts, list(ResourceType))
 		resources = sorted(resources, key=lambda res: res.placementOrder(), reverse=True)
+		resources = [resource for resource in resources if resource != ResourceType.none]
+
+		placer = ResourcePlacer(mapModel, resources, rng=self.rng.stream('resources'))
 
 		# Add resources
 		for resource in resources:
-			if resource == ResourceType.none:
-				continue
-
-			self._addNonUniqueResource(mapModel, resource)
+			self._addNonUniqueResource(mapModel, placer, resource)
 
 		print("-------------------------------")
 
 		# Show number of resources placed
 		for resource in resources:
+			print(f'Counted {placer.numberOfPlaced(resource)} of {resource.name()} placed on map')
 
-			if resource == ResourceType.none:
-				continue
-
-			resource_placed = 0
-
-			for x in range(self.width):
-				for y in range(self.height):
-					point = HexPoint(x, y)
-					tile = mapModel.tileAt(point)
-
-					if tile._resourceValue == resource:
-						resource_placed += 1
-
-			print(f'Counted {resource_placed} of {resource.name()} placed on map')
-
-	def _addNonUniqueResource(self, mapModel, resource):
-		resource_count = self._numberOfResourcesToAdd(mapModel, resource)
+	def _addNonUniqueResource(self, mapModel, placer: ResourcePlacer, resource):
+		resource_count = self._numberOfResourcesToAdd(mapModel, resource, placer.info(resource))
 
 		if resource_count == 0:
 			return
 
-		points = mapModel.points()
-		random.shuffle(points)
-
-		for pt in points:
-			tile = mapModel.tileAt(pt)
-
-			if tile.canHaveResource(mapModel, resource, ignore_latitude=True):
-				resource_num = 1
-
-				if resource == ResourceType.horses or resource == ResourceType.iron or resource == ResourceType.niter or resource == ResourceType.aluminum:
-					resource_num = 2
-				elif resource == ResourceType.oil or resource == ResourceType.coal or resource == ResourceType.uranium:
-					resource_num = 3
-
-				tile._resourceQuantity = resource_num
-				tile._resourceValue = resource
-
-				resource_count -= 1
+		resource_num = 1
 
-				# FIXME: groups
+		if resource == ResourceType.horses or resource == ResourceType.iron or resource == ResourceType.niter or resource == ResourceType.aluminum:
+			resource_num = 2
+		elif resource == ResourceType.oil or resource == ResourceType.coal or resource == ResourceType.uranium:
+			resource_num = 3
 
-			if resource_count <= 0:
-				return
+		# FIXME: groups
+		placer.place(resource, resource_count, resource_num)
 
-	def _numberOfResourcesToAdd(self, mapModel, resource: ResourceType) -> int:
+	def _numberOfResourcesToAdd(self, mapModel, resource: ResourceType, info: ResourcesInfo) -> int:
 		# https://github.com/Gedemon/Civ5-YnAEMP/blob/db7cd1bc6a0684411aba700838184bcc6272b166/Override/WorldBuilderRandomItems.lua
 		# get info about current resource in map
-		info = self.numberOfResources(mapModel, resource)
 		mapFactor = mapModel.width * mapModel.height * 100 / (
 				MapSize.standard.size().width() * MapSize.standard.size().height())
 		absolute_amount = max(1, resource.baseAmount() * mapFactor / 100)
@@ -1317,7 +1838,7 @@ class MapGenerator:
 		if resource.absoluteVarPercent() > 0:
 			rand1 = absolute_amount - (absolute_amount * resource.absoluteVarPercent() / 100)
 			rand2 = absolute_amount + (absolute_amount * resource.absoluteVarPercent() / 100)
-			absolute_amount = int(random.uniform(rand1, rand2))
+			absolute_amount = int(self.rng.stream('resources').uniform(rand1, rand2))
 
 		absolute_amount -= info.already_placed
 
@@ -1347,31 +1868,59 @@ class MapGenerator:
 		return ResourcesInfo(resource=resource, num_possible=num_possible, already_placed=already_placed)
 
 	def _placeRivers(self, rivers, mapModel, height_map):
-		pass
+		riverGenerator = RiverGenerator(mapModel, height_map)
+		priorities = self._numpyRandom('rivers').random(2 * mapModel.width * mapModel.height)
+
+		self.spring_locations = riverGenerator.apply(rivers, priorities)
+
+		print(f'Number of River Springs: {len(self.spring_locations)}')
 
 	def _refineFeatures(self, mapModel):
-		# presets
-		rain_forest_percent = 15
-		forest_percent = 36
-		marsh_percent = 3
-		oasis_percent = 1
-		reef_percent = 5
+		"""
+			adds ice, reefs, floodplains, oasis, marsh, rainforest and forest
+
+			the candidates of all features are computed as masks. the capped features are handed out in a random
+			order until their percentage of the candidates is reached - which is the same as taking the first n
+			eligible candidates in that order, so no per tile loop is needed. _refineFeaturesPerTile is the per tile
+			reference implementation.
+		"""
+		priorities, random_modifiers, floodplain_rolls = self._featureRandomValues(mapModel)
+		counts = self._applyFeatureRefinement(mapModel, priorities, random_modifiers, floodplain_rolls)
 
+		# stats
+		print("----------------------------------------------")
+		print(f'Number of Ices: {counts[FeatureType.ice]}')
+		print(f'Number of Reefs: {counts[FeatureType.reef]} / {self.feature_percents[FeatureType.reef]}%')
+		print(f'Number of Floodplains: {counts[FeatureType.floodplains]}')
+		print(f'Number of Marshes: {counts[FeatureType.marsh]} / {self.feature_percents[FeatureType.marsh]}%')
+		print(f'Number of Jungle: {counts[FeatureType.rainforest]} / {self.feature_percents[FeatureType.rainforest]}%')
+		print(f'Number of Forest: {counts[FeatureType.forest]} / {self.feature_percents[FeatureType.forest]}%')
+		print(f'Number of Oasis: {counts[FeatureType.oasis]} / {self.feature_percents[FeatureType.oasis]}%')
+		print('----------------------------------------------')
+
+	def _featureRandomValues(self, mapModel) -> (np.ndarray, np.ndarray, np.ndarray):
+		"""
+			@return: placement priority (the order of the candidates), floodplains random modifier and floodplains
+				roll of each tile
+		"""
+		rng = self._numpyRandom('features')
+		count = mapModel.width * mapModel.height
+
+		return rng.random(count), rng.uniform(0.0, 0.1, count), rng.uniform(0.0, 1.0, count)
+
+	def _refineFeaturesPerTile(self, mapModel, priorities: np.ndarray, random_modifiers: np.ndarray,
+							   floodplain_rolls: np.ndarray) -> dict:
+		"""reference implementation of _applyFeatureRefinement that places the features tile by tile"""
 		water_tiles_with_ice_possible = []
 		water_tiles_with_reef_possible = []
 		land_tiles_with_feature_possible = []
 
-		# statistics
-		ice_features = 0
-		reef_features = 0
-		flood_plains_features = 0
-		oasis_features = 0
-		marsh_features = 0
-		rain_forest_features = 0
-		forest_features = 0
+		counts = {feature: 0 for feature in self.feature_percents.keys()}
+		counts[FeatureType.ice] = 0
+		counts[FeatureType.floodplains] = 0
 
-		for x in range(self.width):
-			for y in range(self.height):
+		for y in range(mapModel.height):
+			for x in range(mapModel.width):
 				point = HexPoint(x, y)
 
 				tile = mapModel.tileAt(point)
@@ -1383,7 +1932,7 @@ class MapGenerator:
 				if tile.terrain().isWater():
 					can_have_ice = False
 					if mapModel.canHaveFeature(point, FeatureType.ice) and not mapModel.riverAt(point) and (
-						y == 0 or y == self.height - 1):
+						y == 0 or y == mapModel.height - 1):
 						water_tiles_with_ice_possible.append(point)
 						can_have_ice = True
 
@@ -1392,82 +1941,124 @@ class MapGenerator:
 				else:
 					land_tiles_with_feature_possible.append(point)
 
-		# ice ice baby
+		def _priority(pt):
+			return priorities[pt.y * mapModel.width + pt.x]
+
 		for ice_location in water_tiles_with_ice_possible:
 			mapModel.modifyFeatureAt(ice_location, FeatureType.ice)
-			ice_features += 1
+			counts[FeatureType.ice] += 1
 
-		# reef reef baby => 10% chance for reefs
-		random.shuffle(water_tiles_with_reef_possible)
-		for reef_location in water_tiles_with_reef_possible:
-			if reef_features * 100 / len(water_tiles_with_reef_possible) > reef_percent:
+		for reef_location in sorted(water_tiles_with_reef_possible, key=_priority):
+			if counts[FeatureType.reef] * 100 / len(water_tiles_with_reef_possible) > self.feature_percents[FeatureType.reef]:
 				continue
 
-			# print("add reef at \(reefLocation)")
 			mapModel.modifyFeatureAt(reef_location, FeatureType.reef)
-			reef_features += 1
+			counts[FeatureType.reef] += 1
+
+		number_of_land_tiles = len(land_tiles_with_feature_possible)
 
-		# second pass, add features to all land plots as appropriate based on the count and percentage of that type
-		random.shuffle(land_tiles_with_feature_possible)
-		for feature_location in land_tiles_with_feature_possible:
+		def _belowPercent(feature_type):
+			return counts[feature_type] * 100 / number_of_land_tiles <= self.feature_percents[feature_type]
 
+		for feature_location in sorted(land_tiles_with_feature_possible, key=_priority):
+			index = feature_location.y * mapModel.width + feature_location.x
 			feature_tile = mapModel.tileAt(feature_location)
 			distance = self.distance_to_coast.values[feature_location.y][feature_location.x]
 
-			floodplains_desert_modifier = 0.2 if feature_tile.terrain == TerrainType.desert else 0.0
-			random_modifier = random.uniform(0.0, 0.1)
+			floodplains_desert_modifier = 0.2 if feature_tile.terrain() == TerrainType.desert else 0.0
+			random_modifier = random_modifiers[index]
 			floodplains_possibility = 0.5 if distance < 3 else 0.1 + floodplains_desert_modifier + random_modifier
 
 			if mapModel.canHaveFeature(feature_location, FeatureType.floodplains) and \
-				floodplains_possibility > random.uniform(0.0, 1.0):
-
+				floodplains_possibility > floodplain_rolls[index]:
 				mapModel.modifyFeatureAt(feature_location, FeatureType.floodplains)
-				flood_plains_features += 1
-
+				counts[FeatureType.floodplains] += 1
 				continue
-
-			elif mapModel.canHaveFeature(feature_location, FeatureType.oasis) and \
-				(oasis_features * 100 / len(land_tiles_with_feature_possible)) <= oasis_percent:
-
+			elif mapModel.canHaveFeature(feature_location, FeatureType.oasis) and _belowPercent(FeatureType.oasis):
 				mapModel.modifyFeatureAt(feature_location, FeatureType.oasis)
-				oasis_features += 1
-
+				counts[FeatureType.oasis] += 1
 				continue
 
-			if mapModel.canHaveFeature(feature_location, FeatureType.marsh) and \
-				(marsh_features * 100 / len(land_tiles_with_feature_possible)) <= marsh_percent:
-				# First check to add Marsh
-				mapModel.modifyFeatureAt(feature_location, FeatureType.marsh)
-				marsh_features += 1
-			elif mapModel.canHaveFeature(feature_location, FeatureType.rainforest) and \
-				(rain_forest_features * 100 / len(land_tiles_with_feature_possible)) <= rain_forest_percent:
-
-				# First check to add Jungle
-				mapModel.modifyFeatureAt(feature_location, FeatureType.rainforest)
-				rain_forest_features += 1
-			elif mapModel.canHaveFeature(feature_location, FeatureType.forest) and \
-				(forest_features * 100 / len(land_tiles_with_feature_possible)) <= forest_percent:
+			for feature_type in [FeatureType.marsh, FeatureType.rainforest, FeatureType.forest]:
+				if mapModel.canHaveFeature(feature_location, feature_type) and _belowPercent(feature_type):
+					mapModel.modifyFeatureAt(feature_location, feature_type)
+					counts[feature_type] += 1
+					break
 
-				# First check to add Forest
-				mapModel.modifyFeatureAt(feature_location, FeatureType.forest)
-				forest_features += 1
+		return counts
 
-		# stats
-		print("----------------------------------------------")
-		print(f'Number of Ices: {ice_features}')
-		print(f'Number of Reefs: {reef_features} / {reef_percent}%')
-		print(f'Number of Floodplains: {flood_plains_features}')
-		print(f'Number of Marshes: {marsh_features} / {marsh_percent}%')
-		print(f'Number of Jungle: {rain_forest_features} / {rain_forest_percent}%')
-		print(f'Number of Forest: {forest_features} / {forest_percent}%')
-		print(f'Number of Oasis: {oasis_features} / {oasis_percent}%')
-		print('----------------------------------------------')
+	def _applyFeatureRefinement(self, mapModel, priorities: np.ndarray, random_modifiers: np.ndarray,
+								floodplain_rolls: np.ndarray) -> dict:
+		"""
+			@return: dict with the number of placed tiles per feature
+		"""
+		terrainCodes = enumCodes(TerrainType)
+		featureCodes = enumCodes(FeatureType)
+		count = mapModel.width * mapModel.height
+
+		terrains = tileArray(mapModel, lambda tile: terrainCodes[tile._terrainValue], np.int32)
+		features = tileArray(mapModel, lambda tile: featureCodes[tile._featureValue], np.int32)
+		rivers = tileArray(mapModel, lambda tile: tile._riverValue > 0, np.bool_)
+		isWater = enumTable(TerrainType, lambda terrain: terrain.isWater(), np.bool_)[terrains]
+		ys = np.arange(count) // mapModel.width
+
+		# all rules only depend on the tile itself
+		signatures = TileSignatures(mapModel)
+		impassable = signatures.mask(
+			lambda tile: tile.isImpassable(UnitMovementType.walk) and tile.isImpassable(UnitMovementType.swim))
+
+		def _possible(feature_type: FeatureType) -> np.ndarray:
+			return signatures.mask(lambda tile: mapModel.canHaveFeature(tile.point, feature_type))
+
+		def _inOrder(mask: np.ndarray) -> np.ndarray:
+			indices = np.nonzero(mask)[0]
+			return indices[np.argsort(priorities[indices], kind='stable')]
+
+		def _firstBelowPercent(order: np.ndarray, eligible: np.ndarray, total: int, percent: int) -> np.ndarray:
+			# the n-th eligible candidate (in order) is taken, when n * 100 / total <= percent
+			eligibleInOrder = eligible[order]
+			rank = np.cumsum(eligibleInOrder) - 1
+			return order[eligibleInOrder & (rank * 100 / max(total, 1) <= percent)]
+
+		candidates = ~impassable & (features == featureCodes[FeatureType.none])
+		placed = {}
+
+		ice = candidates & isWater & _possible(FeatureType.ice) & ~rivers & ((ys == 0) | (ys == mapModel.height - 1))
+		placed[FeatureType.ice] = np.nonzero(ice)[0]
+
+		reefCandidates = candidates & isWater & ~ice & _possible(FeatureType.reef)
+		placed[FeatureType.reef] = _firstBelowPercent(
+			_inOrder(reefCandidates), reefCandidates, int(reefCandidates.sum()), self.feature_percents[FeatureType.reef])
+
+		landCandidates = candidates & ~isWater
+		landOrder = _inOrder(landCandidates)
+		numberOfLandTiles = int(landCandidates.sum())
+
+		distance = np.array(self.distance_to_coast.values, dtype=np.int64).reshape(-1)
+		desertModifier = np.where(terrains == terrainCodes[TerrainType.desert], 0.2, 0.0)
+		possibility = np.where(distance < 3, 0.5, 0.1 + desertModifier + random_modifiers)
+		floodplains = landCandidates & _possible(FeatureType.floodplains) & (possibility > floodplain_rolls)
+		placed[FeatureType.floodplains] = np.nonzero(floodplains)[0]
+
+		remaining = landCandidates & ~floodplains
+		for feature_type in [FeatureType.oasis, FeatureType.marsh, FeatureType.rainforest, FeatureType.forest]:
+			indices = _firstBelowPercent(landOrder, remaining & _possible(feature_type), numberOfLandTiles,
+										 self.feature_percents[feature_type])
+			remaining[indices] = False
+			placed[feature_type] = indices
+
+		for feature_type, indices in placed.items():
+			for index in indices:
+				y, x = divmod(int(index), mapModel.width)
+				mapModel.tileAt(x, y).setFeature(feature_type)
+
+		return {feature_type: len(indices) for feature_type, indices in placed.items()}
 
 	def _refineNaturalWonders(self, mapModel):
 		pass
 
 	def _identifyContinents(self, mapModel):
-		finder = ContinentFinder(mapModel.width, mapModel.height)
+		finder = ContinentFinder(mapModel.width, mapModel.height, rng=self.rng.stream('continents'))
 
 		continents = finder.executeOn(mapModel)
 
@@ -1481,7 +2072,7 @@ class MapGenerator:
 		print(f'found: {len(continents)} continents')
 
 	def _identifyOceans(self, mapModel):
-		finder = OceanFinder(mapModel.width, mapModel.height)
+		finder = OceanFinder(mapModel.width, mapModel.height, rng=self.rng.stream('oceans'))
 
 		oceans = finder.executeOn(mapModel)
 
@@ -1498,24 +2089,22 @@ class MapGenerator:
 		numberOfPlayers = self.options.mapSize.numberOfPlayers()
 		numberOfCityStates = self.options.mapSize.numberOfCityStates()
 
-		startPositioner = StartPositioner(mapModel, numberOfPlayers, numberOfCityStates)
+		rng = self.rng.stream('startPositions')
+		startPositioner = StartPositioner(mapModel, numberOfPlayers, numberOfCityStates, rng=rng)
 		startPositioner.generateRegions()
 
-		# reset random number
-		# srand48(self.options.seed)
-
 		aiLeaders: [LeaderType] = self.options.aiLeaders
 
 		if len(aiLeaders) == 0:
 			exclude_leaders = [self.options.leader, LeaderType.barbar, LeaderType.none, LeaderType.cityState]
 			aiLeaders = list(filter(lambda leader: leader not in exclude_leaders, list(LeaderType)))
-			aiLeaders = random.choices(aiLeaders, k=(numberOfPlayers - 1))
+			aiLeaders = rng.choices(aiLeaders, k=(numberOfPlayers - 1))
 
 		cityStateTypes: [CityStateType] = []
 		for _ in range(self.options.mapSize.numberOfCityStates()):
 			selectedCityStates: [CityStateType] = list(
 				filter(lambda cityState: cityState not in cityStateTypes, list(CityStateType)))
-			selectedCityState = random.choice(selectedCityStates)
+			selectedCityState = rng.choice(selectedCityStates)
 			cityStateTypes.append(selectedCityState)
 
 		startPositioner.chooseLocations(aiLeaders, self.options.leader)
@@ -0,0 +1,120 @@
+"""
+	incremental hash of the map state (see core.hashing)
+
+	the hasher of a map is created by MapModel.enableHashing() and updated by the setters of the tiles and by adding,
+	moving and removing units and cities. code that writes the attributes of the tiles directly (like the generator or
+	the loaders) has to call enableHashing() again, it computes the hash from scratch.
+"""
+from core.hashing import ZobristHash, zobristKey, mix64, valueCode
+
+
+class HashComponent:
+	"""components of the map state that are part of the hash"""
+	terrain = 1
+	hills = 2
+	feature = 3
+	resource = 4
+	river = 5
+	route = 6
+	improvement = 7
+	improvementPillaged = 8
+	district = 9
+	wonder = 10
+	owner = 11
+	unit = 12
+	city = 13
+
+
+def tileComponents(tile) -> [(int, object)]:
+	"""@return: list of component and value of the tile"""
+	return [
+		(HashComponent.terrain, tile._terrainValue),
+		(HashComponent.hills, tile._isHills),
+		(HashComponent.feature, tile._featureValue),
+		(HashComponent.resource, tile._resourceValue),
+		(HashComponent.river, tile._riverValue),
+		(HashComponent.route, tile._route),
+		(HashComponent.improvement, tile._improvementValue),
+		(HashComponent.improvementPillaged, tile._improvementPillagedValue),
+		(HashComponent.district, tile._districtValue),
+		(HashComponent.wonder, tile._wonderValue),
+		(HashComponent.owner, tile._owner),
+	]
+
+
+class MapHasher:
+	def __init__(self, mapModel):
+		self.width = mapModel.width
+		self._hash = ZobristHash()
+		# keys of the units and cities by id() - units and cities compare by value and can't be used as keys
+		self._unitKeys = {}
+		self._cityKeys = {}
+
+		for y in range(mapModel.height):
+			for x in range(mapModel.width):
+				tile = mapModel.tiles.values[y][x]
+				index = self._index(tile.point)
+
+				for component, value in tileComponents(tile):
+					self._hash.add(zobristKey(index, component, value))
+
+		for unit in mapModel._units:
+			self.addUnit(unit)
+
+		for city in mapModel._cities:
+			self.addCity(city)
+
+	def _index(self, point) -> int:
+		return point.y * self.width + point.x
+
+	def value(self) -> int:
+		return self._hash.value
+
+	def tileChanged(self, point, component: int, oldValue, newValue):
+		"""
+			@param point: location of the tile
+			@param component: HashComponent that changed
+			@param oldValue: value before the change
+			@param newValue: value after the change
+		"""
+		index = self._index(point)
+		self._hash.replace(zobristKey(index, component, oldValue), zobristKey(index, component, newValue))
+
+	def _unitKey(self, unit, location) -> int:
+		return mix64(zobristKey(self._index(location), HashComponent.unit, unit.unitType) ^ valueCode(unit.player))
+
+	def addUnit(self, unit):
+		key = self._unitKey(unit, unit.location)
+		self._unitKeys[id(unit)] = key
+		self._hash.add(key)
+
+	def removeUnit(self, unit):
+		key = self._unitKeys.pop(id(unit), None)
+
+		if key is not None:
+			self._hash.remove(key)
+
+	def moveUnit(self, unit, location):
+		"""
+			@param unit: unit that moves (units that are not on the map are ignored)
+			@param location: new location of the unit
+		"""
+		key = self._unitKeys.get(id(unit))
+
+		if key is None:
+			return
+
+		newKey = self._unitKey(unit, location)
+		self._unitKeys[id(unit)] = newKey
+		self._hash.replace(key, newKey)
+
+	def addCity(self, city):
+		key = zobristKey(self._index(city.location), HashComponent.city, city.player)
+		self._cityKeys[id(city)] = key
+		self._hash.add(key)
+
+	def removeCity(self, city):
+		key = self._cityKeys.pop(id(city), None)
+
+		if key is not None:
+			self._hash.remove(key)
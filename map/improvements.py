@@ -4,7 +4,7 @@ from game.civilizations import CivilizationType
 from game.flavors import Flavor
 from game.types import TechType, CivicType
 from map.types import Yields, TerrainType, FeatureType, ResourceType
-from core.base import ExtendedEnum, InvalidEnumError
+from core.base import ExtendedEnum, InvalidEnumError, catalog
 
 
 class ImprovementTypeData:
@@ -44,45 +44,13 @@ class ImprovementType(ExtendedEnum):
 	goodyHut = 'goodyHut'
 	ruins = 'ruins'
 
-	@staticmethod
-	def fromName(improvementName: str) -> ImprovementType:
-		if improvementName == 'ImprovementType.none' or improvementName == 'none':
-			return ImprovementType.none
-		elif improvementName == 'ImprovementType.barbarianCamp' or improvementName == 'barbarianCamp':
-			return ImprovementType.barbarianCamp
-		elif improvementName == 'ImprovementType.mine' or improvementName == 'mine':
-			return ImprovementType.mine
-		elif improvementName == 'ImprovementType.plantation' or improvementName == 'plantation':
-			return ImprovementType.plantation
-		elif improvementName == 'ImprovementType.farm' or improvementName == 'farm':
-			return ImprovementType.farm
-		elif improvementName == 'ImprovementType.quarry' or improvementName == 'quarry':
-			return ImprovementType.quarry
-		elif improvementName == 'ImprovementType.camp' or improvementName == 'camp':
-			return ImprovementType.camp
-		elif improvementName == 'ImprovementType.fishingBoats' or improvementName == 'fishingBoats':
-			return ImprovementType.fishingBoats
-		elif improvementName == 'ImprovementType.pasture' or improvementName == 'pasture':
-			return ImprovementType.pasture
-		elif improvementName == 'ImprovementType.oilWell' or improvementName == 'oilWell':
-			return ImprovementType.oilWell
-		elif improvementName == 'ImprovementType.fort' or improvementName == 'fort':
-			return ImprovementType.fort
-		elif improvementName == 'ImprovementType.citadelle' or improvementName == 'citadelle':
-			return ImprovementType.citadelle
-		elif improvementName == 'ImprovementType.goodyHut' or improvementName == 'goodyHut':
-			return ImprovementType.goodyHut
-		elif improvementName == 'ImprovementType.ruins' or improvementName == 'ruins':
-			return ImprovementType.ruins
-
-		raise Exception(f'No matching case for improvementName: "{improvementName}"')
-
 	def name(self):
 		return self._data().name
 
 	def canBePillaged(self) -> bool:
 		return self._data().canBePillaged
 
+	@catalog
 	def _data(self) -> ImprovementTypeData:
 		if self == ImprovementType.none:
 			return ImprovementTypeData(
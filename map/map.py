@@ -1,19 +1,16 @@
 from typing import Optional, Union
 
 from core.types import EraType
-from game.cities import City
 from game.cityStates import CityStateType
 from game.civilizations import LeaderType
 from game.districts import DistrictType
-from game.governors import GovernorType, GovernorTitle
-from game.players import Player
 from game.states.builds import BuildType
 from game.types import TechType, CivicType
 from game.unitTypes import UnitMapType
-from game.units import Unit
 from game.wonders import WonderType
 from map.areas import Continent, ContinentType, Ocean, OceanType
 from map.base import HexPoint, HexDirection, Size, Array2D, HexArea
+from map.hashing import HashComponent, MapHasher
 from map.improvements import ImprovementType
 from map.types import TerrainType, FeatureType, ResourceType, ClimateZone, RouteType, UnitMovementType, MapSize, \
 	Tutorials, Yields, AppealLevel, UnitDomainType, ResourceUsage, StartLocation, ArchaeologicalRecordType
@@ -25,10 +22,12 @@ class Tile:
 
 
 class WeightedBuildList(WeightedBaseList):
+	# every tile has one of these lists - copying a prepared dict is much faster than iterating the enum
+	_emptyWeights = dict.fromkeys(list(BuildType), 0.0)
+
 	def __init__(self):
 		super().__init__()
-		for build in list(BuildType):
-			self.setWeight(0.0, build)
+		self.update(WeightedBuildList._emptyWeights)
 
 
 class FlowDirection(ExtendedEnum):
@@ -70,6 +69,10 @@ class Tile:
 
 		it has a TerrainType, FeatureType, ResourceType and a boolean value for being hilly (or not)
 	"""
+	# hasher of the map (set by MapModel.enableHashing), the setters keep the hash of the map up to date
+	_hasher: Optional[MapHasher] = None
+	# incremented by the setters, a SnapshotWriter only pickles the tile again when it changed
+	_version: int = 0
 
 	def __init__(self, point_or_dict: Union[HexPoint, dict], terrain: Optional[TerrainType]=None):
 		"""
@@ -103,7 +106,7 @@ class Tile:
 			self._wonderValue = WonderType.none
 			self._owner = None
 			self._workingCity = None
-			self._buildProgressList = WeightedBuildList()
+			self._buildProgressList = None  # created with the first build progress
 			self._area = None
 		elif isinstance(point_or_dict, dict):
 			self.point = HexPoint(point_or_dict.get('point', {'x': -1, 'y': -1}))
@@ -130,24 +133,24 @@ class Tile:
 			self._wonderValue = WonderType.none
 			self._owner = None
 			self._workingCity = None
-			self._buildProgressList = WeightedBuildList()
+			self._buildProgressList = None  # created with the first build progress
 			self._area = None
 		else:
 			raise Exception('unsupported combination')
 
-		self._builderAIScratchPad = BuilderAIScratchPad()
+		self._builderAIScratchPad = None  # created on first access
 
 	def __repr__(self):
 		return f'Tile({self.point}, {self._terrainValue}, hills={self._isHills}, {self._featureValue}, {self._resourceValue})'
 
-	def owner(self) -> Player:
+	def owner(self) -> 'Player':
 		return self._owner
 
 	def hasOwner(self) -> bool:
 		return self._owner is not None
 
 	def removeOwner(self):
-		self._owner = None
+		self.setOwner(None)
 
 	def area(self) -> Optional[HexArea]:
 		return self._area
@@ -220,7 +223,11 @@ class Tile:
 		return False
 
 	def setResource(self, resource: ResourceType):
+		if self._hasher is not None:
+			self._hasher.tileChanged(self.point, HashComponent.resource, self._resourceValue, resource)
+
 		self._resourceValue = resource
+		self._version += 1
 
 	def isImpassable(self, movement_type):
 		# start with terrain cost
@@ -302,6 +309,7 @@ class Tile:
 
 	def setRiver(self, river: River, flow: FlowDirection):
 		self._riverName = river.name()
+		self._version += 1
 		self.setRiverFlow(flow)
 
 	def isRiver(self) -> bool:
@@ -397,6 +405,7 @@ class Tile:
 	def discoverBy(self, player, simulation):
 		if not self.discovered:
 			self.discovered[str(player.leader)] = True
+			self._version += 1
 
 			# tutorial
 			if simulation.tutorial() == Tutorials.movementAndExploration and player.isHuman():
@@ -419,7 +428,9 @@ class Tile:
 		return False
 
 	def sightBy(self, player):
-		self.visible[str(player.leader)] = True
+		if self.visible.get(str(player.leader)) is not True:
+			self.visible[str(player.leader)] = True
+			self._version += 1
 
 	def canSeeTile(self, otherTile, player, range: int, hasSentry: bool, simulation) -> bool:
 		if otherTile.point == self.point:
@@ -449,13 +460,16 @@ class Tile:
 		return False
 
 	def concealTo(self, player):
-		self.visible[str(player.leader)] = False
+		if self.visible.get(str(player.leader)) is not False:
+			self.visible[str(player.leader)] = False
+			self._version += 1
 
 	def isCity(self) -> bool:
 		return self._cityValue is not None
 
 	def setCity(self, city):
 		self._cityValue = city
+		self._version += 1
 
 	def productionFromFeatureRemoval(self, buildType: BuildType) -> int:
 		if not self.hasAnyFeature():
@@ -476,7 +490,11 @@ class Tile:
 		return self._terrainValue
 
 	def setTerrain(self, terrain: TerrainType):
+		if self._hasher is not None:
+			self._hasher.tileChanged(self.point, HashComponent.terrain, self._terrainValue, terrain)
+
 		self._terrainValue = terrain
+		self._version += 1
 
 	def hasAnyFeature(self) -> bool:
 		return self._featureValue != FeatureType.none
@@ -488,13 +506,21 @@ class Tile:
 		return self._featureValue
 
 	def setFeature(self, feature: FeatureType):
+		if self._hasher is not None:
+			self._hasher.tileChanged(self.point, HashComponent.feature, self._featureValue, feature)
+
 		self._featureValue = feature
+		self._version += 1
 
 	def isHills(self):
 		return self._isHills
 
 	def setHills(self, hills: bool):
+		if self._hasher is not None:
+			self._hasher.tileChanged(self.point, HashComponent.hills, self._isHills, hills)
+
 		self._isHills = hills
+		self._version += 1
 
 	def hasAnyImprovement(self) -> bool:
 		return self._improvementValue != ImprovementType.none
@@ -512,13 +538,21 @@ class Tile:
 		return self._route
 
 	def setRoute(self, route: RouteType):
+		if self._hasher is not None:
+			self._hasher.tileChanged(self.point, HashComponent.route, self._route, route)
+
 		self._route = route
+		self._version += 1
 
 	def improvement(self):
 		return self._improvementValue
 
 	def setImprovement(self, improvement: ImprovementType):
+		if self._hasher is not None:
+			self._hasher.tileChanged(self.point, HashComponent.improvement, self._improvementValue, improvement)
+
 		self._improvementValue = improvement
+		self._version += 1
 
 	def hasAnyWonder(self) -> bool:
 		return self._wonderValue != WonderType.none
@@ -527,22 +561,35 @@ class Tile:
 		return self._districtValue == district
 
 	def buildDistrict(self, district: DistrictType):
+		if self._hasher is not None:
+			self._hasher.tileChanged(self.point, HashComponent.district, self._districtValue, district)
+
 		self._districtValue = district
+		self._version += 1
 
 	def district(self) -> DistrictType:
 		return self._districtValue
 
 	def buildWonder(self, wonder: WonderType):
+		if self._hasher is not None:
+			self._hasher.tileChanged(self.point, HashComponent.wonder, self._wonderValue, wonder)
+
 		self._wonderValue = wonder
+		self._version += 1
 
 	def setOwner(self, player):
+		if self._hasher is not None:
+			self._hasher.tileChanged(self.point, HashComponent.owner, self._owner, player)
+
 		self._owner = player
+		self._version += 1
 
 	def workingCity(self):
 		return self._workingCity
 
 	def setWorkingCity(self, city):
 		self._workingCity = city
+		self._version += 1
 
 	def yields(self, player, ignoreFeature: bool):
 		returnYields = Yields(food=0, production=0, gold=0, science=0)
@@ -594,12 +641,16 @@ class Tile:
 		return self._improvementPillagedValue
 
 	def setImprovementPillaged(self, value: bool):
+		if self._hasher is not None:
+			self._hasher.tileChanged(self.point, HashComponent.improvementPillaged, self._improvementPillagedValue, value)
+
 		self._improvementPillagedValue = value
+		self._version += 1
 
 	def buildProgressOf(self, buildType: BuildType) -> int:
-		return int(self._buildProgressList.weight(buildType))
+		return self.buildProgressFor(buildType)
 
-	def changeBuildProgressOf(self, build: BuildType, change: int, player: Player, simulation) -> bool:
+	def changeBuildProgressOf(self, build: BuildType, change: int, player: 'Player', simulation) -> bool:
 		"""Returns true if build finished ..."""
 		finished = False
 
@@ -607,7 +658,11 @@ class Tile:
 			raise Exception(f'change must be bigger than zero but is {change}')
 
 		if change > 0:
+			if self._buildProgressList is None:
+				self._buildProgressList = WeightedBuildList()
+
 			self._buildProgressList.addWeight(change, build)
+			self._version += 1
 
 			if self.buildProgressFor(build) >= build.buildTimeOn(self):
 				self._buildProgressList.setWeight(0, build)
@@ -658,6 +713,9 @@ class Tile:
 		return finished
 
 	def buildProgressFor(self, build: BuildType) -> int:
+		if self._buildProgressList is None:
+			return 0
+
 		return int(self._buildProgressList.weight(build))
 
 	def updateEurekas(self, improvement: ImprovementType, player, simulation):
@@ -792,6 +850,8 @@ class Tile:
 				# check for governor effects of reyna
 				city = neighborTile.workingCity()
 				if city is not None and city.governor() is not None:
+					from game.governors import GovernorType, GovernorTitle
+
 					if city.governor().type == GovernorType.reyna:
 						# forestryManagement - Tiles adjacent to unimproved features receive +1 Appeal in this city.
 						if city.governor().hasTitle(GovernorTitle.forestryManagement):
@@ -932,12 +992,19 @@ class Tile:
 	def isRiverIn(self, flow: FlowDirection) -> bool:
 		return self._riverValue & int(flow.value) > 0
 
+	def _changeRiverValue(self, change: int):
+		if self._hasher is not None:
+			self._hasher.tileChanged(self.point, HashComponent.river, self._riverValue, self._riverValue + change)
+
+		self._riverValue += change
+		self._version += 1
+
 	def setRiverFlowInNorth(self, flow: FlowDirection):
 		if flow != FlowDirection.east and flow != FlowDirection.west:
 			raise Exception(f'{flow} unsupported in north')
 
 		if not self.isRiverIn(flow):
-			self._riverValue += int(flow.value)
+			self._changeRiverValue(int(flow.value))
 
 		return
 
@@ -946,7 +1013,7 @@ class Tile:
 			raise Exception(f'{flow} unsupported in southEast')
 
 		if not self.isRiverIn(flow):
-			self._riverValue += int(flow.value)
+			self._changeRiverValue(int(flow.value))
 
 		return
 
@@ -955,7 +1022,7 @@ class Tile:
 			raise Exception(f'{flow} unsupported in northEast')
 
 		if not self.isRiverIn(flow):
-			self._riverValue += int(flow.value)
+			self._changeRiverValue(int(flow.value))
 
 		return
 
@@ -1001,6 +1068,10 @@ class Tile:
 		return False
 
 	def builderAIScratchPad(self) -> BuilderAIScratchPad:
+		if self._builderAIScratchPad is None:
+			self._builderAIScratchPad = BuilderAIScratchPad()
+			self._version += 1
+
 		return self._builderAIScratchPad
 
 	def isRoutePillaged(self) -> bool:
@@ -1054,7 +1125,12 @@ class TileStatistics:
 
 
 class MapModel:
-	def __init__(self, width_or_size: Union[Size, int, dict], height: Optional[int] = None):
+	# incremental hash of the map state (see enableHashing)
+	_hasher: Optional[MapHasher] = None
+	# incremented when units or cities are added or removed, a SnapshotWriter only pickles the map again when it changed
+	_version: int = 0
+
+	def __init__(self, width_or_size: Union[Size, int, dict], height: Optional[int] = None, tiles: Optional[Array2D] = None):
 		if isinstance(width_or_size, Size) and height is None:
 			size = width_or_size
 			self.width = size.width()
@@ -1063,7 +1139,7 @@ class MapModel:
 		elif isinstance(width_or_size, int) and isinstance(height, int):
 			self.width = width_or_size
 			self.height = height
-			self._initialize()
+			self._initialize(tiles)
 		elif isinstance(width_or_size, dict) and height is None:
 			dict_obj = width_or_size
 			self.width = dict_obj.get('width', 0)
@@ -1139,13 +1215,16 @@ class MapModel:
 		else:
 			raise AttributeError(f'Map with wrong attributes: {width_or_size} / {height}')
 
-	def _initialize(self):
-		self.tiles = Array2D(self.width, self.height)
+	def _initialize(self, tiles: Optional[Array2D] = None):
+		if tiles is not None:
+			self.tiles = tiles
+		else:
+			self.tiles = Array2D(self.width, self.height)
 
-		# create a unique Tile per place
-		for y in range(self.height):
-			for x in range(self.width):
-				self.tiles.values[y][x] = Tile(HexPoint(x, y), TerrainType.ocean)
+			# create a unique Tile per place
+			for y in range(self.height):
+				for x in range(self.width):
+					self.tiles.values[y][x] = Tile(HexPoint(x, y), TerrainType.ocean)
 
 		self._cities = []
 		self._units = []
@@ -1159,8 +1238,57 @@ class MapModel:
 	def updateStatistics(self):
 		pass
 
-	# def save(self, filename: str) -> bool:
+	def enableHashing(self):
+		"""
+			computes the hash of the map state from scratch and keeps it up to date from now on (the setters of the
+			tiles and the unit / city methods of the map update it) - must be called again after the attributes of
+			the tiles were written directly
+		"""
+		self._hasher = MapHasher(self)
 
+		for y in range(self.height):
+			for x in range(self.width):
+				self.tiles.values[y][x]._hasher = self._hasher
+
+	def stateHash(self) -> int:
+		"""
+			hash of the terrain, features, resources, rivers, routes, improvements, districts, wonders, owners, units
+			and cities - can be used as cache key for results that only depend on the map
+
+			@return: 64 bit hash of the map state
+		"""
+		if self._hasher is None:
+			self.enableHashing()
+
+		return self._hasher.value()
+
+	def computeStateHash(self) -> int:
+		"""@return: hash of the map state computed from scratch (to verify the incremental hash)"""
+		return MapHasher(self).value()
+
+	def save(self, path: str):
+		"""
+			writes the map in the compact binary map format (see serialisation.binaryMap)
+
+			@param path: path of the file
+		"""
+		from serialisation.binaryMap import writeBinaryMap
+
+		with open(path, 'wb') as file:
+			writeBinaryMap(self, file)
+
+	@staticmethod
+	def load(path: str):
+		"""
+			reads a map from a file in the binary map format (see serialisation.binaryMap)
+
+			@param path: path of the file
+			@return: MapModel
+		"""
+		from serialisation.binaryMap import readBinaryMap
+
+		with open(path, 'rb') as file:
+			return readBinaryMap(file.read())
 
 	def valid(self, x_or_hex: Union[int, HexPoint], y: Optional[int] = None) -> bool:
 		if isinstance(x_or_hex, HexPoint) and y is None:
@@ -1347,41 +1475,73 @@ class MapModel:
 
 		return False
 
-	def capitalOf(self, player: Player) -> Optional[City]:
+	def capitalOf(self, player: 'Player') -> Optional['City']:
 		item = next((city for city in self._cities if city.player.leader == player.leader and city.capitalValue), None)
 		return item
 
-	def unitsOf(self, player: Player) -> [Unit]:
+	def unitsOf(self, player: 'Player') -> ['Unit']:
 		return list(filter(lambda unit: unit.player.leader == player.leader, self._units))
 
-	def unitsAt(self, location) -> [Unit]:
+	def unitsAt(self, location) -> ['Unit']:
 		return list(filter(lambda unit: unit.location == location, self._units))
 
-	def unitAt(self, location, unitMapType: UnitMapType) -> Optional[Unit]:
+	def unitAt(self, location, unitMapType: UnitMapType) -> Optional['Unit']:
 		return next(filter(lambda unit: unit.location == location and unit.unitMapType() == unitMapType, self._units), None)
 
 	def addUnit(self, unit):
 		self._units.append(unit)
+		self._version += 1
+
+		if self._hasher is not None:
+			self._hasher.addUnit(unit)
 
 	def removeUnit(self, unit):
+		if self._hasher is not None:
+			for loopUnit in self._units:
+				if unit.location == loopUnit.location and unit.unitType == loopUnit.unitType:
+					self._hasher.removeUnit(loopUnit)
+
 		self._units = list(filter(lambda loopUnit: unit.location != loopUnit.location or unit.unitType != loopUnit.unitType, self._units))
+		self._version += 1
 
-	def cityAt(self, location: HexPoint) -> Optional[City]:
+	def moveUnit(self, unit, location: HexPoint):
+		"""
+			sets the location of the unit (and updates the hash of the map)
+
+			@param unit: unit to move
+			@param location: new location of the unit
+		"""
+		if self._hasher is not None:
+			self._hasher.moveUnit(unit, location)
+
+		unit.location = location
+
+	def cityAt(self, location: HexPoint) -> Optional['City']:
 		return next(filter(lambda city: city.location == location, self._cities), None)
 
-	def citiesOf(self, player) -> [City]:
+	def citiesOf(self, player) -> ['City']:
 		return list(filter(lambda city: city.player.leader == player.leader, self._cities))
 
-	def addCity(self, city: City, simulation):
+	def addCity(self, city: 'City', simulation):
 		self._cities.append(city)
+		self._version += 1
 
 		tile = self.tileAt(city.location)
 		tile.setCity(city)
 
+		if self._hasher is not None:
+			self._hasher.addCity(city)
+
 		self._sightCity(city, simulation)
 
 	def deleteCity(self, city):
+		if self._hasher is not None:
+			for loopCity in self._cities:
+				if loopCity.location == city.location:
+					self._hasher.removeCity(loopCity)
+
 		self._cities = list(filter(lambda c: c.location != city.location, self._cities))
+		self._version += 1
 
 	def _sightCity(self, city, simulation):
 		for pt in city.location.areaWithRadius(3):
@@ -1402,19 +1562,19 @@ class MapModel:
 
 			tile = self.tileAt(pt)
 
-			if tile.terrain == TerrainType.ocean:
+			if tile.terrain() == TerrainType.ocean:
 				stats.ocean += 1
-			elif tile.terrain == TerrainType.shore:
+			elif tile.terrain() == TerrainType.shore:
 				stats.shore += 1
-			elif tile.terrain == TerrainType.plains:
+			elif tile.terrain() == TerrainType.plains:
 				stats.plains += 1
-			elif tile.terrain == TerrainType.grass:
+			elif tile.terrain() == TerrainType.grass:
 				stats.grass += 1
-			elif tile.terrain == TerrainType.desert:
+			elif tile.terrain() == TerrainType.desert:
 				stats.desert += 1
-			elif tile.terrain == TerrainType.tundra:
+			elif tile.terrain() == TerrainType.tundra:
 				stats.tundra += 1
-			elif tile.terrain == TerrainType.snow:
+			elif tile.terrain() == TerrainType.snow:
 				stats.snow += 1
 
 			valid_tiles += 1.0
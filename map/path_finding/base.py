@@ -6,6 +6,8 @@ from abc import ABC, abstractmethod
 from heapq import heappush, heappop
 from typing import Iterable, Union, TypeVar, Generic
 
+from utils.profiling import countSpan
+
 # infinity as a constant
 Infinite = float("inf")
 
@@ -96,9 +98,12 @@ class AStar(ABC, Generic[T]):
 		)
 		open_set: list = []
 		heappush(open_set, start_node)
+		expanded = 0
 		while open_set:
 			current = heappop(open_set)
+			expanded += 1
 			if self.is_goal_reached(current.data, goal):
+				countSpan('nodesExpanded', expanded)
 				return self.reconstruct_path(current, reverse_path)
 
 			current.out_openset = True
@@ -125,4 +130,5 @@ class AStar(ABC, Generic[T]):
 					open_set.remove(neighbor)
 					heappush(open_set, neighbor)
 
+		countSpan('nodesExpanded', expanded)
 		return None
@@ -6,6 +6,7 @@ from map.base import HexPoint
 from map.path_finding.base import AStar
 from map.path_finding.path import HexPath
 from map.types import UnitMovementType, TerrainType, FeatureType
+from utils.profiling import profileSpan
 
 
 class AStarDataSource:
@@ -145,6 +146,7 @@ class AStarPathfinder(AStar):
 	def is_goal_reached(self, current, goal):
 		return current == goal
 
+	@profileSpan('AStarPathfinder.shortestPath')
 	def shortestPath(self, from_point, to_point) -> Optional[HexPath]:
 		if self.data_source is None:
 			print('no datasource')
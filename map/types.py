@@ -7,7 +7,7 @@ from game.cityStates import CityStateType
 from game.civilizations import LeaderType
 from game.types import TechType, CivicType  # not good - map should not import game
 from map.base import ExtendedEnum, Size, HexPoint
-from core.base import InvalidEnumError, WeightedBaseList
+from core.base import InvalidEnumError, WeightedBaseList, catalog
 from utils.translation import gettext_lazy as _
 
 
@@ -52,6 +52,7 @@ class MapSize(Enum):
 	def numberOfCityStates(self):
 		return self._data().numberOfCityStates
 
+	@catalog
 	def _data(self):
 		if self == MapSize.duel:
 			return MapSizeData(
@@ -100,6 +101,7 @@ class MapType(Enum):
 	def name(self) -> str:
 		return self._data().name
 
+	@catalog
 	def _data(self) -> MapTypeData:
 		if self == MapType.empty:
 			return MapTypeData(
@@ -218,25 +220,6 @@ class TerrainType(ExtendedEnum):
 	land = 'land'
 	sea = 'sea'
 
-	@staticmethod
-	def fromName(terrainName: str) -> TerrainType:
-		if terrainName == 'TerrainType.desert' or terrainName == 'desert':
-			return TerrainType.desert
-		elif terrainName == 'TerrainType.grass' or terrainName == 'grass':
-			return TerrainType.grass
-		elif terrainName == 'TerrainType.ocean' or terrainName == 'ocean':
-			return TerrainType.ocean
-		elif terrainName == 'TerrainType.plains' or terrainName == 'plains':
-			return TerrainType.plains
-		elif terrainName == 'TerrainType.shore' or terrainName == 'shore':
-			return TerrainType.shore
-		elif terrainName == 'TerrainType.snow' or terrainName == 'snow':
-			return TerrainType.snow
-		elif terrainName == 'TerrainType.tundra' or terrainName == 'tundra':
-			return TerrainType.tundra
-
-		raise Exception(f'No matching case for terrainName: "{terrainName}"')
-
 	def name(self) -> str:
 		return self._data().name
 
@@ -249,6 +232,7 @@ class TerrainType(ExtendedEnum):
 	def domain(self) -> UnitDomainType:
 		return self._data().domain
 
+	@catalog
 	def _data(self) -> TerrainData:
 		if self == TerrainType.desert:
 			return TerrainData(
@@ -440,51 +424,6 @@ class FeatureType(ExtendedEnum):
 	cliffsOfDover = 'cliffsOfDover'
 	uluru = 'uluru'
 
-	@staticmethod
-	def fromName(featureName: str) -> FeatureType:
-		if featureName == 'FeatureType.none' or featureName == 'none':
-			return FeatureType.none
-		elif featureName == 'FeatureType.atoll' or featureName == 'atoll':
-			return FeatureType.atoll
-		elif featureName == 'FeatureType.fallout' or featureName == 'fallout':
-			return FeatureType.fallout
-		elif featureName == 'FeatureType.floodplains' or featureName == 'floodplains':
-			return FeatureType.floodplains
-		elif featureName == 'FeatureType.forest' or featureName == 'forest':
-			return FeatureType.forest
-		elif featureName == 'FeatureType.ice' or featureName == 'ice':
-			return FeatureType.ice
-		elif featureName == 'FeatureType.marsh' or featureName == 'marsh':
-			return FeatureType.marsh
-		elif featureName == 'FeatureType.mountains' or featureName == 'mountains':
-			return FeatureType.mountains
-		elif featureName == 'FeatureType.oasis' or featureName == 'oasis':
-			return FeatureType.oasis
-		elif featureName == 'FeatureType.pine' or featureName == 'pine':
-			return FeatureType.pine
-		elif featureName == 'FeatureType.rainforest' or featureName == 'rainforest':
-			return FeatureType.rainforest
-		elif featureName == 'FeatureType.reef' or featureName == 'reef':
-			return FeatureType.reef
-		elif featureName == 'FeatureType.lake' or featureName == 'lake':
-			return FeatureType.lake
-		elif featureName == 'FeatureType.volcano' or featureName == 'volcano':
-			return FeatureType.volcano
-
-		# natural wonder
-		elif featureName == 'FeatureType.mountEverest' or featureName == 'mountEverest':
-			return FeatureType.mountEverest
-		elif featureName == 'FeatureType.mountKilimanjaro' or featureName == 'mountKilimanjaro':
-			return FeatureType.mountKilimanjaro
-		elif featureName == 'FeatureType.greatBarrierReef' or featureName == 'greatBarrierReef':
-			return FeatureType.greatBarrierReef
-		elif featureName == 'FeatureType.cliffsOfDover' or featureName == 'cliffsOfDover':
-			return FeatureType.cliffsOfDover
-		elif featureName == 'FeatureType.uluru' or featureName == 'uluru':
-			return FeatureType.uluru
-
-		raise Exception(f'No matching case for featureName: "{featureName}"')
-
 	def name(self) -> str:
 		return self._data().name
 
@@ -494,6 +433,7 @@ class FeatureType(ExtendedEnum):
 	def turnDamage(self) -> int:
 		return self._data().turnDamage
 
+	@catalog
 	def _data(self):
 		if self == FeatureType.none:
 			return FeatureData(
@@ -987,92 +927,6 @@ class ResourceType(ExtendedEnum):
 	antiquitySite = 'antiquitySite'  # https://civilization.fandom.com/wiki/Antiquity_Site_(Civ6)
 	shipwreck = 'shipwreck'  # https://civilization.fandom.com/wiki/Shipwreck_(Civ6)
 
-	@staticmethod
-	def fromName(resourceName: str) -> ResourceType:
-		if resourceName == 'ResourceType.none' or resourceName == 'none':
-			return ResourceType.none
-
-		# bonus
-		elif resourceName == 'ResourceType.banana' or resourceName == 'banana':
-			return ResourceType.banana
-		elif resourceName == 'ResourceType.cattle' or resourceName == 'cattle':
-			return ResourceType.cattle
-		elif resourceName == 'ResourceType.copper' or resourceName == 'copper':
-			return ResourceType.copper
-		elif resourceName == 'ResourceType.crab' or resourceName == 'crab':
-			return ResourceType.crab
-		elif resourceName == 'ResourceType.deer' or resourceName == 'deer':
-			return ResourceType.deer
-		elif resourceName == 'ResourceType.fish' or resourceName == 'fish':
-			return ResourceType.fish
-		elif resourceName == 'ResourceType.rice' or resourceName == 'rice':
-			return ResourceType.rice
-		elif resourceName == 'ResourceType.sheep' or resourceName == 'sheep':
-			return ResourceType.sheep
-		elif resourceName == 'ResourceType.stone' or resourceName == 'stone':
-			return ResourceType.stone
-		elif resourceName == 'ResourceType.wheat' or resourceName == 'wheat':
-			return ResourceType.wheat
-
-		# luxury
-		elif resourceName == 'ResourceType.citrus' or resourceName == 'citrus':
-			return ResourceType.citrus
-		elif resourceName == 'ResourceType.cocoa' or resourceName == 'cocoa':
-			return ResourceType.cocoa
-		elif resourceName == 'ResourceType.cotton' or resourceName == 'cotton':
-			return ResourceType.cotton
-		elif resourceName == 'ResourceType.dyes' or resourceName == 'dyes':
-			return ResourceType.dyes
-		elif resourceName == 'ResourceType.furs' or resourceName == 'furs':
-			return ResourceType.furs
-		elif resourceName == 'ResourceType.incense' or resourceName == 'incense':
-			return ResourceType.incense
-		elif resourceName == 'ResourceType.ivory' or resourceName == 'ivory':
-			return ResourceType.ivory
-		elif resourceName == 'ResourceType.pearls' or resourceName == 'pearls':
-			return ResourceType.pearls
-		elif resourceName == 'ResourceType.salt' or resourceName == 'salt':
-			return ResourceType.salt
-		elif resourceName == 'ResourceType.silk' or resourceName == 'silk':
-			return ResourceType.silk
-		elif resourceName == 'ResourceType.silver' or resourceName == 'silver':
-			return ResourceType.silver
-		elif resourceName == 'ResourceType.spices' or resourceName == 'spices':
-			return ResourceType.spices
-		elif resourceName == 'ResourceType.sugar' or resourceName == 'sugar':
-			return ResourceType.sugar
-		elif resourceName == 'ResourceType.tea' or resourceName == 'tea':
-			return ResourceType.tea
-		elif resourceName == 'ResourceType.whales' or resourceName == 'whales':
-			return ResourceType.whales
-		elif resourceName == 'ResourceType.wine' or resourceName == 'wine':
-			return ResourceType.wine
-		# marble
-
-			# strategic
-		elif resourceName == 'ResourceType.horses' or resourceName == 'horses':
-			return ResourceType.horses
-		elif resourceName == 'ResourceType.iron' or resourceName == 'iron':
-			return ResourceType.iron
-		elif resourceName == 'ResourceType.coal' or resourceName == 'coal':
-			return ResourceType.coal
-		elif resourceName == 'ResourceType.oil' or resourceName == 'oil':
-			return ResourceType.oil
-		elif resourceName == 'ResourceType.aluminum' or resourceName == 'aluminum':
-			return ResourceType.aluminum
-		elif resourceName == 'ResourceType.uranium' or resourceName == 'uranium':
-			return ResourceType.uranium
-		elif resourceName == 'ResourceType.niter' or resourceName == 'niter':
-			return ResourceType.niter
-
-			# artifacts
-		elif resourceName == 'ResourceType.antiquitySite' or resourceName == 'antiquitySite':
-			return ResourceType.antiquitySite
-		elif resourceName == 'ResourceType.shipwreck' or resourceName == 'shipwreck':
-			return ResourceType.shipwreck
-
-		raise Exception(f'No matching case for resourceName: "{resourceName}"')
-
 	def name(self) -> str:
 		return self._data().name
 
@@ -1082,6 +936,7 @@ class ResourceType(ExtendedEnum):
 	def placementOrder(self) -> int:
 		return self._data().placementOrder
 
+	@catalog
 	def _data(self) -> ResourceTypeData:
 		# default
 		if self == ResourceType.none:
@@ -1721,6 +1576,9 @@ class ResourceType(ExtendedEnum):
 	def canBePlacedOnFlatlands(self):
 		return self._data().placeOnFlatlands
 
+	def canBePlacedOnRiverSide(self) -> bool:
+		return self._data().placeOnRiverSide
+
 	def baseAmount(self):
 		return self._data().baseAmount
 
@@ -1847,21 +1705,6 @@ class ClimateZone(ExtendedEnum):
 	sub_tropic = 'sub_tropic'
 	tropic = 'tropic'
 
-	@staticmethod
-	def fromName(climateName: str) -> ClimateZone:
-		if climateName == 'ClimateZone.polar' or climateName == 'polar':
-			return ClimateZone.polar
-		elif climateName == 'ClimateZone.sub_polar' or climateName == 'sub_polar':
-			return ClimateZone.sub_polar
-		elif climateName == 'ClimateZone.temperate' or climateName == 'temperate':
-			return ClimateZone.temperate
-		elif climateName == 'ClimateZone.sub_tropic' or climateName == 'sub_tropic':
-			return ClimateZone.sub_tropic
-		elif climateName == 'ClimateZone.tropic' or climateName == 'tropic':
-			return ClimateZone.tropic
-
-		raise Exception(f'No matching case for climateName: "{climateName}"')
-
 	def moderate(self):
 		if self == ClimateZone.polar:
 			return ClimateZone.sub_polar
@@ -1926,22 +1769,6 @@ class RouteType(ExtendedEnum):
 	industrialRoad = 'industrialRoad'
 	modernRoad = 'modernRoad'
 
-	@staticmethod
-	def fromName(routeName: str) -> RouteType:
-		if routeName == 'RouteType.none' or routeName == 'none':
-			return RouteType.none
-		elif routeName == 'RouteType.ancientRoad' or routeName == 'ancientRoad':
-			return RouteType.ancientRoad
-		elif routeName == 'RouteType.classicalRoad' or routeName == 'classicalRoad':
-			return RouteType.classicalRoad
-		elif routeName == 'RouteType.industrialRoad' or routeName == 'industrialRoad':
-			return RouteType.industrialRoad
-		elif routeName == 'RouteType.modernRoad' or routeName == 'modernRoad':
-			return RouteType.modernRoad
-
-		raise Exception(f'No matching case for routeName: "{routeName}"')
-
-
 	def name(self) -> str:
 		return self._data().name
 
@@ -1951,6 +1778,7 @@ class RouteType(ExtendedEnum):
 	def era(self) -> EraType:
 		return self._data().era
 
+	@catalog
 	def _data(self):
 		if self == RouteType.none:
 			return RouteTypeData(
@@ -0,0 +1,492 @@
+"""
+	compact binary map format
+
+	layout (all numbers little endian):
+
+		header:     magic 'SEMP', version (uint16), flags (uint16), width (uint32), height (uint32), blocks (uint32)
+		blocks:     tag (4 bytes), payload length (uint32), payload - padded to 8 bytes
+
+	block types:
+
+		'COLN'      one tile attribute for all tiles in row order (y * width + x): name, numpy dtype, dictionary
+					(the enum values or strings of the codes, empty for plain numbers) and the values - the values start at an
+					8 byte aligned offset of the file, so they can be mapped without copying
+		'STRT'      start locations of the players
+		'CSST'      start locations of the city states
+		'CONT'      continents (identifier, name, type, points)
+		'OCEN'      oceans (identifier, name, type, points)
+
+	readers skip blocks with unknown tags, so blocks can be added without changing the version
+
+	readBinaryMap builds a complete MapModel, MappedMapModel maps the file and only decodes what is accessed
+"""
+import mmap
+import struct
+from typing import Union, Optional
+
+import numpy as np
+
+from game.cityStates import CityStateType
+from game.civilizations import LeaderType
+from map.areas import Continent, ContinentType, Ocean, OceanType
+from map.base import HexPoint, Array2D
+from map.improvements import ImprovementType
+from map.types import TerrainType, FeatureType, ResourceType, ClimateZone, RouteType, StartLocation
+
+MAGIC = b'SEMP'
+VERSION = 1
+
+_headerStruct = struct.Struct('<4sHHIII')
+_blockStruct = struct.Struct('<4sI')
+_alignment = 8
+
+# name of the column, attribute of the tile and enum of the values
+_enumColumns = [
+	('terrain', '_terrainValue', TerrainType),
+	('feature', '_featureValue', FeatureType),
+	('resource', '_resourceValue', ResourceType),
+	('climateZone', '_climateZone', ClimateZone),
+	('route', '_route', RouteType),
+	('improvement', '_improvementValue', ImprovementType),
+]
+# name of the column, attribute of the tile, dtype in the file and type in the tile
+_valueColumns = [
+	('isHills', '_isHills', '|u1', np.bool_),
+	('resourceQuantity', '_resourceQuantity', '<u2', np.int64),
+	('river', '_riverValue', '|u1', np.int64),
+	('improvementPillaged', '_improvementPillagedValue', '|u1', np.bool_),
+]
+_identifierColumns = [
+	('continentIdentifier', 'continentIdentifier'),
+	('oceanIdentifier', 'oceanIdentifier'),
+]
+
+
+class BinaryMapFormatError(Exception):
+	pass
+
+
+class MapColumn:
+	"""one decoded 'COLN' block - values is a view into the buffer of the file"""
+
+	def __init__(self, name: str, dictionary: [str], values: np.ndarray):
+		self.name = name
+		self.dictionary = dictionary
+		self.values = values
+
+
+class BinaryMapLayout:
+	"""
+		the parsed structure of a binary map file
+
+		the tile columns are numpy views into the buffer, the other sections are decoded into objects
+	"""
+
+	def __init__(self, buffer: Union[bytes, memoryview]):
+		if len(buffer) < _headerStruct.size:
+			raise BinaryMapFormatError('file too short')
+
+		magic, version, self.flags, self.width, self.height, numberOfBlocks = _headerStruct.unpack_from(buffer, 0)
+
+		if magic != MAGIC:
+			raise BinaryMapFormatError(f'not a binary map file: {magic}')
+
+		if version > VERSION:
+			raise BinaryMapFormatError(f'unsupported version: {version} (supported: {VERSION})')
+
+		self.version = version
+		self.columns = {}
+		self.startLocations = []
+		self.cityStateStartLocations = []
+		# (identifier, name, type, coordinates) - coordinates is an array of (x, y) rows, the type of oceans can be None
+		self.continents = []
+		self.oceans = []
+
+		offset = _headerStruct.size
+		for _ in range(numberOfBlocks):
+			tag, length = _blockStruct.unpack_from(buffer, offset)
+			offset += _blockStruct.size
+
+			if tag == b'COLN':
+				column = self._readColumn(buffer, offset)
+				self.columns[column.name] = column
+			elif tag == b'STRT':
+				self.startLocations = self._readStartLocations(buffer, offset)
+			elif tag == b'CSST':
+				self.cityStateStartLocations = self._readStartLocations(buffer, offset)
+			elif tag == b'CONT':
+				self.continents = self._readAreas(buffer, offset, ContinentType)
+			elif tag == b'OCEN':
+				self.oceans = self._readAreas(buffer, offset, OceanType)
+
+			offset = _aligned(offset + length)
+
+	def _readColumn(self, buffer, offset: int) -> MapColumn:
+		name, offset = _readString(buffer, offset)
+		dtype, offset = _readString(buffer, offset)
+		dictionary, offset = _readStrings(buffer, offset)
+		offset = _aligned(offset)
+
+		values = np.frombuffer(buffer, dtype=np.dtype(dtype), count=self.width * self.height, offset=offset)
+		return MapColumn(name, dictionary, values)
+
+	@staticmethod
+	def _readStartLocations(buffer, offset: int) -> [StartLocation]:
+		count, = struct.unpack_from('<I', buffer, offset)
+		offset += 4
+		startLocations = []
+
+		for _ in range(count):
+			x, y, isHuman = struct.unpack_from('<hhB', buffer, offset)
+			offset += 5
+			leaderName, offset = _readString(buffer, offset)
+			cityStateName, offset = _readString(buffer, offset)
+
+			leader = LeaderType(leaderName)
+			cityState = CityStateType(cityStateName) if cityStateName != '' else None
+			startLocations.append(StartLocation(HexPoint(x, y), leader, cityState, bool(isHuman)))
+
+		return startLocations
+
+	@staticmethod
+	def _readAreas(buffer, offset: int, areaType) -> list:
+		count, = struct.unpack_from('<I', buffer, offset)
+		offset += 4
+		areas = []
+
+		for _ in range(count):
+			identifier, = struct.unpack_from('<i', buffer, offset)
+			offset += 4
+			name, offset = _readString(buffer, offset)
+			typeName, offset = _readString(buffer, offset)
+			numberOfPoints, = struct.unpack_from('<I', buffer, offset)
+			offset += 4
+
+			coordinates = np.frombuffer(buffer, dtype='<i2', count=2 * numberOfPoints, offset=offset)
+			offset += 4 * numberOfPoints
+
+			areas.append((identifier, name, areaType(typeName) if typeName != '' else None, coordinates.reshape(-1, 2)))
+
+		return areas
+
+	def enumColumn(self, name: str, enumType) -> (np.ndarray, list):
+		"""
+			@return: the codes of the column and the enum member of each code
+		"""
+		column = self.columns[name]
+		return column.values, [enumType(value) for value in column.dictionary]
+
+	def stringColumn(self, name: str) -> (np.ndarray, list):
+		"""
+			@return: the codes of the column and the string for each code ('' is None)
+		"""
+		column = self.columns[name]
+		return column.values, [None if value == '' else value for value in column.dictionary]
+
+
+def writeBinaryMap(mapModel, file):
+	"""
+		writes the map in the binary map format
+
+		@param mapModel: map to write
+		@param file: binary file-like object
+	"""
+	tiles = [tile for row in mapModel.tiles.values for tile in row]
+	blocks = []
+
+	for name, attribute, enumType in _enumColumns:
+		values = [getattr(tile, attribute) for tile in tiles]
+		blocks.append((b'COLN', _dictionaryColumn(name, [member.value for member in values])))
+
+	for name, attribute, dtype, _ in _valueColumns:
+		values = np.array([getattr(tile, attribute) for tile in tiles], dtype=np.dtype(dtype))
+		blocks.append((b'COLN', _column(name, values, [])))
+
+	blocks.append((b'COLN', _dictionaryColumn('riverName', [tile._riverName or '' for tile in tiles])))
+
+	for name, attribute in _identifierColumns:
+		values = [getattr(tile, attribute) for tile in tiles]
+		values = np.array([-1 if value is None else int(value) for value in values], dtype='<i4')
+		blocks.append((b'COLN', _column(name, values, [])))
+
+	blocks.append((b'STRT', _startLocations(mapModel.startLocations)))
+	blocks.append((b'CSST', _startLocations(mapModel.cityStateStartLocations)))
+	blocks.append((b'CONT', _areas(mapModel.continents, lambda continent: continent.continentType)))
+	blocks.append((b'OCEN', _areas(mapModel.oceans, lambda ocean: getattr(ocean, 'oceanType', None))))
+
+	output = bytearray(_headerStruct.pack(MAGIC, VERSION, 0, mapModel.width, mapModel.height, len(blocks)))
+
+	for tag, payload in blocks:
+		output += _blockStruct.pack(tag, 0)
+		start = len(output)
+		payload(output)
+		struct.pack_into('<I', output, start - 4, len(output) - start)
+		output += bytes(_aligned(len(output)) - len(output))
+
+	file.write(output)
+
+
+def readBinaryMap(buffer: Union[bytes, memoryview]):
+	"""
+		reads a map from the binary map format
+
+		@param buffer: content of the file
+		@return: MapModel
+	"""
+	from map.map import MapModel, Tile
+
+	layout = BinaryMapLayout(buffer)
+	width, height = layout.width, layout.height
+
+	# decode all columns first, so each tile only needs one dict update
+	columns = []
+	for name, attribute, enumType in _enumColumns:
+		codes, members = layout.enumColumn(name, enumType)
+		columns.append((attribute, [members[code] for code in codes.tolist()]))
+
+	for name, attribute, _, valueType in _valueColumns:
+		columns.append((attribute, layout.columns[name].values.astype(valueType).tolist()))
+
+	codes, riverNames = layout.stringColumn('riverName')
+	columns.append(('_riverName', [riverNames[code] for code in codes.tolist()]))
+
+	for name, attribute in _identifierColumns:
+		columns.append((attribute, [None if value == -1 else value for value in layout.columns[name].values.tolist()]))
+
+	attributes = [attribute for attribute, _ in columns]
+	rows = list(zip(*[values for _, values in columns]))
+	tiles = Array2D(width, height)
+
+	points = [HexPoint(x, y) for y in range(height) for x in range(width)]
+
+	for y in range(height):
+		tileRow = tiles.values[y]
+
+		for x in range(width):
+			index = y * width + x
+			tile = Tile(points[index], TerrainType.ocean)
+			tile.__dict__.update(zip(attributes, rows[index]))
+			tileRow[x] = tile
+
+	mapModel = MapModel(width, height, tiles)
+	mapModel.startLocations = layout.startLocations
+	mapModel.cityStateStartLocations = layout.cityStateStartLocations
+
+	# the areas share the points of the tiles
+	for identifier, name, continentType, coordinates in layout.continents:
+		continent = Continent(identifier, name, mapModel)
+		continent.continentType = continentType
+		continent.points = [points[y * width + x] for x, y in coordinates.tolist()]
+		mapModel.continents.append(continent)
+
+	for identifier, name, oceanType, coordinates in layout.oceans:
+		ocean = Ocean(identifier, name, mapModel)
+		if oceanType is not None:
+			ocean.oceanType = oceanType
+		ocean.points = [points[y * width + x] for x, y in coordinates.tolist()]
+		mapModel.oceans.append(ocean)
+
+	return mapModel
+
+
+class MappedMapModel:
+	"""
+		read-only map that is backed by a memory mapped binary map file
+
+		the tile attributes are exposed as numpy views into the mapping (nothing is copied or decoded up front) and
+		Tile objects are only created by tileAt. the tiles are detached copies: changing them does not change the
+		file.
+
+		usage:
+			with MappedMapModel('huge.bmap') as mapModel:
+				codes, terrains = mapModel.enumColumn('terrain')
+	"""
+
+	def __init__(self, path: str):
+		self._file = open(path, 'rb')
+		self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+		self._layout = BinaryMapLayout(self._mmap)
+
+		self.width = self._layout.width
+		self.height = self._layout.height
+		self.startLocations = self._layout.startLocations
+		self.cityStateStartLocations = self._layout.cityStateStartLocations
+
+		self._members = {name: self._layout.enumColumn(name, enumType)[1] for name, _, enumType in _enumColumns}
+		self._riverNames = self._layout.stringColumn('riverName')[1]
+
+	def __enter__(self):
+		return self
+
+	def __exit__(self, exc_type, exc_val, exc_tb):
+		self.close()
+
+	def close(self):
+		"""closes the file - views that were handed out must not be used afterwards"""
+		self._layout = None
+
+		try:
+			self._mmap.close()
+		except BufferError:
+			# views are still referenced, the mapping is released with the last of them
+			pass
+
+		self._file.close()
+
+	def column(self, name: str) -> np.ndarray:
+		"""
+			@param name: name of the column (like 'terrain', 'isHills' or 'river')
+			@return: read-only view of the raw values with the shape (height, width)
+		"""
+		return self._layout.columns[name].values.reshape(self.height, self.width)
+
+	def enumColumn(self, name: str) -> (np.ndarray, list):
+		"""
+			@param name: name of an enum column (like 'terrain' or 'feature')
+			@return: read-only view of the codes with the shape (height, width) and the enum member of each code
+		"""
+		return self.column(name), self._members[name]
+
+	def valid(self, x_or_hex: Union[int, HexPoint], y: Optional[int] = None) -> bool:
+		if isinstance(x_or_hex, HexPoint) and y is None:
+			return 0 <= x_or_hex.x < self.width and 0 <= x_or_hex.y < self.height
+		elif isinstance(x_or_hex, int) and isinstance(y, int):
+			return 0 <= x_or_hex < self.width and 0 <= y < self.height
+		else:
+			raise AttributeError(f'MappedMapModel.valid with wrong attributes: {x_or_hex} / {y}')
+
+	def points(self) -> [HexPoint]:
+		return [HexPoint(x, y) for x in range(self.width) for y in range(self.height)]
+
+	def terrainAt(self, x_or_hex: Union[int, HexPoint], y: Optional[int] = None) -> Optional[TerrainType]:
+		return self._enumAt('terrain', x_or_hex, y)
+
+	def featureAt(self, x_or_hex: Union[int, HexPoint], y: Optional[int] = None) -> Optional[FeatureType]:
+		return self._enumAt('feature', x_or_hex, y)
+
+	def riverAt(self, x_or_hex: Union[int, HexPoint], y: Optional[int] = None) -> bool:
+		index = self._indexOf(x_or_hex, y)
+		return index is not None and int(self._layout.columns['river'].values[index]) > 0
+
+	def tileAt(self, x_or_hex: Union[int, HexPoint], y: Optional[int] = None):
+		"""
+			@return: a new Tile with the attributes of the location or None if the location is not on the map
+		"""
+		from map.map import Tile
+
+		index = self._indexOf(x_or_hex, y)
+		if index is None:
+			return None
+
+		columns = self._layout.columns
+		attributes = {}
+
+		for name, attribute, _ in _enumColumns:
+			attributes[attribute] = self._members[name][columns[name].values[index]]
+
+		for name, attribute, _, valueType in _valueColumns:
+			attributes[attribute] = valueType(columns[name].values[index]).item()
+
+		attributes['_riverName'] = self._riverNames[columns['riverName'].values[index]]
+
+		for name, attribute in _identifierColumns:
+			identifier = int(columns[name].values[index])
+			attributes[attribute] = None if identifier == -1 else identifier
+
+		tile = Tile(HexPoint(index % self.width, index // self.width), TerrainType.ocean)
+		tile.__dict__.update(attributes)
+
+		return tile
+
+	def _indexOf(self, x_or_hex: Union[int, HexPoint], y: Optional[int] = None) -> Optional[int]:
+		if isinstance(x_or_hex, HexPoint) and y is None:
+			x, y = x_or_hex.x, x_or_hex.y
+		else:
+			x = x_or_hex
+
+		if not self.valid(x, y):
+			return None
+
+		return y * self.width + x
+
+	def _enumAt(self, name: str, x_or_hex: Union[int, HexPoint], y: Optional[int]):
+		index = self._indexOf(x_or_hex, y)
+		if index is None:
+			return None
+
+		return self._members[name][self._layout.columns[name].values[index]]
+
+
+def _aligned(offset: int) -> int:
+	return (offset + _alignment - 1) // _alignment * _alignment
+
+
+def _readString(buffer, offset: int) -> (str, int):
+	length, = struct.unpack_from('<H', buffer, offset)
+	offset += 2
+	return bytes(buffer[offset:offset + length]).decode('utf-8'), offset + length
+
+
+def _readStrings(buffer, offset: int) -> ([str], int):
+	count, = struct.unpack_from('<I', buffer, offset)
+	offset += 4
+	values = []
+
+	for _ in range(count):
+		value, offset = _readString(buffer, offset)
+		values.append(value)
+
+	return values, offset
+
+
+def _writeString(output: bytearray, value: str):
+	encoded = value.encode('utf-8')
+	output += struct.pack('<H', len(encoded))
+	output += encoded
+
+
+def _column(name: str, values: np.ndarray, dictionary: [str]):
+	def _write(output: bytearray):
+		_writeString(output, name)
+		_writeString(output, values.dtype.str)
+		output += struct.pack('<I', len(dictionary))
+		for entry in dictionary:
+			_writeString(output, entry)
+
+		output += bytes(_aligned(len(output)) - len(output))
+		output += values.tobytes()
+
+	return _write
+
+
+def _dictionaryColumn(name: str, values: [str]):
+	dictionary = list(dict.fromkeys(values))
+	codes = {value: code for code, value in enumerate(dictionary)}
+	dtype = '|u1' if len(dictionary) <= 256 else '<u2'
+
+	return _column(name, np.array([codes[value] for value in values], dtype=np.dtype(dtype)), dictionary)
+
+
+def _startLocations(startLocations: [StartLocation]):
+	def _write(output: bytearray):
+		output += struct.pack('<I', len(startLocations))
+		for startLocation in startLocations:
+			output += struct.pack('<hhB', startLocation.location.x, startLocation.location.y, startLocation.isHuman)
+			_writeString(output, startLocation.leader.value)
+			_writeString(output, startLocation.cityState.value if startLocation.cityState is not None else '')
+
+	return _write
+
+
+def _areas(areas: list, areaType):
+	def _write(output: bytearray):
+		output += struct.pack('<I', len(areas))
+		for area in areas:
+			output += struct.pack('<i', int(area.identifier))
+			_writeString(output, area.name)
+			typeValue = areaType(area)
+			_writeString(output, typeValue.value if typeValue is not None else '')
+			output += struct.pack('<I', len(area.points))
+			output += np.array([(point.x, point.y) for point in area.points], dtype='<i2').reshape(-1).tobytes()
+
+	return _write
@@ -0,0 +1,454 @@
+"""
+	fast path for the json map format
+
+	dumpsMap / loadsMap read and write the same json as MapModelSchema, but convert directly between the objects and
+	the json structure instead of going through the fields of the marshmallow schemas. enum names are looked up in
+	tables that are built once per enum (see enumNames and enumLookup).
+
+	the compact functions (encodeTile, encodeStartLocation, encodeContinent, encodeOcean and encodeCompactMap) convert
+	to json compatible lists that store enums as codes. the names of the codes are written once per map
+	(encodeCompactMap), so adding enum members doesn't break existing files.
+"""
+import json
+from functools import lru_cache
+
+from core.base import enumLookup
+from game.cityStates import CityStateType
+from game.civilizations import LeaderType
+from map.areas import Continent, ContinentType, Ocean, OceanType
+from map.arrays import enumMembers, enumCodes
+from map.base import HexPoint, Array2D
+from map.improvements import ImprovementType
+from map.types import TerrainType, FeatureType, ResourceType, ClimateZone, RouteType, StartLocation
+from utils.translation import jsonDefault
+
+COMPACT_FORMAT = 'compact'
+COMPACT_VERSION = 1
+
+# enums that are stored as codes in the compact lists
+_compactEnums = [
+	TerrainType, FeatureType, ResourceType, ClimateZone, RouteType, ImprovementType,
+	LeaderType, CityStateType, ContinentType, OceanType
+]
+
+
+@lru_cache(maxsize=None)
+def enumNames(enumType) -> dict:
+	"""@return: dict that maps each member to the name that MapModelSchema writes (str(member))"""
+	return {member: str(member) for member in enumMembers(enumType)}
+
+
+def _optionalString(value):
+	return None if value is None else str(value)
+
+
+def _point(pointDict: dict) -> HexPoint:
+	return HexPoint(pointDict['x'], pointDict['y'])
+
+
+# schema compatible
+
+def tileDictEncoder():
+	"""@return: function that converts a tile into the json structure of TileSchema"""
+	terrainNames = enumNames(TerrainType)
+	featureNames = enumNames(FeatureType)
+	resourceNames = enumNames(ResourceType)
+	climateZoneNames = enumNames(ClimateZone)
+	routeNames = enumNames(RouteType)
+	improvementNames = enumNames(ImprovementType)
+
+	def _encode(tile) -> dict:
+		return {
+			'point': {'x': tile.point.x, 'y': tile.point.y},
+			'terrain': terrainNames[tile._terrainValue],
+			'isHills': bool(tile._isHills),
+			'feature': featureNames[tile._featureValue],
+			'resource': resourceNames[tile._resourceValue],
+			'resourceQuantity': int(tile._resourceQuantity),
+			'river': int(tile._riverValue),
+			'riverName': _optionalString(tile._riverName),
+			'climateZone': climateZoneNames[tile._climateZone],
+			'route': routeNames[tile._route],
+			'improvement': improvementNames[tile._improvementValue],
+			'improvementPillaged': bool(tile._improvementPillagedValue),
+			'continentIdentifier': _optionalString(tile.continentIdentifier),
+			'oceanIdentifier': _optionalString(tile.oceanIdentifier),
+		}
+
+	return _encode
+
+
+def tileDictDecoder():
+	"""@return: function that builds a tile from the json structure of TileSchema and its location"""
+	from map.map import Tile
+
+	terrains = enumLookup(TerrainType)
+	features = enumLookup(FeatureType)
+	resources = enumLookup(ResourceType)
+	climateZones = enumLookup(ClimateZone)
+	routes = enumLookup(RouteType)
+	improvements = enumLookup(ImprovementType)
+
+	def _enum(lookup, enumType, name):
+		member = lookup.get(name)
+		return member if member is not None else enumType.fromName(name)
+
+	def _decode(tileDict: dict, point: HexPoint):
+		# the defaults match Tile(dict)
+		tile = Tile(point, _enum(terrains, TerrainType, tileDict.get('terrain', 'TerrainType.grass')))
+		tile._isHills = tileDict.get('isHills', False)
+		tile._featureValue = _enum(features, FeatureType, tileDict.get('feature', 'FeatureType.none'))
+		tile._resourceValue = _enum(resources, ResourceType, tileDict.get('resource', 'ResourceType.none'))
+		tile._resourceQuantity = tileDict.get('resourceQuantity', 0)
+		tile._riverValue = tileDict.get('river', 0)
+		tile._riverName = tileDict.get('riverName', None)
+		tile._climateZone = _enum(climateZones, ClimateZone, tileDict.get('climateZone', 'ClimateZone.temperate'))
+		tile._route = _enum(routes, RouteType, tileDict.get('route', 'RouteType.none'))
+		tile._improvementValue = _enum(improvements, ImprovementType, tileDict.get('improvement', 'ImprovementType.none'))
+		tile._improvementPillagedValue = tileDict.get('improvementPillaged', False)
+		tile.continentIdentifier = tileDict.get('continentIdentifier', None)
+		tile.oceanIdentifier = tileDict.get('oceanIdentifier', None)
+		return tile
+
+	return _decode
+
+
+def _encodeStartLocationDict(startLocation: StartLocation) -> dict:
+	return {
+		'location': {'x': startLocation.location.x, 'y': startLocation.location.y},
+		'leader': _optionalString(startLocation.leader),
+		'cityState': _optionalString(startLocation.cityState),
+		'isHuman': bool(startLocation.isHuman),
+	}
+
+
+def _encodeAreaDict(area, typeKey: str) -> dict:
+	areaDict = {
+		'identifier': str(area.identifier),
+		'name': str(area.name),
+		'points': [{'x': point.x, 'y': point.y} for point in area.points],
+	}
+
+	# like the schema: the type is skipped if it was never set (Ocean doesn't set a default)
+	if hasattr(area, typeKey):
+		areaDict[typeKey] = _optionalString(getattr(area, typeKey))
+
+	return areaDict
+
+
+def encodeMap(mapModel) -> dict:
+	"""
+		converts a map into the json structure of MapModelSchema().dump(mapModel)
+
+		@param mapModel: map to convert
+		@return: json compatible dict
+	"""
+	encodeTile = tileDictEncoder()
+
+	mapDict = {
+		'width': mapModel.width,
+		'height': mapModel.height,
+		'tiles': [[encodeTile(tile) for tile in row] for row in mapModel.tiles.values],
+	}
+	mapDict.update(encodeMapAreas(mapModel))
+
+	return mapDict
+
+
+def encodeMapAreas(mapModel) -> dict:
+	"""
+		converts the start locations, continents and oceans of a map into the json structure of MapModelSchema
+
+		@param mapModel: map to convert
+		@return: json compatible dict without width, height and tiles
+	"""
+	return {
+		'startLocations': [_encodeStartLocationDict(startLocation) for startLocation in mapModel.startLocations],
+		'cityStateStartLocations': [
+			_encodeStartLocationDict(startLocation) for startLocation in mapModel.cityStateStartLocations],
+		'continents': [_encodeAreaDict(continent, 'continentType') for continent in mapModel.continents],
+		'oceans': [_encodeAreaDict(ocean, 'oceanType') for ocean in mapModel.oceans],
+	}
+
+
+def _decodeStartLocationDict(startLocationDict: dict, cityStateRequired: bool) -> StartLocation:
+	location = _point(startLocationDict.get('location', {'x': -1, 'y': -1}))
+	leader = LeaderType.fromName(startLocationDict.get('leader', 'none'))
+	cityState = None
+
+	if cityStateRequired:
+		if startLocationDict.get('cityState', None) is None:
+			raise Exception('cityState must not be None')
+
+		cityState = CityStateType.fromName(startLocationDict['cityState'])
+
+	return StartLocation(location, leader, cityState, startLocationDict.get('isHuman', False))
+
+
+def _sharedPoints(mapModel, pointDicts: [dict]) -> [HexPoint]:
+	# the points of the areas are shared with the tiles
+	points = []
+
+	for pointDict in pointDicts:
+		x, y = pointDict['x'], pointDict['y']
+
+		if 0 <= x < mapModel.width and 0 <= y < mapModel.height:
+			points.append(mapModel.tiles.values[y][x].point)
+		else:
+			points.append(HexPoint(x, y))
+
+	return points
+
+
+def decodeMap(mapDict: dict):
+	"""
+		builds a map from the json structure of MapModelSchema - like MapModel(MapModelSchema().load(mapDict))
+
+		@param mapDict: json compatible dict (as written by MapModelSchema or encodeMap)
+		@return: MapModel
+	"""
+	from map.map import MapModel
+
+	width = mapDict.get('width', 0)
+	height = mapDict.get('height', 0)
+	tileDicts = mapDict.get('tiles', [])
+	decodeTile = tileDictDecoder()
+
+	tiles = Array2D(width, height)
+	for y in range(height):
+		tileRow = tiles.values[y]
+		tileDictRow = tileDicts[y]
+
+		for x in range(width):
+			tileRow[x] = decodeTile(tileDictRow[x], HexPoint(x, y))
+
+	mapModel = MapModel(width, height, tiles)
+	decodeMapAreas(mapModel, mapDict)
+
+	return mapModel
+
+
+def decodeMapAreas(mapModel, mapDict: dict):
+	"""
+		sets the start locations, continents and oceans of a map from the json structure of MapModelSchema
+
+		@param mapModel: map with the tiles
+		@param mapDict: json compatible dict (the tiles are not used)
+	"""
+	mapModel.startLocations = [
+		_decodeStartLocationDict(startLocationDict, cityStateRequired=False)
+		for startLocationDict in mapDict.get('startLocations', [])]
+	mapModel.cityStateStartLocations = [
+		_decodeStartLocationDict(startLocationDict, cityStateRequired=True)
+		for startLocationDict in mapDict.get('cityStateStartLocations', [])]
+
+	for continentDict in mapDict.get('continents', []):
+		continent = Continent(int(continentDict.get('identifier', '0')), continentDict.get('name', ''), mapModel)
+		continent.continentType = ContinentType.fromName(continentDict.get('continentType', ''))
+		continent.points = _sharedPoints(mapModel, continentDict.get('points', []))
+		mapModel.continents.append(continent)
+
+	for oceanDict in mapDict.get('oceans', []):
+		ocean = Ocean(int(oceanDict.get('identifier', '0')), oceanDict.get('name', ''), mapModel)
+		ocean.oceanType = OceanType.fromName(oceanDict.get('oceanType', ''))
+		ocean.points = _sharedPoints(mapModel, oceanDict.get('points', []))
+		mapModel.oceans.append(ocean)
+
+
+def dumpsMap(mapModel) -> str:
+	"""@return: the map as json string - the same json as MapModelSchema().dumps(mapModel)"""
+	return json.dumps(encodeMap(mapModel), default=jsonDefault)
+
+
+def loadsMap(jsonStr: str):
+	"""@return: MapModel of a json string written by MapModelSchema or dumpsMap"""
+	return decodeMap(json.loads(jsonStr))
+
+
+# compact
+
+def encodeTile(tile) -> list:
+	"""
+		@param tile: tile to encode
+		@return: [terrain, isHills, feature, resource, resourceQuantity, river, riverName, climateZone, route,
+			improvement, improvementPillaged, continentIdentifier, oceanIdentifier] with the enums as codes
+			(the location is given by the position of the tile in the map)
+	"""
+	return [
+		enumCodes(TerrainType)[tile._terrainValue],
+		int(tile._isHills),
+		enumCodes(FeatureType)[tile._featureValue],
+		enumCodes(ResourceType)[tile._resourceValue],
+		int(tile._resourceQuantity),
+		int(tile._riverValue),
+		tile._riverName,
+		enumCodes(ClimateZone)[tile._climateZone],
+		enumCodes(RouteType)[tile._route],
+		enumCodes(ImprovementType)[tile._improvementValue],
+		int(tile._improvementPillagedValue),
+		_optionalString(tile.continentIdentifier),
+		_optionalString(tile.oceanIdentifier),
+	]
+
+
+def decodeTile(values: list, point: HexPoint, members: dict = None):
+	"""
+		@param values: result of encodeTile
+		@param point: location of the tile
+		@param members: enum type -> members by code (the members of the current enums if None)
+		@return: Tile
+	"""
+	from map.map import Tile
+
+	if members is None:
+		members = _currentMembers()
+
+	terrain, isHills, feature, resource, resourceQuantity, river, riverName, climateZone, route, improvement, \
+		improvementPillaged, continentIdentifier, oceanIdentifier = values
+
+	tile = Tile(point, members[TerrainType][terrain])
+	tile._isHills = bool(isHills)
+	tile._featureValue = members[FeatureType][feature]
+	tile._resourceValue = members[ResourceType][resource]
+	tile._resourceQuantity = resourceQuantity
+	tile._riverValue = river
+	tile._riverName = riverName
+	tile._climateZone = members[ClimateZone][climateZone]
+	tile._route = members[RouteType][route]
+	tile._improvementValue = members[ImprovementType][improvement]
+	tile._improvementPillagedValue = bool(improvementPillaged)
+	tile.continentIdentifier = continentIdentifier
+	tile.oceanIdentifier = oceanIdentifier
+	return tile
+
+
+def encodeStartLocation(startLocation: StartLocation) -> list:
+	"""@return: [x, y, leader, cityState (or None), isHuman] with the enums as codes"""
+	cityState = None if startLocation.cityState is None else enumCodes(CityStateType)[startLocation.cityState]
+	return [
+		startLocation.location.x,
+		startLocation.location.y,
+		enumCodes(LeaderType)[startLocation.leader],
+		cityState,
+		int(startLocation.isHuman),
+	]
+
+
+def decodeStartLocation(values: list, members: dict = None) -> StartLocation:
+	if members is None:
+		members = _currentMembers()
+
+	x, y, leader, cityState, isHuman = values
+	cityState = None if cityState is None else members[CityStateType][cityState]
+	return StartLocation(HexPoint(x, y), members[LeaderType][leader], cityState, bool(isHuman))
+
+
+def _encodeArea(area, areaType) -> list:
+	coordinates = []
+
+	for point in area.points:
+		coordinates.append(point.x)
+		coordinates.append(point.y)
+
+	typeCode = None if areaType is None else enumCodes(type(areaType))[areaType]
+	return [area.identifier, area.name, typeCode, coordinates]
+
+
+def encodeContinent(continent: Continent) -> list:
+	"""@return: [identifier, name, continentType, [x0, y0, x1, y1, ...]] with the type as code"""
+	return _encodeArea(continent, continent.continentType)
+
+
+def encodeOcean(ocean: Ocean) -> list:
+	"""@return: [identifier, name, oceanType, [x0, y0, x1, y1, ...]] with the type as code"""
+	return _encodeArea(ocean, getattr(ocean, 'oceanType', None))
+
+
+def _decodeAreaPoints(coordinates: list, mapModel) -> [HexPoint]:
+	return _sharedPoints(mapModel, [{'x': x, 'y': y} for x, y in zip(coordinates[0::2], coordinates[1::2])])
+
+
+def decodeContinent(values: list, mapModel, members: dict = None) -> Continent:
+	if members is None:
+		members = _currentMembers()
+
+	identifier, name, continentType, coordinates = values
+	continent = Continent(identifier, name, mapModel)
+	continent.continentType = ContinentType.none if continentType is None else members[ContinentType][continentType]
+	continent.points = _decodeAreaPoints(coordinates, mapModel)
+	return continent
+
+
+def decodeOcean(values: list, mapModel, members: dict = None) -> Ocean:
+	if members is None:
+		members = _currentMembers()
+
+	identifier, name, oceanType, coordinates = values
+	ocean = Ocean(identifier, name, mapModel)
+	if oceanType is not None:
+		ocean.oceanType = members[OceanType][oceanType]
+	ocean.points = _decodeAreaPoints(coordinates, mapModel)
+	return ocean
+
+
+def _currentMembers() -> dict:
+	return {enumType: enumMembers(enumType) for enumType in _compactEnums}
+
+
+def encodeCompactMap(mapModel) -> dict:
+	"""
+		converts a map into compact lists
+
+		@param mapModel: map to convert
+		@return: json compatible dict with the names of the enum codes and the compact lists
+	"""
+	return {
+		'format': COMPACT_FORMAT,
+		'version': COMPACT_VERSION,
+		'enums': {enumType.__name__: list(enumNames(enumType).values()) for enumType in _compactEnums},
+		'width': mapModel.width,
+		'height': mapModel.height,
+		'tiles': [[encodeTile(tile) for tile in row] for row in mapModel.tiles.values],
+		'startLocations': [encodeStartLocation(startLocation) for startLocation in mapModel.startLocations],
+		'cityStateStartLocations': [
+			encodeStartLocation(startLocation) for startLocation in mapModel.cityStateStartLocations],
+		'continents': [encodeContinent(continent) for continent in mapModel.continents],
+		'oceans': [encodeOcean(ocean) for ocean in mapModel.oceans],
+	}
+
+
+def decodeCompactMap(compactDict: dict):
+	"""
+		builds a map from the result of encodeCompactMap
+
+		@param compactDict: json compatible dict
+		@return: MapModel
+	"""
+	from map.map import MapModel
+
+	if compactDict.get('format') != COMPACT_FORMAT or compactDict.get('version', 0) > COMPACT_VERSION:
+		raise ValueError('not a compact map')
+
+	# map the codes of the file to the members of the current enums
+	members = {}
+	for enumType in _compactEnums:
+		members[enumType] = [enumType.fromName(name) for name in compactDict['enums'][enumType.__name__]]
+
+	width = compactDict['width']
+	height = compactDict['height']
+	tiles = Array2D(width, height)
+
+	for y, row in enumerate(compactDict['tiles']):
+		tileRow = tiles.values[y]
+
+		for x, values in enumerate(row):
+			tileRow[x] = decodeTile(values, HexPoint(x, y), members)
+
+	mapModel = MapModel(width, height, tiles)
+	mapModel.startLocations = [decodeStartLocation(values, members) for values in compactDict['startLocations']]
+	mapModel.cityStateStartLocations = [
+		decodeStartLocation(values, members) for values in compactDict['cityStateStartLocations']]
+	mapModel.continents = [decodeContinent(values, mapModel, members) for values in compactDict['continents']]
+	mapModel.oceans = [decodeOcean(values, mapModel, members) for values in compactDict['oceans']]
+
+	return mapModel
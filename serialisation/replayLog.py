@@ -0,0 +1,547 @@
+"""
+	append-only binary replay log
+
+	the events of a game (replay events, moments and gossip) and the changes of the map are appended to a log file
+	while the game runs. the log can be read while it is written (or after a crash) and a reader doesn't need to parse
+	the whole file to find the events of a turn or of one player.
+
+	layout (all numbers little endian):
+
+		header:     magic 'SERL', version (uint16), reserved (uint16), width (uint32), height (uint32)
+		records:    length (uint32, of type and payload), type (uint8), payload
+		trailer:    magic 'SRLE', offset of the last index record (uint64) - only written by close
+
+	record types:
+
+		COLUMNS     json with the names and value names of the map columns (written once, before the first turn)
+		EVENT       turn (uint32), category (uint8), player (int8, -1 for none), event type (uint16, index into the
+					names), x (int16), y (int16), json of the event data
+		DIFF        turn (uint32), number of changed tiles n (uint32), flat tile indices (uint32 * n), then for every
+					column the new values (int16 * n)
+		KEYFRAME    turn (uint32), then for every column the values of all tiles (int16 * width * height)
+		INDEX       turn (uint32), offset of the first record of the turn (uint64), offset of the previous index
+					(uint64, 0 for none), offset of the keyframe and of the diff of the turn (uint64, 0 for none),
+					number of new names (uint16) and the names (uint16 length + utf8 each), number of events (uint32)
+					and per event: offset (uint64), category (uint8), player (int8), event type (uint16)
+
+	the index records are a linked list from the last turn backwards, the trailer points to the last one. if the
+	trailer is missing (the game is still running or crashed), the reader walks the record lengths instead.
+"""
+import json
+import mmap
+import struct
+from enum import Enum
+from typing import Optional
+
+import numpy as np
+
+from core.base import ExtendedEnum
+from map.arrays import enumCodes, enumMembers, tileArray
+from map.base import HexPoint
+from map.improvements import ImprovementType
+from map.types import TerrainType, FeatureType, ResourceType, RouteType
+from utils.translation import LazyString
+
+MAGIC = b'SERL'
+TRAILER_MAGIC = b'SRLE'
+VERSION = 1
+
+COLUMNS = 1
+EVENT = 2
+DIFF = 3
+KEYFRAME = 4
+INDEX = 5
+
+_headerStruct = struct.Struct('<4sHHII')
+_recordStruct = struct.Struct('<IB')
+_trailerStruct = struct.Struct('<4sQ')
+_eventStruct = struct.Struct('<IBbHhh')
+_indexStruct = struct.Struct('<IQQQQ')
+_indexEntryDtype = np.dtype([('offset', '<u8'), ('category', 'u1'), ('player', 'i1'), ('eventType', '<u2')])
+
+# name of the column, enum of the values and attribute of the tile
+_enumColumns = [
+	('terrain', TerrainType, '_terrainValue'),
+	('feature', FeatureType, '_featureValue'),
+	('resource', ResourceType, '_resourceValue'),
+	('improvement', ImprovementType, '_improvementValue'),
+	('route', RouteType, '_route'),
+]
+
+
+class ReplayLogError(Exception):
+	pass
+
+
+class ReplayEventCategory(ExtendedEnum):
+	replay = 'replay'
+	moment = 'moment'
+	gossip = 'gossip'
+
+
+def _eventTypeName(eventType) -> str:
+	if isinstance(eventType, Enum):
+		return f'{type(eventType).__name__}.{eventType.value}'
+
+	return str(eventType)
+
+
+def _jsonValue(value):
+	if isinstance(value, Enum):
+		return value.value
+	elif isinstance(value, HexPoint):
+		return [value.x, value.y]
+	elif isinstance(value, LazyString):
+		# the key - the log doesn't depend on the language
+		return value.key
+	elif isinstance(value, (list, tuple)):
+		return [_jsonValue(item) for item in value]
+	elif isinstance(value, dict):
+		return {str(key): _jsonValue(item) for key, item in value.items()}
+
+	return value
+
+
+def mapColumns(simulation) -> dict:
+	"""
+		the state of the map that is recorded in the log
+
+		@param simulation: game
+		@return: dict of column name -> flat int16 array (one value per tile)
+	"""
+	mapModel = simulation._map
+	columns = {}
+
+	for name, enumType, attribute in _enumColumns:
+		codes = enumCodes(enumType)
+		columns[name] = tileArray(mapModel, lambda tile: codes[getattr(tile, attribute)], np.int16)
+
+	columns['pillaged'] = tileArray(mapModel, lambda tile: tile._improvementPillagedValue, np.int16)
+
+	playerCodes = {id(player): index + 1 for index, player in enumerate(simulation.players)}
+	columns['owner'] = tileArray(mapModel, lambda tile: playerCodes.get(id(tile._owner), 0), np.int16)
+	columns['city'] = tileArray(mapModel, lambda tile: tile._cityValue is not None, np.int16)
+
+	return columns
+
+
+def _columnNames(simulation) -> list:
+	columnNames = [{'name': name, 'values': [_eventTypeName(member) for member in enumMembers(enumType)]}
+				   for name, enumType, _ in _enumColumns]
+	columnNames.append({'name': 'pillaged', 'values': []})
+	columnNames.append({'name': 'owner', 'values': ['none'] + [player.leader.value for player in simulation.players]})
+	columnNames.append({'name': 'city', 'values': []})
+	return columnNames
+
+
+class ReplayLogWriter:
+	"""
+		appends the events and map changes of a game to a log file
+
+		records are collected in a buffer that is written when it is full and at the end of every turn
+	"""
+
+	def __init__(self, path: str, simulation, keyframeInterval: int = 10, bufferSize: int = 1 << 16):
+		"""
+			@param path: path of the log file (an existing file is replaced)
+			@param simulation: game that is logged - the players and the map size must not change anymore
+			@param keyframeInterval: number of turns between two keyframes of the map
+			@param bufferSize: size of the write buffer in bytes
+		"""
+		self.path = path
+		self.keyframeInterval = keyframeInterval
+		self.bufferSize = bufferSize
+
+		self._file = open(path, 'wb')
+		self._buffer = bytearray(_headerStruct.pack(MAGIC, VERSION, 0, simulation._map.width, simulation._map.height))
+		self._offset = len(self._buffer)
+
+		self._names = {}
+		self._newNames = []
+		self._events = []
+		self._turnOffset = None
+		self._lastIndexOffset = 0
+		self._lastKeyframeTurn = None
+		self._columns = None
+
+		self._append(COLUMNS, json.dumps(_columnNames(simulation)).encode('utf8'))
+
+	def __enter__(self):
+		return self
+
+	def __exit__(self, excType, excValue, traceback):
+		self.close()
+
+	def addEvent(self, turn: int, category: ReplayEventCategory, eventType, player: int = -1,
+				 location: Optional[HexPoint] = None, data: Optional[dict] = None):
+		"""
+			appends an event
+
+			@param turn: turn of the event
+			@param category: category of the event
+			@param eventType: type of the event (enum member or string)
+			@param player: index of the player in the game (-1 for none)
+			@param location: location of the event
+			@param data: json compatible details of the event (enums are written as their values)
+		"""
+		self._beginTurn()
+
+		name = _eventTypeName(eventType)
+		nameIndex = self._names.get(name)
+
+		if nameIndex is None:
+			nameIndex = len(self._names)
+			self._names[name] = nameIndex
+			self._newNames.append(name)
+
+		x, y = (location.x, location.y) if location is not None else (-1, -1)
+		categoryCode = enumCodes(ReplayEventCategory)[category]
+		payload = _eventStruct.pack(turn, categoryCode, player, nameIndex, x, y)
+
+		if data:
+			payload += json.dumps(_jsonValue(data)).encode('utf8')
+
+		offset = self._append(EVENT, payload)
+		self._events.append((offset, categoryCode, player, nameIndex))
+
+	def finishTurn(self, simulation):
+		"""
+			appends the changes of the map and the index of the current turn of the game and flushes the buffer
+
+			@param simulation: game
+		"""
+		self._beginTurn()
+
+		turn = simulation.currentTurn
+		columns = mapColumns(simulation)
+		keyframeOffset = 0
+		diffOffset = 0
+
+		if self._columns is None or turn - self._lastKeyframeTurn >= self.keyframeInterval:
+			payload = struct.pack('<I', turn) + b''.join(values.astype('<i2').tobytes() for values in columns.values())
+			keyframeOffset = self._append(KEYFRAME, payload)
+			self._lastKeyframeTurn = turn
+		else:
+			changed = np.zeros(len(next(iter(columns.values()))), dtype=bool)
+			for name, values in columns.items():
+				changed |= values != self._columns[name]
+
+			indices = np.flatnonzero(changed).astype('<u4')
+
+			if len(indices) > 0:
+				payload = struct.pack('<II', turn, len(indices)) + indices.tobytes()
+				payload += b''.join(values[indices].astype('<i2').tobytes() for values in columns.values())
+				diffOffset = self._append(DIFF, payload)
+
+		self._columns = columns
+
+		payload = bytearray(_indexStruct.pack(turn, self._turnOffset, self._lastIndexOffset, keyframeOffset, diffOffset))
+		payload += struct.pack('<H', len(self._newNames))
+
+		for name in self._newNames:
+			encodedName = name.encode('utf8')
+			payload += struct.pack('<H', len(encodedName)) + encodedName
+
+		payload += struct.pack('<I', len(self._events))
+		payload += np.array(self._events, dtype=_indexEntryDtype).tobytes()
+
+		self._lastIndexOffset = self._append(INDEX, bytes(payload))
+		self._newNames = []
+		self._events = []
+		self._turnOffset = None
+
+		self.flush()
+
+	def flush(self):
+		if len(self._buffer) > 0:
+			self._file.write(self._buffer)
+			self._buffer = bytearray()
+
+		self._file.flush()
+
+	def close(self):
+		"""writes the pending records and the trailer"""
+		if self._file.closed:
+			return
+
+		self._buffer += _trailerStruct.pack(TRAILER_MAGIC, self._lastIndexOffset)
+		self.flush()
+		self._file.close()
+
+	def _beginTurn(self):
+		if self._turnOffset is None:
+			self._turnOffset = self._offset
+
+	def _append(self, recordType: int, payload: bytes) -> int:
+		offset = self._offset
+		self._buffer += _recordStruct.pack(len(payload) + 1, recordType)
+		self._buffer += payload
+		self._offset += _recordStruct.size + len(payload)
+
+		if len(self._buffer) >= self.bufferSize:
+			self._file.write(self._buffer)
+			self._buffer = bytearray()
+
+		return offset
+
+
+class ReplayEvent:
+	def __init__(self, turn: int, category: ReplayEventCategory, eventType: str, player: int,
+				 location: Optional[HexPoint], data: dict):
+		self.turn = turn
+		self.category = category
+		self.eventType = eventType
+		self.player = player
+		self.location = location
+		self.data = data
+
+	def __repr__(self):
+		return f'ReplayEvent({self.turn}, {self.category}, {self.eventType}, {self.player}, {self.location})'
+
+
+class _TurnIndex:
+	def __init__(self, turn: int, turnOffset: int, keyframeOffset: int, diffOffset: int, entries: np.ndarray):
+		self.turn = turn
+		self.turnOffset = turnOffset
+		self.keyframeOffset = keyframeOffset
+		self.diffOffset = diffOffset
+		self.entries = entries
+
+
+class ReplayLogReader:
+	"""
+		reads a replay log via mmap - only the index records are parsed when the log is opened
+
+		usage:
+			with ReplayLogReader('game.replay') as reader:
+				for event in reader.events(turn=12, player=1):
+					...
+
+				columns = reader.mapStateAt(40)
+	"""
+
+	def __init__(self, path: str):
+		"""
+			@param path: path of the log file
+		"""
+		self.path = path
+		self._file = open(path, 'rb')
+
+		try:
+			self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+		except ValueError as e:
+			self._file.close()
+			raise ReplayLogError(f'{path} is empty') from e
+
+		if len(self._mmap) < _headerStruct.size:
+			self.close()
+			raise ReplayLogError(f'{path} is too short')
+
+		magic, version, _, self.width, self.height = _headerStruct.unpack_from(self._mmap, 0)
+
+		if magic != MAGIC:
+			self.close()
+			raise ReplayLogError(f'{path} is not a replay log')
+
+		if version != VERSION:
+			self.close()
+			raise ReplayLogError(f'unsupported replay log version {version}')
+
+		self._columnNames = []
+		self._names = []
+		self._turns = {}
+		self._loadIndex()
+
+	def __enter__(self):
+		return self
+
+	def __exit__(self, excType, excValue, traceback):
+		self.close()
+
+	def close(self):
+		if self._mmap is not None:
+			self._mmap.close()
+			self._mmap = None
+
+		self._file.close()
+
+	def turns(self) -> list:
+		"""@return: sorted list of the turns that are in the log"""
+		return sorted(self._turns.keys())
+
+	def eventTypes(self) -> list:
+		"""@return: names of the event types, the index in this list is the event type of the index entries"""
+		return list(self._names)
+
+	def columnNames(self) -> list:
+		"""@return: names of the map columns"""
+		return [column['name'] for column in self._columnNames]
+
+	def columnValues(self, column: str) -> list:
+		"""@return: names of the values of the column (empty for plain numbers)"""
+		for columnName in self._columnNames:
+			if columnName['name'] == column:
+				return columnName['values']
+
+		raise ReplayLogError(f'unknown column {column}')
+
+	def events(self, turn: Optional[int] = None, category: Optional[ReplayEventCategory] = None, eventType=None,
+			   player: Optional[int] = None) -> list:
+		"""
+			returns the events that match all given filters - only the matching records are decoded
+
+			@param turn: turn of the events (None for all turns)
+			@param category: category of the events
+			@param eventType: type of the events (enum member or string)
+			@param player: index of the player (-1 for events without player)
+			@return: list of ReplayEvent
+		"""
+		if turn is not None:
+			turnIndices = [self._turns[turn]] if turn in self._turns else []
+		else:
+			turnIndices = [self._turns[key] for key in sorted(self._turns.keys())]
+
+		eventTypeIndex = None
+		if eventType is not None:
+			try:
+				eventTypeIndex = self._names.index(_eventTypeName(eventType))
+			except ValueError:
+				return []
+
+		events = []
+		for turnIndex in turnIndices:
+			entries = turnIndex.entries
+			mask = np.ones(len(entries), dtype=bool)
+
+			if category is not None:
+				mask &= entries['category'] == enumCodes(ReplayEventCategory)[category]
+
+			if eventTypeIndex is not None:
+				mask &= entries['eventType'] == eventTypeIndex
+
+			if player is not None:
+				mask &= entries['player'] == player
+
+			for offset in entries['offset'][mask]:
+				events.append(self._readEvent(int(offset)))
+
+		return events
+
+	def mapStateAt(self, turn: int) -> dict:
+		"""
+			restores the state of the map at the end of a turn from the nearest keyframe and the following diffs
+
+			@param turn: turn to restore
+			@return: dict of column name -> int16 array with the shape (height, width)
+		"""
+		turns = [key for key in sorted(self._turns.keys()) if key <= turn]
+		keyframeTurns = [key for key in turns if self._turns[key].keyframeOffset != 0]
+
+		if len(keyframeTurns) == 0:
+			raise ReplayLogError(f'no map state before turn {turn}')
+
+		names = self.columnNames()
+		size = self.width * self.height
+		payload = self._record(self._turns[keyframeTurns[-1]].keyframeOffset, KEYFRAME)
+		values = np.frombuffer(payload, dtype='<i2', offset=4, count=size * len(names)).reshape(len(names), size).copy()
+
+		for key in turns:
+			if key <= keyframeTurns[-1] or self._turns[key].diffOffset == 0:
+				continue
+
+			payload = self._record(self._turns[key].diffOffset, DIFF)
+			_, count = struct.unpack_from('<II', payload, 0)
+			indices = np.frombuffer(payload, dtype='<u4', offset=8, count=count)
+			changes = np.frombuffer(payload, dtype='<i2', offset=8 + 4 * count, count=count * len(names))
+			values[:, indices] = changes.reshape(len(names), count)
+
+		return {name: values[index].reshape(self.height, self.width) for index, name in enumerate(names)}
+
+	def _recordAt(self, offset: int):
+		if offset + _recordStruct.size > len(self._mmap):
+			return None, None
+
+		length, recordType = _recordStruct.unpack_from(self._mmap, offset)
+
+		if offset + 4 + length > len(self._mmap):
+			return None, None
+
+		return recordType, self._mmap[offset + _recordStruct.size:offset + 4 + length]
+
+	def _record(self, offset: int, expectedType: int):
+		recordType, payload = self._recordAt(offset)
+
+		if recordType != expectedType:
+			raise ReplayLogError(f'expected record type {expectedType} at {offset}, found {recordType}')
+
+		return payload
+
+	def _readEvent(self, offset: int) -> ReplayEvent:
+		payload = self._record(offset, EVENT)
+		turn, categoryCode, player, nameIndex, x, y = _eventStruct.unpack_from(payload, 0)
+		data = json.loads(payload[_eventStruct.size:]) if len(payload) > _eventStruct.size else {}
+		location = HexPoint(x, y) if x >= 0 and y >= 0 else None
+		category = enumMembers(ReplayEventCategory)[categoryCode]
+
+		return ReplayEvent(turn, category, self._names[nameIndex], player, location, data)
+
+	def _indexOffsets(self) -> list:
+		# complete log: follow the index records from the trailer backwards
+		if len(self._mmap) >= _headerStruct.size + _trailerStruct.size:
+			magic, lastIndexOffset = _trailerStruct.unpack_from(self._mmap, len(self._mmap) - _trailerStruct.size)
+
+			if magic == TRAILER_MAGIC:
+				offsets = []
+				offset = lastIndexOffset
+
+				while offset != 0:
+					offsets.append(offset)
+					payload = self._record(offset, INDEX)
+					offset = _indexStruct.unpack_from(payload, 0)[2]
+
+				return list(reversed(offsets))
+
+		# incomplete log: skip from record to record (only the record headers are read)
+		offsets = []
+		offset = _headerStruct.size
+
+		while True:
+			recordType, _ = self._recordAt(offset)
+
+			if recordType is None:
+				break
+
+			if recordType == INDEX:
+				offsets.append(offset)
+
+			offset += 4 + _recordStruct.unpack_from(self._mmap, offset)[0]
+
+		return offsets
+
+	def _loadIndex(self):
+		recordType, payload = self._recordAt(_headerStruct.size)
+
+		if recordType != COLUMNS:
+			raise ReplayLogError('the log does not start with the map columns')
+
+		self._columnNames = json.loads(payload)
+
+		for offset in self._indexOffsets():
+			payload = self._record(offset, INDEX)
+			turn, turnOffset, _, keyframeOffset, diffOffset = _indexStruct.unpack_from(payload, 0)
+			position = _indexStruct.size
+
+			nameCount, = struct.unpack_from('<H', payload, position)
+			position += 2
+
+			for _ in range(nameCount):
+				nameLength, = struct.unpack_from('<H', payload, position)
+				position += 2
+				self._names.append(payload[position:position + nameLength].decode('utf8'))
+				position += nameLength
+
+			eventCount, = struct.unpack_from('<I', payload, position)
+			position += 4
+			entries = np.frombuffer(payload, dtype=_indexEntryDtype, offset=position, count=eventCount).copy()
+
+			self._turns[turn] = _TurnIndex(turn, turnOffset, keyframeOffset, diffOffset, entries)
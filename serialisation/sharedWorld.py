@@ -0,0 +1,534 @@
+"""
+	shared memory snapshot of the world for worker processes
+
+	the game writes the tile attributes, the units, the cities and the visibility of the players into shared memory
+	blocks once - the workers only get the (small) manifest and attach to the blocks by name, nothing is pickled or
+	copied:
+
+		with SharedWorldSnapshot(simulation) as snapshot:
+			pool.map(work, [snapshot.manifest] * 4)
+
+		def work(manifest):
+			with SharedWorldView(manifest) as world:
+				dataSource = MoveTypeIgnoreUnitsPathfinderDataSource(world, UnitMovementType.walk, player, options)
+
+	blocks (numpy structured arrays, see the dtypes below):
+
+		tiles       one row per tile in row order (y * width + x) - the enums are stored as their index in the enum
+		units       one row per unit (location, type, player, health and moves)
+		cities      one row per city (location, player, population and capital)
+		visibility  one plane per visibility key of the players (bit 1: discovered, bit 2: visible)
+
+	the players are referenced by their index in the game. SharedWorldView implements the part of the GameModel /
+	MapModel api that the pathfinders, the evaluators and the tactical analysis use (tileAt, valid, unitAt, unitsAt,
+	cityAt, isVisibleTo, isDiscoveredBy) - the TurnPlanner fills the tactical analysis maps of the players from it (see
+	game.planning). the tiles, units and cities of the view are detached and read-only: the tiles are Tile objects
+	with the attributes of the snapshot, units, cities and players are light records. the view doesn't follow the
+	game - update the snapshot (see SharedWorldSnapshot.update) and attach a new view when the game changed.
+"""
+from multiprocessing import shared_memory
+from numbers import Integral
+from typing import Union, Optional
+
+import numpy as np
+
+from game.districts import DistrictType
+from game.unitTypes import UnitType, UnitMapType
+from game.wonders import WonderType
+from map.base import HexPoint, Size
+from serialisation.binaryMap import _enumColumns, _valueColumns, _identifierColumns
+
+_visibilityDiscovered = 1
+_visibilityVisible = 2
+
+_tileDtype = np.dtype(
+	[(name, '|u1') for name, _, _ in _enumColumns] +
+	[(name, dtype) for name, _, dtype, _ in _valueColumns] +
+	[(name, '<i4') for name, _ in _identifierColumns] +
+	[('district', '|i1'), ('wonder', '|u1'), ('owner', '<i2'), ('city', '<i4')]
+)
+_unitDtype = np.dtype([
+	('x', '<i4'), ('y', '<i4'), ('unitType', '<u2'), ('unitMapType', '|u1'), ('player', '<i2'),
+	('healthPoints', '<i2'), ('moves', '<i2')
+])
+_cityDtype = np.dtype([
+	('x', '<i4'), ('y', '<i4'), ('player', '<i2'), ('population', '<i2'), ('capital', '|u1')
+])
+
+# members of the enums in the order of their codes
+_districtTypes = list(DistrictType)
+_wonderTypes = list(WonderType)
+_unitTypes = list(UnitType)
+_unitMapTypes = list(UnitMapType)
+
+
+def _codes(members: list) -> dict:
+	return {member: code for code, member in enumerate(members)}
+
+
+class SharedPlayer:
+	"""player of a SharedWorldView - only identifies the player (like Player.isEqualTo)"""
+
+	def __init__(self, index: int, leader, cityState):
+		self.index = index
+		self.leader = leader
+		self.cityState = cityState
+
+	def isEqualTo(self, otherPlayer) -> bool:
+		if otherPlayer is None:
+			return False
+
+		return self.leader == otherPlayer.leader
+
+	def isCityState(self) -> bool:
+		return self.cityState is not None
+
+	def __repr__(self):
+		return f'SharedPlayer({self.index}, {self.leader}, {self.cityState})'
+
+
+class SharedUnit:
+	"""unit of a SharedWorldView"""
+
+	def __init__(self, location: HexPoint, unitType: UnitType, unitMapType: UnitMapType, player: SharedPlayer,
+				 healthPoints: int, moves: int):
+		self.location = location
+		self.unitType = unitType
+		self.player = player
+		self._unitMapType = unitMapType
+		self._healthPoints = healthPoints
+		self._moves = moves
+
+	def unitMapType(self) -> UnitMapType:
+		return self._unitMapType
+
+	def healthPoints(self) -> int:
+		return self._healthPoints
+
+	def moves(self) -> int:
+		return self._moves
+
+	def isCombatUnit(self) -> bool:
+		return self.unitType.meleeStrength() > 0
+
+	def __repr__(self):
+		return f'SharedUnit({self.unitType}, {self.location}, {self.player})'
+
+
+class SharedCity:
+	"""city of a SharedWorldView"""
+
+	def __init__(self, location: HexPoint, player: SharedPlayer, population: int, capital: bool):
+		self.location = location
+		self.player = player
+		self._population = population
+		self._capital = capital
+
+	def population(self) -> int:
+		return self._population
+
+	def isCapital(self) -> bool:
+		return self._capital
+
+	def __repr__(self):
+		return f'SharedCity({self.location}, {self.player})'
+
+
+class SharedWorldManifest:
+	"""everything a worker needs to attach to a SharedWorldSnapshot (small, can be pickled)"""
+
+	def __init__(self, width: int, height: int, turn: int, players: [tuple], visibilityKeys: [str],
+				 blocks: dict, counts: dict):
+		"""
+			@param width: width of the map
+			@param height: height of the map
+			@param turn: turn of the game
+			@param players: leader and city state of each player of the game
+			@param visibilityKeys: keys of the visibility planes (like the keys of Tile.visible)
+			@param blocks: name of the shared memory block of each part (tiles, units, cities and visibility)
+			@param counts: number of rows of each part
+		"""
+		self.width = width
+		self.height = height
+		self.turn = turn
+		self.players = players
+		self.visibilityKeys = visibilityKeys
+		self.blocks = blocks
+		self.counts = counts
+
+
+def _createBlock(values: np.ndarray) -> shared_memory.SharedMemory:
+	# blocks can't be empty
+	block = shared_memory.SharedMemory(create=True, size=max(1, values.nbytes))
+	np.ndarray(values.shape, dtype=values.dtype, buffer=block.buf)[...] = values
+	return block
+
+
+class SharedWorldSnapshot:
+	"""
+		writes the world of a game into shared memory blocks - the blocks live until unlink() is called (the context
+		manager closes and unlinks them)
+
+		update() writes the game into the blocks again: only the tiles whose version changed (see Tile._version) are
+		written, the units and the cities are written into new blocks. views have to be created again after an update.
+	"""
+
+	def __init__(self, simulation):
+		"""
+			@param simulation: game to export (GameModel)
+		"""
+		mapModel = simulation._map
+		self._visibilityKeys = sorted(set(str(player.leader) for player in simulation.players))
+		self._visibilityIndices = {key: index for index, key in enumerate(self._visibilityKeys)}
+		self._enumCodes = {name: _codes(list(enumType)) for name, _, enumType in _enumColumns}
+		self._districtCodes = _codes(_districtTypes)
+		self._wonderCodes = _codes(_wonderTypes)
+		self._unitTypeCodes = _codes(_unitTypes)
+		self._unitMapTypeCodes = _codes(_unitMapTypes)
+
+		# tile and its version of each row of the tiles block
+		self._rows = [None] * (mapModel.width * mapModel.height)
+		self._playerIndices = {}
+		self._players = []
+
+		self._blocks = {}
+		try:
+			self._blocks['tiles'] = _createBlock(np.zeros(mapModel.width * mapModel.height, dtype=_tileDtype))
+			self._blocks['visibility'] = _createBlock(
+				np.zeros((len(self._visibilityKeys), mapModel.height, mapModel.width), dtype='|u1')
+			)
+		except Exception:
+			self.unlink()
+			raise
+
+		self._tiles = np.ndarray((mapModel.width * mapModel.height,), dtype=_tileDtype, buffer=self._blocks['tiles'].buf)
+		self._visibility = np.ndarray(
+			(len(self._visibilityKeys), mapModel.height, mapModel.width), dtype='|u1', buffer=self._blocks['visibility'].buf
+		)
+
+		self.manifest = None
+		self.update(simulation)
+
+	def update(self, simulation):
+		"""
+			writes the current state of the game into the blocks (and updates the manifest)
+
+			@param simulation: game of the snapshot
+		"""
+		mapModel = simulation._map
+		self._players = simulation.players
+		self._playerIndices = {id(player): index for index, player in enumerate(self._players)}
+
+		cities = list(mapModel._cities)
+		cityIndices = {id(city): index for index, city in enumerate(cities)}
+		cityColumn = []
+
+		for y in range(mapModel.height):
+			for x in range(mapModel.width):
+				tile = mapModel.tiles.values[y][x]
+				index = y * mapModel.width + x
+				row = self._rows[index]
+
+				if row is None or row[0] is not tile or row[1] != tile._version:
+					self._writeTile(index, x, y, tile)
+					self._rows[index] = (tile, tile._version)
+
+				# the indices of the cities change when a city is removed
+				cityColumn.append(-1 if tile._cityValue is None else cityIndices.get(id(tile._cityValue), -1))
+
+		self._tiles['city'] = cityColumn
+
+		units = np.array([
+			(
+				unit.location.x, unit.location.y, self._unitTypeCodes[unit.unitType],
+				self._unitMapTypeCodes[unit.unitMapType()], self._playerIndex(unit.player), unit.healthPoints(),
+				unit.moves()
+			) for unit in mapModel._units
+		], dtype=_unitDtype)
+		cities = np.array([
+			(city.location.x, city.location.y, self._playerIndex(city.player), city.population(), city.isCapital())
+			for city in cities
+		], dtype=_cityDtype)
+
+		for part, values in [('units', units), ('cities', cities)]:
+			block = self._blocks.pop(part, None)
+			if block is not None:
+				block.close()
+				block.unlink()
+
+			self._blocks[part] = _createBlock(values)
+
+		self.manifest = SharedWorldManifest(
+			width=mapModel.width,
+			height=mapModel.height,
+			turn=simulation.currentTurn,
+			players=[(player.leader, player.cityState) for player in self._players],
+			visibilityKeys=self._visibilityKeys,
+			blocks={part: block.name for part, block in self._blocks.items()},
+			counts={
+				'tiles': len(self._tiles), 'units': len(units), 'cities': len(cities),
+				'visibility': len(self._visibilityKeys)
+			}
+		)
+
+	def _playerIndex(self, player) -> int:
+		if player is None:
+			return -1
+
+		index = self._playerIndices.get(id(player))
+		if index is None:
+			# a copy of a player of the game
+			index = next((index for index, loopPlayer in enumerate(self._players) if loopPlayer.isEqualTo(player)), -1)
+
+		return index
+
+	def _writeTile(self, index: int, x: int, y: int, tile):
+		row = self._tiles[index]
+
+		for name, attribute, _ in _enumColumns:
+			row[name] = self._enumCodes[name][getattr(tile, attribute)]
+
+		for name, attribute, _, _ in _valueColumns:
+			row[name] = getattr(tile, attribute)
+
+		for name, attribute in _identifierColumns:
+			identifier = getattr(tile, attribute)
+			row[name] = -1 if identifier is None else int(identifier)
+
+		row['district'] = -1 if tile._districtValue is None else self._districtCodes[tile._districtValue]
+		row['wonder'] = self._wonderCodes[tile._wonderValue]
+		row['owner'] = self._playerIndex(tile._owner)
+
+		self._visibility[:, y, x] = 0
+
+		for key, discovered in tile.discovered.items():
+			if discovered and key in self._visibilityIndices:
+				self._visibility[self._visibilityIndices[key], y, x] |= _visibilityDiscovered
+
+		for key, visible in tile.visible.items():
+			if visible and key in self._visibilityIndices:
+				self._visibility[self._visibilityIndices[key], y, x] |= _visibilityVisible
+
+	def __enter__(self):
+		return self
+
+	def __exit__(self, excType, excValue, traceback):
+		self.unlink()
+
+	def close(self):
+		"""closes the blocks in this process (they still exist for the views)"""
+		self._tiles = self._visibility = None
+
+		for block in self._blocks.values():
+			block.close()
+
+	def unlink(self):
+		"""closes and removes the blocks - views that are still attached keep their mapping until they are closed"""
+		self._tiles = self._visibility = None
+
+		for block in self._blocks.values():
+			block.close()
+			block.unlink()
+
+		self._blocks = {}
+
+
+class SharedWorldView:
+	"""
+		read-only world that is attached to the blocks of a SharedWorldSnapshot
+
+		the tile attributes are exposed as numpy views into the blocks and Tile objects are only created by tileAt
+		(and kept, the snapshot doesn't change).
+	"""
+
+	def __init__(self, manifest: SharedWorldManifest):
+		"""
+			@param manifest: manifest of the snapshot
+		"""
+		self.manifest = manifest
+		self.width = manifest.width
+		self.height = manifest.height
+		self.players = [
+			SharedPlayer(index, leader, cityState) for index, (leader, cityState) in enumerate(manifest.players)
+		]
+
+		self._blocks = {part: shared_memory.SharedMemory(name=name) for part, name in manifest.blocks.items()}
+		self.tiles = self._array('tiles', _tileDtype, (manifest.counts['tiles'],))
+		self.units = self._array('units', _unitDtype, (manifest.counts['units'],))
+		self.cities = self._array('cities', _cityDtype, (manifest.counts['cities'],))
+		self.visibility = self._array('visibility', np.dtype('|u1'), (manifest.counts['visibility'], self.height, self.width))
+
+		self._visibilityIndices = {key: index for index, key in enumerate(manifest.visibilityKeys)}
+		self._members = {name: list(enumType) for name, _, enumType in _enumColumns}
+		self._tiles = {}
+		self._cities = {}
+
+	def _array(self, part: str, dtype: np.dtype, shape: tuple) -> np.ndarray:
+		array = np.ndarray(shape, dtype=dtype, buffer=self._blocks[part].buf)
+		array.flags.writeable = False
+		return array
+
+	def __enter__(self):
+		return self
+
+	def __exit__(self, excType, excValue, traceback):
+		self.close()
+
+	def close(self):
+		"""detaches from the blocks - views that were handed out must not be used afterwards"""
+		self.tiles = self.units = self.cities = self.visibility = None
+		self._tiles = {}
+		self._cities = {}
+
+		for block in self._blocks.values():
+			try:
+				block.close()
+			except BufferError:
+				# views are still referenced, the mapping is released with the last of them
+				pass
+
+		self._blocks = {}
+
+	def valid(self, x_or_hex: Union[int, HexPoint], y: Optional[int] = None) -> bool:
+		if isinstance(x_or_hex, HexPoint) and y is None:
+			return 0 <= x_or_hex.x < self.width and 0 <= x_or_hex.y < self.height
+		elif isinstance(x_or_hex, Integral) and isinstance(y, Integral):
+			# the coordinates that are read from the blocks are numpy integers
+			return 0 <= x_or_hex < self.width and 0 <= y < self.height
+		else:
+			raise AttributeError(f'SharedWorldView.valid with wrong attributes: {x_or_hex} / {y}')
+
+	def points(self) -> [HexPoint]:
+		return [HexPoint(x, y) for x in range(self.width) for y in range(self.height)]
+
+	def mapSize(self) -> Size:
+		return Size(self.width, self.height)
+
+	def tileAt(self, x_or_hex: Union[int, HexPoint], y: Optional[int] = None):
+		"""
+			@return: a Tile with the attributes of the location or None if the location is not on the map
+		"""
+		index = self._indexOf(x_or_hex, y)
+		if index is None:
+			return None
+
+		tile = self._tiles.get(index)
+		if tile is None:
+			tile = self._tile(index)
+			self._tiles[index] = tile
+
+		return tile
+
+	def _tile(self, index: int):
+		from map.map import Tile
+
+		row = self.tiles[index]
+		point = HexPoint(index % self.width, index // self.width)
+		attributes = {}
+
+		for name, attribute, _ in _enumColumns:
+			attributes[attribute] = self._members[name][row[name]]
+
+		for name, attribute, _, valueType in _valueColumns:
+			attributes[attribute] = valueType(row[name]).item()
+
+		for name, attribute in _identifierColumns:
+			identifier = int(row[name])
+			attributes[attribute] = None if identifier == -1 else identifier
+
+		district = int(row['district'])
+		attributes['_districtValue'] = None if district == -1 else _districtTypes[district]
+		attributes['_wonderValue'] = _wonderTypes[row['wonder']]
+		attributes['_owner'] = self._player(int(row['owner']))
+		attributes['_cityValue'] = self._city(int(row['city']))
+
+		planes = self.visibility[:, point.y, point.x]
+		attributes['discovered'] = {
+			key: True for key, index in self._visibilityIndices.items() if planes[index] & _visibilityDiscovered
+		}
+		attributes['visible'] = {
+			key: True for key, index in self._visibilityIndices.items() if planes[index] & _visibilityVisible
+		}
+
+		tile = Tile(point, attributes['_terrainValue'])
+		tile.__dict__.update(attributes)
+
+		return tile
+
+	def _player(self, index: int) -> Optional[SharedPlayer]:
+		return None if index == -1 else self.players[index]
+
+	def _city(self, index: int) -> Optional[SharedCity]:
+		if index == -1:
+			return None
+
+		city = self._cities.get(index)
+		if city is None:
+			row = self.cities[index]
+			city = SharedCity(
+				HexPoint(int(row['x']), int(row['y'])), self._player(int(row['player'])), int(row['population']),
+				bool(row['capital'])
+			)
+			self._cities[index] = city
+
+		return city
+
+	def _unit(self, index: int) -> SharedUnit:
+		row = self.units[index]
+		return SharedUnit(
+			HexPoint(int(row['x']), int(row['y'])), _unitTypes[row['unitType']], _unitMapTypes[row['unitMapType']],
+			self._player(int(row['player'])), int(row['healthPoints']), int(row['moves'])
+		)
+
+	def _unitIndicesAt(self, location: HexPoint) -> np.ndarray:
+		return np.flatnonzero((self.units['x'] == location.x) & (self.units['y'] == location.y))
+
+	def unitsAt(self, location: HexPoint) -> [SharedUnit]:
+		return [self._unit(index) for index in self._unitIndicesAt(location)]
+
+	def unitAt(self, location: HexPoint, unitMapType: UnitMapType) -> Optional[SharedUnit]:
+		code = _unitMapTypes.index(unitMapType)
+
+		for index in self._unitIndicesAt(location):
+			if self.units['unitMapType'][index] == code:
+				return self._unit(index)
+
+		return None
+
+	def cityAt(self, location: HexPoint) -> Optional[SharedCity]:
+		if not self.valid(location):
+			return None
+
+		return self._city(int(self.tiles['city'][location.y * self.width + location.x]))
+
+	def isVisibleTo(self, location: HexPoint, player) -> bool:
+		"""
+			@param location: location of the tile
+			@param player: player (or SharedPlayer) - like Tile.isVisibleTo
+			@return: True if the tile is visible to the player
+		"""
+		return self._visibilityAt(location, player) & _visibilityVisible != 0
+
+	def isDiscoveredBy(self, location: HexPoint, player) -> bool:
+		return self._visibilityAt(location, player) & _visibilityDiscovered != 0
+
+	def _visibilityAt(self, location: HexPoint, player) -> int:
+		if player is None or not self.valid(location):
+			return 0
+
+		index = self._visibilityIndices.get(str(player.leader))
+		if index is None:
+			return 0
+
+		return int(self.visibility[index, location.y, location.x])
+
+	def _indexOf(self, x_or_hex: Union[int, HexPoint], y: Optional[int] = None) -> Optional[int]:
+		if isinstance(x_or_hex, HexPoint) and y is None:
+			x, y = x_or_hex.x, x_or_hex.y
+		else:
+			x = x_or_hex
+
+		if not self.valid(x, y):
+			return None
+
+		return int(y) * self.width + int(x)
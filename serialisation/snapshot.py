@@ -0,0 +1,876 @@
+"""
+	full game state snapshots
+
+	the state of a game is split into records: the game itself, the map, every player, city, unit and tile. records
+	are written in chunks (one chunk per record, the tiles in one chunk per row of the map) and every chunk is pickled
+	on its own. references to other records are written as persistent ids, so an object that is referenced from
+	several chunks (like the player that owns a city or the city that works a tile) is restored as the same object.
+
+	layout (all numbers little endian):
+
+		header:     magic 'SESN', version (uint16), kind (uint8, 0 = full, 1 = delta),
+					compression (uint8, 0 = zlib, 1 = lzma), sequence (uint32), base sequence (uint32)
+		body:       compressed pickle of a dict with the class table, the id of the root record, the chunks
+					(chunk id -> ((record id, class index), ...), pickled record states) and the ids of the
+					removed chunks
+
+	a SnapshotWriter remembers what it wrote before: a delta snapshot only contains the chunks that changed since the
+	previous snapshot of the same writer, a chain of a full snapshot and its following deltas is restored with
+	readSnapshots.
+
+	writing a snapshot is split into capture, which pickles the records and has to run while the game is not
+	updated, and encode, which assembles and compresses the file and can run on another thread
+	(see AutoSaver).
+
+	attributes that only exist at runtime (like the user interface of the game) are not written and are recreated
+	after the records are restored (see _transientAttributes)
+"""
+import importlib
+import io
+import lzma
+import os
+import pickle
+import struct
+import threading
+import time
+import zlib
+from collections import deque
+from typing import Optional
+
+from game.ai.tactics import TacticalAnalysisMap
+from game.cities import City
+from game.game import GameModel
+from game.players import Player
+from game.units import Unit
+from map.base import Size
+from map.map import MapModel, Tile
+
+MAGIC = b'SESN'
+VERSION = 1
+
+FULL = 0
+DELTA = 1
+
+ZLIB = 0
+LZMA = 1
+
+_compressions = {
+	'zlib': ZLIB,
+	'lzma': LZMA,
+}
+
+_headerStruct = struct.Struct('<4sHBBII')
+
+# classes whose instances are stored as records - everything else is stored inside the record that references it
+_recordClasses = (GameModel, MapModel, Player, City, Unit, Tile)
+
+# attributes that are not written, they are restored by _restoreTransientAttributes
+_transientAttributes = {
+	GameModel: ('userInterface', 'autoSaver', 'replayLog', '_tacticalAnalysisMap', 'planner'),
+	# numpy arrays can't be restored by the restricted unpickler, the vector is rebuilt on demand
+	Player: ('_flavorVector', '_flavorVectorKey'),
+	# the hasher of the map references the units and cities by id(), it is computed again - the versions only make
+	# sense for the writer that saw them
+	MapModel: ('_hasher', '_version'),
+	Tile: ('_hasher', '_version'),
+}
+
+# records whose setters increment their _version, their chunks are only pickled again when a version changed
+_versionedClasses = (MapModel, Tile)
+
+# packages of this game, only classes of these packages (and the builtins below) can be restored - no functions, so a
+# snapshot can't call anything but constructors and enum lookups
+_defaultPackages = ('core', 'game', 'map', 'serialisation', 'utils')
+_safeBuiltins = {
+	('builtins', 'set'),
+	('builtins', 'frozenset'),
+	('builtins', 'range'),
+	('builtins', 'slice'),
+	('collections', 'OrderedDict'),
+	('collections', 'defaultdict'),
+	('collections', 'deque'),
+}
+
+
+class SnapshotFormatError(Exception):
+	pass
+
+
+class _RecordPickler(pickle.Pickler):
+	def __init__(self, file, writer):
+		super().__init__(file, protocol=pickle.HIGHEST_PROTOCOL)
+		self.writer = writer
+		# ids of the records that are referenced from the chunk
+		self.references = []
+
+	def persistent_id(self, obj):
+		isRecord = self.writer._isRecordClass.get(type(obj))
+
+		if isRecord is None:
+			isRecord = self.writer._checkRecordClass(type(obj))
+
+		if not isRecord:
+			return None
+
+		identifier = self.writer._recordIdentifier(obj)
+		self.references.append(identifier)
+		return identifier
+
+
+class _RestrictedUnpickler(pickle.Unpickler):
+	def __init__(self, file, packages: (str, ...), records: Optional[dict] = None):
+		super().__init__(file)
+		self.packages = packages
+		self.records = records
+
+	def find_class(self, module: str, name: str):
+		if (module, name) in _safeBuiltins:
+			return super().find_class(module, name)
+
+		# dotted names are resolved with getattr and would reach the modules that an allowed module imports
+		if '.' in name or not _isAllowedModule(module, self.packages):
+			raise SnapshotFormatError(f'class {module}.{name} is not allowed in a snapshot')
+
+		try:
+			obj = super().find_class(module, name)
+		except (ImportError, AttributeError) as e:
+			raise SnapshotFormatError(f'cannot resolve class {module}.{name}') from e
+
+		if not _isAllowedClass(obj, self.packages):
+			raise SnapshotFormatError(f'class {module}.{name} is not allowed in a snapshot')
+
+		return obj
+
+	def persistent_load(self, pid):
+		if self.records is None or pid not in self.records:
+			raise SnapshotFormatError(f'unknown record {pid}')
+
+		return self.records[pid]
+
+
+def _isAllowedModule(module: str, packages: (str, ...)) -> bool:
+	return module.split('.', 1)[0] in packages
+
+
+def _isAllowedClass(obj, packages: (str, ...)) -> bool:
+	"""@return: True if obj is a class (or an enum) that is defined in one of the packages"""
+	return isinstance(obj, type) and _isAllowedModule(obj.__module__, packages)
+
+
+def _className(cls) -> str:
+	return f'{cls.__module__}:{cls.__qualname__}'
+
+
+def _resolveClass(className: str, packages: (str, ...)):
+	module, _, qualname = className.partition(':')
+
+	if not _isAllowedModule(module, packages):
+		raise SnapshotFormatError(f'class {className} is not allowed in a snapshot')
+
+	try:
+		obj = importlib.import_module(module)
+		for name in qualname.split('.'):
+			obj = getattr(obj, name)
+	except (ImportError, AttributeError) as e:
+		raise SnapshotFormatError(f'cannot resolve class {className}') from e
+
+	# the qualname of a nested class is dotted, but the class has to be a record class of the packages
+	if not _isAllowedClass(obj, packages) or not issubclass(obj, _recordClasses):
+		raise SnapshotFormatError(f'class {className} is not allowed in a snapshot')
+
+	return obj
+
+
+class SnapshotCapture:
+	"""the pickled chunks of a game at one point in time - it doesn't reference the game anymore"""
+
+	def __init__(self, classes: (str, ...), root: int, chunks: dict, turn: int, seconds: float, pickledChunks: int):
+		self.classes = classes
+		self.root = root
+		self.chunks = chunks
+		self.turn = turn
+		self.seconds = seconds
+		# number of chunks that were pickled, the others were unchanged and taken from the previous capture
+		self.pickledChunks = pickledChunks
+
+
+class SnapshotWriter:
+	"""
+		writes snapshots of a game
+
+		the writer keeps the record ids and the chunks of the last snapshot, so that the next snapshot
+		can be written as a delta that only contains the changed chunks. a delta can only be restored on top of the
+		previous snapshot of the same writer.
+
+		each chunk has a version: the sequence number of the snapshot in which its content changed the last time.
+
+		the chunks of the map and the tiles are only pickled again when one of their records changed: the setters of
+		MapModel and Tile increment a _version counter of the record. code that writes the attributes of a tile directly
+		(like the map generator) has to do that before the first capture or use a new writer. players, cities, units
+		and the game have no such counter and are pickled by every capture.
+	"""
+
+	def __init__(self, compression: str = 'zlib', compressionLevel: Optional[int] = None):
+		if compression not in _compressions:
+			raise ValueError(f'unknown compression {compression}')
+
+		self.compression = compression
+		self.compressionLevel = compressionLevel
+		self.sequence = 0
+
+		# number of chunks that changed since the previous encode
+		self.dirtyChunks = 0
+
+		self._isRecordClass = {}
+		self._classes = []
+		self._classIndices = {}
+
+		# id(obj) -> record id - the objects are kept alive in _objects, so that their id can't be reused
+		self._identifiers = {}
+		self._objects = {}
+		self._nextIdentifier = 0
+
+		self._pending = deque()
+		self._reached = set()
+
+		# chunk id -> (chunk, version) - the chunks are compared, not their hashes (reused chunks are the same object)
+		self._chunkVersions = {}
+
+		# chunk id -> (records, versions of the records, chunk, ids of the referenced records) of the versioned chunks
+		self._cachedChunks = {}
+		self._pickledChunks = 0
+
+	def snapshot(self, simulation, delta: bool = False) -> bytes:
+		"""
+			creates a snapshot of the game
+
+			@param simulation: game to write
+			@param delta: write only the chunks that changed since the previous snapshot of this writer
+				(ignored for the first snapshot)
+			@return: the snapshot
+		"""
+		return self.encode(self.capture(simulation), delta=delta)
+
+	def write(self, simulation, file, delta: bool = False):
+		"""
+			writes a snapshot of the game to a binary file object
+
+			@param simulation: game to write
+			@param file: binary file object
+			@param delta: write only the chunks that changed since the previous snapshot of this writer
+		"""
+		file.write(self.snapshot(simulation, delta=delta))
+
+	def capture(self, simulation) -> SnapshotCapture:
+		"""
+			pickles all records of the game - the game must not be updated while this runs
+
+			@param simulation: game to capture
+			@return: SnapshotCapture that can be encoded on another thread
+		"""
+		startTime = time.perf_counter()
+		chunks = self._encodeChunks(simulation)
+
+		return SnapshotCapture(
+			classes=tuple(self._classes),
+			root=self._identifiers[id(simulation)],
+			chunks=chunks,
+			turn=simulation.currentTurn,
+			seconds=time.perf_counter() - startTime,
+			pickledChunks=self._pickledChunks
+		)
+
+	def encode(self, capture: SnapshotCapture, delta: bool = False) -> bytes:
+		"""
+			finds the changed chunks of a capture, assembles and compresses the snapshot
+
+			the captures of a writer need to be encoded in the order they were captured (but not all of them)
+
+			@param capture: result of capture
+			@param delta: write only the chunks that changed since the previous snapshot of this writer
+				(ignored for the first snapshot)
+			@return: the snapshot
+		"""
+		delta = delta and self.sequence > 0
+		baseSequence = self.sequence
+		self.sequence += 1
+
+		versions = {}
+		chunks = {}
+		self.dirtyChunks = 0
+
+		for chunkIdentifier, chunk in capture.chunks.items():
+			version = self._chunkVersions.get(chunkIdentifier)
+
+			if version is None or version[0] != chunk:
+				version = (chunk, self.sequence)
+				self.dirtyChunks += 1
+
+			versions[chunkIdentifier] = version
+
+			if not delta or version[1] == self.sequence:
+				chunks[chunkIdentifier] = chunk
+
+		removed = []
+		if delta:
+			removed = [chunkIdentifier for chunkIdentifier in self._chunkVersions if chunkIdentifier not in versions]
+
+		self._chunkVersions = versions
+
+		body = {
+			'classes': capture.classes,
+			'root': capture.root,
+			'chunks': chunks,
+			'removed': removed,
+		}
+
+		compression = _compressions[self.compression]
+		header = _headerStruct.pack(MAGIC, VERSION, DELTA if delta else FULL, compression, self.sequence, baseSequence)
+
+		return header + self._compress(pickle.dumps(body, protocol=pickle.HIGHEST_PROTOCOL))
+
+	def records(self) -> dict:
+		"""@return: dict of record id and object of the last capture"""
+		return self._objects
+
+	def _compress(self, payload: bytes) -> bytes:
+		if self.compression == 'lzma':
+			return lzma.compress(payload, preset=6 if self.compressionLevel is None else self.compressionLevel)
+
+		return zlib.compress(payload, 6 if self.compressionLevel is None else self.compressionLevel)
+
+	def _checkRecordClass(self, cls) -> bool:
+		isRecord = issubclass(cls, _recordClasses)
+		self._isRecordClass[cls] = isRecord
+		return isRecord
+
+	def _classIndex(self, cls) -> int:
+		index = self._classIndices.get(cls)
+
+		if index is None:
+			index = len(self._classes)
+			self._classes.append(_className(cls))
+			self._classIndices[cls] = index
+
+		return index
+
+	def _recordIdentifier(self, obj) -> int:
+		identifier = self._identifiers.get(id(obj))
+
+		if identifier is None:
+			identifier = self._register(obj)
+
+		if identifier not in self._reached:
+			self._reached.add(identifier)
+			self._pending.append([obj])
+
+		return identifier
+
+	def _register(self, obj) -> int:
+		identifier = self._nextIdentifier
+		self._nextIdentifier += 1
+		self._identifiers[id(obj)] = identifier
+		self._objects[identifier] = obj
+		return identifier
+
+	def _queueMap(self, mapModel):
+		# the tiles of a map are written row by row - a changed tile only dirties its row
+		for row in mapModel.tiles.values:
+			for tile in row:
+				identifier = self._identifiers.get(id(tile))
+
+				if identifier is None:
+					identifier = self._register(tile)
+
+				self._reached.add(identifier)
+
+			self._pending.append(row)
+
+	def _encodeChunks(self, simulation) -> dict:
+		self._reached = set()
+		self._pending = deque()
+		self._pickledChunks = 0
+
+		self._recordIdentifier(simulation)
+		self._recordIdentifier(simulation._map)
+		self._queueMap(simulation._map)
+
+		chunks = {}
+
+		while len(self._pending) > 0:
+			records = self._pending.popleft()
+			chunk = self._cachedChunk(records)
+
+			if chunk is None:
+				chunk = self._encodeChunk(records)
+
+			chunks[chunk[0][0][0]] = chunk
+
+		# forget the records that are no longer reachable (like killed units)
+		for identifier in list(self._objects.keys()):
+			if identifier not in self._reached:
+				obj = self._objects.pop(identifier)
+				del self._identifiers[id(obj)]
+				self._cachedChunks.pop(identifier, None)
+
+		return chunks
+
+	def _cachedChunk(self, records: list) -> Optional[tuple]:
+		"""@return: the chunk of the previous capture, if the records are versioned and none of them changed"""
+		cached = self._cachedChunks.get(self._identifiers[id(records[0])])
+
+		if cached is None:
+			return None
+
+		cachedRecords, versions, chunk, references = cached
+
+		if len(cachedRecords) != len(records):
+			return None
+
+		for obj, cachedObj, version in zip(records, cachedRecords, versions):
+			if obj is not cachedObj or obj._version != version:
+				return None
+
+		# the referenced records have to be written as well - as if the chunk was pickled
+		for identifier in references:
+			obj = self._objects.get(identifier)
+
+			if obj is None:
+				return None
+
+		for identifier in references:
+			self._recordIdentifier(self._objects[identifier])
+
+		return chunk
+
+	def _encodeChunk(self, records: list) -> (tuple, bytes):
+		header = []
+		states = []
+
+		for obj in records:
+			identifier = self._identifiers[id(obj)]
+			header.append((identifier, self._classIndex(type(obj))))
+
+			state = obj.__dict__
+			transient = _transientAttributes.get(type(obj))
+
+			if transient is None:
+				for cls, attributes in _transientAttributes.items():
+					if isinstance(obj, cls):
+						transient = attributes
+						break
+
+			if transient:
+				state = {key: value for key, value in state.items() if key not in transient}
+
+			states.append(state)
+
+		buffer = io.BytesIO()
+		pickler = _RecordPickler(buffer, self)
+		pickler.dump(states)
+		self._pickledChunks += 1
+
+		chunk = tuple(header), buffer.getvalue()
+
+		if all(isinstance(obj, _versionedClasses) for obj in records):
+			self._cachedChunks[header[0][0]] = (
+				tuple(records),
+				tuple(obj._version for obj in records),
+				chunk,
+				tuple(dict.fromkeys(pickler.references))
+			)
+
+		return chunk
+
+
+class SnapshotInfo:
+	"""the parsed header and body of a snapshot"""
+
+	def __init__(self, kind: int, sequence: int, baseSequence: int, body: dict):
+		self.kind = kind
+		self.sequence = sequence
+		self.baseSequence = baseSequence
+		self.classes = body['classes']
+		self.root = body['root']
+		self.chunks = body['chunks']
+		self.removed = body['removed']
+
+	def isDelta(self) -> bool:
+		return self.kind == DELTA
+
+
+def readSnapshotInfo(buffer: bytes, packages: (str, ...) = _defaultPackages) -> SnapshotInfo:
+	"""
+		parses a snapshot without restoring the records
+
+		@param buffer: content of a snapshot file
+		@param packages: packages whose classes can be restored
+		@return: SnapshotInfo
+	"""
+	if len(buffer) < _headerStruct.size:
+		raise SnapshotFormatError('file too short')
+
+	magic, version, kind, compression, sequence, baseSequence = _headerStruct.unpack_from(buffer, 0)
+
+	if magic != MAGIC:
+		raise SnapshotFormatError(f'not a snapshot file (magic {magic!r})')
+
+	if version > VERSION:
+		raise SnapshotFormatError(f'unsupported snapshot version {version}')
+
+	if compression == LZMA:
+		decompress = lzma.decompress
+	elif compression == ZLIB:
+		decompress = zlib.decompress
+	else:
+		raise SnapshotFormatError(f'unknown compression {compression}')
+
+	try:
+		body = _RestrictedUnpickler(io.BytesIO(decompress(buffer[_headerStruct.size:])), packages).load()
+	except (zlib.error, lzma.LZMAError, pickle.UnpicklingError, EOFError, KeyError, ValueError) as e:
+		raise SnapshotFormatError('corrupt snapshot') from e
+
+	return SnapshotInfo(kind, sequence, baseSequence, body)
+
+
+def readSnapshots(buffers: [bytes], packages: (str, ...) = _defaultPackages):
+	"""
+		restores a game from a full snapshot and the deltas that were written after it
+
+		@param buffers: contents of the snapshot files - the full snapshot first, then the deltas in order
+		@param packages: packages whose classes can be restored
+		@return: GameModel (without user interface)
+	"""
+	if len(buffers) == 0:
+		raise SnapshotFormatError('no snapshot given')
+
+	infos = [readSnapshotInfo(buffer, packages) for buffer in buffers]
+
+	if infos[0].isDelta():
+		raise SnapshotFormatError('the first snapshot must be a full snapshot')
+
+	chunks = {}
+	previous = None
+
+	for info in infos:
+		if previous is not None:
+			if not info.isDelta():
+				raise SnapshotFormatError('only the first snapshot can be a full snapshot')
+
+			if info.baseSequence != previous.sequence:
+				raise SnapshotFormatError(f'delta {info.sequence} is not based on snapshot {previous.sequence}')
+
+		for chunkIdentifier in info.removed:
+			chunks.pop(chunkIdentifier, None)
+
+		chunks.update(info.chunks)
+		previous = info
+
+	# the class table only grows, so the last one contains the classes of all chunks
+	classes = [_resolveClass(className, packages) for className in previous.classes]
+
+	# create all records first, so that the chunks can reference each other in any order
+	records = {}
+	for header, _ in chunks.values():
+		for identifier, classIndex in header:
+			cls = classes[classIndex]
+			records[identifier] = cls.__new__(cls)
+
+	for header, blob in chunks.values():
+		states = _RestrictedUnpickler(io.BytesIO(blob), packages, records).load()
+
+		for (identifier, _), state in zip(header, states):
+			records[identifier].__dict__.update(state)
+
+	if previous.root not in records:
+		raise SnapshotFormatError('the root record is missing')
+
+	for record in records.values():
+		_restoreTransientAttributes(record)
+
+	return records[previous.root]
+
+
+def _restoreTransientAttributes(record):
+	if isinstance(record, GameModel):
+		record.userInterface = None
+		record.autoSaver = None
+		record.replayLog = None
+		record._tacticalAnalysisMap = TacticalAnalysisMap(Size(record._map.width, record._map.height))
+		record.planner = None
+	elif isinstance(record, Player):
+		record._flavorVector = None
+		record._flavorVectorKey = None
+	elif isinstance(record, MapModel):
+		record.enableHashing()
+
+
+class AutoSaveReport:
+	"""timings and size of one autosave - passed to the instrumentation hook of the AutoSaver"""
+
+	def __init__(self, path: Optional[str], turn: int, sequence: int, delta: bool, size: int, captureSeconds: float,
+				 encodeSeconds: float, writeSeconds: float, dirtyChunks: int, totalChunks: int, pickledChunks: int,
+				 dropped: int, error: Optional[Exception] = None):
+		self.path = path
+		self.turn = turn
+		self.sequence = sequence
+		self.delta = delta
+		self.size = size
+		self.captureSeconds = captureSeconds
+		self.encodeSeconds = encodeSeconds
+		self.writeSeconds = writeSeconds
+		self.dirtyChunks = dirtyChunks
+		self.totalChunks = totalChunks
+		self.pickledChunks = pickledChunks
+		self.dropped = dropped
+		self.error = error
+
+	def __repr__(self):
+		return f'AutoSaveReport(turn={self.turn}, delta={self.delta}, size={self.size}, ' \
+			f'capture={self.captureSeconds:.4f}s, ' \
+			f'encode={self.encodeSeconds:.4f}s, write={self.writeSeconds:.4f}s, ' \
+			f'dirty={self.dirtyChunks}/{self.totalChunks}, pickled={self.pickledChunks}, dropped={self.dropped})'
+
+
+class AutoSaver:
+	"""
+		writes the autosaves of a game into rotating slots of a directory
+
+		the game is only captured on the calling thread (once per turn, after the turn of the ai players), compressing and
+		writing is done by a background thread - save never waits for the disk. the capture only pickles the tiles that
+		changed since the previous save (see SnapshotWriter). if a capture is still waiting for the background thread
+		when the next one arrives, the older one is dropped.
+
+		a slot is a chain of snapshots: a full snapshot (autosave_<slot>.snapshot) and the deltas that were written after
+		it (autosave_<slot>_delta_<n>.snapshot, see SnapshotWriter). when the chain of a slot has all its deltas, the next
+		save rotates to the next slot and starts it with a full snapshot - the deltas of the previous chain in that slot
+		are removed first, so the oldest slot can be overwritten without breaking a chain. latestPaths() returns the chain
+		of the latest save (restore it with readSnapshots). files are written to a temporary file first and then renamed,
+		so a slot always contains a complete chain.
+
+		the capture on the calling thread still pickles all players, cities, units and the game (they have no version
+		counter), a delta only saves the encoding and the writing of the unchanged chunks - see AutoSaveReport for the
+		timings.
+	"""
+
+	def __init__(self, directory: str, slots: int = 3, compression: str = 'zlib',
+				 compressionLevel: Optional[int] = None, instrumentation=None, background: bool = True,
+				 interval: int = 1, deltas: int = 4):
+		"""
+			@param directory: directory of the slots
+			@param slots: number of rotating slots
+			@param compression: 'zlib' or 'lzma'
+			@param compressionLevel: level of the compression (default of the compression if None)
+			@param instrumentation: optional function that is called with an AutoSaveReport after every save
+				(on the background thread)
+			@param background: write on a background thread - otherwise save writes immediately
+			@param interval: number of turns between two saves
+			@param deltas: number of delta saves after the full save of a slot
+		"""
+		if interval < 1:
+			raise ValueError(f'interval must be at least 1 but is {interval}')
+
+		if deltas < 0:
+			raise ValueError(f'deltas must not be negative but is {deltas}')
+
+		self.directory = directory
+		self.slots = slots
+		self.interval = interval
+		self.deltas = deltas
+		self.instrumentation = instrumentation
+		self.background = background
+		self.writer = SnapshotWriter(compression=compression, compressionLevel=compressionLevel)
+
+		self.dropped = 0
+		# number of saves that were written (the position in the chains of the slots)
+		self._saves = 0
+		self._latestPaths = []
+		self._lastError = None
+
+		self._condition = threading.Condition()
+		self._capture = None
+		self._busy = False
+		self._stopping = False
+		self._thread = None
+
+	def isDue(self, turn: int) -> bool:
+		"""@return: True if the game is saved in this turn (every interval turns)"""
+		return turn % self.interval == 0
+
+	def save(self, simulation):
+		"""
+			captures the game and hands it to the background thread - turns that are not due (see interval) are skipped
+
+			@param simulation: game to save
+		"""
+		if not self.isDue(simulation.currentTurn):
+			return
+
+		capture = self.writer.capture(simulation)
+
+		if not self.background:
+			self._write(capture, 0)
+			return
+
+		with self._condition:
+			if self._capture is not None:
+				self.dropped += 1
+
+			self._capture = capture
+
+			if self._thread is None:
+				self._thread = threading.Thread(target=self._run, name='AutoSaver', daemon=True)
+				self._thread.start()
+
+			self._condition.notify_all()
+
+	def flush(self, timeout: Optional[float] = None) -> bool:
+		"""
+			waits until the pending save is written
+
+			@param timeout: maximal time to wait in seconds (no limit if None)
+			@return: True if all saves are written
+		"""
+		with self._condition:
+			finished = self._condition.wait_for(lambda: self._capture is None and not self._busy, timeout)
+
+		return finished
+
+	def close(self):
+		"""writes the pending save and stops the background thread"""
+		self.flush()
+
+		with self._condition:
+			thread = self._thread
+			self._stopping = True
+			self._condition.notify_all()
+
+		if thread is not None:
+			thread.join()
+
+		with self._condition:
+			self._thread = None
+			self._stopping = False
+
+	def __enter__(self):
+		return self
+
+	def __exit__(self, excType, excValue, traceback):
+		self.close()
+
+	def latestPath(self) -> Optional[str]:
+		"""@return: the path of the file of the latest complete save (a full snapshot or a delta)"""
+		with self._condition:
+			return self._latestPaths[-1] if len(self._latestPaths) > 0 else None
+
+	def latestPaths(self) -> [str]:
+		"""@return: the paths of the chain of the latest complete save - the full snapshot first, then the deltas"""
+		with self._condition:
+			return list(self._latestPaths)
+
+	def lastError(self) -> Optional[Exception]:
+		"""@return: the error of the last failed save"""
+		with self._condition:
+			return self._lastError
+
+	def slotPath(self, slot: int) -> str:
+		return os.path.join(self.directory, f'autosave_{slot}.snapshot')
+
+	def deltaPath(self, slot: int, position: int) -> str:
+		return os.path.join(self.directory, f'autosave_{slot}_delta_{position}.snapshot')
+
+	def _run(self):
+		while True:
+			with self._condition:
+				self._condition.wait_for(lambda: self._capture is not None or self._stopping)
+
+				if self._capture is None:
+					return
+
+				capture = self._capture
+				dropped = self.dropped
+				self._capture = None
+				self.dropped = 0
+				self._busy = True
+
+			try:
+				self._write(capture, dropped)
+			except Exception as e:
+				# the instrumentation failed - keep the thread alive for the next saves
+				with self._condition:
+					self._lastError = e
+			finally:
+				with self._condition:
+					self._busy = False
+					self._condition.notify_all()
+
+	def _write(self, capture: SnapshotCapture, dropped: int):
+		chainLength = self.deltas + 1
+		slot = (self._saves // chainLength) % self.slots
+		position = self._saves % chainLength
+		delta = position > 0
+
+		path = None
+		content = b''
+		error = None
+		encodeSeconds = writeSeconds = 0.0
+
+		try:
+			if not delta:
+				# the deltas of the previous chain of the slot can't be restored without its full snapshot
+				for stalePosition in range(1, chainLength):
+					stalePath = self.deltaPath(slot, stalePosition)
+					if os.path.exists(stalePath):
+						os.remove(stalePath)
+
+			startTime = time.perf_counter()
+			content = self.writer.encode(capture, delta=delta)
+			encodeSeconds = time.perf_counter() - startTime
+
+			path = self.deltaPath(slot, position) if delta else self.slotPath(slot)
+			startTime = time.perf_counter()
+			_writeAtomically(path, content)
+			writeSeconds = time.perf_counter() - startTime
+
+			self._saves += 1
+
+			with self._condition:
+				self._latestPaths = [self.slotPath(slot)] + [
+					self.deltaPath(slot, deltaPosition) for deltaPosition in range(1, position + 1)
+				]
+		except Exception as e:
+			error = e
+			# the chain is broken, the next save starts a new chain in the next slot
+			self._saves = (self._saves // chainLength + 1) * chainLength
+
+			with self._condition:
+				self._lastError = e
+
+		if self.instrumentation is not None:
+			self.instrumentation(AutoSaveReport(
+				path=path,
+				turn=capture.turn,
+				sequence=self.writer.sequence,
+				delta=delta,
+				size=len(content),
+				captureSeconds=capture.seconds,
+				encodeSeconds=encodeSeconds,
+				writeSeconds=writeSeconds,
+				dirtyChunks=self.writer.dirtyChunks,
+				totalChunks=len(capture.chunks),
+				pickledChunks=capture.pickledChunks,
+				dropped=dropped,
+				error=error
+			))
+
+
+def _writeAtomically(path: str, content: bytes):
+	os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+	tmpPath = f'{path}.tmp'
+
+	with open(tmpPath, 'wb') as file:
+		file.write(content)
+		file.flush()
+		os.fsync(file.fileno())
+
+	os.replace(tmpPath, path)
@@ -0,0 +1,206 @@
+"""
+	streaming reader and writer for the json map format
+
+	the json layout is the same as the one of MapModelSchema (so old .map files can be read), but neither the complete
+	json string nor the complete nested dict/list structure is built in memory:
+
+		- MapStreamWriter writes the tiles row by row to a (text) file object
+		- MapStreamReader reads the file in chunks and decodes the tiles one row at a time
+
+	usage:
+		with open('huge.map', 'w') as file:
+			MapStreamWriter(file).write(mapModel)
+
+		with open('huge.map', 'r') as file:
+			mapModel = MapStreamReader(file).read()
+"""
+import json
+
+from map.base import Array2D, HexPoint
+from serialisation.fastMap import tileDictEncoder, tileDictDecoder, encodeMapAreas, decodeMapAreas
+from utils.translation import jsonDefault
+
+
+class MapStreamError(Exception):
+	pass
+
+
+class MapStreamWriter:
+	def __init__(self, file):
+		"""
+			@param file: text file object
+		"""
+		self.file = file
+
+	def write(self, mapModel):
+		"""
+			writes the map - only one row of tiles is encoded at a time
+
+			@param mapModel: map to write
+		"""
+		encodeTile = tileDictEncoder()
+		write = self.file.write
+
+		write(f'{{"width": {json.dumps(mapModel.width)}, "height": {json.dumps(mapModel.height)}, "tiles": [')
+
+		for y, row in enumerate(mapModel.tiles.values):
+			if y > 0:
+				write(', ')
+
+			write(json.dumps([encodeTile(tile) for tile in row], default=jsonDefault))
+
+		write(']')
+
+		# the other attributes are small compared to the tiles
+		for key, value in encodeMapAreas(mapModel).items():
+			write(f', {json.dumps(key)}: {json.dumps(value, default=jsonDefault)}')
+
+		write('}')
+
+
+class _JsonTokenizer:
+	"""reads json values from a text file object with a buffer of a few chunks"""
+
+	def __init__(self, file, chunkSize: int):
+		self.file = file
+		self.chunkSize = chunkSize
+		self.decoder = json.JSONDecoder()
+		self.buffer = ''
+		self.position = 0
+		self.finished = False
+
+	def _fill(self) -> bool:
+		if self.finished:
+			return False
+
+		chunk = self.file.read(self.chunkSize)
+
+		if not chunk:
+			self.finished = True
+			return False
+
+		# drop the consumed part of the buffer
+		self.buffer = self.buffer[self.position:] + chunk
+		self.position = 0
+		return True
+
+	def peek(self) -> str:
+		"""@return: next non whitespace character (without consuming it), empty at the end of the file"""
+		while True:
+			while self.position < len(self.buffer) and self.buffer[self.position] in ' \t\n\r':
+				self.position += 1
+
+			if self.position < len(self.buffer):
+				return self.buffer[self.position]
+
+			if not self._fill():
+				return ''
+
+	def expect(self, characters: str) -> str:
+		character = self.peek()
+
+		if character == '' or character not in characters:
+			raise MapStreamError(f'expected one of {characters!r}, found {character!r}')
+
+		self.position += 1
+		return character
+
+	def value(self):
+		"""@return: the next json value"""
+		self.peek()
+
+		while True:
+			try:
+				value, end = self.decoder.raw_decode(self.buffer, self.position)
+
+				# a number at the end of the buffer might be continued in the next chunk
+				if end < len(self.buffer) or self.finished:
+					self.position = end
+					return value
+			except json.JSONDecodeError as e:
+				if self.finished:
+					raise MapStreamError(f'invalid json: {e}') from e
+
+			self._fill()
+
+
+class MapStreamReader:
+	def __init__(self, file, chunkSize: int = 1 << 16):
+		"""
+			@param file: text file object
+			@param chunkSize: number of characters that are read at once
+		"""
+		self.tokenizer = _JsonTokenizer(file, chunkSize)
+
+		# all attributes of the map except the tiles - filled while the rows are read
+		self.attributes = {}
+
+	def rows(self):
+		"""
+			parses the file and yields the rows of tiles as soon as they are decoded
+
+			the attributes that are not tiles are collected in self.attributes (they are complete once all rows are
+			yielded)
+
+			@return: generator of lists of tiles
+		"""
+		decodeTile = tileDictDecoder()
+		tokenizer = self.tokenizer
+
+		tokenizer.expect('{')
+
+		if tokenizer.peek() == '}':
+			tokenizer.expect('}')
+			return
+
+		while True:
+			key = tokenizer.value()
+
+			if not isinstance(key, str):
+				raise MapStreamError(f'expected a key, found {key!r}')
+
+			tokenizer.expect(':')
+
+			if key == 'tiles':
+				tokenizer.expect('[')
+				y = 0
+
+				if tokenizer.peek() != ']':
+					while True:
+						tileDictRow = tokenizer.value()
+						yield [decodeTile(tileDict, HexPoint(x, y)) for x, tileDict in enumerate(tileDictRow)]
+						y += 1
+
+						if tokenizer.expect(',]') == ']':
+							break
+				else:
+					tokenizer.expect(']')
+			else:
+				self.attributes[key] = tokenizer.value()
+
+			if tokenizer.expect(',}') == '}':
+				break
+
+	def read(self):
+		"""
+			reads the complete map
+
+			@return: MapModel
+		"""
+		from map.map import MapModel
+
+		rows = list(self.rows())
+
+		width = self.attributes.get('width', 0)
+		height = self.attributes.get('height', 0)
+
+		if len(rows) != height or any(len(row) != width for row in rows):
+			raise MapStreamError(f'the tiles don\'t match the size {width}x{height}')
+
+		tiles = Array2D(width, height)
+		tiles.values = rows
+
+		mapModel = MapModel(width, height, tiles)
+		decodeMapAreas(mapModel, self.attributes)
+
+		return mapModel
@@ -7,7 +7,7 @@ from game.types import TechType, CivicType
 from game.wonders import WonderType
 from map.map import MapModel
 from map.types import TerrainType, MapSize
-from serialisation.map import MapModelSchema
+from serialisation.fastMap import loadsMap
 
 
 class BetweenAssertMixin(object):
@@ -46,10 +46,7 @@ class MapModelMock(MapModel):
 			path = './files/duel.map'
 
 		with open(path, "r") as file:
-			fileContent = file.read()
-
-			obj_dict = MapModelSchema().loads(fileContent)
-			return MapModel(obj_dict)
+			return loadsMap(file.read())
 
 
 class UserInterfaceMock(Interface):
@@ -1,16 +1,32 @@
+import json
+import pickle
 import unittest
 
+from benchmarks.suite import compareResults, regressions, runBenchmarks, selectBenchmarks
+from core.hashing import firstDivergentTurn, hashValues
+from core.rng import GameRandom
 from game.baseTypes import HandicapType
+from game.buildings import BuildingType
 from game.cities import City
 from game.civilizations import LeaderType
-from game.flavors import Flavors, FlavorType, Flavor
+from game.ai.grandStrategies import GrandStrategyAIType
+from game.districts import DistrictType
+from game.flavors import Flavors, FlavorType, Flavor, flavorMatrix, flavorTypes
 from game.game import GameModel
 from game.playerMechanics import AccessLevel
 from game.players import Player
+from game.promotions import UnitPromotionType
 from game.states.victories import VictoryType
+from game.types import TechType
+from game.unitTypes import UnitType
+from game.units import Unit
 from map.base import HexPoint
 from map.types import TerrainType
 from tests.testBasics import MapModelMock, UserInterfaceMock
+from utils.importTime import ImportTimeReport, parseImportTime, subtreeOf
+from utils.profiling import profileSpan, profiling, span, countSpan, setProfilingTurn, currentProfiler
+from utils.translation import gettext_lazy as _, activateLanguage, resetTranslationStats, translationStats, LazyString, \
+	jsonDefault
 
 
 class TestFlavors(unittest.TestCase):
@@ -72,6 +88,325 @@ class TestFlavors(unittest.TestCase):
 		# THEN
 		self.assertEqual(cultureValue, 2)
 
+	def test_catalog_flavor_matrix(self):
+		for enumType in [BuildingType, DistrictType, UnitType, LeaderType]:
+			# WHEN
+			matrix = flavorMatrix(enumType)
+
+			# THEN
+			for row, member in enumerate(enumType):
+				expected = [member.flavor(flavorType) for flavorType in flavorTypes]
+				self.assertEqual(list(matrix[row]), expected, f'{member}')
+
+	def test_player_flavor_vector(self):
+		# GIVEN
+		player = Player(LeaderType.alexander, human=False)
+		player.initialize()
+
+		for strategy in [GrandStrategyAIType.none, GrandStrategyAIType.conquest]:
+			# WHEN
+			player.grandStrategyAI.activeStrategy = strategy
+			vector = player.personalAndGrandStrategyFlavors()
+
+			# THEN
+			expected = [player.personalAndGrandStrategyFlavor(flavorType) for flavorType in flavorTypes]
+			self.assertEqual(list(vector), expected)
+
+		# personality changes update the vector too
+		player.personalityFlavors.set(FlavorType.growth, 0)
+		self.assertEqual(player.personalAndGrandStrategyFlavors()[flavorTypes.index(FlavorType.growth)], 0)
+
+
+class TestCatalog(unittest.TestCase):
+	def test_data_is_shared(self):
+		for enumType in [TechType, BuildingType, UnitPromotionType]:
+			for member in enumType:
+				# WHEN
+				data = member._data()
+
+				# THEN
+				self.assertIs(member._data(), data)
+
+	def test_accessors_match_uncached_data(self):
+		# the timings are in the benchmarks (catalog.*)
+		# GIVEN
+		accessors = [
+			(list(TechType), lambda tech: tech.cost(), lambda tech: TechType._data.__wrapped__(tech).cost),
+			(list(BuildingType), lambda building: building.productionCost(),
+				lambda building: BuildingType._data.__wrapped__(building).productionCost),
+			(list(UnitPromotionType), lambda promotion: promotion.tier(),
+				lambda promotion: UnitPromotionType._data.__wrapped__(promotion).tier)
+		]
+
+		# WHEN
+		uncached = [build(member) for members, _, build in accessors for member in members]
+		cached = [accessor(member) for members, accessor, _ in accessors for member in members]
+
+		# THEN
+		self.assertEqual(cached, uncached)
+
+	def test_map_import_is_lean(self):
+		# GIVEN
+		forbidden = ['game.players', 'game.cities', 'game.units', 'game.ai.tactics', 'numpy']
+
+		# WHEN
+		report = ImportTimeReport.measure('map.map')
+
+		# THEN
+		self.assertEqual(report.modules()[-1], 'map.map')
+		self.assertIn('game.types', report.modules())
+		self.assertEqual(report.violations(forbidden=forbidden), [])
+
+	def test_parse_import_time(self):
+		# GIVEN
+		output = '\n'.join([
+			'import time: self [us] | cumulative | imported package',
+			'import time:       120 |        120 | site',
+			'import time:        30 |         30 |     core.base',
+			'import time:        50 |         80 |   core',
+			'import time:        20 |        100 | map',
+		])
+
+		# WHEN
+		entries = subtreeOf(parseImportTime(output), 'map')
+		report = ImportTimeReport('map', entries)
+
+		# THEN
+		self.assertEqual(report.modules(), ['core.base', 'core', 'map'])
+		self.assertEqual(report.totalTime(), 100)
+		self.assertEqual(report.packageTimes(), {'core': 80, 'map': 20})
+		self.assertEqual(len(report.violations(budget=0.05)), 1)
+
+
+class TestTranslation(unittest.TestCase):
+	def tearDown(self):
+		activateLanguage('en')
+
+	def test_lazy_string_is_cached(self):
+		# GIVEN
+		activateLanguage('en')
+		resetTranslationStats()
+		text = _('TXT_KEY_ERA_ANCIENT')
+
+		# WHEN
+		rendered = [str(text), f'{text}', str(_('TXT_KEY_ERA_ANCIENT'))]
+
+		# THEN
+		self.assertEqual(rendered, ['Ancient', 'Ancient', 'Ancient'])
+		self.assertEqual(text, _('TXT_KEY_ERA_ANCIENT'))
+		self.assertNotEqual(text, 'Ancient')
+		self.assertEqual(translationStats()['lookups'], 1)
+
+		# WHEN
+		activateLanguage('en')
+		str(text)
+
+		# THEN
+		self.assertEqual(translationStats()['lookups'], 2)
+
+	def test_lazy_string_identity(self):
+		# GIVEN
+		text = _('TXT_KEY_ERA_ANCIENT')
+		names = {text: 'era'}
+		textHash = hash(text)
+
+		# WHEN
+		activateLanguage('en')
+
+		# THEN
+		# equality and hash depend on the key, not on the translation
+		self.assertEqual(hash(text), textHash)
+		self.assertEqual(names[LazyString('TXT_KEY_ERA_ANCIENT')], 'era')
+		self.assertNotEqual(LazyString('TXT_KEY_A'), LazyString('TXT_KEY_B'))
+		self.assertNotEqual(text.format(1), text.format(2))
+		self.assertEqual(json.dumps({'era': text}, default=jsonDefault), '{"era": "Ancient"}')
+
+	def test_building_units_does_not_translate(self):
+		# GIVEN
+		player = Player(leader=LeaderType.trajan, cityState=None, human=False)
+		resetTranslationStats()
+
+		# WHEN
+		units = [Unit(HexPoint(5, 5), unitType, player) for unitType in list(UnitType)]
+
+		# THEN
+		self.assertEqual(translationStats()['lookups'], 0)
+		self.assertEqual(units[0].name(), str(list(UnitType)[0].name()))
+
+	def test_catalog_names_are_translated_when_rendered(self):
+		# GIVEN
+		activateLanguage('en')
+		name = TechType.mining.name()
+
+		# WHEN
+		activateLanguage('en')
+
+		# THEN
+		# the cached record keeps the key, so the name follows the language
+		self.assertIsInstance(name, LazyString)
+		self.assertIs(TechType.mining.name(), name)
+		self.assertEqual(str(name), 'Mining')
+
+
+@profileSpan('outer')
+def _profiledOuter(turn: int):
+	with span('inner'):
+		countSpan('tilesScanned', 10)
+
+	setProfilingTurn(turn)
+
+
+class TestProfiling(unittest.TestCase):
+	def test_span_tree(self):
+		# GIVEN
+		_profiledOuter(0)
+
+		# WHEN
+		with profiling() as profiler:
+			_profiledOuter(1)
+			_profiledOuter(1)
+			countSpan('nodesExpanded', 5)
+
+		# THEN
+		self.assertIsNone(currentProfiler())
+		self.assertEqual(list(profiler.toJson().keys()), ['0', '1'])
+
+		outer = profiler.turns[0].children['outer']
+		self.assertEqual(outer.calls, 1)
+		self.assertEqual(outer.children['inner'].counters, {'tilesScanned': 10})
+		self.assertEqual(profiler.turns[1].children['outer'].calls, 1)
+		self.assertEqual(profiler.turns[1].counters, {'nodesExpanded': 5})
+
+		paths = [line.rsplit(' ', 1)[0] for line in profiler.collapsedStacks().splitlines()]
+		self.assertIn('outer;inner', paths)
+
+	def test_disabled_span_is_transparent(self):
+		# the overhead is measured in the benchmarks (profiling.*)
+		# GIVEN
+		def plain(value):
+			return value + 1
+
+		profiled = profileSpan('plain')(plain)
+
+		# WHEN
+		results = [profiled(index) for index in range(10)]
+
+		# THEN
+		self.assertIsNone(currentProfiler())
+		self.assertEqual(results, [plain(index) for index in range(10)])
+
+
+class TestGameRandom(unittest.TestCase):
+	def test_streams_are_independent(self):
+		# GIVEN
+		playerTrajan = Player(LeaderType.trajan, human=False)
+		playerAlexander = Player(LeaderType.alexander, human=False)
+
+		rng = GameRandom(seed=42)
+		otherRng = GameRandom(seed=42)
+
+		# WHEN
+		rng.stream('combat').random()
+		values = [rng.stream('tech', playerTrajan).randrange(100) for _ in range(10)]
+		otherValues = [otherRng.stream('tech', playerTrajan).randrange(100) for _ in range(10)]
+		alexanderValues = [otherRng.stream('tech', playerAlexander).randrange(100) for _ in range(10)]
+
+		# THEN
+		self.assertEqual(values, otherValues)
+		self.assertNotEqual(values, alexanderValues)
+		self.assertEqual(rng.streamNames(), ['combat', 'tech/trajan'])
+
+	def test_snapshot_and_restore(self):
+		# GIVEN
+		rng = GameRandom(seed=7)
+		rng.stream('combat').random()
+		snapshot = rng.snapshot()
+
+		# WHEN
+		expected = [rng.stream('combat').random(), rng.stream('tactics').random()]
+		rng.restore(snapshot)
+		restored = [rng.stream('combat').random(), rng.stream('tactics').random()]
+		copied = pickle.loads(pickle.dumps(rng))
+
+		# THEN
+		self.assertEqual(restored, expected)
+		self.assertEqual(copied.stream('combat').random(), rng.stream('combat').random())
+
+
+class TestStateHash(unittest.TestCase):
+	def test_player_hash_summarizes_techs_and_treasury(self):
+		# GIVEN
+		playerTrajan = Player(LeaderType.trajan, human=False)
+		otherTrajan = Player(LeaderType.trajan, human=False)
+		playerAlexander = Player(LeaderType.alexander, human=False)
+		playerTrajan.initialize()
+		otherTrajan.initialize()
+		playerAlexander.initialize()
+
+		# WHEN
+		initialHash = playerTrajan.stateHash()
+		playerTrajan.treasury.changeGoldBy(10.0)
+
+		# THEN
+		self.assertEqual(initialHash, otherTrajan.stateHash())
+		self.assertNotEqual(initialHash, playerAlexander.stateHash())
+		self.assertNotEqual(playerTrajan.stateHash(), initialHash)
+
+	def test_first_divergent_turn(self):
+		# GIVEN
+		hashLog = {0: hashValues([1]), 1: hashValues([2]), 2: hashValues([3])}
+		otherHashLog = {0: hashValues([1]), 1: hashValues([2]), 2: hashValues([4]), 3: hashValues([5])}
+
+		# WHEN
+		turn = firstDivergentTurn(hashLog, otherHashLog)
+
+		# THEN
+		self.assertEqual(turn, 2)
+		self.assertIsNone(firstDivergentTurn(hashLog, hashLog))
+		self.assertEqual(hashValues([TerrainType.grass, 3]), hashValues([TerrainType.grass, 3]))
+		self.assertNotEqual(hashValues([TerrainType.grass, 3]), hashValues([3, TerrainType.grass]))
+
+
+class TestBenchmarks(unittest.TestCase):
+	def test_run_map_benchmarks(self):
+		# GIVEN
+		benchmarks = selectBenchmarks(['mapLoad.json.duelMap', 'pathfinding.*.duelMap'], quick=True)
+
+		# WHEN
+		results = runBenchmarks(benchmarks, repeat=1)
+
+		# THEN
+		self.assertEqual(list(results['benchmarks'].keys()), [
+			'mapLoad.json.duelMap',
+			'pathfinding.short.duelMap',
+			'pathfinding.long.duelMap',
+			'pathfinding.unreachable.duelMap'
+		])
+		self.assertEqual(results['benchmarks']['mapLoad.json.duelMap']['runs'], 1)
+
+	def test_compare_flags_regressions(self):
+		# GIVEN
+		def _results(times: dict) -> dict:
+			return {'benchmarks': {name: {'min': value} for name, value in times.items()}}
+
+		baseline = _results({'fast': 1.0, 'slow': 1.0, 'stable': 1.0, 'removed': 1.0})
+		current = _results({'fast': 0.5, 'slow': 1.3, 'stable': 1.05, 'added': 1.0})
+
+		# WHEN
+		comparisons = compareResults(baseline, current)
+
+		# THEN
+		statuses = {comparison.name: comparison.status(0.1) for comparison in comparisons}
+		self.assertEqual(statuses, {
+			'fast': 'improvement',
+			'slow': 'regression',
+			'stable': 'unchanged',
+			'removed': 'missing',
+			'added': 'new'
+		})
+		self.assertEqual([comparison.name for comparison in regressions(comparisons, 0.1)], ['slow'])
+		self.assertEqual(regressions(comparisons, 0.5), [])
+
 
 class AccessLevelTests(unittest.TestCase):
 	def test_initial_no_contact(self):
@@ -1,6 +1,12 @@
+import csv
+import json
+import os
+import random
+import tempfile
 import unittest
 
 from game.achievements import CivicAchievements, TechAchievements
+from game.ai.tactics import TacticalAnalysisMap, TacticalAnalysisCell
 from game.ai.baseTypes import MilitaryStrategyType
 from game.ai.economicStrategies import EconomicStrategyType
 from game.ai.homeland import HomelandMoveType
@@ -8,17 +14,21 @@ from game.baseTypes import HandicapType, GameState
 from game.buildings import BuildingType
 from game.cities import City, CityStateType
 from game.cityStates import CityStateCategory
+from game.flavors import FlavorType
 from game.civilizations import LeaderType, CivilizationType, CivilizationAbility
 from game.districts import DistrictType
 from game.game import GameModel
 from game.generation import GameGenerator
+from game.headless import HeadlessGame, HeadlessRun, PhaseTimer
 from game.governments import GovernmentType
 from game.loyalties import LoyaltyState
 from game.moments import MomentType
 from game.notifications import NotificationType
+from game.planning import TurnPlanner
 from game.players import Player
 from game.policyCards import PolicyCardType
 from game.promotions import UnitPromotionType
+from game.researchGraph import researchGraph
 from game.states.accessLevels import AccessLevel
 from game.states.ages import AgeType
 from game.states.builds import BuildType
@@ -391,7 +401,7 @@ class TestPlayerTechs(unittest.TestCase):
 		# GIVEN
 
 		# WHEN
-		nextTech = self.playerTechs.chooseNextTech()
+		nextTech = self.playerTechs.chooseNextTech(self.simulation)
 
 		# THEN
 		expected = [
@@ -417,6 +427,48 @@ class TestPlayerTechs(unittest.TestCase):
 		self.assertEqual(progressBefore, 0.0)
 		self.assertEqual(progressAfter, 25.0)
 
+	def test_lookahead_flavors(self):
+		# GIVEN
+		graph = researchGraph(TechType)
+
+		def _flavorValue(tech: TechType, flavor: FlavorType, depth: int) -> float:
+			# former nested loops over leadsTo()
+			weights = [1.0, 0.75, 0.5, 0.25]
+			value = tech.flavorValue(flavor) * weights[depth]
+
+			if depth < 3:
+				for activatedTech in [leadsTo for leadsTo in TechType if tech in leadsTo.required()]:
+					value += _flavorValue(activatedTech, flavor, depth + 1)
+
+			return value
+
+		# WHEN
+		lookahead = graph.lookaheadOf(list(TechType))
+
+		# THEN
+		for row, tech in enumerate(TechType):
+			for column, flavor in enumerate(graph.flavorTypes):
+				self.assertAlmostEqual(lookahead[row, column], _flavorValue(tech, flavor, 0), msg=f'{tech} {flavor}')
+
+	def test_frontier_matches_tree(self):
+		# GIVEN
+		discovered = []
+
+		for tech in [TechType.pottery, TechType.mining, TechType.writing, TechType.bronzeWorking, TechType.masonry,
+					 TechType.animalHusbandry, TechType.archery]:
+			self.playerTechs.discover(tech=tech, simulation=self.simulation)
+			discovered.append(tech)
+
+			# WHEN
+			possibleTechs = self.playerTechs.possibleTechs()
+
+			# THEN
+			expected = [
+				candidate for candidate in TechType if candidate != TechType.none and candidate not in discovered and
+				all(requirement in discovered for requirement in candidate.required())
+			]
+			self.assertEqual(possibleTechs, expected)
+
 
 class TestPlayerCivics(unittest.TestCase):
 	def setUp(self) -> None:
@@ -862,3 +914,100 @@ class TestGameGeneration(unittest.TestCase):
 		# THEN
 		self.assertEqual(game.currentTurn, 0)
 		self.assertEqual(len(game.players), 6)
+
+
+class TestHeadlessRun(unittest.TestCase):
+	def test_ai_only_game(self):
+		with tempfile.TemporaryDirectory() as outputDir:
+			# GIVEN
+			doTurn = GameModel.doTurn
+			headlessRun = HeadlessRun(outputDir, seeds=[1], mapSize=MapSize.duel, mapType=MapType.continents, turns=3,
+									  profile=True)
+
+			# WHEN
+			summaries = headlessRun.run()
+
+			# THEN
+			self.assertEqual(len(summaries), 1)
+			self.assertEqual(summaries[0]['turns'], 3)
+			self.assertEqual(len(summaries[0]['players']), 2)
+
+			with open(headlessRun.turnsPath(), 'r', newline='') as file:
+				rows = list(csv.DictReader(file))
+
+			self.assertEqual([row['turn'] for row in rows], ['0', '1', '2'])
+			self.assertGreater(float(rows[1]['time_total']), 0.0)
+			self.assertGreater(float(rows[1]['time_unitAI']), 0.0)
+			self.assertEqual(len(rows[1]['stateHash']), 16)
+
+			with open(os.path.join(outputDir, headlessRun.jobs()[0].fileName()), 'r') as file:
+				self.assertEqual(len(json.load(file)['turnRows']), 3)
+
+			with open(os.path.join(outputDir, headlessRun.jobs()[0].fileName('profile', 'folded')), 'r') as file:
+				self.assertIn('GameModel.updateMoves;', file.read())
+
+			# the phases are only timed while the games are played
+			self.assertIs(GameModel.doTurn, doTurn)
+			self.assertEqual(len(PhaseTimer.phaseNames()), 6)
+
+
+class TestTurnPlanner(unittest.TestCase):
+	def test_planner_keeps_serial_results(self):
+		hashLogs = []
+
+		for workers in [None, 0, 2]:
+			# GIVEN
+			random.seed(4)
+			game = HeadlessGame.generate(MapSize.duel, MapType.continents)
+
+			# WHEN
+			with TurnPlanner(workers=0 if workers is None else workers) as planner:
+				if workers is not None:
+					game.simulation.planner = planner
+
+				game.play(3)
+
+			# THEN
+			if workers is not None:
+				# the major players used the planned cells on every turn (the last turn of the players after the first
+				# one starts with the next update)
+				for player in game.majorPlayers():
+					self.assertGreaterEqual(planner.plannedPlayers[player.leader], 2)
+
+			hashLogs.append(game.simulation.hashLog)
+
+		self.assertEqual(len(hashLogs[0]), 3)
+		self.assertEqual(hashLogs[0], hashLogs[1])
+		self.assertEqual(hashLogs[0], hashLogs[2])
+
+	def test_planned_cells_match_populated_cells(self):
+		# GIVEN
+		random.seed(4)
+		game = HeadlessGame.generate(MapSize.duel, MapType.continents)
+		game.play(2)
+		simulation = game.simulation
+		player = game.majorPlayers()[0]
+
+		analysisMap = TacticalAnalysisMap(simulation.mapSize())
+		analysisMap.playerBuild = player
+
+		# WHEN
+		with TurnPlanner(workers=0) as planner:
+			cells = planner.planCells(player, simulation)
+
+		# THEN
+		for y in range(simulation.mapSize().height()):
+			for x in range(simulation.mapSize().width()):
+				cell = TacticalAnalysisCell()
+				analysisMap.plots.values[y][x] = cell
+				populated = analysisMap.populateCellAt(x, y, simulation.tileAt(HexPoint(x, y)), simulation)
+				plannedPopulated, plannedState = cells[y][x]
+
+				self.assertEqual(plannedPopulated, populated)
+				self.assertEqual(plannedState.keys(), cell.__dict__.keys())
+
+				for attribute, value in cell.__dict__.items():
+					if attribute.endswith('Unit'):
+						self.assertEqual(plannedState[attribute], value is not None)
+					else:
+						self.assertEqual(plannedState[attribute], value, attribute)
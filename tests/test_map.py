@@ -1,6 +1,11 @@
 """ unittest module """
+import os
+import random
+import tempfile
 import unittest
 
+import numpy as np
+
 from game.baseTypes import HandicapType
 from game.civilizations import LeaderType
 from game.game import GameModel
@@ -10,13 +15,18 @@ from game.states.victories import VictoryType
 from game.types import TechType, CivicType
 from game.unitTypes import UnitType
 from game.units import Unit
+from map.arrays import SummedAreaTable, hexNeighborIndices
 from map.base import Array2D, HexPoint, HexCube, HexDirection, Size, BoundingBox, HexArea
-from map.generation import MapOptions, MapGenerator, HeightMap
+from map.batch import MapSweep
+from map.generation import MapOptions, MapGenerator, HeightMap, TileFertilityEvaluator, StartPositioner, \
+	ResourcePlacer, RiverGenerator, StartRegion
 from map.improvements import ImprovementType
 from map.map import Tile, MapModel, FlowDirection, River, Continent
 from map.path_finding.finder import MoveTypeIgnoreUnitsOptions, AStarPathfinder, MoveTypeIgnoreUnitsPathfinderDataSource
 from map.path_finding.path import HexPath
-from map.types import FeatureType, TerrainType, UnitMovementType, MapSize, MapType, AppealLevel, ResourceType
+from map.types import FeatureType, TerrainType, UnitMovementType, MapSize, MapType, AppealLevel, ResourceType, \
+	ResourceUsage, RouteType
+from serialisation.fastMap import dumpsMap
 from tests.testBasics import UserInterfaceMock, MapModelMock
 
 
@@ -737,6 +747,41 @@ class TestMap(unittest.TestCase):
 		for index in range(4):
 			self.assertEqual(map_points[index], expected[index])
 
+	def test_state_hash_follows_mutations(self):
+		# GIVEN
+		mapModel = MapModelMock(8, 6, TerrainType.grass)
+		playerTrajan = Player(LeaderType.trajan, human=False)
+		initialHash = mapModel.stateHash()
+
+		# WHEN
+		tile = mapModel.tileAt(HexPoint(2, 3))
+		tile.setFeature(FeatureType.forest)
+		tile.setRoute(RouteType.ancientRoad)
+		tile.setOwner(playerTrajan)
+		tile.setRiverFlowInNorth(FlowDirection.east)
+		mapModel.modifyTerrainAt(HexPoint(4, 4), TerrainType.plains)
+
+		unit = Unit(HexPoint(1, 1), UnitType.warrior, playerTrajan)
+		mapModel.addUnit(unit)
+		mapModel.moveUnit(unit, HexPoint(1, 2))
+		changedHash = mapModel.stateHash()
+
+		# THEN
+		self.assertNotEqual(changedHash, initialHash)
+		self.assertEqual(changedHash, mapModel.computeStateHash())
+
+		# WHEN
+		mapModel.removeUnit(unit)
+		tile.setFeature(FeatureType.none)
+		tile.setRoute(RouteType.none)
+		tile.removeOwner()
+		mapModel.modifyTerrainAt(HexPoint(4, 4), TerrainType.grass)
+		tile._riverValue = 0
+		mapModel.enableHashing()
+
+		# THEN
+		self.assertEqual(mapModel.stateHash(), initialHash)
+
 	def test_tileAt(self):
 		mapModel = MapModelMock(4, 6, TerrainType.ocean)
 
@@ -972,6 +1017,301 @@ class TestMapGenerator(unittest.TestCase):
 		self.assertEqual(grid.height, 22)
 		self.assertEqual(self.last_state_value, 1.0)
 
+	def test_seed_makes_generation_reproducible(self):
+		# GIVEN
+		def _generate(seed: int) -> str:
+			options = MapOptions(mapSize=MapSize.duel, mapType=MapType.continents, leader=LeaderType.trajan, seed=seed)
+			return dumpsMap(MapGenerator(options).generate(lambda state: None))
+
+		# WHEN
+		random.seed(1)
+		first = _generate(42)
+		random.seed(2)
+		second = _generate(42)
+		other = _generate(43)
+
+		# THEN
+		self.assertEqual(first, second)
+		self.assertNotEqual(first, other)
+
+
+class TestTerrainKernels(unittest.TestCase):
+	@staticmethod
+	def _randomMap(generator, seed: int) -> MapModel:
+		rng = random.Random(seed)
+		mapModel = MapModel(generator.width, generator.height)
+		terrains = [TerrainType.ocean, TerrainType.shore, TerrainType.grass, TerrainType.plains, TerrainType.desert,
+					TerrainType.tundra, TerrainType.snow]
+		features = [FeatureType.none] * 6 + [FeatureType.mountains, FeatureType.marsh, FeatureType.rainforest]
+
+		for point in mapModel.points():
+			tile = mapModel.tileAt(point)
+			tile.setTerrain(rng.choice(terrains))
+
+			if tile.isLand():
+				tile.setHills(rng.random() < 0.2)
+				tile.setFeature(rng.choice(features))
+
+				if rng.random() < 0.2:
+					tile.setRiverFlowInNorth(FlowDirection.east)
+
+			generator.distance_to_coast.values[point.y][point.x] = rng.randint(0, 5)
+
+		return mapModel
+
+	def test_blendTerrains_matches_reference(self):
+		# GIVEN
+		generator = MapGenerator(MapOptions(mapSize=MapSize.duel, mapType=MapType.continents, leader=LeaderType.trajan))
+		originalMap = self._randomMap(generator, 7)
+		mapModel = self._randomMap(generator, 7)
+		referenceMap = self._randomMap(generator, 7)
+		randPercents = generator._terrainBlendRandomPercents(mapModel)
+
+		# WHEN
+		generator._applyTerrainBlend(mapModel, randPercents)
+		generator._blendTerrainsPerTile(referenceMap, randPercents)
+
+		# THEN
+		changed = 0
+		for point in mapModel.points():
+			tile = mapModel.tileAt(point)
+			referenceTile = referenceMap.tileAt(point)
+			self.assertEqual(tile.terrain(), referenceTile.terrain(), f'terrain at {point}')
+			self.assertEqual(tile.feature(), referenceTile.feature(), f'feature at {point}')
+			changed += tile.terrain() != originalMap.terrainAt(point)
+
+		self.assertGreater(changed, 0)
+
+	def test_refineFeatures_matches_reference(self):
+		# GIVEN
+		generator = MapGenerator(MapOptions(mapSize=MapSize.duel, mapType=MapType.continents, leader=LeaderType.trajan))
+		mapModel = self._randomMap(generator, 11)
+		referenceMap = self._randomMap(generator, 11)
+		priorities, randomModifiers, floodplainRolls = generator._featureRandomValues(mapModel)
+
+		# WHEN
+		counts = generator._applyFeatureRefinement(mapModel, priorities, randomModifiers, floodplainRolls)
+		referenceCounts = generator._refineFeaturesPerTile(referenceMap, priorities, randomModifiers, floodplainRolls)
+
+		# THEN
+		self.assertEqual(counts, referenceCounts)
+		self.assertGreater(counts[FeatureType.forest], 0)
+		self.assertGreater(counts[FeatureType.floodplains], 0)
+		for point in mapModel.points():
+			self.assertEqual(mapModel.featureAt(point), referenceMap.featureAt(point), f'feature at {point}')
+
+
+class TestRiverGenerator(unittest.TestCase):
+	@staticmethod
+	def _slopeMap(width: int, height: int) -> (MapModel, Array2D):
+		# land that rises to the east, the first two columns are ocean
+		mapModel = MapModelMock(width, height, TerrainType.grass)
+		heightMap = Array2D(width, height, 0.0)
+
+		for y in range(height):
+			for x in range(width):
+				if x < 2:
+					mapModel.modifyTerrainAt(HexPoint(x, y), TerrainType.ocean)
+
+				heightMap.values[y][x] = float(x) + 0.01 * ((x * 7 + y * 13) % 5)
+
+		return mapModel, heightMap
+
+	def test_corners_are_symmetric(self):
+		# GIVEN
+		mapModel, heightMap = self._slopeMap(8, 6)
+		edges = {
+			FlowDirection.east.value: FlowDirection.west.value,
+			FlowDirection.northWest.value: FlowDirection.southEast.value,
+			FlowDirection.northEast.value: FlowDirection.southWest.value
+		}
+		edges.update({value: key for key, value in edges.items()})
+
+		# WHEN
+		riverGenerator = RiverGenerator(mapModel, heightMap)
+
+		# THEN
+		for corner in np.nonzero(riverGenerator.valid)[0]:
+			for column, neighbor in enumerate(riverGenerator.neighbors[corner]):
+				if neighbor < 0 or not riverGenerator.valid[neighbor]:
+					continue
+
+				backColumn = list(riverGenerator.neighbors[neighbor]).index(corner)
+				self.assertEqual(riverGenerator.owners[corner, column], riverGenerator.owners[neighbor, backColumn])
+				self.assertEqual(edges[riverGenerator.flows[corner, column]], riverGenerator.flows[neighbor, backColumn])
+
+	def test_rivers_flow_downhill_to_the_coast(self):
+		# GIVEN
+		mapModel, heightMap = self._slopeMap(16, 10)
+		riverGenerator = RiverGenerator(mapModel, heightMap, minimumFlow=3)
+
+		# WHEN
+		springs = riverGenerator.apply(3, np.zeros(2 * 16 * 10))
+		segments, _ = riverGenerator.riverSegments(3, np.zeros(2 * 16 * 10))
+
+		# THEN
+		self.assertGreater(len(springs), 0)
+		self.assertGreater(len(segments), 0)
+
+		for corner in segments:
+			downstream = riverGenerator.down[corner]
+			self.assertLess(riverGenerator.heights[downstream], riverGenerator.heights[corner])
+			self.assertGreater(riverGenerator.flow[downstream], riverGenerator.flow[corner])
+
+			owner = riverGenerator.owners[corner, riverGenerator.downColumn[corner]]
+			y, x = divmod(int(owner), 16)
+			tile = mapModel.tileAt(x, y)
+			self.assertTrue(tile.isRiver())
+			self.assertTrue(tile.isRiverIn(FlowDirection(int(riverGenerator.flows[corner, riverGenerator.downColumn[corner]]))))
+
+		# every river ends at the coast
+		for corner in segments:
+			while riverGenerator.down[corner] >= 0:
+				corner = riverGenerator.down[corner]
+
+			self.assertTrue(riverGenerator.touchesWater[corner])
+
+
+class TestMapArrays(unittest.TestCase):
+	def test_hexNeighborIndices(self):
+		neighbors = hexNeighborIndices(10, 8)
+
+		for point in [HexPoint(0, 0), HexPoint(4, 3), HexPoint(5, 4), HexPoint(9, 7)]:
+			expected = [n.y * 10 + n.x if 0 <= n.x < 10 and 0 <= n.y < 8 else -1 for n in point.neighbors()]
+			self.assertEqual(list(neighbors[point.y * 10 + point.x]), expected)
+
+		radius2 = hexNeighborIndices(10, 8, 2)
+		center = HexPoint(4, 3)
+		expected = sorted(n.y * 10 + n.x for n in center.areaWithRadius(2).points() if n != center)
+		self.assertEqual(sorted(radius2[center.y * 10 + center.x]), expected)
+
+	def test_summedAreaTable(self):
+		values = np.arange(20).reshape((4, 5))
+		table = SummedAreaTable(values)
+
+		self.assertEqual(table.sum(0, 0, 4, 3), values.sum())
+		self.assertEqual(table.sum(1, 1, 3, 2), values[1:3, 1:4].sum())
+		self.assertEqual(table.sum(3, 1, 2, 2), 0.0)
+		self.assertEqual(list(table.columnSums(1, 1, 3, 2)), list(values[1:3, 1:4].sum(axis=0)))
+		self.assertEqual(list(table.rowSums(1, 1, 3, 2)), list(values[1:3, 1:4].sum(axis=1)))
+
+
+class TestStartPositioner(unittest.TestCase):
+	def test_placementFertilities(self):
+		# GIVEN
+		mapModel = MapModelMock.duelMap()
+		mapModel.tileAt(HexPoint(10, 10)).setRiverFlowInNorth(FlowDirection.east)
+		mapModel.modifyFeatureAt(HexPoint(12, 12), FeatureType.lake)
+		evaluator = TileFertilityEvaluator(mapModel)
+
+		for checkForCoastalLand in [True, False]:
+			# WHEN
+			fertilities = evaluator.placementFertilities(checkForCoastalLand)
+
+			# THEN
+			for point in mapModel.points():
+				expected = evaluator.placementFertility(mapModel.tileAt(point), checkForCoastalLand)
+				self.assertEqual(fertilities[point.y][point.x], expected, f'fertility at {point}')
+
+	def test_generateRegions(self):
+		# GIVEN
+		mapModel = MapModelMock.duelMap()
+		startPositioner = StartPositioner(mapModel, 2, 3)
+
+		# WHEN
+		startPositioner.generateRegions()
+
+		# THEN
+		# five starts are divided into 3 regions with 2 sub regions each
+		self.assertEqual(len(startPositioner.startAreas), 6)
+		landPoints = sum(len(continent.points) for continent in mapModel.continents if len(continent.points) > 0)
+		areaPoints = sum(len(startArea.area.points()) for startArea in startPositioner.startAreas)
+		self.assertLessEqual(areaPoints, landPoints)
+		for startArea in startPositioner.startAreas:
+			self.assertGreater(len(startArea.area.points()), 0)
+			self.assertGreater(startArea.fertility, 0.0)
+
+	def test_divide_thin_landmass(self):
+		for width, height in [(1, 1), (3, 1), (1, 2)]:
+			# GIVEN
+			landmass = np.zeros((5, 8), dtype=np.bool_)
+			landmass[2:2 + height, 3:3 + width] = True
+			region = StartRegion(
+				landmass,
+				SummedAreaTable(np.where(landmass, 2.0, 0.0)),
+				SummedAreaTable(landmass.astype(np.int32)),
+				0, 0, 7, 4
+			).shrunk()
+
+			# WHEN
+			regions = region.divide(3)
+
+			# THEN
+			self.assertEqual(len(regions), min(3, max(width, height)), f'{width}x{height}')
+			for subRegion in regions:
+				self.assertLessEqual(subRegion.minX, subRegion.maxX)
+				self.assertLessEqual(subRegion.minY, subRegion.maxY)
+				self.assertGreater(subRegion.numberOfPlots(), 0)
+
+			self.assertEqual(sum(subRegion.numberOfPlots() for subRegion in regions), width * height)
+
+
+class TestResourcePlacer(unittest.TestCase):
+	def test_candidates_match_numberOfResources(self):
+		# GIVEN
+		mapModel = MapModelMock.duelMap()
+		generator = MapGenerator(MapOptions(mapSize=MapSize.duel, mapType=MapType.continents, leader=LeaderType.trajan))
+		resources = [resource for resource in list(ResourceType)
+					 if resource != ResourceType.none and resource.usage() != ResourceUsage.artifacts]
+
+		# WHEN
+		placer = ResourcePlacer(mapModel, resources)
+
+		# THEN
+		for resource in resources:
+			info = placer.info(resource)
+			expected = generator.numberOfResources(mapModel, resource)
+			self.assertEqual(info.num_possible, expected.num_possible, f'possible {resource}')
+			self.assertEqual(info.already_placed, expected.already_placed, f'placed {resource}')
+
+	def test_place(self):
+		# GIVEN
+		mapModel = MapModelMock(10, 10, TerrainType.plains)
+		placer = ResourcePlacer(mapModel, [ResourceType.wheat, ResourceType.cotton])
+		numberOfCandidates = len(placer.candidatesFor(ResourceType.cotton))
+
+		# WHEN
+		placed = placer.place(ResourceType.wheat, 5, 1)
+
+		# THEN
+		self.assertEqual(placed, 5)
+		self.assertEqual(placer.numberOfPlaced(ResourceType.wheat), 5)
+		self.assertEqual(sum(1 for point in mapModel.points() if mapModel.tileAt(point).resourceFor(None) == ResourceType.wheat), 5)
+		# tiles with wheat are no longer candidates for other resources
+		self.assertEqual(len(placer.candidatesFor(ResourceType.cotton)), numberOfCandidates - 5)
+
+
+class TestMapSweep(unittest.TestCase):
+	def test_run_and_resume(self):
+		with tempfile.TemporaryDirectory() as outputDir:
+			# GIVEN
+			sweep = MapSweep(outputDir, seeds=[1], mapSizes=[MapSize.duel], mapTypes=[MapType.continents])
+			rows = []
+
+			# WHEN
+			generated = sweep.run(lambda row: rows.append(row))
+
+			# THEN
+			self.assertEqual(generated, 1)
+			self.assertEqual(len(rows), 1)
+			self.assertTrue(os.path.exists(os.path.join(outputDir, rows[0]['file'])))
+			self.assertGreater(float(rows[0]['landPercent']), 0.0)
+			self.assertEqual(len(rows[0]['startFertility'].split(';')), 5)
+
+			# already generated maps are skipped
+			self.assertEqual(len(sweep.jobs()), 0)
+			self.assertEqual(sweep.run(), 0)
+
 
 class TestPathfinding(unittest.TestCase):
 	def test_path(self):
@@ -1,13 +1,59 @@
+import contextlib
+import io
+import json
+import multiprocessing
 import os
+import pickle
+import random
+import tempfile
 import unittest
+import zlib
 
+from core.base import enumLookup
+from game.baseTypes import HandicapType
+from game.cityStates import CityStateType
 from game.civilizations import LeaderType
+from game.game import GameModel
+from game.moments import MomentType
+from game.players import Player, ReplyEventType
+from game.states.victories import VictoryType
+from map.areas import ContinentType, OceanType
 from map.base import HexPoint
 from map.generation import MapOptions, MapGenerator
-from map.map import Tile, MapModel
-from map.types import TerrainType, MapSize, FeatureType, MapType
+from map.improvements import ImprovementType
+from map.map import Tile, MapModel, River, FlowDirection
+from map.types import TerrainType, MapSize, FeatureType, MapType, ResourceType, ClimateZone, RouteType
+from serialisation.fastMap import encodeMap, loadsMap, dumpsMap, encodeCompactMap, decodeCompactMap, encodeTile, \
+	decodeTile
+from serialisation.binaryMap import writeBinaryMap, readBinaryMap, BinaryMapFormatError, MappedMapModel
 from serialisation.map import MapModelSchema, TileSchema
-from tests.testBasics import MapModelMock
+from serialisation.streamingMap import MapStreamWriter, MapStreamReader, MapStreamError
+from serialisation.replayLog import ReplayLogWriter, ReplayLogReader, ReplayEventCategory, mapColumns
+from serialisation.sharedWorld import SharedWorldSnapshot, SharedWorldView
+from serialisation.snapshot import SnapshotWriter, readSnapshots, readSnapshotInfo, SnapshotFormatError, AutoSaver, \
+	MAGIC, VERSION, FULL, ZLIB, _headerStruct
+from tests.testBasics import MapModelMock, UserInterfaceMock
+
+# the map of the test games is a MapModelMock
+snapshotPackages = ('core', 'game', 'map', 'serialisation', 'utils', 'tests')
+
+
+def _sharedWorldCities(manifest) -> [(int, int)]:
+	# runs in a worker process
+	with SharedWorldView(manifest) as world:
+		return [(int(row['x']), int(row['y'])) for row in world.cities]
+
+
+class _CollidingBlob(bytes):
+	"""blob with the hash of another blob"""
+
+	def __new__(cls, value: bytes, collidingHash: int):
+		blob = super().__new__(cls, value)
+		blob.collidingHash = collidingHash
+		return blob
+
+	def __hash__(self):
+		return self.collidingHash
 
 
 class TestSerialisation(unittest.TestCase):
@@ -81,3 +127,641 @@ class TestSerialisation(unittest.TestCase):
 
 		with open('duel.map', "w") as file:
 			file.write(json_str)
+
+	def test_binary_map_round_trip(self):
+		path = './tests/files/duel.map'
+		if os.path.exists('./files/duel.map'):
+			path = './files/duel.map'
+
+		with open(path, "r") as file:
+			jsonStr = file.read()
+
+		mapModel = MapModel(MapModelSchema().loads(jsonStr))
+
+		with tempfile.TemporaryDirectory() as directory:
+			binaryPath = os.path.join(directory, 'duel.bmap')
+			mapModel.save(binaryPath)
+			loadedMapModel = MapModel.load(binaryPath)
+
+			self.assertLess(os.path.getsize(binaryPath) * 10, len(jsonStr))
+
+		self.assertEqual(MapModelSchema().dumps(loadedMapModel), MapModelSchema().dumps(mapModel))
+		self.assertEqual(len(loadedMapModel.startLocations), len(mapModel.startLocations))
+		self.assertEqual(loadedMapModel.cityStateStartLocations[0].cityState, mapModel.cityStateStartLocations[0].cityState)
+		self.assertEqual(loadedMapModel.continents[0].continentType, mapModel.continents[0].continentType)
+
+	def test_binary_map_tile_attributes(self):
+		mapModel = MapModelMock(MapSize.duel, TerrainType.grass)
+		tile = mapModel.tileAt(HexPoint(4, 5))
+		tile.setHills(True)
+		tile.setFeature(FeatureType.forest)
+		tile.setRiver(River('Nile'), FlowDirection.southEast)
+
+		buffer = io.BytesIO()
+		writeBinaryMap(mapModel, buffer)
+		loadedTile = readBinaryMap(buffer.getvalue()).tileAt(HexPoint(4, 5))
+
+		self.assertEqual(loadedTile.terrain(), TerrainType.grass)
+		self.assertTrue(loadedTile.isHills())
+		self.assertEqual(loadedTile.feature(), FeatureType.forest)
+		self.assertTrue(loadedTile.isRiverInNorthEast())
+		self.assertEqual(loadedTile._riverName, 'Nile')
+
+		with self.assertRaises(BinaryMapFormatError):
+			readBinaryMap(b'JSON' + buffer.getvalue()[4:])
+
+	def test_mapped_map_model(self):
+		path = './tests/files/duel.map'
+		if os.path.exists('./files/duel.map'):
+			path = './files/duel.map'
+
+		with open(path, "r") as file:
+			mapModel = MapModel(MapModelSchema().loads(file.read()))
+
+		with tempfile.TemporaryDirectory() as directory:
+			binaryPath = os.path.join(directory, 'duel.bmap')
+			mapModel.save(binaryPath)
+
+			with MappedMapModel(binaryPath) as mappedMapModel:
+				self.assertEqual(mappedMapModel.width, mapModel.width)
+				self.assertEqual(mappedMapModel.height, mapModel.height)
+				self.assertEqual(len(mappedMapModel.startLocations), len(mapModel.startLocations))
+
+				codes, terrains = mappedMapModel.enumColumn('terrain')
+				self.assertEqual(codes.shape, (mapModel.height, mapModel.width))
+				self.assertFalse(codes.flags.writeable)
+				self.assertFalse(codes.flags.owndata)
+
+				for point in mapModel.points():
+					tile = mapModel.tileAt(point)
+					mappedTile = mappedMapModel.tileAt(point)
+
+					self.assertEqual(terrains[codes[point.y, point.x]], tile.terrain())
+					self.assertEqual(mappedMapModel.terrainAt(point), tile.terrain())
+					self.assertEqual(TileSchema().dumps(mappedTile), TileSchema().dumps(tile))
+
+				self.assertIsNone(mappedMapModel.tileAt(HexPoint(-1, 0)))
+
+
+class TestFastMapSerialisation(unittest.TestCase):
+	def _duelMapJson(self) -> str:
+		path = './tests/files/duel.map'
+		if os.path.exists('./files/duel.map'):
+			path = './files/duel.map'
+
+		with open(path, "r") as file:
+			return file.read()
+
+	def _hugeMap(self) -> MapModel:
+		# there is no huge map size (yet), so the map is filled with random tiles
+		rnd = random.Random(42)
+		mapModel = MapModelMock(128, 80, TerrainType.ocean)
+		terrains = [TerrainType.grass, TerrainType.plains, TerrainType.desert, TerrainType.tundra, TerrainType.shore]
+		features = [FeatureType.none, FeatureType.forest, FeatureType.rainforest, FeatureType.marsh]
+		resources = [ResourceType.none, ResourceType.wheat, ResourceType.iron, ResourceType.fish]
+
+		for point in mapModel.points():
+			tile = mapModel.tileAt(point)
+			tile._terrainValue = rnd.choice(terrains)
+			tile._isHills = rnd.random() < 0.2
+			tile._featureValue = rnd.choice(features)
+			tile._resourceValue = rnd.choice(resources)
+			tile._resourceQuantity = rnd.randint(0, 3)
+			tile._riverValue = rnd.randint(0, 7)
+			tile._riverName = 'Nile' if tile._riverValue > 0 else None
+			tile._climateZone = rnd.choice(list(ClimateZone))
+			tile.continentIdentifier = str(rnd.randint(0, 5))
+
+		return mapModel
+
+	def test_fast_path_matches_schema(self):
+		jsonStr = self._duelMapJson()
+		mapModel = MapModel(MapModelSchema().loads(jsonStr))
+		schemaDict = MapModelSchema().dump(mapModel)
+
+		self.assertEqual(encodeMap(mapModel), schemaDict)
+		self.assertEqual(json.loads(dumpsMap(mapModel)), json.loads(MapModelSchema().dumps(mapModel)))
+		self.assertEqual(MapModelSchema().dump(loadsMap(jsonStr)), schemaDict)
+
+		# the compact lists store the same map
+		compactJson = json.dumps(encodeCompactMap(mapModel))
+		self.assertEqual(MapModelSchema().dump(decodeCompactMap(json.loads(compactJson))), schemaDict)
+		self.assertLess(len(compactJson) * 4, len(jsonStr))
+
+		tile = mapModel.tileAt(HexPoint(3, 4))
+		decodedTile = decodeTile(encodeTile(tile), tile.point)
+		self.assertEqual(TileSchema().dump(decodedTile), TileSchema().dump(tile))
+
+	def test_enum_from_name(self):
+		for enumType in [TerrainType, FeatureType, ResourceType, ClimateZone, RouteType, ImprovementType, LeaderType,
+						 CityStateType, ContinentType, OceanType]:
+			for member in enumType:
+				self.assertIs(enumType.fromName(str(member)), member)
+				self.assertIs(enumType.fromName(member._name_), member)
+				self.assertIs(enumType.fromName(member.value), member)
+
+			with self.assertRaises(Exception):
+				enumType.fromName(f'{enumType.__name__}.unknown')
+
+		self.assertIs(enumLookup(TerrainType)['TerrainType.grass'], TerrainType.grass)
+
+	def test_enum_from_name_matches_scan(self):
+		# the timings are in the benchmarks (enumFromName.*)
+		tileDicts = [tileDict for row in encodeMap(self._hugeMap())['tiles'] for tileDict in row]
+		columns = [
+			(TerrainType, 'terrain'), (FeatureType, 'feature'), (ResourceType, 'resource'), (ClimateZone, 'climateZone')
+		]
+		names = [(enumType, tileDict[key]) for tileDict in tileDicts for enumType, key in columns]
+
+		# reference: scan the members like the former if/elif chains
+		def _scan(enumType, name):
+			return next(member for member in enumType if name == str(member) or name == member.value)
+
+		scanned = [_scan(enumType, name) for enumType, name in names]
+		looked = [enumType.fromName(name) for enumType, name in names]
+
+		self.assertEqual(looked, scanned)
+
+	def test_fast_path_round_trip_matches_schema(self):
+		# the timings are in the benchmarks (mapSave.* and mapLoad.*)
+		mapModels = [MapModel(MapModelSchema().loads(self._duelMapJson())), self._hugeMap()]
+
+		for mapModel in mapModels:
+			schemaMapModel = MapModel(MapModelSchema().loads(MapModelSchema().dumps(mapModel)))
+			fastMapModel = loadsMap(dumpsMap(mapModel))
+
+			self.assertEqual(encodeMap(fastMapModel), encodeMap(schemaMapModel))
+
+
+	def test_streaming_map_round_trip(self):
+		jsonStr = self._duelMapJson()
+		mapModel = loadsMap(jsonStr)
+
+		buffer = io.StringIO()
+		MapStreamWriter(buffer).write(mapModel)
+		self.assertEqual(json.loads(buffer.getvalue()), MapModelSchema().dump(mapModel))
+
+		# the files written by the schema have a random key order, the tiles are not always the first key
+		reorderedJson = json.dumps(dict(reversed(list(json.loads(jsonStr).items()))))
+
+		for content in [buffer.getvalue(), jsonStr, reorderedJson]:
+			# small chunks split the values at every possible position
+			for chunkSize in [7, 1 << 16]:
+				streamedMapModel = MapStreamReader(io.StringIO(content), chunkSize=chunkSize).read()
+				self.assertEqual(encodeMap(streamedMapModel), encodeMap(mapModel))
+
+		reader = MapStreamReader(io.StringIO(buffer.getvalue()))
+		for y, row in enumerate(reader.rows()):
+			self.assertEqual(len(row), mapModel.width)
+			self.assertEqual(row[0].point, HexPoint(0, y))
+
+		with self.assertRaises(MapStreamError):
+			MapStreamReader(io.StringIO(buffer.getvalue()[:len(buffer.getvalue()) // 2])).read()
+
+	def test_streaming_map_memory(self):
+		import tracemalloc
+
+		buffer = io.StringIO()
+		MapStreamWriter(buffer).write(self._hugeMap())
+		content = buffer.getvalue()
+
+		def _peakMemory(func) -> int:
+			tracemalloc.start()
+			try:
+				func()
+				return tracemalloc.get_traced_memory()[1]
+			finally:
+				tracemalloc.stop()
+
+		file = io.StringIO(content)
+		peakLoads = _peakMemory(lambda: loadsMap(content))
+		peakStream = _peakMemory(lambda: MapStreamReader(file).read())
+
+		# the streaming reader only needs the tiles and one row of json
+		self.assertLess(peakStream * 2, peakLoads)
+
+
+class TestGameSnapshot(unittest.TestCase):
+	def _game(self) -> GameModel:
+		mapModel = MapModelMock(MapSize.tiny, TerrainType.grass)
+		simulation = GameModel(
+			victoryTypes=[VictoryType.domination],
+			handicap=HandicapType.chieftain,
+			turnsElapsed=0,
+			players=[],
+			map=mapModel
+		)
+
+		for leader, human in [(LeaderType.barbar, False), (LeaderType.trajan, False), (LeaderType.alexander, True)]:
+			player = Player(leader, human=human)
+			player.initialize()
+			simulation.players.append(player)
+
+		simulation.userInterface = UserInterfaceMock()
+
+		simulation.players[1].foundCity(HexPoint(4, 5), "Berlin", simulation)
+		simulation.players[2].foundCity(HexPoint(14, 5), "Potsdam", simulation)
+
+		return simulation
+
+	def _playTurns(self, simulation: GameModel, turns: int):
+		humanPlayer = simulation.humanPlayer()
+		lastTurn = simulation.currentTurn + turns
+
+		with contextlib.redirect_stdout(io.StringIO()):
+			while simulation.currentTurn < lastTurn:
+				simulation.update()
+
+				if humanPlayer.isTurnActive():
+					humanPlayer.setProcessedAutoMovesTo(True)
+					humanPlayer.finishTurn()
+
+	def _readFile(self, path: str) -> bytes:
+		with open(path, 'rb') as file:
+			return file.read()
+
+	def test_snapshot_round_trip(self):
+		simulation = self._game()
+		self._playTurns(simulation, 3)
+
+		snapshot = SnapshotWriter().snapshot(simulation)
+		restored = readSnapshots([snapshot], snapshotPackages)
+
+		self.assertEqual(restored.currentTurn, simulation.currentTurn)
+		self.assertEqual([player.leader for player in restored.players], [player.leader for player in simulation.players])
+		self.assertIsNone(restored.userInterface)
+
+		# references between records are restored as the same objects
+		restoredTrajan = restored.players[1]
+		restoredBerlin = restored.cityAt(HexPoint(4, 5))
+		self.assertEqual(restoredBerlin.name(), 'Berlin')
+		self.assertIs(restoredBerlin.player, restoredTrajan)
+		self.assertIs(restored.tileAt(HexPoint(4, 5)).owner(), restoredTrajan)
+		self.assertIs(restored.capitalOf(restoredTrajan), restoredBerlin)
+
+		for unit in restored._map._units:
+			self.assertIn(unit.player, restored.players)
+
+		self.assertEqual(
+			[(unit.unitType, unit.location) for unit in restored.unitsOf(restoredTrajan)],
+			[(unit.unitType, unit.location) for unit in simulation.unitsOf(simulation.players[1])]
+		)
+		self.assertEqual(
+			restoredTrajan.techs.currentTech(),
+			simulation.players[1].techs.currentTech()
+		)
+
+		# the restored game can be continued
+		restored.userInterface = UserInterfaceMock()
+		self._playTurns(restored, 2)
+		self.assertEqual(restored.currentTurn, simulation.currentTurn + 2)
+
+		with self.assertRaises(SnapshotFormatError):
+			readSnapshots([b'JSON' + snapshot[4:]], snapshotPackages)
+
+		# the map of the test game is not part of the default packages
+		with self.assertRaises(SnapshotFormatError):
+			readSnapshots([snapshot])
+
+	def test_shared_world_view(self):
+		# GIVEN
+		simulation = self._game()
+		self._playTurns(simulation, 2)
+		trajan = simulation.players[1]
+
+		# WHEN
+		with SharedWorldSnapshot(simulation) as snapshot:
+			with SharedWorldView(snapshot.manifest) as world:
+
+				# THEN
+				self.assertEqual((world.width, world.height), (simulation.mapSize().width(), simulation.mapSize().height()))
+				self.assertFalse(world.tiles.flags.writeable)
+				self.assertIsNone(world.tileAt(HexPoint(-1, 0)))
+				self.assertFalse(world.valid(HexPoint(world.width, 0)))
+
+				for point in simulation.points():
+					tile = simulation.tileAt(point)
+					worldTile = world.tileAt(point)
+
+					self.assertEqual(worldTile.terrain(), tile.terrain())
+					self.assertEqual(worldTile.feature(), tile.feature())
+					self.assertEqual(worldTile.isCity(), tile.isCity())
+					self.assertEqual(worldTile.isVisibleTo(trajan), tile.isVisibleTo(trajan))
+					self.assertEqual(world.isVisibleTo(point, trajan), tile.isVisibleTo(trajan))
+					self.assertEqual(world.isDiscoveredBy(point, trajan), tile.isDiscoveredBy(trajan))
+
+					if tile.hasOwner():
+						self.assertEqual(worldTile.owner().leader, tile.owner().leader)
+					else:
+						self.assertFalse(worldTile.hasOwner())
+
+				for unit in simulation._map._units:
+					worldUnit = world.unitAt(unit.location, unit.unitMapType())
+					self.assertEqual(worldUnit.unitType, unit.unitType)
+					self.assertTrue(worldUnit.player.isEqualTo(unit.player))
+
+				berlin = world.cityAt(HexPoint(4, 5))
+				self.assertTrue(berlin.player.isEqualTo(trajan))
+				self.assertTrue(berlin.isCapital())
+				self.assertIsNone(world.cityAt(HexPoint(0, 0)))
+
+			# the workers only get the manifest
+			if 'fork' in multiprocessing.get_all_start_methods():
+				with multiprocessing.get_context('fork').Pool(processes=1) as pool:
+					cities = pool.apply(_sharedWorldCities, (snapshot.manifest,))
+
+				self.assertEqual(cities, [(4, 5), (14, 5)])
+
+	def test_shared_world_update(self):
+		# GIVEN
+		simulation = self._game()
+		self._playTurns(simulation, 2)
+		trajan = simulation.players[1]
+
+		with SharedWorldSnapshot(simulation) as snapshot:
+			# WHEN
+			simulation.tileAt(HexPoint(10, 10)).setTerrain(TerrainType.desert)
+			simulation.tileAt(HexPoint(10, 10)).sightBy(trajan)
+			simulation.tileAt(HexPoint(11, 10)).setOwner(trajan)
+			simulation.deleteCity(simulation.cityAt(HexPoint(4, 5)))
+			snapshot.update(simulation)
+
+			# THEN
+			with SharedWorldView(snapshot.manifest) as world:
+				self.assertEqual(world.tileAt(HexPoint(10, 10)).terrain(), TerrainType.desert)
+				self.assertTrue(world.isVisibleTo(HexPoint(10, 10), trajan))
+				self.assertTrue(world.tileAt(HexPoint(11, 10)).owner().isEqualTo(trajan))
+				self.assertEqual(len(world.cities), 1)
+
+				# coordinates that are read from the blocks are numpy integers
+				row = world.cities[0]
+				self.assertTrue(world.valid(row['x'], row['y']))
+				self.assertEqual(world.tileAt(row['x'], row['y']).point, HexPoint(14, 5))
+				self.assertEqual(world.cityAt(HexPoint(14, 5)).population(), simulation.cityAt(HexPoint(14, 5)).population())
+
+	def test_snapshot_delta(self):
+		simulation = self._game()
+		self._playTurns(simulation, 2)
+
+		writer = SnapshotWriter()
+		snapshots = [writer.snapshot(simulation)]
+
+		for _ in range(2):
+			self._playTurns(simulation, 1)
+			snapshots.append(writer.snapshot(simulation, delta=True))
+
+		full = readSnapshotInfo(snapshots[0], snapshotPackages)
+		delta = readSnapshotInfo(snapshots[-1], snapshotPackages)
+
+		self.assertFalse(full.isDelta())
+		self.assertTrue(delta.isDelta())
+		self.assertEqual(delta.baseSequence, full.sequence + 1)
+		self.assertLess(len(delta.chunks), len(full.chunks))
+		self.assertLess(len(snapshots[-1]), len(snapshots[0]))
+
+		# the chain of deltas restores the same state as a full snapshot
+		restored = readSnapshots(snapshots, snapshotPackages)
+		expected = readSnapshots([SnapshotWriter().snapshot(simulation)], snapshotPackages)
+		self.assertEqual(SnapshotWriter().snapshot(restored), SnapshotWriter().snapshot(expected))
+
+		with self.assertRaises(SnapshotFormatError):
+			readSnapshots([snapshots[0], snapshots[2]], snapshotPackages)
+
+		with self.assertRaises(SnapshotFormatError):
+			readSnapshots(snapshots[1:], snapshotPackages)
+
+	def test_snapshot_reuses_unchanged_chunks(self):
+		# GIVEN
+		simulation = self._game()
+		self._playTurns(simulation, 2)
+
+		writer = SnapshotWriter()
+		first = writer.capture(simulation)
+		writer.encode(first)
+		unversionedChunks = len([
+			chunk for chunk in first.chunks.values()
+			if not isinstance(writer.records()[chunk[0][0][0]], (MapModel, Tile))
+		])
+
+		# WHEN
+		unchanged = writer.capture(simulation)
+		writer.encode(unchanged, delta=True)
+		tile = simulation.tileAt(HexPoint(10, 10))
+		tile.setRoute(RouteType.ancientRoad)
+		changed = writer.capture(simulation)
+		delta = readSnapshotInfo(writer.encode(changed, delta=True), snapshotPackages)
+
+		# THEN
+		self.assertEqual(first.pickledChunks, len(first.chunks))
+		self.assertEqual(unchanged.pickledChunks, unversionedChunks)
+		self.assertEqual(changed.pickledChunks, unversionedChunks + 1)
+		self.assertIn(tile, [writer.records()[identifier] for header, _ in delta.chunks.values() for identifier, _ in header])
+
+	def test_snapshot_compares_chunk_contents(self):
+		# GIVEN
+		simulation = self._game()
+		writer = SnapshotWriter()
+		first = writer.capture(simulation)
+		writer.encode(first)
+
+		# WHEN
+		second = writer.capture(simulation)
+		chunkIdentifier, (header, blob) = next(iter(second.chunks.items()))
+		second.chunks[chunkIdentifier] = (header, _CollidingBlob(blob + b'changed', hash(blob)))
+		writer.encode(second, delta=True)
+
+		# THEN
+		self.assertEqual(hash(second.chunks[chunkIdentifier]), hash(first.chunks[chunkIdentifier]))
+		self.assertEqual(writer.dirtyChunks, 1)
+
+	def test_snapshot_rejects_functions(self):
+		# GIVEN
+		def _snapshotFile(body: bytes) -> bytes:
+			return _headerStruct.pack(MAGIC, VERSION, FULL, ZLIB, 0, 0) + zlib.compress(body)
+
+		classTable = pickle.dumps({
+			'classes': ('serialisation.snapshot:os.getcwd',),
+			'root': 0,
+			'chunks': {0: (((0, 0),), pickle.dumps([{}]))},
+			'removed': ()
+		})
+		maliciousFiles = [
+			# dotted names reach the modules that are imported by an allowed module
+			_snapshotFile(b'\x80\x04cserialisation.snapshot\nos.getcwd\n)R.'),
+			_snapshotFile(b'\x80\x04\x8c\x16serialisation.snapshot\x94\x8c\tos.getcwd\x94\x93)R.'),
+			# functions of allowed modules and builtins
+			_snapshotFile(b'\x80\x04cserialisation.snapshot\nreadSnapshots\n)R.'),
+			_snapshotFile(b'\x80\x04cbuiltins\ngetattr\n)R.'),
+			_snapshotFile(classTable)
+		]
+
+		for maliciousFile in maliciousFiles:
+			# WHEN / THEN
+			with self.assertRaises(SnapshotFormatError):
+				readSnapshots([maliciousFile])
+
+	def test_snapshot_compression(self):
+		simulation = self._game()
+		self._playTurns(simulation, 2)
+
+		writer = SnapshotWriter(compression='lzma')
+		snapshot = writer.snapshot(simulation)
+		restored = readSnapshots([snapshot], snapshotPackages)
+
+		self.assertEqual(restored.currentTurn, simulation.currentTurn)
+		self.assertEqual(
+			SnapshotWriter().snapshot(restored),
+			SnapshotWriter().snapshot(readSnapshots([SnapshotWriter().snapshot(simulation)], snapshotPackages))
+		)
+
+		# a second snapshot of the unchanged game has no changed chunks
+		self.assertEqual(writer.dirtyChunks, len(readSnapshotInfo(snapshot, snapshotPackages).chunks))
+		writer.snapshot(simulation)
+		self.assertEqual(writer.dirtyChunks, 0)
+
+	def test_auto_save(self):
+		simulation = self._game()
+		reports = []
+
+		with tempfile.TemporaryDirectory() as directory:
+			with AutoSaver(directory, slots=2, instrumentation=reports.append) as autoSaver:
+				simulation.autoSaver = autoSaver
+				self._playTurns(simulation, 4)
+
+			self.assertGreater(len(reports), 0)
+			self.assertIsNone(autoSaver.lastError())
+			self.assertEqual(reports[-1].turn, simulation.currentTurn)
+			self.assertEqual(reports[-1].path, autoSaver.latestPath())
+			self.assertLessEqual(reports[-1].dirtyChunks, reports[-1].totalChunks)
+			self.assertLess(reports[-1].pickledChunks, reports[-1].totalChunks)
+			self.assertEqual(len(reports), autoSaver.writer.sequence)
+			# one save per turn
+			self.assertEqual(len(reports) + sum(report.dropped for report in reports), 4)
+
+			# only the chains of the slots, no temporary files
+			self.assertLessEqual(len(os.listdir(directory)), 2 * (autoSaver.deltas + 1))
+			self.assertTrue(all(fileName.endswith('.snapshot') for fileName in os.listdir(directory)))
+
+			restored = readSnapshots([self._readFile(path) for path in autoSaver.latestPaths()], snapshotPackages)
+
+		self.assertEqual(restored.currentTurn, simulation.currentTurn)
+		self.assertIsNone(restored.autoSaver)
+
+	def test_auto_save_rotates_delta_chains(self):
+		# GIVEN
+		simulation = self._game()
+		reports = []
+
+		with tempfile.TemporaryDirectory() as directory:
+			autoSaver = AutoSaver(directory, slots=2, deltas=2, instrumentation=reports.append, background=False)
+			simulation.autoSaver = autoSaver
+
+			# WHEN
+			self._playTurns(simulation, 7)
+
+			# THEN
+			# slot 0: full, delta, delta - slot 1: full, delta, delta - slot 0: full
+			self.assertEqual([report.delta for report in reports], [False, True, True, False, True, True, False])
+			self.assertTrue(all(report.dirtyChunks < report.totalChunks for report in reports if report.delta))
+			self.assertEqual(autoSaver.latestPaths(), [autoSaver.slotPath(0)])
+			# the deltas of the overwritten chain of slot 0 are removed
+			self.assertEqual(sorted(os.listdir(directory)), [
+				'autosave_0.snapshot', 'autosave_1.snapshot', 'autosave_1_delta_1.snapshot',
+				'autosave_1_delta_2.snapshot'
+			])
+
+			# the older chain restores the game of its last delta
+			older = readSnapshots(
+				[self._readFile(autoSaver.slotPath(1))] +
+				[self._readFile(autoSaver.deltaPath(1, position)) for position in [1, 2]],
+				snapshotPackages
+			)
+			latest = readSnapshots([self._readFile(autoSaver.slotPath(0))], snapshotPackages)
+
+		self.assertEqual(older.currentTurn, reports[5].turn)
+		self.assertEqual(latest.currentTurn, simulation.currentTurn)
+
+		with self.assertRaises(ValueError):
+			AutoSaver(directory, deltas=-1)
+
+	def test_auto_save_interval(self):
+		# GIVEN
+		simulation = self._game()
+		reports = []
+
+		with tempfile.TemporaryDirectory() as directory:
+			autoSaver = AutoSaver(directory, interval=2, instrumentation=reports.append, background=False)
+			simulation.autoSaver = autoSaver
+
+			# WHEN
+			self._playTurns(simulation, 5)
+
+		# THEN
+		self.assertEqual([report.turn for report in reports], [2, 4])
+
+		with self.assertRaises(ValueError):
+			AutoSaver(directory, interval=0)
+
+
+class TestReplayLog(unittest.TestCase):
+	_game = TestGameSnapshot._game
+	_playTurns = TestGameSnapshot._playTurns
+
+	def _loggedGame(self, path: str, turns: int) -> GameModel:
+		simulation = self._game()
+		simulation.replayLog = ReplayLogWriter(path, simulation, keyframeInterval=2)
+
+		for _ in range(turns):
+			simulation.addReplayEvent(ReplyEventType.major, 'tick', HexPoint(4, 5))
+			simulation.players[1].addMoment(MomentType.cityNearVolcano, cityName='Berlin', simulation=simulation)
+			self._playTurns(simulation, 1)
+
+		return simulation
+
+	def test_replay_log_events(self):
+		with tempfile.TemporaryDirectory() as directory:
+			path = os.path.join(directory, 'game.replay')
+			simulation = self._loggedGame(path, 3)
+			simulation.replayLog.close()
+
+			with ReplayLogReader(path) as reader:
+				self.assertEqual(reader.turns(), [0, 1, 2])
+
+				replayEvents = reader.events(category=ReplayEventCategory.replay)
+				self.assertEqual([event.turn for event in replayEvents], [0, 1, 2])
+				self.assertEqual(replayEvents[0].location, HexPoint(4, 5))
+				self.assertEqual(replayEvents[0].data, {'message': 'tick'})
+				self.assertEqual(replayEvents[0].player, -1)
+
+				moments = reader.events(turn=1, eventType=MomentType.cityNearVolcano)
+				self.assertEqual(len(moments), 1)
+				self.assertEqual(moments[0].category, ReplayEventCategory.moment)
+				self.assertEqual(moments[0].player, 1)
+
+				self.assertEqual(reader.events(player=2, category=ReplayEventCategory.replay), [])
+
+	def test_replay_log_map_state(self):
+		with tempfile.TemporaryDirectory() as directory:
+			path = os.path.join(directory, 'game.replay')
+			simulation = self._loggedGame(path, 2)
+
+			simulation.tileAt(HexPoint(8, 8)).setTerrain(TerrainType.desert)
+			simulation.tileAt(HexPoint(9, 8)).setOwner(simulation.players[2])
+			self._playTurns(simulation, 2)
+			columns = mapColumns(simulation)
+
+			# the log is read while the game is still running (no trailer)
+			with ReplayLogReader(path) as reader:
+				self.assertEqual(reader.turns(), [0, 1, 2, 3])
+
+				state = reader.mapStateAt(3)
+				for name, values in columns.items():
+					self.assertTrue((state[name].ravel() == values).all(), name)
+
+				# turn 3 is restored from the keyframe of turn 2 and a diff
+				terrainValues = reader.columnValues('terrain')
+				self.assertEqual(terrainValues[state['terrain'][8, 8]], 'TerrainType.desert')
+				self.assertEqual(reader.columnValues('owner')[state['owner'][8, 9]], LeaderType.alexander.value)
+				self.assertEqual(terrainValues[reader.mapStateAt(1)['terrain'][8, 8]], 'TerrainType.grass')
+
+			simulation.replayLog.close()
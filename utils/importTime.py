@@ -0,0 +1,193 @@
+"""
+	import time report
+
+	runs `python -X importtime -c "import <module>"` in a fresh interpreter and summarizes the output, so the start
+	up time of the tools can be checked against a budget:
+
+		python -m utils.importTime map.map --budget 150
+		python -m utils.importTime game.game --top 20
+
+	the exit code is 1 if the module takes longer than the budget (or imports one of the --forbid modules).
+
+	note: if the interpreter doesn't write bytecode (PYTHONDONTWRITEBYTECODE) the times include the compilation of
+	the sources and are a lot higher.
+"""
+import argparse
+import subprocess
+import sys
+from pathlib import Path
+from typing import Optional
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+
+
+class ImportTimeEntry:
+	def __init__(self, module: str, selfTime: int, cumulativeTime: int, depth: int):
+		"""
+			@param module: name of the imported module
+			@param selfTime: time to execute the module in microseconds
+			@param cumulativeTime: time including the imports of the module in microseconds
+			@param depth: nesting level (0 for the module that was imported by the command)
+		"""
+		self.module = module
+		self.selfTime = selfTime
+		self.cumulativeTime = cumulativeTime
+		self.depth = depth
+
+	def package(self) -> str:
+		return self.module.split('.')[0]
+
+	def __repr__(self):
+		return f'ImportTimeEntry({self.module}, self={self.selfTime}us, cumulative={self.cumulativeTime}us)'
+
+
+def parseImportTime(output: str) -> [ImportTimeEntry]:
+	"""
+		parses the stderr output of `python -X importtime`
+
+		@param output: lines like 'import time:      1497 |      18800 |             game.wonders'
+		@return: list of entries in the order of the output (the imported module is the last one)
+	"""
+	entries = []
+
+	for line in output.splitlines():
+		if not line.startswith('import time:'):
+			continue
+
+		parts = line[len('import time:'):].split('|')
+
+		if len(parts) != 3 or not parts[0].strip().isdigit():
+			# header line
+			continue
+
+		name = parts[2].rstrip()
+		depth = (len(name) - len(name.lstrip()) - 1) // 2
+		entries.append(ImportTimeEntry(name.strip(), int(parts[0]), int(parts[1]), depth))
+
+	return entries
+
+
+def subtreeOf(entries: [ImportTimeEntry], module: str) -> [ImportTimeEntry]:
+	"""
+		the imports of a module are listed before the module itself, the modules of the interpreter start up (site, ...)
+		before that
+
+		@param entries: all entries of the output
+		@param module: module that was imported
+		@return: entries of the module and its imports
+	"""
+	end = next((index for index, entry in enumerate(entries) if entry.module == module and entry.depth == 0), None)
+
+	if end is None:
+		return []
+
+	start = end
+	while start > 0 and entries[start - 1].depth > 0:
+		start -= 1
+
+	return entries[start:end + 1]
+
+
+class ImportTimeReport:
+	def __init__(self, module: str, entries: [ImportTimeEntry]):
+		self.module = module
+		self.entries = entries
+
+	@classmethod
+	def measure(cls, module: str, warmup: bool = True) -> 'ImportTimeReport':
+		"""
+			imports the module in a fresh interpreter
+
+			@param module: name of the module like 'map.map'
+			@param warmup: import the module once before the measurement (writes the bytecode if enabled)
+			@return: report of the imports
+		"""
+		command = [sys.executable, '-X', 'importtime', '-c', f'import {module}']
+
+		if warmup:
+			subprocess.run(command, cwd=BASE_DIR, capture_output=True, check=True)
+
+		result = subprocess.run(command, cwd=BASE_DIR, capture_output=True, text=True, check=True)
+		return cls(module, subtreeOf(parseImportTime(result.stderr), module))
+
+	def totalTime(self) -> int:
+		"""@return: cumulative import time of the module in microseconds"""
+		if not self.entries:
+			# the module was already imported by the interpreter
+			return 0
+
+		return self.entries[-1].cumulativeTime
+
+	def modules(self) -> [str]:
+		return [entry.module for entry in self.entries]
+
+	def slowest(self, count: int) -> [ImportTimeEntry]:
+		"""@return: the modules with the highest self time"""
+		return sorted(self.entries, key=lambda entry: entry.selfTime, reverse=True)[:count]
+
+	def packageTimes(self) -> dict:
+		"""@return: dict of top level package and sum of the self times of its modules, slowest first"""
+		times = {}
+
+		for entry in self.entries:
+			times[entry.package()] = times.get(entry.package(), 0) + entry.selfTime
+
+		return dict(sorted(times.items(), key=lambda item: item[1], reverse=True))
+
+	def violations(self, budget: Optional[float] = None, forbidden: Optional[list] = None) -> [str]:
+		"""
+			@param budget: maximal cumulative import time in milliseconds
+			@param forbidden: modules that must not be imported (by the module or its imports)
+			@return: list of messages, empty if the budget is kept
+		"""
+		messages = []
+
+		if budget is not None and self.totalTime() > budget * 1000:
+			messages.append(f'import of {self.module} took {self.totalTime() / 1000:.1f}ms (budget {budget:.1f}ms)')
+
+		modules = set(self.modules())
+		for module in forbidden or []:
+			if module in modules:
+				messages.append(f'{self.module} imports {module}')
+
+		return messages
+
+	def summary(self, top: int = 10) -> str:
+		lines = [
+			f'{self.module}: {self.totalTime() / 1000:.1f}ms, {len(self.entries)} modules',
+			'',
+			'packages (self time):'
+		]
+
+		for package, time in list(self.packageTimes().items())[:top]:
+			lines.append(f'  {time / 1000:8.1f}ms  {package}')
+
+		lines.append('')
+		lines.append('slowest modules (self time):')
+
+		for entry in self.slowest(top):
+			lines.append(f'  {entry.selfTime / 1000:8.1f}ms  {entry.module}')
+
+		return '\n'.join(lines)
+
+
+def main(argv: Optional[list] = None) -> int:
+	parser = argparse.ArgumentParser(description='Summarize the import time of a module and check it against a budget.')
+	parser.add_argument('module', help='module to import like map.map')
+	parser.add_argument('--budget', type=float, default=None, help='maximal cumulative import time in milliseconds')
+	parser.add_argument('--forbid', nargs='+', default=[], help='modules that must not be imported')
+	parser.add_argument('--top', type=int, default=10, help='number of slowest modules to list')
+	args = parser.parse_args(argv)
+
+	report = ImportTimeReport.measure(args.module)
+	print(report.summary(args.top))
+
+	violations = report.violations(args.budget, args.forbid)
+	for violation in violations:
+		print(f'error: {violation}')
+
+	return 1 if violations else 0
+
+
+if __name__ == '__main__':
+	sys.exit(main())
@@ -0,0 +1,231 @@
+"""
+	hierarchical profiling of the turn pipeline
+
+	the expensive steps of a turn are marked as named spans:
+
+		@profileSpan('TacticalAI.doTurn')
+		def doTurn(self, simulation):
+			...
+
+		with span('cities'):
+			...
+
+		countSpan('nodesExpanded', expanded)
+
+	spans are only measured while profiling is enabled - otherwise a span costs a global lookup and a branch. the
+	measured spans are aggregated into one tree per turn (calls, time and counters of every path of spans):
+
+		with profiling() as profiler:
+			game.play(turns)
+
+		profiler.toJson()           # {turn: tree}
+		profiler.collapsedStacks()  # 'GameModel.doTurn;Player.doTurn;City.doTurn 1234' lines for flamegraph.pl
+"""
+import time
+from contextlib import contextmanager, nullcontext
+from functools import wraps
+from typing import Optional
+
+_profiler = None
+
+
+class SpanNode:
+	def __init__(self, name: str, parent: Optional['SpanNode'] = None):
+		self.name = name
+		self.parent = parent
+		self.calls = 0
+		self.totalTime = 0.0
+		self.counters = {}
+		self.children = {}
+
+	def child(self, name: str) -> 'SpanNode':
+		node = self.children.get(name)
+
+		if node is None:
+			node = SpanNode(name, self)
+			self.children[name] = node
+
+		return node
+
+	def selfTime(self) -> float:
+		"""@return: time of the span without the time of its child spans"""
+		return max(0.0, self.totalTime - sum(child.totalTime for child in self.children.values()))
+
+	def toDict(self) -> dict:
+		return {
+			'name': self.name,
+			'calls': self.calls,
+			'time': round(self.totalTime, 6),
+			'selfTime': round(self.selfTime(), 6),
+			'counters': dict(self.counters),
+			'children': [child.toDict() for child in self.children.values()]
+		}
+
+
+class Profiler:
+	def __init__(self):
+		self.turns = {}
+		self.turn = 0
+		self.current = self._root(0)
+
+	def _root(self, turn: int) -> SpanNode:
+		root = self.turns.get(turn)
+
+		if root is None:
+			root = SpanNode('turn')
+			self.turns[turn] = root
+
+		return root
+
+	def setTurn(self, turn: int):
+		"""top level spans that start after this call are added to the tree of the turn"""
+		self.turn = turn
+
+	def enter(self, name: str) -> SpanNode:
+		# a span belongs to the turn it started in (GameModel.doTurn starts in one turn and ends in the next)
+		parent = self._root(self.turn) if self.current.parent is None else self.current
+
+		node = parent.child(name)
+		node.calls += 1
+		self.current = node
+		return node
+
+	def exit(self, node: SpanNode, duration: float):
+		node.totalTime += duration
+		self.current = node.parent
+
+	def count(self, name: str, value: int = 1):
+		node = self._root(self.turn) if self.current.parent is None else self.current
+		counters = node.counters
+		counters[name] = counters.get(name, 0) + value
+
+	def toJson(self) -> dict:
+		"""@return: dict of turn and span tree (json compatible)"""
+		return {str(turn): root.toDict() for turn, root in self.turns.items()}
+
+	def collapsedStacks(self, turn: Optional[int] = None) -> str:
+		"""
+			@param turn: only the spans of this turn (default: all turns)
+			@return: one 'span;child;grandchild microseconds' line per path (self time), the input of flamegraph.pl
+		"""
+		stacks = {}
+		roots = self.turns.values() if turn is None else [self.turns.get(turn, SpanNode('turn'))]
+
+		def _collect(node: SpanNode, prefix: str):
+			for child in node.children.values():
+				path = child.name if prefix == '' else f'{prefix};{child.name}'
+				stacks[path] = stacks.get(path, 0) + int(round(child.selfTime() * 1e6))
+				_collect(child, path)
+
+		for root in roots:
+			_collect(root, '')
+
+		return '\n'.join(f'{path} {value}' for path, value in stacks.items() if value > 0)
+
+
+def enableProfiling() -> Profiler:
+	global _profiler
+
+	_profiler = Profiler()
+	return _profiler
+
+
+def disableProfiling() -> Optional[Profiler]:
+	global _profiler
+
+	profiler = _profiler
+	_profiler = None
+	return profiler
+
+
+def currentProfiler() -> Optional[Profiler]:
+	return _profiler
+
+
+@contextmanager
+def profiling():
+	"""enables the profiling for the block and yields the profiler"""
+	profiler = enableProfiling()
+
+	try:
+		yield profiler
+	finally:
+		if _profiler is profiler:
+			disableProfiling()
+
+
+@contextmanager
+def _measuredSpan(profiler: Profiler, name: str):
+	node = profiler.enter(name)
+	startTime = time.perf_counter()
+
+	try:
+		yield node
+	finally:
+		profiler.exit(node, time.perf_counter() - startTime)
+
+
+# shared by all spans while profiling is disabled
+_noSpan = nullcontext()
+
+
+def span(name: str):
+	"""
+		context manager that measures the block as span with the name (if profiling is enabled)
+
+		@param name: name of the span
+	"""
+	if _profiler is None:
+		return _noSpan
+
+	return _measuredSpan(_profiler, name)
+
+
+def profileSpan(name: str):
+	"""
+		decorator that measures the function as span with the name (if profiling is enabled)
+
+		@param name: name of the span like 'TacticalAI.doTurn'
+	"""
+	def _decorator(func):
+		@wraps(func)
+		def _profiled(*args, **kwargs):
+			profiler = _profiler
+
+			if profiler is None:
+				return func(*args, **kwargs)
+
+			node = profiler.enter(name)
+			startTime = time.perf_counter()
+
+			try:
+				return func(*args, **kwargs)
+			finally:
+				profiler.exit(node, time.perf_counter() - startTime)
+
+		return _profiled
+
+	return _decorator
+
+
+def countSpan(name: str, value: int = 1):
+	"""
+		adds the value to the counter with the name of the current span (if profiling is enabled)
+
+		@param name: name of the counter like 'nodesExpanded'
+		@param value: value to add
+	"""
+	profiler = _profiler
+
+	if profiler is not None:
+		profiler.count(name, value)
+
+
+def setProfilingTurn(turn: int):
+	"""
+		@param turn: turn the following spans belong to
+	"""
+	profiler = _profiler
+
+	if profiler is not None:
+		profiler.setTurn(turn)
@@ -1,15 +1,180 @@
+"""
+	translation of the text keys
+
+	gettext_lazy (usually imported as _) doesn't translate the key, it returns a LazyString that is translated when it
+	is rendered (str(), f-strings, comparisons, ...). the translation is looked up once per (key, language) and kept
+	in a cache, so the _data() tables only store the keys and building a unit or a city doesn't touch the catalog.
+
+	the catalog of the current language is loaded on the first translation, activateLanguage() switches the language
+	and invalidates the cache. translationStats() returns the number of catalog lookups and cache hits.
+"""
 import gettext
+import sys
 from pathlib import Path
 
-
 # set current language
 BASE_DIR = Path(__file__).resolve().parent.parent
-lang_translations = gettext.translation('base', localedir=BASE_DIR / 'locales', languages=['en'])
-lang_translations.install()
 
+_language = 'en'
+_translations = None
+
+# (language, key) -> interned translation
+_cache = {}
+
+# key -> LazyString
+_lazyStrings = {}
+
+_stats = {'lookups': 0, 'hits': 0}
+
+
+def activateLanguage(language: str):
+	"""
+		switches the language - the catalog is loaded on the next translation
+
+		@param language: language code like 'en'
+	"""
+	global _language, _translations
+
+	_language = language
+	_translations = None
+	_cache.clear()
+
+
+def currentLanguage() -> str:
+	return _language
+
+
+def translate(key: str) -> str:
+	"""
+		@param key: text key like 'TXT_KEY_UNIT_SETTLER_NAME'
+		@return: translation in the current language (the key, if there is none)
+	"""
+	global _translations
+
+	cacheKey = (_language, key)
+	value = _cache.get(cacheKey)
+
+	if value is not None:
+		_stats['hits'] += 1
+		return value
+
+	if _translations is None:
+		_translations = gettext.translation('base', localedir=BASE_DIR / 'locales', languages=[_language])
+
+	_stats['lookups'] += 1
+	value = sys.intern(_translations.gettext(key))
+	_cache[cacheKey] = value
+
+	return value
+
+
+def translationStats() -> dict:
+	"""@return: dict with the number of catalog 'lookups' and cache 'hits' since the last reset"""
+	return dict(_stats)
+
+
+def resetTranslationStats():
+	_stats['lookups'] = 0
+	_stats['hits'] = 0
+
+
+class LazyString:
+	"""
+		text key that is translated when it is rendered
+
+		behaves like the translated str for rendering and ordering, str methods return plain strs. equality and hash
+		depend on the key and the arguments only, so they don't change with the language - a LazyString is not equal to
+		its translation (compare str(text)). it is no str either: json writers need jsonDefault.
+	"""
+	__slots__ = ('key', 'args', 'kwargs')
+
+	def __init__(self, key: str, args: tuple = (), kwargs: dict = None):
+		self.key = key
+		self.args = args
+		self.kwargs = kwargs
 
-def gettext_lazy(key: str) -> str:
+	def __str__(self) -> str:
+		value = translate(self.key)
+
+		if self.args or self.kwargs:
+			return value.format(*self.args, **(self.kwargs or {}))
+
+		return value
+
+	def __repr__(self) -> str:
+		return f'LazyString({self.key})'
+
+	def __format__(self, formatSpec: str) -> str:
+		return format(str(self), formatSpec)
+
+	def format(self, *args, **kwargs) -> 'LazyString':
+		"""@return: LazyString that is formatted with the arguments when it is rendered"""
+		return LazyString(self.key, args, kwargs)
+
+	def _identity(self) -> tuple:
+		return self.key, self.args, tuple(sorted((self.kwargs or {}).items()))
+
+	def __eq__(self, other) -> bool:
+		if isinstance(other, LazyString):
+			return self._identity() == other._identity()
+
+		return NotImplemented
+
+	def __ne__(self, other) -> bool:
+		if isinstance(other, LazyString):
+			return self._identity() != other._identity()
+
+		return NotImplemented
+
+	def __lt__(self, other) -> bool:
+		return str(self) < str(other)
+
+	def __hash__(self) -> int:
+		return hash(self._identity())
+
+	def __len__(self) -> int:
+		return len(str(self))
+
+	def __add__(self, other) -> str:
+		return str(self) + str(other)
+
+	def __radd__(self, other) -> str:
+		return str(other) + str(self)
+
+	def __contains__(self, item) -> bool:
+		return item in str(self)
+
+	def __getattr__(self, name):
+		if name.startswith('__'):
+			raise AttributeError(name)
+
+		# str methods like upper() or startswith()
+		return getattr(str(self), name)
+
+	def __reduce__(self):
+		# stored as key, so a loaded game is shown in the current language
+		return LazyString, (self.key, self.args, self.kwargs)
+
+
+def jsonDefault(value):
+	"""
+		renders LazyStrings for the json writers: json.dumps(data, default=jsonDefault)
+
+		@param value: value that json can't encode
+		@return: the translation of a LazyString
+	"""
+	if isinstance(value, LazyString):
+		return str(value)
+
+	raise TypeError(f'Object of type {type(value).__name__} is not JSON serializable')
+
+
+def gettext_lazy(key: str) -> LazyString:
 	# from utils.translation import gettext_lazy as _
-	# print(f'gettext_lazy("{key}") has no translation')
-	return lang_translations.gettext(key)
+	lazyString = _lazyStrings.get(key)
+
+	if lazyString is None:
+		lazyString = LazyString(key)
+		_lazyStrings[key] = lazyString
 
+	return lazyString